@@ -4,6 +4,12 @@ import re
 
 from __pypy__.builders import StringBuilder, UnicodeBuilder
 
+try:
+    # PyPy speedup, the interface is different than CPython's _json
+    from _pypyjson import dumps as _pypyjson_dumps
+except ImportError:
+    _pypyjson_dumps = None
+
 class StringOrUnicodeBuilder(object):
     def __init__(self):
         self._builder = StringBuilder()
@@ -206,6 +212,14 @@ class JSONEncoder(object):
         '{"foo": ["bar", "baz"]}'
 
         """
+        if (_pypyjson_dumps is not None and self.encoding == 'utf-8' and
+                FLOAT_REPR is repr and
+                (self.indent is None or isinstance(self.indent, (int, long)))):
+            return _pypyjson_dumps(o, self.skipkeys, self.ensure_ascii,
+                                   self.check_circular, self.allow_nan,
+                                   self.sort_keys, self.indent,
+                                   (self.item_separator, self.key_separator),
+                                   self.default)
         if self.check_circular:
             markers = {}
         else:
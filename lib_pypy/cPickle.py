@@ -114,12 +114,22 @@ class Pickler(PythonPickler):
     def getvalue(self):
         return self.__f and self.__f.getvalue()
 
+try:
+    from _pypypickle import dumps as _fast_dumps, loads as _fast_loads
+except ImportError:
+    _fast_dumps = _fast_loads = None
+
 @builtinify
 def dump(obj, file, protocol=None):
-    Pickler(file, protocol).dump(obj)
+    if _fast_dumps is not None:
+        file.write(_fast_dumps(obj, protocol))
+    else:
+        Pickler(file, protocol).dump(obj)
 
 @builtinify
 def dumps(obj, protocol=None):
+    if _fast_dumps is not None:
+        return _fast_dumps(obj, protocol)
     file = StringIO()
     Pickler(file, protocol).dump(obj)
     return file.getvalue()
@@ -596,5 +606,7 @@ def load(f):
     return Unpickler(f).load()
 
 def loads(str):
+    if _fast_loads is not None and type(str) is type(''):
+        return _fast_loads(str)
     f = StringIO(str)
     return Unpickler(f).load()
@@ -35,7 +35,7 @@ working_modules.update([
     "cStringIO", "thread", "itertools", "pyexpat", "_ssl", "cpyext", "array",
     "binascii", "_multiprocessing", '_warnings', "_collections",
     "_multibytecodec", "micronumpy", "_continuation", "_cffi_backend",
-    "_csv", "cppyy", "_pypyjson"
+    "_csv", "cppyy", "_pypyjson", "_pypypickle", "_sampleprof"
 ])
 
 translation_modules = default_modules.copy()
@@ -57,6 +57,7 @@ if sys.platform == "win32":
     working_modules.remove("pwd")
     working_modules.remove("termios")
     working_modules.remove("_minimal_curses")
+    working_modules.remove("_sampleprof")   # needs setitimer()
 
     if "cppyy" in working_modules:
         working_modules.remove("cppyy")  # not tested on win32
@@ -65,6 +66,7 @@ if sys.platform == "win32":
     default_modules.add("_locale")
 
 if sys.platform == "sunos5":
+    working_modules.remove('_sampleprof')   # depends on signal
     working_modules.remove('mmap')   # depend on ctypes, can't get at c-level 'errono'
     working_modules.remove('rctime') # depend on ctypes, missing tm_zone/tm_gmtoff
     working_modules.remove('signal') # depend on ctypes, can't get at c-level 'errono'
@@ -81,6 +83,7 @@ module_dependencies = {
                          ('objspace.usemodules.thread', True)],
     'cpyext': [('objspace.usemodules.array', True)],
     'cppyy': [('objspace.usemodules.cpyext', True)],
+    '_sampleprof': [('objspace.usemodules.signal', True)],
     }
 module_suggests = {
     # the reason you want _rawffi is for ctypes, which
@@ -213,6 +216,16 @@ pypy_optiondescription = OptionDescription("objspace", "Object Space Options", [
                    default=False,
                    requires=[("objspace.honor__builtins__", False)]),
 
+        BoolOption("withcompactdicts",
+                   "use a compact, insertion-ordered representation "
+                   "for the storage of dictionaries",
+                   default=False),
+
+        BoolOption("withtupledicts",
+                   "use special dict strategies for dicts whose keys are "
+                   "all (int, int) or (str, int) tuples",
+                   default=False),
+
         BoolOption("withmapdict",
                    "make instances really small but slow without the JIT",
                    default=False,
@@ -318,6 +331,7 @@ def set_pypy_opt_level(config, level):
         config.objspace.std.suggest(withrangelist=True)
         config.objspace.std.suggest(withprebuiltchar=True)
         config.objspace.std.suggest(withmapdict=True)
+        config.objspace.std.suggest(withcompactdicts=True)
         if not IS_64_BITS:
             config.objspace.std.suggest(withsmalllong=True)
 
@@ -38,6 +38,9 @@ PYTHONIOENCODING: Encoding[:errors] used for stdin/stdout/stderr.
 PYPY_IRC_TOPIC: if set to a non-empty value, print a random #pypy IRC
                topic at startup of interactive mode.
 PYPYLOG: If set to a non-empty value, enable logging.
+PYPYJITLOG: file where the JIT writes its traces in a binary format.
+PYPY_JIT_PROFILE: file used to save the JIT warm-start profile at exit
+               and to load it at startup (see pypyjit.warm_start()).
 """
 
 import sys
@@ -517,6 +520,11 @@ def run_command_line(interactive,
     mainmodule = type(sys)('__main__')
     sys.modules['__main__'] = mainmodule
 
+    jit_profile = not ignore_environment and os.getenv('PYPY_JIT_PROFILE')
+    if jit_profile and 'pypyjit' in sys.builtin_module_names:
+        import pypyjit
+        pypyjit.warm_start(jit_profile)
+
     if not no_site:
         try:
             import site
@@ -32,6 +32,11 @@ class ExecutionContext(object):
         self.compiler = space.createcompiler()
         self.profilefunc = None
         self.w_profilefuncarg = None
+        # while the actions run from JIT-compiled code (see jump_absolute()
+        # in pypy/module/pypyjit/interp_jit.py), the code object and the
+        # position of the loop that is running; otherwise None and -1
+        self.jit_code = None
+        self.jit_next_instr = -1
 
     def gettopframe(self):
         return self.topframeref()
@@ -119,14 +124,17 @@ class ExecutionContext(object):
         if self.gettrace() is not None:
             self._trace(frame, 'return', w_retval)
 
-    def bytecode_trace(self, frame, decr_by=TICK_COUNTER_STEP):
+    def bytecode_trace(self, frame, decr_by=TICK_COUNTER_STEP,
+                       jit_code=None, jit_next_instr=-1):
         "Trace function called before each bytecode."
         # this is split into a fast path and a slower path that is
         # not invoked every time bytecode_trace() is.
         self.bytecode_only_trace(frame)
         actionflag = self.space.actionflag
         if actionflag.decrement_ticker(decr_by) < 0:
-            actionflag.action_dispatcher(self, frame)     # slow path
+            self.jit_code = jit_code                      # slow path
+            self.jit_next_instr = jit_next_instr
+            actionflag.action_dispatcher(self, frame)
     bytecode_trace._always_inline_ = True
 
     def bytecode_only_trace(self, frame):
@@ -189,7 +197,9 @@ class ExecutionContext(object):
         actionflag = self.space.actionflag
         self.bytecode_only_trace(frame)
         if actionflag.get_ticker() < 0:
-            actionflag.action_dispatcher(self, frame)     # slow path
+            self.jit_code = None                          # slow path
+            self.jit_next_instr = -1
+            actionflag.action_dispatcher(self, frame)
     bytecode_trace_after_exception._always_inline_ = 'try'
     # NB. this function is not inlined right now.  backendopt.inline would
     # need some improvements to handle this case, but it's not really an
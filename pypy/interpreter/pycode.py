@@ -127,6 +127,10 @@ class PyCode(eval.Code):
             from pypy.objspace.std.mapdict import init_mapdict_cache
             init_mapdict_cache(self)
 
+        if self.space.config.objspace.usemodules.pypyjit:
+            from pypy.module.pypyjit.interp_warmstart import prime_new_code
+            prime_new_code(self)
+
     def _cleanup_(self):
         if (self.magic == cpython_magic and
             '__pypy__' not in sys.builtin_module_names):
@@ -3,8 +3,12 @@ from pypy.interpreter.mixedmodule import MixedModule
 class Module(MixedModule):
     """fast json implementation"""
 
-    appleveldefs = {}
+    appleveldefs = {
+        'iterload' : 'app_stream.iterload',
+        }
 
     interpleveldefs = {
         'loads' : 'interp_decoder.loads',
+        'dumps' : 'interp_encoder.dumps',
+        'StreamDecoder' : 'interp_stream.W_StreamDecoder',
         }
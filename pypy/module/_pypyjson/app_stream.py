@@ -0,0 +1,18 @@
+import _pypyjson
+
+def iterload(fp, array=False, bufsize=65536):
+    """Decode the JSON text read from the file fp, and yield the values one
+    at a time as soon as they are complete.  By default the text is a
+    sequence of values separated by whitespace, like newline-delimited JSON;
+    with array=True it must be a single array, whose elements are yielded.
+    The file is read in blocks of bufsize bytes, so that the memory used
+    does not depend on the total size of the text."""
+    decoder = _pypyjson.StreamDecoder(array)
+    while True:
+        data = fp.read(bufsize)
+        if not data:
+            break
+        for value in decoder.feed(data):
+            yield value
+    for value in decoder.close():
+        yield value
@@ -0,0 +1,61 @@
+""" decoding speed and memory benchmark for JSON documents made of many
+records with the same keys, like the ones returned by web APIs.  Run it
+with a translated pypy: it reports the time taken by json.loads() and the
+growth of the resident set size caused by keeping the result alive.
+"""
+
+import gc, sys, time, json
+
+KEYS = ["id", "name", "email", "created_at", "updated_at", "active",
+        "score", "tags", "country", "city", "zip", "phone", "company",
+        "title", "department", "manager_id", "salary", "currency",
+        "last_login", "notes"]
+
+def get_rss_kb():
+    # current resident set size, in kilobytes (Linux only)
+    for line in open('/proc/self/status'):
+        if line.startswith('VmRSS:'):
+            return int(line.split()[1])
+    return 0
+
+def count_operation(name, function):
+    print name
+    t0 = time.time()
+    retval = function()
+    tk = time.time()
+    print name, " takes: %f" % (tk - t0)
+    return retval
+
+def make_record(i):
+    record = {}
+    for j, key in enumerate(KEYS):
+        if j % 3 == 0:
+            record[key] = i * j
+        elif j % 3 == 1:
+            record[key] = "value %d" % (i,)
+        else:
+            record[key] = [i, j]
+    return record
+
+def make_document(num):
+    return json.dumps([make_record(i) for i in xrange(num)])
+
+def bench_records(NUM=200000, REPEAT=5):
+    doc = count_operation("Creating a document with %d records" % (NUM,),
+                          lambda: make_document(NUM))
+    print "Document size: %d bytes" % (len(doc),)
+    for i in range(REPEAT):
+        count_operation("Decoding", lambda: json.loads(doc))
+    gc.collect()
+    rss0 = get_rss_kb()
+    result = json.loads(doc)
+    gc.collect()
+    rss1 = get_rss_kb()
+    print "Heap growth per record: %.1f bytes" % (
+        (rss1 - rss0) * 1024.0 / len(result))
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        bench_records(int(sys.argv[1]))
+    else:
+        bench_records()
@@ -5,6 +5,7 @@ from rpython.rlib import rfloat, runicode
 from rpython.rtyper.lltypesystem import lltype, rffi
 from pypy.interpreter.error import OperationError, oefmt
 from pypy.interpreter import unicodehelper
+from pypy.objspace.std.dictmultiobject import W_DictMultiObject
 
 OVF_DIGITS = len(str(sys.maxint))
 
@@ -42,12 +43,64 @@ def strslice2unicode_latin1(s, start, end):
         ll_res.chars[i] = cast_primitive(UniChar, ch)
     return hlunicode(ll_res)
 
+# the maximum number of ObjectMaps in a DecoderCache: objects whose keys
+# are data rather than names, like {"id1": ..., "id2": ...}, would
+# otherwise create a new map for every key
+MAX_MAPS = 10000
+# the maximum number of interned keys in a DecoderCache, for the same
+# reason: the keys of a stream of records can be data too
+MAX_KEYS = 10000
+
+class JSONKey(object):
+    """An interned object key: its raw text, without escapes, and the
+    unicode object used for all the keys with this text."""
+    def __init__(self, s, w_key):
+        self.s = s
+        self.w_key = w_key
+
+class ObjectMap(object):
+    """A node in the tree of object layouts: the path from the root to it
+    is the sequence of keys at the start of an object."""
+    def __init__(self):
+        self.transitions = {}    # JSONKey -> ObjectMap
+        # the transition followed most recently.  Objects decoded in a row
+        # often have the same keys in the same order, so this is tried
+        # first, by comparing the text directly.
+        self.last_key = None
+        self.last_map = None
+        # on the maps of the first key: the number of keys of the last
+        # object which started with it, used to presize the next one
+        self.size_hint = 0
+
+    def get_next(self, cache, key):
+        objmap = self.transitions.get(key, None)
+        if objmap is None:
+            if cache.num_maps >= MAX_MAPS:
+                return None
+            objmap = ObjectMap()
+            cache.num_maps += 1
+            self.transitions[key] = objmap
+        self.last_key = key
+        self.last_map = objmap
+        return objmap
+
+class DecoderCache(object):
+    """The interned keys and the object layouts seen by a JSONDecoder.  It
+    can be shared by several decoders, e.g. to decode a stream of records."""
+    def __init__(self):
+        self.keys = {}           # raw text -> JSONKey
+        self.root = ObjectMap()
+        self.num_maps = 0
+
 TYPE_UNKNOWN = 0
 TYPE_STRING = 1
 class JSONDecoder(object):
-    def __init__(self, space, s):
+    def __init__(self, space, s, cache=None):
         self.space = space
         self.s = s
+        if cache is None:
+            cache = DecoderCache()
+        self.cache = cache
         # we put our string in a raw buffer so:
         # 1) we automatically get the '\0' sentinel at the end of the string,
         #    which means that we never have to check for the "end of string"
@@ -255,12 +308,15 @@ class JSONDecoder(object):
             self.pos = i+1
             return w_dict
         #
+        objmap = self.cache.root
+        first_map = None
+        count = 0
         while True:
             # parse a key: value
-            self.last_type = TYPE_UNKNOWN
-            w_name = self.decode_any(i)
-            if self.last_type != TYPE_STRING:
+            i = self.skip_whitespace(i)
+            if self.ll_chars[i] != '"':
                 self._raise("Key name must be string for object starting at char %d", start)
+            w_name, objmap = self.decode_key(i+1, objmap)
             i = self.skip_whitespace(self.pos)
             ch = self.ll_chars[i]
             if ch != ':':
@@ -270,11 +326,22 @@ class JSONDecoder(object):
             #
             w_value = self.decode_any(i)
             self.space.setitem(w_dict, w_name, w_value)
+            count += 1
+            if count == 1 and objmap is not None:
+                # called after the first setitem(), which selects the
+                # strategy of the dict
+                first_map = objmap
+                if (objmap.size_hint > 1 and
+                        isinstance(w_dict, W_DictMultiObject)):
+                    w_dict.strategy.prepare_update(w_dict,
+                                                   objmap.size_hint - 1)
             i = self.skip_whitespace(self.pos)
             ch = self.ll_chars[i]
             i += 1
             if ch == '}':
                 self.pos = i
+                if first_map is not None:
+                    first_map.size_hint = count
                 return w_dict
             elif ch == ',':
                 pass
@@ -284,6 +351,45 @@ class JSONDecoder(object):
                 self._raise("Unexpected '%s' when decoding object (char %d)",
                             ch, self.pos)
 
+    def decode_key(self, i, objmap):
+        """Decode an object key, starting just after its opening quote.
+        Return the key, and the map reached by following it from objmap, or
+        None if the layout of the object is not tracked.  Keys without
+        escapes are interned in the cache."""
+        if objmap is not None:
+            key = objmap.last_key
+            if key is not None and self.match_key(i, key.s):
+                self.pos = i + len(key.s) + 1
+                return key.w_key, objmap.last_map
+        start = i
+        while True:
+            ch = self.ll_chars[i]
+            i += 1
+            if ch == '"':
+                break
+            elif ch == '\\' or ch < '\x20':
+                # not interned; decode_string() also reports the errors
+                return self.decode_string(start), None
+        content = self.getslice(start, i-1)
+        cache = self.cache
+        key = cache.keys.get(content, None)
+        if key is None:
+            if len(cache.keys) >= MAX_KEYS:
+                # not interned, and the layout is not tracked either
+                return self.decode_string(start), None
+            key = JSONKey(content, self.decode_string(start))
+            cache.keys[content] = key
+        self.pos = i
+        if objmap is not None:
+            objmap = objmap.get_next(cache, key)
+        return key.w_key, objmap
+
+    def match_key(self, i, s):
+        """Check if the text at position i is s followed by a quote."""
+        for j in range(len(s)):
+            if self.ll_chars[i+j] != s[j]:
+                return False
+        return self.ll_chars[i+len(s)] == '"'
 
     def decode_string(self, i):
         start = i
@@ -387,7 +493,11 @@ def loads(space, w_s):
         raise OperationError(space.w_TypeError,
                              space.wrap("Expected utf8-encoded str, got unicode"))
     s = space.str_w(w_s)
-    decoder = JSONDecoder(space, s)
+    return decode_str(space, s)
+
+def decode_str(space, s, cache=None):
+    """Decode the JSON document s, which must contain exactly one value."""
+    decoder = JSONDecoder(space, s, cache)
     try:
         w_res = decoder.decode_any(0)
         i = decoder.skip_whitespace(decoder.pos)
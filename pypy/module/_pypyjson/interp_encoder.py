@@ -0,0 +1,432 @@
+from rpython.rlib.rstring import StringBuilder
+from rpython.rlib import rstackovf
+from rpython.rlib.rfloat import isfinite, isinf
+from pypy.interpreter.error import OperationError, oefmt
+from pypy.interpreter.gateway import unwrap_spec
+from pypy.interpreter import unicodehelper
+from pypy.objspace.std.dictmultiobject import W_DictMultiObject
+from pypy.objspace.std.floatobject import float2string
+from pypy.objspace.std.intobject import W_IntObject
+
+HEX_DIGITS = '0123456789abcdef'
+
+def _make_escape_table():
+    table = [None] * 128
+    for i in range(0x20):
+        table[i] = '\\u%04x' % (i,)
+    table[ord('\\')] = '\\\\'
+    table[ord('"')] = '\\"'
+    table[ord('\b')] = '\\b'
+    table[ord('\f')] = '\\f'
+    table[ord('\n')] = '\\n'
+    table[ord('\r')] = '\\r'
+    table[ord('\t')] = '\\t'
+    # only escaped when ensure_ascii is true
+    table[0x7f] = '\\u007f'
+    return table
+ESCAPE_TABLE = _make_escape_table()
+
+def needs_escape(ch, ensure_ascii):
+    return (ch < ' ' or ch == '"' or ch == '\\' or
+            (ensure_ascii and ch == '\x7f'))
+
+def append_u_escape(builder, c):
+    builder.append('\\u')
+    builder.append(HEX_DIGITS[(c >> 12) & 0xf])
+    builder.append(HEX_DIGITS[(c >> 8) & 0xf])
+    builder.append(HEX_DIGITS[(c >> 4) & 0xf])
+    builder.append(HEX_DIGITS[c & 0xf])
+
+
+class JSONEncoder(object):
+    def __init__(self, space, skipkeys, ensure_ascii, check_circular,
+                 allow_nan, sort_keys, indent, item_separator,
+                 key_separator, w_default, unicode_item_separator=False,
+                 unicode_key_separator=False):
+        self.space = space
+        self.skipkeys = skipkeys
+        self.ensure_ascii = ensure_ascii
+        self.check_circular = check_circular
+        self.allow_nan = allow_nan
+        self.sort_keys = sort_keys
+        self.indent = indent     # -1 means no indentation
+        # the separators are utf-8 encoded if they were given as unicodes,
+        # in which case writing them makes the result a unicode
+        self.item_separator = item_separator
+        self.key_separator = key_separator
+        self.unicode_item_separator = unicode_item_separator
+        self.unicode_key_separator = unicode_key_separator
+        self.w_default = w_default
+        self.builder = StringBuilder()
+        # the containers currently being encoded, for check_circular
+        self.markers = {}
+        # set when a unicode is written with ensure_ascii == False: in this
+        # case the builder contains utf-8 and the result must be a unicode
+        self.has_unicode = False
+
+    def build(self):
+        space = self.space
+        s = self.builder.build()
+        if self.has_unicode:
+            return space.wrap(unicodehelper.decode_utf8(space, s))
+        return space.wrap(s)
+
+    # ____________________________________________________________
+    # markers and indentation
+
+    def mark(self, w_obj):
+        if self.check_circular:
+            if w_obj in self.markers:
+                raise oefmt(self.space.w_ValueError,
+                            "Circular reference detected")
+            self.markers[w_obj] = None
+
+    def unmark(self, w_obj):
+        if self.check_circular:
+            del self.markers[w_obj]
+
+    def emit_indent(self, level):
+        """Write the newline and indentation after an opening bracket, and
+        return the item separator and the indentation level to use."""
+        if self.indent < 0:
+            return self.item_separator, level
+        level += 1
+        newline_indent = '\n' + ' ' * (self.indent * level)
+        self.builder.append(newline_indent)
+        return self.item_separator + newline_indent, level
+
+    def write_separator(self, separator):
+        self.builder.append(separator)
+        if self.unicode_item_separator:
+            self.has_unicode = True
+
+    def emit_unindent(self, level):
+        if self.indent >= 0:
+            self.builder.append('\n')
+            self.builder.append_multiple_char(' ', self.indent * (level - 1))
+
+    # ____________________________________________________________
+    # atoms
+
+    def floatstr(self, x):
+        if isfinite(x):
+            return float2string(x, 'r', 0)
+        if not self.allow_nan:
+            raise oefmt(self.space.w_ValueError,
+                        "Out of range float values are not JSON compliant: "
+                        "%s", float2string(x, 'r', 0))
+        if isinf(x):
+            if x > 0.0:
+                return 'Infinity'
+            return '-Infinity'
+        return 'NaN'
+
+    def write_bytes(self, s):
+        """Write a quoted str, assumed to be utf-8 encoded."""
+        if self.ensure_ascii:
+            for i in range(len(s)):
+                if ord(s[i]) >= 0x80:
+                    u = unicodehelper.decode_utf8(self.space, s)
+                    self.write_unicode_ascii(u)
+                    return
+        builder = self.builder
+        builder.append('"')
+        start = 0
+        for i in range(len(s)):
+            ch = s[i]
+            if needs_escape(ch, self.ensure_ascii):
+                builder.append_slice(s, start, i)
+                builder.append(ESCAPE_TABLE[ord(ch)])
+                start = i + 1
+        builder.append_slice(s, start, len(s))
+        builder.append('"')
+
+    def write_unicode(self, u):
+        if self.ensure_ascii:
+            self.write_unicode_ascii(u)
+        else:
+            # in utf-8 all the bytes of non-ascii characters are >= 0x80,
+            # so there is no need to escape them separately
+            self.has_unicode = True
+            self.write_bytes(unicodehelper.encode_utf8(self.space, u))
+
+    def write_unicode_ascii(self, u):
+        builder = self.builder
+        builder.append('"')
+        for i in range(len(u)):
+            c = ord(u[i])
+            if c < 0x80:
+                ch = chr(c)
+                if needs_escape(ch, True):
+                    builder.append(ESCAPE_TABLE[c])
+                else:
+                    builder.append(ch)
+            elif c < 0x10000:
+                append_u_escape(builder, c)
+            else:
+                # surrogate pair
+                c -= 0x10000
+                append_u_escape(builder, 0xd800 | ((c >> 10) & 0x3ff))
+                append_u_escape(builder, 0xdc00 | (c & 0x3ff))
+        builder.append('"')
+
+    # ____________________________________________________________
+    # generic encoding
+
+    def encode(self, w_obj, level):
+        space = self.space
+        if space.is_w(w_obj, space.w_None):
+            self.builder.append('null')
+        elif space.is_w(w_obj, space.w_True):
+            self.builder.append('true')
+        elif space.is_w(w_obj, space.w_False):
+            self.builder.append('false')
+        elif type(w_obj) is W_IntObject:
+            self.builder.append(str(w_obj.intval))
+        elif space.isinstance_w(w_obj, space.w_str):
+            self.write_bytes(space.str_w(w_obj))
+        elif space.isinstance_w(w_obj, space.w_unicode):
+            self.write_unicode(space.unicode_w(w_obj))
+        elif (space.isinstance_w(w_obj, space.w_int) or
+              space.isinstance_w(w_obj, space.w_long)):
+            self.builder.append(space.str_w(space.str(w_obj)))
+        elif space.isinstance_w(w_obj, space.w_float):
+            self.builder.append(self.floatstr(space.float_w(w_obj)))
+        elif (space.isinstance_w(w_obj, space.w_list) or
+              space.isinstance_w(w_obj, space.w_tuple)):
+            self.encode_list(w_obj, level)
+        elif space.isinstance_w(w_obj, space.w_dict):
+            self.encode_dict(w_obj, level)
+        else:
+            self.encode_default(w_obj, level)
+
+    def encode_default(self, w_obj, level):
+        space = self.space
+        if self.w_default is None:
+            raise oefmt(space.w_TypeError, "%R is not JSON serializable",
+                        w_obj)
+        self.mark(w_obj)
+        w_res = space.call_function(self.w_default, w_obj)
+        self.encode(w_res, level)
+        self.unmark(w_obj)
+
+    # ____________________________________________________________
+    # lists
+
+    def encode_list(self, w_lst, level):
+        space = self.space
+        # fast paths for the list strategies that store unboxed items
+        intlist = space.listview_int(w_lst)
+        if intlist is not None:
+            self.write_int_list(intlist, level)
+            return
+        floatlist = space.listview_float(w_lst)
+        if floatlist is not None:
+            self.write_float_list(floatlist, level)
+            return
+        byteslist = space.listview_bytes(w_lst)
+        if byteslist is not None:
+            self.write_bytes_list(byteslist, level)
+            return
+        unicodelist = space.listview_unicode(w_lst)
+        if unicodelist is not None:
+            self.write_unicode_list(unicodelist, level)
+            return
+        #
+        lst_w = space.fixedview(w_lst)
+        if not lst_w:
+            self.builder.append('[]')
+            return
+        self.mark(w_lst)
+        self.builder.append('[')
+        separator, level = self.emit_indent(level)
+        for i in range(len(lst_w)):
+            if i > 0:
+                self.write_separator(separator)
+            self.encode(lst_w[i], level)
+        self.emit_unindent(level)
+        self.builder.append(']')
+        self.unmark(w_lst)
+
+    def write_int_list(self, intlist, level):
+        if not intlist:
+            self.builder.append('[]')
+            return
+        self.builder.append('[')
+        separator, level = self.emit_indent(level)
+        for i in range(len(intlist)):
+            if i > 0:
+                self.write_separator(separator)
+            self.builder.append(str(intlist[i]))
+        self.emit_unindent(level)
+        self.builder.append(']')
+
+    def write_float_list(self, floatlist, level):
+        if not floatlist:
+            self.builder.append('[]')
+            return
+        self.builder.append('[')
+        separator, level = self.emit_indent(level)
+        for i in range(len(floatlist)):
+            if i > 0:
+                self.write_separator(separator)
+            self.builder.append(self.floatstr(floatlist[i]))
+        self.emit_unindent(level)
+        self.builder.append(']')
+
+    def write_bytes_list(self, byteslist, level):
+        if not byteslist:
+            self.builder.append('[]')
+            return
+        self.builder.append('[')
+        separator, level = self.emit_indent(level)
+        for i in range(len(byteslist)):
+            if i > 0:
+                self.write_separator(separator)
+            self.write_bytes(byteslist[i])
+        self.emit_unindent(level)
+        self.builder.append(']')
+
+    def write_unicode_list(self, unicodelist, level):
+        if not unicodelist:
+            self.builder.append('[]')
+            return
+        self.builder.append('[')
+        separator, level = self.emit_indent(level)
+        for i in range(len(unicodelist)):
+            if i > 0:
+                self.write_separator(separator)
+            self.write_unicode(unicodelist[i])
+        self.emit_unindent(level)
+        self.builder.append(']')
+
+    # ____________________________________________________________
+    # dicts
+
+    def encode_dict(self, w_dict, level):
+        space = self.space
+        if space.len_w(w_dict) == 0:
+            self.builder.append('{}')
+            return
+        self.mark(w_dict)
+        self.builder.append('{')
+        separator, level = self.emit_indent(level)
+        first = True
+        if self.sort_keys:
+            w_keys = space.call_method(w_dict, 'keys')
+            space.call_method(w_keys, 'sort')
+            for w_key in space.listview(w_keys):
+                w_value = space.getitem(w_dict, w_key)
+                first = self.write_item(w_key, w_value, separator, first,
+                                        level)
+        elif type(w_dict) is W_DictMultiObject:
+            iteritems = w_dict.iteritems()
+            while True:
+                w_key, w_value = iteritems.next_item()
+                if w_key is None:
+                    break
+                first = self.write_item(w_key, w_value, separator, first,
+                                        level)
+        else:
+            # dict subclass, may override iteritems()
+            w_iter = space.iter(space.call_method(w_dict, 'iteritems'))
+            while True:
+                try:
+                    w_item = space.next(w_iter)
+                except OperationError, e:
+                    if not e.match(space, space.w_StopIteration):
+                        raise
+                    break
+                w_key, w_value = space.fixedview(w_item, 2)
+                first = self.write_item(w_key, w_value, separator, first,
+                                        level)
+        self.emit_unindent(level)
+        self.builder.append('}')
+        self.unmark(w_dict)
+
+    def write_item(self, w_key, w_value, separator, first, level):
+        """Write one 'key: value' pair of a dict, preceded by the separator
+        unless it is the first one.  Return the new value of 'first'."""
+        space = self.space
+        if space.isinstance_w(w_key, space.w_str):
+            key = space.str_w(w_key)
+        elif space.isinstance_w(w_key, space.w_unicode):
+            key = None
+        # JavaScript is weakly typed for these, so it makes sense to
+        # also allow them.
+        elif space.isinstance_w(w_key, space.w_float):
+            key = self.floatstr(space.float_w(w_key))
+        elif space.is_w(w_key, space.w_True):
+            key = 'true'
+        elif space.is_w(w_key, space.w_False):
+            key = 'false'
+        elif space.is_w(w_key, space.w_None):
+            key = 'null'
+        elif type(w_key) is W_IntObject:
+            key = str(w_key.intval)
+        elif (space.isinstance_w(w_key, space.w_int) or
+              space.isinstance_w(w_key, space.w_long)):
+            key = space.str_w(space.str(w_key))
+        elif self.skipkeys:
+            return first
+        else:
+            raise oefmt(space.w_TypeError, "key %R is not a string", w_key)
+        if not first:
+            self.write_separator(separator)
+        if key is None:
+            self.write_unicode(space.unicode_w(w_key))
+        else:
+            self.write_bytes(key)
+        self.builder.append(self.key_separator)
+        if self.unicode_key_separator:
+            self.has_unicode = True
+        self.encode(w_value, level)
+        return False
+
+
+def _separator_w(space, w_separator):
+    """Return the separator as a str, utf-8 encoded if it is a unicode,
+    and whether it is a unicode."""
+    if space.isinstance_w(w_separator, space.w_unicode):
+        u = space.unicode_w(w_separator)
+        return unicodehelper.encode_utf8(space, u), True
+    return space.str_w(w_separator), False
+
+
+@unwrap_spec(skipkeys=bool, ensure_ascii=bool, check_circular=bool,
+             allow_nan=bool, sort_keys=bool)
+def dumps(space, w_obj, skipkeys=False, ensure_ascii=True,
+          check_circular=True, allow_nan=True, sort_keys=False,
+          w_indent=None, w_separators=None, w_default=None):
+    """Serialize an object to a JSON formatted str, like json.dumps() with
+    the default utf-8 encoding."""
+    if w_indent is None or space.is_w(w_indent, space.w_None):
+        indent = -1
+    else:
+        indent = space.int_w(w_indent)
+        if indent < 0:
+            indent = 0
+    if w_separators is None or space.is_w(w_separators, space.w_None):
+        item_separator = ', '
+        key_separator = ': '
+        unicode_item_separator = unicode_key_separator = False
+    else:
+        w_item_sep, w_key_sep = space.fixedview(w_separators, 2)
+        item_separator, unicode_item_separator = _separator_w(space,
+                                                              w_item_sep)
+        key_separator, unicode_key_separator = _separator_w(space,
+                                                            w_key_sep)
+    if w_default is not None and space.is_w(w_default, space.w_None):
+        w_default = None
+    encoder = JSONEncoder(space, skipkeys, ensure_ascii, check_circular,
+                          allow_nan, sort_keys, indent, item_separator,
+                          key_separator, w_default, unicode_item_separator,
+                          unicode_key_separator)
+    try:
+        encoder.encode(w_obj, 0)
+    except rstackovf.StackOverflow:
+        rstackovf.check_stack_overflow()
+        raise oefmt(space.w_RuntimeError,
+                    "maximum recursion depth exceeded while encoding a "
+                    "JSON object")
+    return encoder.build()
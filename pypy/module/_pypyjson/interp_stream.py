@@ -0,0 +1,202 @@
+from pypy.interpreter.baseobjspace import W_Root
+from pypy.interpreter.error import OperationError, oefmt
+from pypy.interpreter.gateway import unwrap_spec
+from pypy.interpreter.typedef import TypeDef, interp2app
+from pypy.module._pypyjson.interp_decoder import (DecoderCache, decode_str,
+                                                  is_whitespace)
+
+# states of the top-level array, when decoding its elements one by one
+(ARRAY_START, ARRAY_FIRST, ARRAY_NEXT, ARRAY_SEP, ARRAY_DONE) = range(5)
+
+
+class W_StreamDecoder(W_Root):
+    """Incremental decoder.  The JSON text is passed in arbitrary chunks to
+    feed(), which only scans them to find where each value ends; a value is
+    decoded by the regular JSONDecoder as soon as it is complete, and only
+    the text of the value currently being read is kept.
+
+    In the default mode the text is a sequence of JSON values separated by
+    whitespace, like newline-delimited JSON.  With array=True the text must
+    be a single array, and its elements are returned one by one."""
+
+    def __init__(self, space, array):
+        self.space = space
+        self.array = array
+        self.array_state = ARRAY_START
+        self.closed = False
+        # the records of a stream usually have the same keys
+        self.cache = DecoderCache()
+        # absolute offset in the stream of the chunk being scanned
+        self.offset = 0
+        # the value being read: pieces from the previous chunks, and its
+        # start in the current chunk (or 0 if it started earlier)
+        self.in_value = False
+        self.pending = []
+        self.start = 0
+        self.value_start = 0    # absolute offset, for error messages
+        self.depth = 0
+        self.scalar = False
+        self.in_string = False
+        self.escape = False
+
+    def _check_open(self):
+        if self.closed:
+            raise oefmt(self.space.w_ValueError,
+                        "feed() or close() called on a closed StreamDecoder")
+
+    def feed_w(self, w_data):
+        """Scan the next chunk of JSON text, and return the list of values
+        which were completed by it."""
+        space = self.space
+        self._check_open()
+        if space.isinstance_w(w_data, space.w_unicode):
+            raise OperationError(space.w_TypeError,
+                                 space.wrap("Expected utf8-encoded str, got unicode"))
+        chunk = space.str_w(w_data)
+        result_w = []
+        self.scan(chunk, result_w)
+        if self.in_value:
+            start = self.start
+            assert start >= 0
+            self.pending.append(chunk[start:])
+            self.start = 0
+        self.offset += len(chunk)
+        return space.newlist(result_w)
+
+    def close_w(self):
+        """Signal the end of the text, and return the list of values which
+        were completed by it (a number at the very end of the text).  Raise
+        ValueError if the text is incomplete."""
+        space = self.space
+        self._check_open()
+        self.closed = True
+        result_w = []
+        if self.in_value and self.scalar:
+            self.end_value('', 0, result_w)
+        if self.in_value:
+            raise oefmt(space.w_ValueError,
+                        "Unterminated value starting at char %d",
+                        self.value_start)
+        if self.array and self.array_state != ARRAY_DONE:
+            if self.array_state == ARRAY_START:
+                raise oefmt(space.w_ValueError,
+                            "No JSON object could be decoded")
+            raise oefmt(space.w_ValueError, "Unterminated array")
+        return space.newlist(result_w)
+
+    def scan(self, chunk, result_w):
+        i = 0
+        n = len(chunk)
+        while i < n:
+            ch = chunk[i]
+            if not self.in_value:
+                if not is_whitespace(ch):
+                    if self.array and self.scan_array_punctuation(ch, i):
+                        pass
+                    else:
+                        self.start_value(ch, i)
+                i += 1
+            elif self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == '\\':
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+                    if self.depth == 0:
+                        self.end_value(chunk, i + 1, result_w)
+                i += 1
+            elif self.scalar:
+                if (is_whitespace(ch) or ch == ',' or ch == ']' or
+                        ch == '}' or ch == '[' or ch == '{' or ch == '"'):
+                    # the character after the end of a number or constant:
+                    # it is scanned again
+                    self.end_value(chunk, i, result_w)
+                else:
+                    i += 1
+            else:
+                if ch == '"':
+                    self.in_string = True
+                elif ch == '[' or ch == '{':
+                    self.depth += 1
+                elif ch == ']' or ch == '}':
+                    self.depth -= 1
+                    if self.depth == 0:
+                        self.end_value(chunk, i + 1, result_w)
+                i += 1
+
+    def scan_array_punctuation(self, ch, i):
+        """Handle the brackets and commas of the top-level array.  Return
+        False if 'ch' starts an element instead."""
+        state = self.array_state
+        if state == ARRAY_START:
+            if ch != '[':
+                raise oefmt(self.space.w_ValueError,
+                            "Expected '[' at char %d", self.offset + i)
+            self.array_state = ARRAY_FIRST
+        elif state == ARRAY_FIRST:
+            if ch != ']':
+                return False
+            self.array_state = ARRAY_DONE
+        elif state == ARRAY_NEXT:
+            return False
+        elif state == ARRAY_SEP:
+            if ch == ',':
+                self.array_state = ARRAY_NEXT
+            elif ch == ']':
+                self.array_state = ARRAY_DONE
+            else:
+                raise oefmt(self.space.w_ValueError,
+                            "Unexpected '%s' when decoding array (char %d)",
+                            ch, self.offset + i)
+        else:
+            raise oefmt(self.space.w_ValueError, "Extra data at char %d",
+                        self.offset + i)
+        return True
+
+    def start_value(self, ch, i):
+        if ch == ',' or ch == ':' or ch == ']' or ch == '}':
+            raise oefmt(self.space.w_ValueError,
+                        "No JSON object could be decoded: unexpected '%s' at "
+                        "char %d", ch, self.offset + i)
+        self.in_value = True
+        self.start = i
+        self.value_start = self.offset + i
+        if ch == '"':
+            self.in_string = True
+        elif ch == '[' or ch == '{':
+            self.depth = 1
+        else:
+            self.scalar = True
+
+    def end_value(self, chunk, end, result_w):
+        start = self.start
+        assert start >= 0
+        assert end >= start
+        if self.pending:
+            self.pending.append(chunk[start:end])
+            s = ''.join(self.pending)
+            self.pending = []
+        else:
+            s = chunk[start:end]
+        self.in_value = False
+        self.scalar = False
+        self.depth = 0
+        if self.array:
+            self.array_state = ARRAY_SEP
+        result_w.append(decode_str(self.space, s, self.cache))
+
+
+@unwrap_spec(array=bool)
+def descr_new_streamdecoder(space, w_subtype, array=False):
+    w_decoder = space.allocate_instance(W_StreamDecoder, w_subtype)
+    W_StreamDecoder.__init__(w_decoder, space, array)
+    return w_decoder
+
+W_StreamDecoder.typedef = TypeDef(
+    '_pypyjson.StreamDecoder',
+    __new__ = interp2app(descr_new_streamdecoder),
+    feed = interp2app(W_StreamDecoder.feed_w),
+    close = interp2app(W_StreamDecoder.close_w),
+    __doc__ = W_StreamDecoder.__doc__,
+)
@@ -10,10 +10,21 @@ def test_skip_whitespace():
     assert dec.skip_whitespace(8) == len(s)
     dec.close()
 
+def test_keys_bounded(space, monkeypatch):
+    from pypy.module._pypyjson import interp_decoder
+    monkeypatch.setattr(interp_decoder, 'MAX_KEYS', 3)
+    cache = interp_decoder.DecoderCache()
+    for s in ['{"a": 1, "b": 2}', '{"c": 3, "d": 4}', '{"a": 5, "e": 6}']:
+        w_res = interp_decoder.decode_str(space, s, cache)
+        assert space.len_w(w_res) == 2
+    assert sorted(cache.keys) == ['a', 'b', 'c']
+    w_res = interp_decoder.decode_str(space, '{"d": 7}', cache)
+    assert space.int_w(space.getitem(w_res, space.wrap(u'd'))) == 7
+
     
 
 class AppTest(object):
-    spaceconfig = {"objspace.usemodules._pypyjson": True}
+    spaceconfig = {"usemodules": ["_pypyjson", "struct", "binascii"]}
 
     def test_raise_on_unicode(self):
         import _pypyjson
@@ -188,4 +199,221 @@ class AppTest(object):
         import _pypyjson
         # http://json.org/JSON_checker/test/fail25.json
         s = '["\ttab\tcharacter\tin\tstring\t"]'
-        raises(ValueError, "_pypyjson.loads(s)")
\ No newline at end of file
+        raises(ValueError, "_pypyjson.loads(s)")
+
+    def test_encode_constants(self):
+        import _pypyjson
+        assert _pypyjson.dumps(None) == 'null'
+        assert _pypyjson.dumps(True) == 'true'
+        assert _pypyjson.dumps(False) == 'false'
+        assert _pypyjson.dumps(42) == '42'
+        assert _pypyjson.dumps(-42L) == '-42'
+        assert _pypyjson.dumps(1 << 70) == str(1 << 70)
+        assert _pypyjson.dumps(1.5) == '1.5'
+        assert _pypyjson.dumps(1e100) == '1e+100'
+        assert _pypyjson.dumps(float('inf')) == 'Infinity'
+        assert _pypyjson.dumps(float('-inf')) == '-Infinity'
+        assert _pypyjson.dumps(float('nan')) == 'NaN'
+        raises(ValueError, _pypyjson.dumps, float('nan'), allow_nan=False)
+
+    def test_encode_string(self):
+        import _pypyjson
+        assert _pypyjson.dumps('hello') == '"hello"'
+        assert _pypyjson.dumps('a"b\\c\n\x01\x7f') == '"a\\"b\\\\c\\n\\u0001\\u007f"'
+        assert _pypyjson.dumps(u'\xe0\u1234') == '"\\u00e0\\u1234"'
+        assert _pypyjson.dumps('\xc3\xa0') == '"\\u00e0"'
+        assert _pypyjson.dumps(u'z\U0001d120x') == '"z\\ud834\\udd20x"'
+        raises(UnicodeDecodeError, _pypyjson.dumps, '\xe0')
+
+    def test_encode_string_not_ascii(self):
+        import _pypyjson
+        res = _pypyjson.dumps('\xc3\xa0\x7f\n', ensure_ascii=False)
+        assert res == '"\xc3\xa0\x7f\\n"'
+        assert type(res) is str
+        res = _pypyjson.dumps(['\xc3\xa0', u'\u1234"'], ensure_ascii=False)
+        assert res == u'["\xe0", "\u1234\\""]'
+        assert type(res) is unicode
+
+    def test_encode_list(self):
+        import _pypyjson
+        assert _pypyjson.dumps([]) == '[]'
+        assert _pypyjson.dumps(()) == '[]'
+        assert _pypyjson.dumps([1, 2, 3]) == '[1, 2, 3]'
+        assert _pypyjson.dumps(range(3)) == '[0, 1, 2]'
+        assert _pypyjson.dumps([1.5, float('inf')]) == '[1.5, Infinity]'
+        assert _pypyjson.dumps(['a', 'b\n']) == '["a", "b\\n"]'
+        assert _pypyjson.dumps([u'a', u'\xe0']) == '["a", "\\u00e0"]'
+        assert _pypyjson.dumps((1, 'a', None, [2.5])) == '[1, "a", null, [2.5]]'
+        raises(ValueError, _pypyjson.dumps, [float('nan')], allow_nan=False)
+
+    def test_encode_dict(self):
+        import _pypyjson
+        assert _pypyjson.dumps({}) == '{}'
+        assert _pypyjson.dumps({'a': 1}) == '{"a": 1}'
+        d = {'b': [1, 2], 'a': {u'c': None}, 'c': 1.5}
+        assert (_pypyjson.dumps(d, sort_keys=True) ==
+                '{"a": {"c": null}, "b": [1, 2], "c": 1.5}')
+        d = {1: 'a', 2.5: 'b', True: 'c', None: 'd'}
+        res = _pypyjson.loads(_pypyjson.dumps(d))
+        assert res == {'1': 'c', '2.5': 'b', 'null': 'd'}
+        raises(TypeError, _pypyjson.dumps, {(1, 2): 3})
+        assert _pypyjson.dumps({(1, 2): 3, 'a': 4}, skipkeys=True) == '{"a": 4}'
+
+    def test_encode_dict_subclass(self):
+        import _pypyjson
+        class D(dict):
+            def iteritems(self):
+                yield ('x', 1)
+        assert _pypyjson.dumps(D(a=5)) == '{"x": 1}'
+
+    def test_encode_indent_separators(self):
+        import _pypyjson
+        d = {'a': [1, 2], 'b': {}}
+        res = _pypyjson.dumps(d, sort_keys=True, indent=2)
+        assert res == '{\n  "a": [\n    1, \n    2\n  ], \n  "b": {}\n}'
+        res = _pypyjson.dumps(d, sort_keys=True, separators=(',', ':'))
+        assert res == '{"a":[1,2],"b":{}}'
+        res = _pypyjson.dumps([[]], indent=0, separators=(',', ':'))
+        assert res == '[\n[]\n]'
+
+    def test_encode_unicode_separators(self):
+        import _pypyjson
+        res = _pypyjson.dumps({'a': [1, 2]}, separators=(u',', u':'))
+        assert res == u'{"a":[1,2]}'
+        assert type(res) is unicode
+        res = _pypyjson.dumps([1, 2], separators=(u'\xe9', ':'))
+        assert res == u'[1\xe92]'
+        # like json.dumps(), a str if the separators are not used
+        res = _pypyjson.dumps([1], separators=(u',', u':'))
+        assert res == '[1]'
+        assert type(res) is str
+
+    def test_encode_default(self):
+        import _pypyjson
+        class A(object):
+            pass
+        raises(TypeError, _pypyjson.dumps, A())
+        res = _pypyjson.dumps([A(), 1], default=lambda x: {'A': [1]})
+        assert res == '[{"A": [1]}, 1]'
+
+    def test_encode_circular(self):
+        import _pypyjson
+        l = [1]
+        l.append(l)
+        raises(ValueError, _pypyjson.dumps, l)
+        d = {}
+        d['d'] = d
+        raises(ValueError, _pypyjson.dumps, d)
+        class A(object):
+            pass
+        raises(ValueError, _pypyjson.dumps, A(), default=lambda x: [x])
+        # not circular
+        x = [1]
+        assert _pypyjson.dumps([x, x]) == '[[1], [1]]'
+
+    def test_json_module_uses_dumps(self):
+        import json
+        from json import encoder
+        class Encoder(json.JSONEncoder):
+            item_separator = ';'
+            def default(self, o):
+                return sorted(o)
+        obj = {'a': [1, 2.5, u'\xe0'], 'b': set([2, 1]), 'c': 'x\n'}
+        res1 = json.dumps(obj, sort_keys=True, indent=2, cls=Encoder)
+        old = encoder.FLOAT_REPR
+        encoder.FLOAT_REPR = lambda x: repr(x)   # disables the fast path
+        try:
+            res2 = json.dumps(obj, sort_keys=True, indent=2, cls=Encoder)
+        finally:
+            encoder.FLOAT_REPR = old
+        assert res1 == res2
+        assert json.dumps([1, {'x': None}]) == '[1, {"x": null}]'
+
+    def test_stream_decoder_records(self):
+        import _pypyjson
+        text = '{"a": [1, "]}"]}\n42\n"x\\"y"\n[true, null]\n-1.5 {}'
+        for size in range(1, len(text) + 1):
+            dec = _pypyjson.StreamDecoder()
+            res = []
+            for i in range(0, len(text), size):
+                res += dec.feed(text[i:i+size])
+            res += dec.close()
+            assert res == [{'a': [1, ']}']}, 42, 'x"y', [True, None],
+                           -1.5, {}]
+
+    def test_stream_decoder_array(self):
+        import _pypyjson
+        text = ' [ {"a": 1}, 2,"3" ,[[4]], 5.5 ] '
+        for size in range(1, len(text) + 1):
+            dec = _pypyjson.StreamDecoder(array=True)
+            res = []
+            for i in range(0, len(text), size):
+                res += dec.feed(text[i:i+size])
+            res += dec.close()
+            assert res == [{'a': 1}, 2, '3', [[4]], 5.5]
+        dec = _pypyjson.StreamDecoder(array=True)
+        assert dec.feed('[]') == []
+        assert dec.close() == []
+
+    def test_stream_decoder_errors(self):
+        import _pypyjson
+        dec = _pypyjson.StreamDecoder()
+        assert dec.feed('[1, 2') == []
+        raises(ValueError, dec.close)
+        raises(ValueError, dec.feed, '3]')
+        dec = _pypyjson.StreamDecoder()
+        raises(ValueError, dec.feed, '[1 2]')
+        dec = _pypyjson.StreamDecoder()
+        raises(ValueError, dec.feed, ', 1')
+        raises(TypeError, _pypyjson.StreamDecoder().feed, u'1')
+        dec = _pypyjson.StreamDecoder(array=True)
+        raises(ValueError, dec.feed, '{}')
+        dec = _pypyjson.StreamDecoder(array=True)
+        raises(ValueError, dec.feed, '[1 2]')
+        dec = _pypyjson.StreamDecoder(array=True)
+        raises(ValueError, dec.feed, '[1], 2')
+        dec = _pypyjson.StreamDecoder(array=True)
+        dec.feed('[1, 2')
+        raises(ValueError, dec.close)
+        raises(ValueError, _pypyjson.StreamDecoder(array=True).close)
+
+    def test_iterload(self):
+        import _pypyjson
+        from StringIO import StringIO
+        f = StringIO('{"id": 1}\n{"id": 2}\n{"id": 3}\n')
+        it = _pypyjson.iterload(f, bufsize=4)
+        assert it.next() == {'id': 1}
+        assert f.tell() < 20
+        assert list(it) == [{'id': 2}, {'id': 3}]
+        f = StringIO('[1, [2, 3], {"4": 5}]')
+        assert list(_pypyjson.iterload(f, array=True, bufsize=3)) == [
+            1, [2, 3], {'4': 5}]
+
+    def test_decode_object_keys_interned(self):
+        import _pypyjson
+        res = _pypyjson.loads('[{"a": 1, "bc": 2}, {"a": 3, "bc": 4},'
+                              ' {"bc": 5, "a": 6}, {"b": 7, "bcd": 8}]')
+        assert res == [{'a': 1, 'bc': 2}, {'a': 3, 'bc': 4},
+                       {'bc': 5, 'a': 6}, {'b': 7, 'bcd': 8}]
+        k0 = sorted(res[0].keys())
+        k1 = sorted(res[1].keys())
+        k2 = sorted(res[2].keys())
+        assert k0[0] is k1[0] is k2[0]
+        assert k0[1] is k1[1] is k2[1]
+        assert type(k0[0]) is unicode
+
+    def test_decode_object_keys_escapes(self):
+        import _pypyjson
+        s = '[{"a\\"b": 1, "\xc3\xa0": 2}, {"a\\"b": 3, "\xc3\xa0": 4}, {"a": 5}]'
+        assert _pypyjson.loads(s) == [{u'a"b': 1, u'\xe0': 2},
+                                      {u'a"b': 3, u'\xe0': 4}, {u'a': 5}]
+        raises(ValueError, _pypyjson.loads, '[{"a": 1}, {"a\tb": 2}]')
+        raises(ValueError, _pypyjson.loads, '[{"a": 1}, {"a')
+        raises(ValueError, _pypyjson.loads, '{"a": 1, 2: 3}')
+
+    def test_decode_object_many_layouts(self):
+        import _pypyjson
+        d = dict([(str(i), i) for i in range(50)])
+        records = [d, dict([(k, -v) for k, v in d.items()]), {"x": 1}]
+        s = '[' + ', '.join([repr(r).replace("'", '"') for r in records]) + ']'
+        assert _pypyjson.loads(s) == records
@@ -0,0 +1,13 @@
+from pypy.interpreter.mixedmodule import MixedModule
+
+class Module(MixedModule):
+    """fast implementation of cPickle.dumps() and cPickle.loads()"""
+
+    appleveldefs = {
+        }
+
+    interpleveldefs = {
+        'dumps' : 'interp_pickle.dumps',
+        'loads' : 'interp_unpickle.loads',
+        'HIGHEST_PROTOCOL' : 'space.wrap(interp_pickle.HIGHEST_PROTOCOL)',
+        }
@@ -0,0 +1,765 @@
+from rpython.rlib import rstackovf
+from rpython.rlib.objectmodel import specialize
+from rpython.rlib.rstring import StringBuilder
+from rpython.rlib.rstruct import ieee
+from rpython.rlib.runicode import unicode_encode_raw_unicode_escape
+from pypy.interpreter import gateway
+from pypy.interpreter.error import OperationError, oefmt
+from pypy.interpreter.unicodehelper import encode_utf8
+from pypy.objspace.std.bytesobject import string_escape_encode
+from pypy.objspace.std.dictmultiobject import W_DictMultiObject
+from pypy.objspace.std.floatobject import float2string
+
+HIGHEST_PROTOCOL = 2
+
+# Keep in synch with pickle.Pickler._BATCHSIZE
+BATCHSIZE = 1000
+
+MARK            = '('
+STOP            = '.'
+POP             = '0'
+POP_MARK        = '1'
+DUP             = '2'
+FLOAT           = 'F'
+INT             = 'I'
+BININT          = 'J'
+BININT1         = 'K'
+LONG            = 'L'
+BININT2         = 'M'
+NONE            = 'N'
+PERSID          = 'P'
+BINPERSID       = 'Q'
+REDUCE          = 'R'
+STRING          = 'S'
+BINSTRING       = 'T'
+SHORT_BINSTRING = 'U'
+UNICODE         = 'V'
+BINUNICODE      = 'X'
+APPEND          = 'a'
+BUILD           = 'b'
+GLOBAL          = 'c'
+DICT            = 'd'
+EMPTY_DICT      = '}'
+APPENDS         = 'e'
+GET             = 'g'
+BINGET          = 'h'
+INST            = 'i'
+LONG_BINGET     = 'j'
+LIST            = 'l'
+EMPTY_LIST      = ']'
+OBJ             = 'o'
+PUT             = 'p'
+BINPUT          = 'q'
+LONG_BINPUT     = 'r'
+SETITEM         = 's'
+TUPLE           = 't'
+EMPTY_TUPLE     = ')'
+SETITEMS        = 'u'
+BINFLOAT        = 'G'
+
+TRUE            = 'I01\n'
+FALSE           = 'I00\n'
+
+# Protocol 2
+
+PROTO           = '\x80'
+NEWOBJ          = '\x81'
+EXT1            = '\x82'
+EXT2            = '\x83'
+EXT4            = '\x84'
+TUPLE1          = '\x85'
+TUPLE2          = '\x86'
+TUPLE3          = '\x87'
+NEWTRUE         = '\x88'
+NEWFALSE        = '\x89'
+LONG1           = '\x8a'
+LONG4           = '\x8b'
+
+TUPLESIZE2CODE = [EMPTY_TUPLE, TUPLE1, TUPLE2, TUPLE3]
+
+
+# The objects which are not of one of the basic types are handled by
+# following the same steps as pickle.Pickler.save(), at app-level, which
+# then tells the Pickler which opcodes to write for them.
+
+app = gateway.applevel(r'''
+    from types import ClassType, FunctionType, BuiltinFunctionType, \
+         InstanceType, ModuleType, StringType, TupleType, TypeType
+    import sys
+
+    def global_name(obj, name, proto):
+        from pickle import PicklingError, whichmodule
+        from copy_reg import _extension_registry
+        if name is None:
+            name = obj.__name__
+        module = getattr(obj, "__module__", None)
+        if module is None:
+            module = whichmodule(obj, name)
+        try:
+            __import__(module)
+            mod = sys.modules[module]
+            klass = getattr(mod, name)
+        except (ImportError, KeyError, AttributeError):
+            raise PicklingError(
+                "Can't pickle %r: it's not found as %s.%s" %
+                (obj, module, name))
+        else:
+            if klass is not obj:
+                raise PicklingError(
+                    "Can't pickle %r: it's not the same object as %s.%s" %
+                    (obj, module, name))
+        code = 0
+        if proto >= 2:
+            code = _extension_registry.get((module, name), 0)
+        return ('global', module, name, code)
+
+    def check_reduce(obj, rv, reduce, proto):
+        from pickle import PicklingError
+        if type(rv) is StringType:
+            return global_name(obj, rv, proto)
+        if type(rv) is not TupleType:
+            raise PicklingError("%s must return string or tuple" % reduce)
+        l = len(rv)
+        if not (2 <= l <= 5):
+            raise PicklingError("Tuple returned by %s must have "
+                                "two to five elements" % reduce)
+        func = rv[0]
+        args = rv[1]
+        state = listitems = dictitems = None
+        if l > 2:
+            state = rv[2]
+        if l > 3:
+            listitems = rv[3]
+        if l > 4:
+            dictitems = rv[4]
+        if not isinstance(args, TupleType):
+            raise PicklingError("args from reduce() should be a tuple")
+        if not hasattr(func, '__call__'):
+            raise PicklingError("func from reduce should be callable")
+        kind = 'reduce'
+        if proto >= 2 and getattr(func, "__name__", "") == "__newobj__":
+            cls = args[0]
+            if not hasattr(cls, "__new__"):
+                raise PicklingError(
+                    "args[0] from __newobj__ args has no __new__")
+            if obj is not None and cls is not obj.__class__:
+                raise PicklingError(
+                    "args[0] from __newobj__ args has the wrong class")
+            kind = 'newobj'
+            func = cls
+            args = args[1:]
+        return (kind, func, args, state, listitems, dictitems)
+
+    def reduce_object(obj, proto):
+        """Find how to pickle an object which is not of a basic type.
+        Return one of:
+
+        ('global', module, name, extension_code)
+        ('inst', cls, initargs, module, name)
+        ('reduce', func, args, state, listitems, dictitems)
+        ('newobj', cls, args, state, listitems, dictitems)
+        """
+        from pickle import PicklingError
+        from copy_reg import dispatch_table
+        t = type(obj)
+        if t is ClassType or t is BuiltinFunctionType:
+            return global_name(obj, None, proto)
+        if t is FunctionType:
+            try:
+                return global_name(obj, None, proto)
+            except PicklingError, e:
+                pass
+            reduce = dispatch_table.get(t)
+            if reduce:
+                rv = reduce(obj)
+            else:
+                reduce = getattr(obj, "__reduce_ex__", None)
+                if reduce:
+                    rv = reduce(proto)
+                else:
+                    reduce = getattr(obj, "__reduce__", None)
+                    if reduce:
+                        rv = reduce()
+                    else:
+                        raise e
+            return check_reduce(obj, rv, reduce, proto)
+        if t is InstanceType:
+            cls = obj.__class__
+            if hasattr(obj, '__getinitargs__'):
+                args = obj.__getinitargs__()
+                len(args) # XXX Assert it's a sequence
+            else:
+                args = ()
+            return ('inst', cls, args, cls.__module__, cls.__name__)
+        reduce = dispatch_table.get(t)
+        if reduce:
+            rv = reduce(obj)
+        else:
+            try:
+                issc = issubclass(t, TypeType)
+            except TypeError:
+                issc = 0
+            if issc:
+                return global_name(obj, None, proto)
+            reduce = getattr(obj, "__reduce_ex__", None)
+            if reduce:
+                rv = reduce(proto)
+            else:
+                reduce = getattr(obj, "__reduce__", None)
+                if reduce:
+                    rv = reduce()
+                else:
+                    raise PicklingError("Can't pickle %r object: %r" %
+                                        (t.__name__, obj))
+        return check_reduce(obj, rv, reduce, proto)
+
+    def reduce_moduledict(obj, proto):
+        """Module dictionaries are saved as getattr(module, '__dict__')."""
+        try:
+            name = obj['__name__']
+            if type(name) is not str:
+                return None
+            themodule = sys.modules[name]
+            if type(themodule) is not ModuleType:
+                return None
+            if themodule.__dict__ is not obj:
+                return None
+        except (AttributeError, KeyError, TypeError):
+            return None
+        return check_reduce(None, (getattr, (themodule, '__dict__')),
+                            None, proto)
+
+    def inst_state(obj):
+        try:
+            getstate = obj.__getstate__
+        except AttributeError:
+            return obj.__dict__
+        return getstate()
+''', filename=__file__)
+
+reduce_object = app.interphook('reduce_object')
+reduce_moduledict = app.interphook('reduce_moduledict')
+inst_state = app.interphook('inst_state')
+
+
+def encode_long(big):
+    """Encode a long as a two's complement little-endian binary string,
+    with the smallest number of bytes; 0 is encoded as ''."""
+    if not big.tobool():
+        return ''
+    nbytes = (big.bit_length() >> 3) + 1
+    data = big.tobytes(nbytes, 'little', True)
+    end = nbytes - 1
+    if (big.sign < 0 and end > 0 and data[end] == '\xff' and
+            ord(data[end - 1]) & 0x80):
+        data = data[:end]
+    return data
+
+
+class Pickler(object):
+    """Write the pickle of an object to a StringBuilder.  The objects of the
+    basic types (and the lists, tuples and dicts containing them) are
+    pickled without leaving interp-level; the same opcodes are produced as
+    with the pure Python pickler."""
+
+    def __init__(self, space, proto):
+        self.space = space
+        self.proto = proto
+        self.bin = proto >= 1
+        self.builder = StringBuilder()
+        # maps the objects already pickled to their index in the memo.
+        # W_Roots are compared by identity, so this keeps alive all the
+        # memoized objects, like pickle.Pickler.memo.  Strings and unicodes
+        # have their own memos, because in PyPy their identity is their
+        # value: 'is' and id() don't depend on the W_Root which holds them
+        self.memo = {}
+        self.str_memo = {}
+        self.unicode_memo = {}
+        self.memo_count = 0
+
+    def dump(self, w_obj):
+        if self.proto >= 2:
+            self.builder.append(PROTO)
+            self.builder.append(chr(self.proto))
+        self.save(w_obj)
+        self.builder.append(STOP)
+        return self.builder.build()
+
+    def write_int4(self, x):
+        builder = self.builder
+        builder.append(chr(x & 0xff))
+        builder.append(chr((x >> 8) & 0xff))
+        builder.append(chr((x >> 16) & 0xff))
+        builder.append(chr((x >> 24) & 0xff))
+
+    # ____________________________________________________________
+    # memo
+
+    def memoize(self, w_obj):
+        self.memo[w_obj] = self.write_put()
+
+    def write_put(self):
+        self.memo_count += 1
+        index = self.memo_count
+        if not self.bin:
+            self.builder.append(PUT)
+            self.builder.append(str(index))
+            self.builder.append('\n')
+        elif index < 256:
+            self.builder.append(BINPUT)
+            self.builder.append(chr(index))
+        else:
+            self.builder.append(LONG_BINPUT)
+            self.write_int4(index)
+        return index
+
+    def write_get(self, index):
+        if not self.bin:
+            self.builder.append(GET)
+            self.builder.append(str(index))
+            self.builder.append('\n')
+        elif index < 256:
+            self.builder.append(BINGET)
+            self.builder.append(chr(index))
+        else:
+            self.builder.append(LONG_BINGET)
+            self.write_int4(index)
+
+    # ____________________________________________________________
+    # generic saving
+
+    def save(self, w_obj):
+        space = self.space
+        w_type = space.type(w_obj)
+        if space.is_w(w_obj, space.w_None):
+            self.builder.append(NONE)
+        elif space.is_w(w_type, space.w_bool):
+            self.save_bool(space.is_true(w_obj))
+        elif space.is_w(w_type, space.w_int):
+            self.save_int(space.int_w(w_obj))
+        elif space.is_w(w_type, space.w_float):
+            self.save_float(space.float_w(w_obj))
+        elif space.is_w(w_type, space.w_long):
+            self.save_long(w_obj)
+        elif space.is_w(w_type, space.w_str):
+            self.save_string(space.str_w(w_obj))
+        elif space.is_w(w_type, space.w_unicode):
+            self.save_unicode(space.unicode_w(w_obj))
+        else:
+            index = self.memo.get(w_obj, 0)
+            if index:
+                self.write_get(index)
+            elif space.is_w(w_type, space.w_tuple):
+                self.save_tuple(w_obj)
+            elif space.is_w(w_type, space.w_list):
+                self.save_list(w_obj)
+            elif space.is_w(w_type, space.w_dict):
+                self.save_dict(w_obj)
+            else:
+                self.save_other(w_obj)
+
+    def save_bool(self, value):
+        if self.proto >= 2:
+            self.builder.append(NEWTRUE if value else NEWFALSE)
+        else:
+            self.builder.append(TRUE if value else FALSE)
+
+    def save_int(self, x):
+        builder = self.builder
+        if self.bin:
+            # First one- and two-byte unsigned ints, then 4-byte signed ints
+            if x >= 0:
+                if x <= 0xff:
+                    builder.append(BININT1)
+                    builder.append(chr(x))
+                    return
+                if x <= 0xffff:
+                    builder.append(BININT2)
+                    builder.append(chr(x & 0xff))
+                    builder.append(chr(x >> 8))
+                    return
+            high_bits = x >> 31
+            if high_bits == 0 or high_bits == -1:
+                builder.append(BININT)
+                self.write_int4(x)
+                return
+        # Text pickle, or int too big to fit in signed 4-byte format.
+        builder.append(INT)
+        builder.append(str(x))
+        builder.append('\n')
+
+    def save_long(self, w_obj):
+        big = self.space.bigint_w(w_obj)
+        builder = self.builder
+        if self.proto >= 2:
+            data = encode_long(big)
+            n = len(data)
+            if n < 256:
+                builder.append(LONG1)
+                builder.append(chr(n))
+            else:
+                builder.append(LONG4)
+                self.write_int4(n)
+            builder.append(data)
+        else:
+            builder.append(LONG)
+            builder.append(big.repr())
+            builder.append('\n')
+
+    def save_float(self, x):
+        if self.bin:
+            self.builder.append(BINFLOAT)
+            ieee.pack_float(self.builder, x, 8, True)
+        else:
+            self.builder.append(FLOAT)
+            self.builder.append(float2string(x, 'r', 0))
+            self.builder.append('\n')
+
+    def save_string(self, s):
+        index = self.str_memo.get(s, 0)
+        if index:
+            self.write_get(index)
+            return
+        builder = self.builder
+        if self.bin:
+            n = len(s)
+            if n < 256:
+                builder.append(SHORT_BINSTRING)
+                builder.append(chr(n))
+            else:
+                builder.append(BINSTRING)
+                self.write_int4(n)
+            builder.append(s)
+        else:
+            quote = "'"
+            if quote in s and '"' not in s:
+                quote = '"'
+            builder.append(STRING)
+            builder.append(string_escape_encode(s, quote))
+            builder.append('\n')
+        self.str_memo[s] = self.write_put()
+
+    def save_unicode(self, u):
+        index = self.unicode_memo.get(u, 0)
+        if index:
+            self.write_get(index)
+            return
+        space = self.space
+        builder = self.builder
+        if self.bin:
+            data = encode_utf8(space, u)
+            builder.append(BINUNICODE)
+            self.write_int4(len(data))
+            builder.append(data)
+        else:
+            builder.append(UNICODE)
+            # like the 'raw-unicode-escape' codec, but the backslashes and
+            # the newlines must be escaped too
+            start = 0
+            for i in range(len(u)):
+                ch = u[i]
+                if ch == u'\\' or ch == u'\n':
+                    builder.append(unicode_encode_raw_unicode_escape(
+                        u[start:i], i - start, 'strict'))
+                    if ch == u'\\':
+                        builder.append('\\u005c')
+                    else:
+                        builder.append('\\u000a')
+                    start = i + 1
+            builder.append(unicode_encode_raw_unicode_escape(
+                u[start:], len(u) - start, 'strict'))
+            builder.append('\n')
+        self.unicode_memo[u] = self.write_put()
+
+    def save_tuple(self, w_obj):
+        items_w = self.space.fixedview(w_obj)
+        builder = self.builder
+        n = len(items_w)
+        if n == 0:
+            if self.proto:
+                builder.append(EMPTY_TUPLE)
+            else:
+                builder.append(MARK)
+                builder.append(TUPLE)
+            return
+        if n <= 3 and self.proto >= 2:
+            for w_item in items_w:
+                self.save(w_item)
+            index = self.memo.get(w_obj, 0)
+            if index:
+                # the tuple is recursive: it was saved by one of its items
+                for i in range(n):
+                    builder.append(POP)
+                self.write_get(index)
+            else:
+                builder.append(TUPLESIZE2CODE[n])
+                self.memoize(w_obj)
+            return
+        builder.append(MARK)
+        for w_item in items_w:
+            self.save(w_item)
+        index = self.memo.get(w_obj, 0)
+        if index:
+            # the tuple is recursive: throw away everything we put on the
+            # stack, and simply GET the tuple (it's already constructed)
+            if self.proto:
+                builder.append(POP_MARK)
+            else:
+                for i in range(n + 1):
+                    builder.append(POP)
+            self.write_get(index)
+            return
+        builder.append(TUPLE)
+        self.memoize(w_obj)
+
+    def save_list(self, w_obj):
+        space = self.space
+        if self.bin:
+            self.builder.append(EMPTY_LIST)
+        else:
+            self.builder.append(MARK)
+            self.builder.append(LIST)
+        self.memoize(w_obj)
+        # the lists of ints and strings are pickled without wrapping their
+        # items
+        intlist = space.listview_int(w_obj)
+        if intlist is not None:
+            self.batch_appends_unwrapped(intlist, Pickler.save_int)
+            return
+        strlist = space.listview_bytes(w_obj)
+        if strlist is not None:
+            self.batch_appends_unwrapped(strlist, Pickler.save_string)
+            return
+        self.batch_appends(space.listview(w_obj))
+
+    @specialize.arg(2)
+    def batch_appends_unwrapped(self, items, save_item):
+        builder = self.builder
+        if not self.bin:
+            for item in items:
+                save_item(self, item)
+                builder.append(APPEND)
+            return
+        n = len(items)
+        start = 0
+        while start < n:
+            stop = min(start + BATCHSIZE, n)
+            if stop - start > 1:
+                builder.append(MARK)
+                for i in range(start, stop):
+                    save_item(self, items[i])
+                builder.append(APPENDS)
+            else:
+                save_item(self, items[start])
+                builder.append(APPEND)
+            start = stop
+
+    def batch_appends(self, items_w):
+        builder = self.builder
+        if not self.bin:
+            for w_item in items_w:
+                self.save(w_item)
+                builder.append(APPEND)
+            return
+        n = len(items_w)
+        start = 0
+        while start < n:
+            stop = min(start + BATCHSIZE, n)
+            if stop - start > 1:
+                builder.append(MARK)
+                for i in range(start, stop):
+                    self.save(items_w[i])
+                builder.append(APPENDS)
+            else:
+                self.save(items_w[start])
+                builder.append(APPEND)
+            start = stop
+
+    def batch_appends_iter(self, w_iter):
+        space = self.space
+        while True:
+            items_w = []
+            while len(items_w) < BATCHSIZE:
+                try:
+                    w_item = space.next(w_iter)
+                except OperationError, e:
+                    if not e.match(space, space.w_StopIteration):
+                        raise
+                    break
+                items_w.append(w_item)
+            self.batch_appends(items_w)
+            if len(items_w) < BATCHSIZE:
+                break
+
+    def save_dict(self, w_obj):
+        space = self.space
+        assert isinstance(w_obj, W_DictMultiObject)
+        if space.finditem_str(w_obj, '__name__') is not None:
+            w_res = reduce_moduledict(space, w_obj, space.wrap(self.proto))
+            if not space.is_w(w_res, space.w_None):
+                # like pickle.py, the dict itself is not memoized
+                self.save_reduce_result(None, w_res)
+                return
+        if self.bin:
+            self.builder.append(EMPTY_DICT)
+        else:
+            self.builder.append(MARK)
+            self.builder.append(DICT)
+        self.memoize(w_obj)
+        # take the items first: saving them might run app-level code which
+        # changes the dict
+        keys_w = []
+        values_w = []
+        iteritems = w_obj.iteritems()
+        while True:
+            w_key, w_value = iteritems.next_item()
+            if w_key is None:
+                break
+            keys_w.append(w_key)
+            values_w.append(w_value)
+        self.batch_setitems(keys_w, values_w)
+
+    def batch_setitems(self, keys_w, values_w):
+        builder = self.builder
+        if not self.bin:
+            for i in range(len(keys_w)):
+                self.save(keys_w[i])
+                self.save(values_w[i])
+                builder.append(SETITEM)
+            return
+        n = len(keys_w)
+        start = 0
+        while start < n:
+            stop = min(start + BATCHSIZE, n)
+            if stop - start > 1:
+                builder.append(MARK)
+                for i in range(start, stop):
+                    self.save(keys_w[i])
+                    self.save(values_w[i])
+                builder.append(SETITEMS)
+            else:
+                self.save(keys_w[start])
+                self.save(values_w[start])
+                builder.append(SETITEM)
+            start = stop
+
+    def batch_setitems_iter(self, w_iter):
+        space = self.space
+        while True:
+            keys_w = []
+            values_w = []
+            while len(keys_w) < BATCHSIZE:
+                try:
+                    w_item = space.next(w_iter)
+                except OperationError, e:
+                    if not e.match(space, space.w_StopIteration):
+                        raise
+                    break
+                w_key, w_value = space.fixedview(w_item, 2)
+                keys_w.append(w_key)
+                values_w.append(w_value)
+            self.batch_setitems(keys_w, values_w)
+            if len(keys_w) < BATCHSIZE:
+                break
+
+    # ____________________________________________________________
+    # other objects: classes, functions, instances and __reduce__
+
+    def save_other(self, w_obj):
+        space = self.space
+        w_res = reduce_object(space, w_obj, space.wrap(self.proto))
+        self.save_reduce_result(w_obj, w_res)
+
+    def save_reduce_result(self, w_obj, w_res):
+        space = self.space
+        res_w = space.fixedview(w_res)
+        kind = space.str_w(res_w[0])
+        if kind == 'global':
+            self.save_global(w_obj, space.str_w(res_w[1]),
+                             space.str_w(res_w[2]), space.int_w(res_w[3]))
+        elif kind == 'inst':
+            self.save_inst(w_obj, res_w[1], res_w[2], space.str_w(res_w[3]),
+                           space.str_w(res_w[4]))
+        else:
+            self.save_reduce(w_obj, kind == 'newobj', res_w[1], res_w[2],
+                             res_w[3], res_w[4], res_w[5])
+
+    def save_global(self, w_obj, module, name, code):
+        builder = self.builder
+        if code:
+            if code <= 0xff:
+                builder.append(EXT1)
+                builder.append(chr(code))
+            elif code <= 0xffff:
+                builder.append(EXT2)
+                builder.append(chr(code & 0xff))
+                builder.append(chr(code >> 8))
+            else:
+                builder.append(EXT4)
+                self.write_int4(code)
+            return
+        builder.append(GLOBAL)
+        builder.append(module)
+        builder.append('\n')
+        builder.append(name)
+        builder.append('\n')
+        self.memoize(w_obj)
+
+    def save_inst(self, w_obj, w_cls, w_args, module, name):
+        space = self.space
+        builder = self.builder
+        builder.append(MARK)
+        if self.bin:
+            self.save(w_cls)
+            for w_arg in space.listview(w_args):
+                self.save(w_arg)
+            builder.append(OBJ)
+        else:
+            for w_arg in space.listview(w_args):
+                self.save(w_arg)
+            builder.append(INST)
+            builder.append(module)
+            builder.append('\n')
+            builder.append(name)
+            builder.append('\n')
+        self.memoize(w_obj)
+        self.save(inst_state(space, w_obj))
+        builder.append(BUILD)
+
+    def save_reduce(self, w_obj, newobj, w_func, w_args, w_state,
+                    w_listitems, w_dictitems):
+        space = self.space
+        self.save(w_func)
+        self.save(w_args)
+        self.builder.append(NEWOBJ if newobj else REDUCE)
+        if w_obj is not None:
+            self.memoize(w_obj)
+        if not space.is_w(w_listitems, space.w_None):
+            self.batch_appends_iter(w_listitems)
+        if not space.is_w(w_dictitems, space.w_None):
+            self.batch_setitems_iter(w_dictitems)
+        if not space.is_w(w_state, space.w_None):
+            self.save(w_state)
+            self.builder.append(BUILD)
+
+
+def dumps(space, w_obj, w_protocol=None):
+    """dumps(obj, protocol=0) -- Return a string containing an object in
+    pickle format."""
+    if w_protocol is None or space.is_w(w_protocol, space.w_None):
+        proto = 0
+    else:
+        proto = space.int_w(w_protocol)
+        if proto < 0:
+            proto = HIGHEST_PROTOCOL
+        elif proto > HIGHEST_PROTOCOL:
+            raise oefmt(space.w_ValueError, "pickle protocol must be <= %d",
+                        HIGHEST_PROTOCOL)
+    pickler = Pickler(space, proto)
+    try:
+        return space.wrap(pickler.dump(w_obj))
+    except rstackovf.StackOverflow:
+        rstackovf.check_stack_overflow()
+        raise oefmt(space.w_RuntimeError,
+                    "maximum recursion depth exceeded while pickling an "
+                    "object")
@@ -0,0 +1,412 @@
+from rpython.rlib import rstackovf
+from rpython.rlib.rarithmetic import string_to_int
+from rpython.rlib.rbigint import rbigint
+from rpython.rlib.rstring import ParseStringError, ParseStringOverflowError
+from rpython.rlib.rstruct import ieee
+from pypy.interpreter import gateway
+from pypy.interpreter.error import OperationError, oefmt
+from pypy.interpreter.gateway import unwrap_spec
+from pypy.interpreter.pyparser.parsestring import PyString_DecodeEscape
+from pypy.interpreter.unicodehelper import (decode_raw_unicode_escape,
+                                            decode_utf8)
+from pypy.module._pypypickle.interp_pickle import (
+    MARK, STOP, POP, POP_MARK, DUP, FLOAT, INT, BININT, BININT1, LONG,
+    BININT2, NONE, PERSID, BINPERSID, REDUCE, STRING, BINSTRING,
+    SHORT_BINSTRING, UNICODE, BINUNICODE, APPEND, BUILD, GLOBAL, DICT,
+    EMPTY_DICT, APPENDS, GET, BINGET, INST, LONG_BINGET, LIST, EMPTY_LIST,
+    OBJ, PUT, BINPUT, LONG_BINPUT, SETITEM, TUPLE, EMPTY_TUPLE, SETITEMS,
+    BINFLOAT, PROTO, NEWOBJ, EXT1, EXT2, EXT4, TUPLE1, TUPLE2, TUPLE3,
+    NEWTRUE, NEWFALSE, LONG1, LONG4, HIGHEST_PROTOCOL)
+
+# The opcodes which import or instantiate classes, or call __setstate__(),
+# are implemented at app-level, exactly like in pickle.Unpickler.
+
+app = gateway.applevel(r'''
+    import sys
+
+    def unpickling_error(msg):
+        from pickle import UnpicklingError
+        return UnpicklingError(msg)
+
+    def find_class(module, name):
+        __import__(module)
+        mod = sys.modules[module]
+        klass = getattr(mod, name)
+        return klass
+
+    def get_extension(code):
+        from copy_reg import _extension_cache, _inverted_registry
+        nil = []
+        obj = _extension_cache.get(code, nil)
+        if obj is not nil:
+            return obj
+        key = _inverted_registry.get(code)
+        if not key:
+            raise ValueError("unregistered extension code %d" % code)
+        obj = find_class(*key)
+        _extension_cache[code] = obj
+        return obj
+
+    def instantiate(klass, args):
+        from types import ClassType
+        from pickle import _EmptyClass
+        if (not args and
+                type(klass) is ClassType and
+                not hasattr(klass, "__getinitargs__")):
+            value = _EmptyClass()
+            value.__class__ = klass
+            return value
+        try:
+            return klass(*args)
+        except TypeError, err:
+            raise TypeError, "in constructor for %s: %s" % (
+                klass.__name__, str(err)), sys.exc_info()[2]
+
+    def build(inst, state):
+        setstate = getattr(inst, "__setstate__", None)
+        if setstate:
+            setstate(state)
+            return
+        slotstate = None
+        if isinstance(state, tuple) and len(state) == 2:
+            state, slotstate = state
+        if state:
+            d = inst.__dict__
+            try:
+                for k, v in state.iteritems():
+                    d[intern(k)] = v
+            # keys in state don't have to be strings
+            # don't blow up, but don't go out of our way
+            except TypeError:
+                d.update(state)
+        if slotstate:
+            for k, v in slotstate.items():
+                setattr(inst, k, v)
+''', filename=__file__)
+
+unpickling_error = app.interphook('unpickling_error')
+find_class = app.interphook('find_class')
+get_extension = app.interphook('get_extension')
+instantiate = app.interphook('instantiate')
+build = app.interphook('build')
+
+
+class Unpickler(object):
+    """Read a pickle from a string.  Instead of pushing marker objects on
+    the stack, the positions of the marks are kept in a separate list."""
+
+    def __init__(self, space, data):
+        self.space = space
+        self.data = data
+        self.pos = 0
+        self.stack_w = []
+        self.marks = []
+        self.memo = {}      # index -> W_Root
+
+    def error(self, msg):
+        w_exc = unpickling_error(self.space, self.space.wrap(msg))
+        return OperationError(self.space.type(w_exc), w_exc)
+
+    # ____________________________________________________________
+    # reading the data
+
+    def read(self, n):
+        start = self.pos
+        stop = start + n
+        if n < 0 or stop > len(self.data):
+            raise OperationError(self.space.w_EOFError, self.space.w_None)
+        assert stop >= 0
+        self.pos = stop
+        return self.data[start:stop]
+
+    def read_byte(self):
+        pos = self.pos
+        if pos >= len(self.data):
+            raise OperationError(self.space.w_EOFError, self.space.w_None)
+        self.pos = pos + 1
+        return ord(self.data[pos])
+
+    def read_uint2(self):
+        s = self.read(2)
+        return ord(s[0]) | (ord(s[1]) << 8)
+
+    def read_int4(self):
+        s = self.read(4)
+        high = ord(s[3])
+        if high >= 0x80:
+            high -= 0x100
+        return ord(s[0]) | (ord(s[1]) << 8) | (ord(s[2]) << 16) | (high << 24)
+
+    def readline(self):
+        """Return the next line, without the newline."""
+        start = self.pos
+        end = self.data.find('\n', start)
+        if end < 0:
+            raise OperationError(self.space.w_EOFError, self.space.w_None)
+        self.pos = end + 1
+        return self.data[start:end]
+
+    def readline_index(self):
+        line = self.readline()
+        try:
+            return string_to_int(line)
+        except (ParseStringError, ParseStringOverflowError):
+            raise oefmt(self.space.w_ValueError,
+                        "invalid memo index '%s'", line)
+
+    # ____________________________________________________________
+    # the stack
+
+    def append(self, w_obj):
+        self.stack_w.append(w_obj)
+
+    def pop(self):
+        if (not self.stack_w or
+                (self.marks and self.marks[-1] == len(self.stack_w))):
+            raise self.error("unpickling stack underflow")
+        return self.stack_w.pop()
+
+    def top(self):
+        if (not self.stack_w or
+                (self.marks and self.marks[-1] == len(self.stack_w))):
+            raise self.error("unpickling stack underflow")
+        return self.stack_w[-1]
+
+    def pop_mark(self):
+        """Remove the topmost mark, and return the position on the stack of
+        the first item after it."""
+        if not self.marks:
+            raise self.error("could not find MARK")
+        return self.marks.pop()
+
+    def pop_slice(self, k):
+        assert k >= 0
+        items_w = self.stack_w[k:]
+        del self.stack_w[k:]
+        return items_w
+
+    # ____________________________________________________________
+
+    def load(self):
+        while True:
+            key = chr(self.read_byte())
+            if key == STOP:
+                break
+            self.dispatch(key)
+        return self.pop()
+
+    def dispatch(self, key):
+        space = self.space
+        if key == MARK:
+            self.marks.append(len(self.stack_w))
+        elif key == EMPTY_LIST:
+            self.append(space.newlist([]))
+        elif key == EMPTY_DICT:
+            self.append(space.newdict())
+        elif key == EMPTY_TUPLE:
+            self.append(space.newtuple([]))
+        elif key == BININT1:
+            self.append(space.wrap(self.read_byte()))
+        elif key == BININT2:
+            self.append(space.wrap(self.read_uint2()))
+        elif key == BININT:
+            self.append(space.wrap(self.read_int4()))
+        elif key == BINFLOAT:
+            self.append(space.wrap(ieee.unpack_float(self.read(8), True)))
+        elif key == SHORT_BINSTRING:
+            self.append(space.wrap(self.read(self.read_byte())))
+        elif key == BINSTRING:
+            self.append(space.wrap(self.read(self.read_int4())))
+        elif key == BINUNICODE:
+            data = self.read(self.read_int4())
+            self.append(space.wrap(decode_utf8(space, data)))
+        elif key == BINPUT:
+            self.memo[self.read_byte()] = self.top()
+        elif key == LONG_BINPUT:
+            self.memo[self.read_int4()] = self.top()
+        elif key == PUT:
+            self.memo[self.readline_index()] = self.top()
+        elif key == BINGET:
+            self.load_get(self.read_byte())
+        elif key == LONG_BINGET:
+            self.load_get(self.read_int4())
+        elif key == GET:
+            self.load_get(self.readline_index())
+        elif key == APPEND:
+            w_value = self.pop()
+            space.call_method(self.top(), 'append', w_value)
+        elif key == APPENDS:
+            self.load_appends()
+        elif key == SETITEM:
+            w_value = self.pop()
+            w_key = self.pop()
+            space.setitem(self.top(), w_key, w_value)
+        elif key == SETITEMS:
+            self.load_setitems()
+        elif key == TUPLE:
+            k = self.pop_mark()
+            self.append(space.newtuple(self.pop_slice(k)))
+        elif key == TUPLE1 or key == TUPLE2 or key == TUPLE3:
+            n = ord(key) - ord(TUPLE1) + 1
+            items_w = [None] * n
+            for i in range(n - 1, -1, -1):
+                items_w[i] = self.pop()
+            self.append(space.newtuple(items_w))
+        elif key == LIST:
+            k = self.pop_mark()
+            self.append(space.newlist(self.pop_slice(k)))
+        elif key == DICT:
+            k = self.pop_mark()
+            items_w = self.pop_slice(k)
+            w_dict = space.newdict()
+            for i in range(0, len(items_w) - 1, 2):
+                space.setitem(w_dict, items_w[i], items_w[i + 1])
+            self.append(w_dict)
+        elif key == NONE:
+            self.append(space.w_None)
+        elif key == NEWTRUE:
+            self.append(space.w_True)
+        elif key == NEWFALSE:
+            self.append(space.w_False)
+        elif key == INT:
+            data = self.readline()
+            if data == '00':
+                self.append(space.w_False)
+            elif data == '01':
+                self.append(space.w_True)
+            else:
+                self.append(space.call_function(space.w_int,
+                                                space.wrap(data)))
+        elif key == LONG:
+            self.append(space.call_function(space.w_long,
+                                            space.wrap(self.readline()),
+                                            space.wrap(0)))
+        elif key == LONG1 or key == LONG4:
+            if key == LONG1:
+                n = self.read_byte()
+            else:
+                n = self.read_int4()
+            big = rbigint.frombytes(self.read(n), 'little', True)
+            self.append(space.newlong_from_rbigint(big))
+        elif key == FLOAT:
+            self.append(space.call_function(space.w_float,
+                                            space.wrap(self.readline())))
+        elif key == STRING:
+            self.load_string()
+        elif key == UNICODE:
+            data = self.readline()
+            self.append(space.wrap(decode_raw_unicode_escape(space, data)))
+        elif key == POP:
+            if self.marks and self.marks[-1] == len(self.stack_w):
+                self.marks.pop()
+            else:
+                self.pop()
+        elif key == POP_MARK:
+            self.pop_slice(self.pop_mark())
+        elif key == DUP:
+            self.append(self.top())
+        elif key == GLOBAL:
+            module = self.readline()
+            name = self.readline()
+            self.append(find_class(space, space.wrap(module),
+                                   space.wrap(name)))
+        elif key == EXT1 or key == EXT2 or key == EXT4:
+            if key == EXT1:
+                code = self.read_byte()
+            elif key == EXT2:
+                code = self.read_uint2()
+            else:
+                code = self.read_int4()
+            self.append(get_extension(space, space.wrap(code)))
+        elif key == REDUCE:
+            w_args = self.pop()
+            w_func = self.pop()
+            self.append(space.call(w_func, w_args))
+        elif key == NEWOBJ:
+            w_args = self.pop()
+            w_cls = self.pop()
+            args_w = [w_cls] + space.fixedview(w_args)
+            w_new = space.getattr(w_cls, space.wrap('__new__'))
+            self.append(space.call(w_new, space.newtuple(args_w)))
+        elif key == INST:
+            module = self.readline()
+            name = self.readline()
+            w_klass = find_class(space, space.wrap(module), space.wrap(name))
+            k = self.pop_mark()
+            w_args = space.newtuple(self.pop_slice(k))
+            self.append(instantiate(space, w_klass, w_args))
+        elif key == OBJ:
+            k = self.pop_mark()
+            items_w = self.pop_slice(k)
+            if not items_w:
+                raise self.error("unpickling stack underflow")
+            w_args = space.newtuple(items_w[1:])
+            self.append(instantiate(space, items_w[0], w_args))
+        elif key == BUILD:
+            w_state = self.pop()
+            build(space, self.top(), w_state)
+        elif key == PROTO:
+            proto = self.read_byte()
+            if proto > HIGHEST_PROTOCOL:
+                raise oefmt(space.w_ValueError,
+                            "unsupported pickle protocol: %d", proto)
+        elif key == PERSID or key == BINPERSID:
+            raise self.error("A load persistent id instruction was "
+                             "encountered, but no persistent_load function "
+                             "was specified.")
+        else:
+            raise self.error("invalid load key, '%s'." % (key,))
+
+    def load_get(self, index):
+        try:
+            w_obj = self.memo[index]
+        except KeyError:
+            raise OperationError(self.space.w_KeyError,
+                                 self.space.wrap(index))
+        self.append(w_obj)
+
+    def load_appends(self):
+        space = self.space
+        k = self.pop_mark()
+        if k == 0:
+            raise self.error("unpickling stack underflow")
+        items_w = self.pop_slice(k)
+        w_list = self.stack_w[k - 1]
+        if space.is_w(space.type(w_list), space.w_list):
+            space.call_method(w_list, 'extend', space.newlist(items_w))
+        else:
+            for w_item in items_w:
+                space.call_method(w_list, 'append', w_item)
+
+    def load_setitems(self):
+        space = self.space
+        k = self.pop_mark()
+        if k == 0:
+            raise self.error("unpickling stack underflow")
+        items_w = self.pop_slice(k)
+        w_dict = self.stack_w[k - 1]
+        for i in range(0, len(items_w) - 1, 2):
+            space.setitem(w_dict, items_w[i], items_w[i + 1])
+
+    def load_string(self):
+        rep = self.readline()
+        n = len(rep)
+        if n < 2 or rep[0] != rep[n - 1] or (rep[0] != "'" and
+                                             rep[0] != '"'):
+            raise oefmt(self.space.w_ValueError, "insecure string pickle")
+        end = n - 1
+        assert end >= 1
+        data = PyString_DecodeEscape(self.space, rep[1:end], 'strict', None)
+        self.append(self.space.wrap(data))
+
+
+@unwrap_spec(data=str)
+def loads(space, data):
+    """loads(string) -- Load a pickle from the given string"""
+    unpickler = Unpickler(space, data)
+    try:
+        return unpickler.load()
+    except rstackovf.StackOverflow:
+        rstackovf.check_stack_overflow()
+        raise oefmt(space.w_RuntimeError,
+                    "maximum recursion depth exceeded while unpickling")
@@ -0,0 +1,283 @@
+from pypy.module._pypypickle.interp_pickle import encode_long
+from rpython.rlib.rbigint import rbigint
+
+
+def test_encode_long():
+    for value, expected in [(0, ''), (255, '\xff\x00'), (32767, '\xff\x7f'),
+                            (-256, '\x00\xff'), (-32768, '\x00\x80'),
+                            (-128, '\x80'), (127, '\x7f'), (-1, '\xff'),
+                            (2 ** 64, '\x00' * 8 + '\x01')]:
+        assert encode_long(rbigint.fromlong(value)) == expected
+
+
+class AppTestPickle(object):
+    spaceconfig = {"usemodules": ["_pypypickle", "struct", "binascii"]}
+
+    def setup_class(cls):
+        cls.w_app_dumps = cls.space.appexec([], """():
+            from StringIO import StringIO
+            import cPickle
+            def app_dumps(obj, proto=0):
+                f = StringIO()
+                cPickle.Pickler(f, proto).dump(obj)
+                return f.getvalue()
+            return app_dumps
+        """)
+
+    def w_check(self, obj, compare=True):
+        import _pypypickle, pickle
+        for proto in range(3):
+            s = _pypypickle.dumps(obj, proto)
+            if compare:
+                assert s == self.app_dumps(obj, proto)
+            res = _pypypickle.loads(s)
+            assert res == obj
+            assert type(res) is type(obj)
+            assert pickle.loads(s) == obj
+            assert _pypypickle.loads(pickle.dumps(obj, proto)) == obj
+        return res
+
+    def test_atoms(self):
+        for obj in [None, True, False, 0, 1, 255, 256, 65535, 65536, -1,
+                    -2 ** 31, 2 ** 31 - 1, 2 ** 31, -2 ** 31 - 1,
+                    3 ** 50, -3 ** 50, 0L, 42L, -128L, 255L,
+                    0.0, -1.5, 1e100, 0.1,
+                    '', 'abc', 'a' * 300, 'it\'s "quoted"', '\x00\n\\\xff',
+                    u'', u'abc', u'\u1234\\\n\x00', u'\U00012345']:
+            self.check(obj)
+
+    def test_int_is_not_long(self):
+        import _pypypickle
+        assert type(_pypypickle.loads(_pypypickle.dumps(2 ** 31, 0))) is int
+        assert type(_pypypickle.loads(_pypypickle.dumps(5L, 2))) is long
+
+    def test_float_specials(self):
+        import _pypypickle
+        for proto in range(3):
+            s = _pypypickle.dumps(float('inf'), proto)
+            assert _pypypickle.loads(s) == float('inf')
+            s = _pypypickle.dumps(float('nan'), proto)
+            x = _pypypickle.loads(s)
+            assert x != x
+
+    def test_containers(self):
+        for obj in [(), (1,), (1, 2), (1, 2, 3), (1, 2, 3, 4),
+                    [], [1, 2, 3], ['a', 'b', None, 1.5],
+                    [[1], [2, [3]]], {}, {'a': 1, 2: [3]},
+                    {(1, 2): (u'x', 'y')}]:
+            self.check(obj)
+
+    def test_batches(self):
+        import _pypypickle
+        for obj in [range(1001), map(str, range(1001)),
+                    [None] * 1001, dict.fromkeys(range(1001))]:
+            s = _pypypickle.dumps(obj, 1)
+            assert s == self.app_dumps(obj, 1)
+            assert _pypypickle.loads(s) == obj
+
+    def test_memo(self):
+        import _pypypickle
+        a = [1, 2]
+        s = 'shared'
+        lst = [a, a, s, s, (a, s)]
+        for proto in range(3):
+            res = _pypypickle.loads(_pypypickle.dumps(lst, proto))
+            assert res == lst
+            assert res[0] is res[1]
+            assert res[2] is res[3]
+            assert res[4][0] is res[0]
+            assert _pypypickle.dumps(lst, proto) == self.app_dumps(lst, proto)
+
+    def test_many_memo_entries(self):
+        lst = [str(i) for i in range(260)]
+        self.check(lst + lst)
+
+    def test_recursive(self):
+        import _pypypickle
+        lst = []
+        lst.append(lst)
+        d = {}
+        d[1] = d
+        t = ([],)
+        t[0].append(t)
+        for proto in range(3):
+            res = _pypypickle.loads(_pypypickle.dumps(lst, proto))
+            assert res[0] is res
+            res = _pypypickle.loads(_pypypickle.dumps(d, proto))
+            assert res[1] is res
+            s = _pypypickle.dumps(t, proto)
+            assert s == self.app_dumps(t, proto)
+            res = _pypypickle.loads(s)
+            assert res[0][0] is res
+
+    def test_deep_recursion(self):
+        import _pypypickle
+        lst = []
+        for i in range(100000):
+            lst = [lst]
+        raises(RuntimeError, _pypypickle.dumps, lst)
+
+    def test_globals(self):
+        import _pypypickle, os
+        for obj in [os.path.join, len, int, ValueError]:
+            for proto in range(3):
+                s = _pypypickle.dumps(obj, proto)
+                assert s == self.app_dumps(obj, proto)
+                assert _pypypickle.loads(s) is obj
+
+    def test_extension_registry(self):
+        import _pypypickle, copy_reg, os
+        module = os.path.join.__module__
+        copy_reg.add_extension(module, 'join', 200)
+        try:
+            s = _pypypickle.dumps(os.path.join, 2)
+            assert s == '\x80\x02\x82\xc8.'
+            assert _pypypickle.loads(s) is os.path.join
+        finally:
+            copy_reg.remove_extension(module, 'join', 200)
+
+    def test_unpicklable(self):
+        import _pypypickle, pickle
+        class BadReduce(object):
+            def __init__(self, result):
+                self.result = result
+            def __reduce__(self):
+                return self.result
+        raises(pickle.PicklingError, _pypypickle.dumps, BadReduce(42))
+        raises(pickle.PicklingError, _pypypickle.dumps, BadReduce((1,)))
+        raises(pickle.PicklingError, _pypypickle.dumps, BadReduce((1, ())))
+        raises(pickle.PicklingError, _pypypickle.dumps,
+               BadReduce((BadReduce, [])))
+        raises(pickle.PicklingError, _pypypickle.dumps, BadReduce('nothere'))
+
+    def test_protocol(self):
+        import _pypypickle
+        assert _pypypickle.HIGHEST_PROTOCOL == 2
+        assert _pypypickle.dumps(1, -1) == '\x80\x02K\x01.'
+        assert _pypypickle.dumps(1) == 'I1\n.'
+        raises(ValueError, _pypypickle.dumps, 1, 3)
+
+    def test_new_style_instances(self):
+        import _pypypickle
+        class Point(object):
+            def __init__(self, x, y):
+                self.x = x
+                self.y = y
+            def __eq__(self, other):
+                return self.__dict__ == other.__dict__
+        Point.__module__ = '_pickle_test'
+        import sys, new
+        mod = new.module('_pickle_test')
+        mod.Point = Point
+        sys.modules['_pickle_test'] = mod
+        try:
+            p = Point(1, [2])
+            res = self.check([p, p])
+            assert res[0] is res[1]
+        finally:
+            del sys.modules['_pickle_test']
+
+    def test_old_style_instances(self):
+        import _pypypickle
+        class Old:
+            def __eq__(self, other):
+                return self.__dict__ == other.__dict__
+        class WithArgs:
+            def __init__(self, a):
+                self.a = a
+            def __getinitargs__(self):
+                return (self.a,)
+            def __eq__(self, other):
+                return self.a == other.a
+        import sys, new
+        mod = new.module('_pickle_test')
+        Old.__module__ = WithArgs.__module__ = '_pickle_test'
+        mod.Old = Old
+        mod.WithArgs = WithArgs
+        sys.modules['_pickle_test'] = mod
+        try:
+            o = Old()
+            o.x = 5
+            self.check(o)
+            # pickle.py adds an entry to the memo for the initargs
+            self.check(WithArgs('abc'), compare=False)
+        finally:
+            del sys.modules['_pickle_test']
+
+    def test_reduce(self):
+        import _pypypickle
+        class Items(object):
+            def __init__(self):
+                self.items = []
+                self.state = None
+            def append(self, x):
+                self.items.append(x)
+            def __setstate__(self, state):
+                self.state = state
+            def __reduce__(self):
+                return (Items, (), 'state', iter(self.items),
+                        iter([]))
+        import sys, new
+        mod = new.module('_pickle_test')
+        Items.__module__ = '_pickle_test'
+        mod.Items = Items
+        sys.modules['_pickle_test'] = mod
+        try:
+            obj = Items()
+            for i in range(1001):
+                obj.append(i)
+            for proto in range(3):
+                s = _pypypickle.dumps(obj, proto)
+                assert s == self.app_dumps(obj, proto)
+                res = _pypypickle.loads(s)
+                assert res.items == range(1001)
+                assert res.state == 'state'
+        finally:
+            del sys.modules['_pickle_test']
+
+    def test_builtin_reduce(self):
+        import _pypypickle, collections
+        for obj in [set([1, 2]), frozenset('ab'), 3j,
+                    collections.OrderedDict([(1, 2), (3, 4)]),
+                    collections.deque([1, 2])]:
+            for proto in range(3):
+                s = _pypypickle.dumps(obj, proto)
+                assert _pypypickle.loads(s) == obj
+
+    def test_module_dict(self):
+        import _pypypickle, os
+        for proto in range(3):
+            assert _pypypickle.loads(_pypypickle.dumps(os.__dict__,
+                                                       proto)) is os.__dict__
+
+    def test_loads_errors(self):
+        import _pypypickle, pickle
+        raises(EOFError, _pypypickle.loads, '')
+        raises(EOFError, _pypypickle.loads, 'I1\n')
+        raises(EOFError, _pypypickle.loads, 'K')
+        raises(EOFError, _pypypickle.loads, 'U\x05abc.')
+        raises(pickle.UnpicklingError, _pypypickle.loads, '.')
+        raises(pickle.UnpicklingError, _pypypickle.loads, '(.')
+        raises(pickle.UnpicklingError, _pypypickle.loads, 'Nt.')
+        raises(pickle.UnpicklingError, _pypypickle.loads, '\xff.')
+        raises(KeyError, _pypypickle.loads, 'h\x05.')
+        raises(ValueError, _pypypickle.loads, 'S"abc\n.')
+        raises(ValueError, _pypypickle.loads, '\x80\x03N.')
+        raises(pickle.UnpicklingError, _pypypickle.loads, 'P1\n.')
+
+    def test_loads_pop_mark(self):
+        import _pypypickle
+        assert _pypypickle.loads('K\x01(K\x0200.') == 1
+        assert _pypypickle.loads('K\x01(K\x02K\x031.') == 1
+        assert _pypypickle.loads('K\x012\x86.') == (1, 1)
+
+    def test_cPickle_uses_module(self):
+        import cPickle, StringIO
+        obj = {'a': [1, 2.5, u'x'], 'b': (None, True)}
+        for proto in range(3):
+            s = cPickle.dumps(obj, proto)
+            assert s == self.app_dumps(obj, proto)
+            assert cPickle.loads(s) == obj
+            f = StringIO.StringIO()
+            cPickle.dump(obj, f, proto)
+            assert f.getvalue() == s
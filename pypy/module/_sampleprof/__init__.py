@@ -0,0 +1,19 @@
+""" _sampleprof module: a statistical profiler driven by SIGPROF
+"""
+
+from pypy.interpreter.mixedmodule import MixedModule
+
+class Module(MixedModule):
+    interpleveldefs = {
+        'enable': 'interp_sampleprof.enable',
+        'disable': 'interp_sampleprof.disable',
+        'is_enabled': 'interp_sampleprof.is_enabled',
+    }
+
+    appleveldefs = {}
+
+    def shutdown(self, space):
+        from pypy.module._sampleprof.interp_sampleprof import SamplingProfiler
+        profiler = space.fromcache(SamplingProfiler)
+        if profiler.enabled:
+            profiler.disable()
@@ -0,0 +1,275 @@
+"""A statistical profiler driven by SIGPROF.
+
+The C-level signal handler only sets the usual flag; the sample is taken
+by an AsyncAction, i.e. at the next point where the interpreter or the
+JIT-compiled code checks for signals.  Unlike _lsprof, nothing is done
+on calls and returns, so the JIT compiles the same code as usual.
+
+Each sample records the stack of Python frames and what was running:
+
+  * KIND_INTERP: the interpreter;
+  * KIND_JIT: JIT-compiled code, which checks for signals when it jumps
+    back to the start of a loop.  The sample records the position of
+    that loop, and the log contains a record for every loop and bridge
+    compiled, so that the loop number can be found;
+  * KIND_TRACING: the JIT was tracing or compiling.
+
+The signals received during a garbage collection are only seen after it,
+so instead every sample records the time spent in the GC since the
+previous sample.
+
+The log is written in the binary format read by pypy/tool/sampleprof.py:
+a header 'SPRF', a version byte and the period in microseconds, followed
+by records starting with a tag byte.  All numbers are 8-byte little-endian
+signed integers, and strings are a length followed by the bytes.
+
+  'C' code_id firstlineno name filename      -- before the first use
+  'S' kind timestamp gc_us jit_next_instr depth (code_id lineno)*depth
+  'L' type number loop_number code_id next_instr
+"""
+
+import os
+
+from rpython.rlib import jit, jit_hooks, rgc
+from rpython.rlib.objectmodel import compute_unique_id, we_are_translated
+from rpython.rlib.rarithmetic import intmask, r_longlong
+from rpython.rlib.rsignal import (SIGPROF, ITIMER_PROF, c_setitimer,
+    itimervalP)
+from rpython.rlib.rstring import StringBuilder
+from rpython.rlib.rtimer import read_timestamp
+from rpython.rtyper.lltypesystem import lltype
+
+from pypy.interpreter.error import oefmt, wrap_oserror
+from pypy.interpreter.executioncontext import AsyncAction
+from pypy.interpreter.gateway import unwrap_spec
+from pypy.interpreter.pytraceback import offset2lineno
+from pypy.module.signal.interp_signal import (set_interp_level_action,
+    timeval_from_double)
+
+VERSION = 1
+
+KIND_INTERP = 0
+KIND_JIT = 1
+KIND_TRACING = 2
+
+LOOP = 0
+ENTRY_BRIDGE = 1
+BRIDGE = 2
+
+FLUSH_SIZE = 65536
+
+
+def write_int(builder, value):
+    value = r_longlong(value)
+    for i in range(8):
+        builder.append(chr(intmask(value >> (i * 8)) & 0xff))
+
+def write_str(builder, s):
+    write_int(builder, len(s))
+    builder.append(s)
+
+
+def set_timer(period):
+    with lltype.scoped_alloc(itimervalP.TO, 1) as new:
+        timeval_from_double(period, new[0].c_it_value)
+        timeval_from_double(period, new[0].c_it_interval)
+        c_setitimer(ITIMER_PROF, new, lltype.nullptr(itimervalP.TO))
+
+
+def get_gc_time():
+    if not we_are_translated():
+        return 0.0
+    t = (rgc.get_stats(rgc.STAT_TOTAL_MINOR_TIME) +
+         rgc.get_stats(rgc.STAT_TOTAL_MAJOR_TIME))
+    if t < 0.0:
+        return 0.0     # not supported by this GC
+    return t
+
+def is_jit_compiling(space):
+    if not we_are_translated() or not space.config.translation.jit:
+        return False
+    return jit_hooks.stats_get_current_event(None) >= 0
+
+
+class SamplingProfiler(AsyncAction):
+    """Performed after every SIGPROF while the profiler is enabled."""
+
+    def __init__(self, space):
+        AsyncAction.__init__(self, space)
+        self.enabled = False
+        self.fileno = -1
+        self.max_depth = 0
+        self.builder = None
+        self.code_ids = {}
+        self.last_gc_time = 0.0
+        self.write_error = 0
+
+    def enable(self, fileno, period, max_depth):
+        self.fileno = fileno
+        self.max_depth = max_depth
+        self.builder = StringBuilder()
+        self.code_ids = {}
+        self.last_gc_time = get_gc_time()
+        self.write_error = 0
+        self.builder.append('SPRF')
+        self.builder.append(chr(VERSION))
+        write_int(self.builder, int(period * 1000000.0))
+        self.enabled = True
+        set_interp_level_action(self.space, SIGPROF, self)
+        set_timer(period)
+
+    def disable(self):
+        set_timer(0.0)
+        set_interp_level_action(self.space, SIGPROF, None)
+        self.enabled = False
+        self.flush()
+        self.builder = None
+        self.code_ids = {}
+
+    def flush(self):
+        data = self.builder.build()
+        self.builder = StringBuilder()
+        while data and self.write_error == 0:
+            try:
+                count = os.write(self.fileno, data)
+            except OSError, e:
+                self.write_error = e.errno
+                break
+            data = data[count:]
+
+    def get_code_id(self, pycode):
+        code_id = compute_unique_id(pycode)
+        if code_id not in self.code_ids:
+            self.code_ids[code_id] = None
+            builder = self.builder
+            builder.append('C')
+            write_int(builder, code_id)
+            write_int(builder, pycode.co_firstlineno)
+            write_str(builder, pycode.co_name)
+            write_str(builder, pycode.co_filename)
+        return code_id
+
+    def perform(self, ec, frame):
+        if self.enabled:
+            self.take_sample(ec, frame)
+
+    @jit.dont_look_inside
+    def take_sample(self, ec, frame):
+        gc_time = get_gc_time()
+        gc_us = int((gc_time - self.last_gc_time) * 1000000.0)
+        self.last_gc_time = gc_time
+        # collect the stack first, as it may write 'C' records
+        stack = []
+        jit_next_instr = -1
+        if is_jit_compiling(self.space):
+            kind = KIND_TRACING
+            f = ec.gettopframe_nohidden()
+        elif ec.jit_code is not None and frame is not None:
+            # don't read the fields of 'frame': they live in the
+            # JIT-compiled code, and reading them would force it
+            kind = KIND_JIT
+            jit_next_instr = ec.jit_next_instr
+            stack.append(self.get_code_id(ec.jit_code))
+            stack.append(offset2lineno(ec.jit_code, jit_next_instr))
+            f = ec.getnextframe_nohidden(frame)
+        else:
+            kind = KIND_INTERP
+            f = ec.gettopframe_nohidden()
+        while f is not None and len(stack) < 2 * self.max_depth:
+            stack.append(self.get_code_id(f.pycode))
+            stack.append(f.get_last_lineno())
+            f = ec.getnextframe_nohidden(f)
+        builder = self.builder
+        builder.append('S')
+        builder.append(chr(kind))
+        write_int(builder, read_timestamp())
+        write_int(builder, gc_us)
+        write_int(builder, jit_next_instr)
+        write_int(builder, len(stack) // 2)
+        for value in stack:
+            write_int(builder, value)
+        if builder.getlength() > FLUSH_SIZE:
+            self.flush()
+
+    def record_loop(self, loop_type, number, loop_number, pycode, next_instr):
+        builder = self.builder
+        if pycode is not None:
+            code_id = self.get_code_id(pycode)
+        else:
+            code_id = 0
+        builder.append('L')
+        builder.append(chr(loop_type))
+        write_int(builder, number)
+        write_int(builder, loop_number)
+        write_int(builder, code_id)
+        write_int(builder, next_instr)
+
+
+def record_compilation(space, debug_info, is_bridge):
+    """Called by the JIT hooks of the pypyjit module."""
+    from pypy.module.pypyjit.interp_jit import pypyjitdriver
+    from pypy.module.pypyjit.interp_warmstart import pycode_from_box
+    from rpython.jit.metainterp.resoperation import rop
+    profiler = space.fromcache(SamplingProfiler)
+    if not profiler.enabled:
+        return
+    if debug_info.get_jitdriver() is not pypyjitdriver:
+        return
+    loop_number = debug_info.looptoken.number
+    if not is_bridge:
+        if debug_info.type == 'entry bridge':
+            loop_type = ENTRY_BRIDGE
+        else:
+            loop_type = LOOP
+        greenkey = debug_info.greenkey
+        profiler.record_loop(loop_type, loop_number, loop_number,
+                             pycode_from_box(greenkey[2]),
+                             greenkey[0].getint())
+        return
+    number = compute_unique_id(debug_info.fail_descr)
+    for op in debug_info.operations:
+        if op.getopnum() == rop.DEBUG_MERGE_POINT:
+            greenkey = op.getarglist()[3:]
+            profiler.record_loop(BRIDGE, number, loop_number,
+                                 pycode_from_box(greenkey[2]),
+                                 greenkey[0].getint())
+            return
+    profiler.record_loop(BRIDGE, number, loop_number, None, -1)
+
+
+@unwrap_spec(fileno=int, period=float, max_depth=int)
+def enable(space, fileno, period=0.001, max_depth=128):
+    """enable(fileno, period=0.001, max_depth=128)
+
+    Start sampling the running program every 'period' seconds of CPU
+    time, and write the samples to the file descriptor 'fileno'.  Only
+    the main thread is sampled."""
+    profiler = space.fromcache(SamplingProfiler)
+    if profiler.enabled:
+        raise oefmt(space.w_ValueError, "the profiler is already enabled")
+    if period <= 0.0 or max_depth <= 0:
+        raise oefmt(space.w_ValueError,
+                    "'period' and 'max_depth' must be positive")
+    if not space.threadlocals.signals_enabled():
+        raise oefmt(space.w_ValueError,
+                    "the profiler can only be enabled in the main thread")
+    try:
+        os.fstat(fileno)
+    except OSError, e:
+        raise wrap_oserror(space, e)
+    profiler.enable(fileno, period, max_depth)
+
+def disable(space):
+    """disable()
+
+    Stop the profiler and write the remaining samples."""
+    profiler = space.fromcache(SamplingProfiler)
+    if not profiler.enabled:
+        raise oefmt(space.w_ValueError, "the profiler is not enabled")
+    profiler.disable()
+    if profiler.write_error:
+        raise wrap_oserror(space, OSError(profiler.write_error,
+                                          "cannot write the samples"))
+
+def is_enabled(space):
+    return space.wrap(space.fromcache(SamplingProfiler).enabled)
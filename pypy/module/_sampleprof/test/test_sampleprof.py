@@ -0,0 +1,126 @@
+import py
+from pypy.interpreter.gateway import interp2app, unwrap_spec
+from pypy.module._sampleprof.interp_sampleprof import SamplingProfiler
+from pypy.tool import sampleprof
+
+
+class AppTestSampleProf(object):
+    spaceconfig = dict(usemodules=('_sampleprof', 'signal'))
+
+    def setup_class(cls):
+        if cls.runappdirect:
+            py.test.skip("Can't run this test with -A")
+        space = cls.space
+
+        def sample(space):
+            profiler = space.fromcache(SamplingProfiler)
+            ec = space.getexecutioncontext()
+            profiler.perform(ec, ec.gettopframe())
+
+        def sample_jit(space):
+            # as if called from jump_absolute() in JIT-compiled code
+            profiler = space.fromcache(SamplingProfiler)
+            ec = space.getexecutioncontext()
+            frame = ec.gettopframe()
+            ec.jit_code = frame.pycode
+            ec.jit_next_instr = 0
+            try:
+                profiler.perform(ec, frame)
+            finally:
+                ec.jit_code = None
+                ec.jit_next_instr = -1
+
+        def record_loop(space, w_func, next_instr, number):
+            profiler = space.fromcache(SamplingProfiler)
+            profiler.record_loop(0, number, number,
+                                 space.interp_w(
+                                     cls.Function, w_func).code,
+                                 next_instr)
+
+        @unwrap_spec(filename=str, mode=str)
+        def convert(space, filename, mode):
+            with open(filename, 'rb') as f:
+                log = sampleprof.read_log(f.read())
+            out = py.io.TextIO()
+            if mode == 'calltree':
+                sampleprof.write_calltree(log, out)
+            else:
+                sampleprof.write_flamegraph(log, out)
+            return space.wrap(out.getvalue())
+
+        from pypy.interpreter.function import Function
+        cls.Function = Function
+        cls.w_sample = space.wrap(interp2app(sample))
+        cls.w_sample_jit = space.wrap(interp2app(sample_jit))
+        cls.w_record_loop = space.wrap(interp2app(
+            unwrap_spec(next_instr=int, number=int)(record_loop)))
+        cls.w_convert = space.wrap(interp2app(convert))
+        cls.w_tmpfile = space.wrap(str(
+            py.test.ensuretemp('sampleprof').join('profile.log')))
+
+    def test_enable_disable(self):
+        import _sampleprof
+        assert not _sampleprof.is_enabled()
+        raises(ValueError, _sampleprof.disable)
+        raises(ValueError, _sampleprof.enable, 1, 0.0)
+        raises(OSError, _sampleprof.enable, 12345)
+        with open(self.tmpfile, 'wb') as f:
+            _sampleprof.enable(f.fileno(), 10.0)
+            try:
+                assert _sampleprof.is_enabled()
+                raises(ValueError, _sampleprof.enable, f.fileno())
+            finally:
+                _sampleprof.disable()
+        assert not _sampleprof.is_enabled()
+        with open(self.tmpfile, 'rb') as f:
+            assert f.read(4) == 'SPRF'
+
+    def test_samples(self):
+        import _sampleprof
+        sample = self.sample
+        sample_jit = self.sample_jit
+
+        def inner():
+            sample()
+            sample()
+
+        def loop():
+            sample_jit()
+
+        def outer():
+            inner()
+            loop()
+
+        with open(self.tmpfile, 'wb') as f:
+            _sampleprof.enable(f.fileno(), 10.0)
+            try:
+                self.record_loop(loop, 0, 42)
+                outer()
+            finally:
+                _sampleprof.disable()
+        lines = self.convert(self.tmpfile, 'flamegraph').splitlines()
+        assert len(lines) == 2
+        inner_line = [l for l in lines if l.endswith(':inner 20000000')]
+        assert len(inner_line) == 1
+        assert ':outer;' in inner_line[0]
+        assert ':test_samples;' in inner_line[0]
+        loop_line = [l for l in lines if ':loop;[jit loop 42] ' in l]
+        assert len(loop_line) == 1
+        assert loop_line[0].endswith(' 10000000')
+        #
+        calltree = self.convert(self.tmpfile, 'calltree')
+        assert calltree.startswith('events: Microseconds\n')
+        assert 'cfn=inner ' in calltree
+        assert 'summary: 30000000' in calltree
+
+    def test_signal(self):
+        import _sampleprof
+        with open(self.tmpfile, 'wb') as f:
+            _sampleprof.enable(f.fileno(), 0.001)
+            try:
+                for i in range(20000):
+                    pass
+            finally:
+                _sampleprof.disable()
+        text = self.convert(self.tmpfile, 'flamegraph')
+        assert ':test_signal ' in text
@@ -0,0 +1,5 @@
+from pypy.objspace.fake.checkmodule import checkmodule
+
+
+def test_sampleprof_translates():
+    checkmodule('_sampleprof')
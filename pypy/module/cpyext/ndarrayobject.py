@@ -11,6 +11,7 @@ from pypy.module.micronumpy.ndarray import W_NDimArray
 from pypy.module.micronumpy.ctors import array
 from pypy.module.micronumpy.descriptor import get_dtype_cache, W_Dtype
 from pypy.module.micronumpy.concrete import ConcreteArray
+from pypy.module.micronumpy.lazy import prepare
 from rpython.rlib.rawstorage import RAW_STORAGE_PTR
 
 NPY_C_CONTIGUOUS   = 0x0001
@@ -60,6 +61,7 @@ def _PyArray_CheckExact(space, w_obj):
 @cpython_api([PyObject], rffi.INT_real, error=CANNOT_FAIL)
 def _PyArray_FLAGS(space, w_array):
     assert isinstance(w_array, W_NDimArray)
+    prepare(space, w_array)
     flags = NPY_BEHAVED_NS
     if isinstance(w_array.implementation, ConcreteArray):
         flags |= NPY_OWNDATA
@@ -111,6 +113,7 @@ def _PyArray_TYPE(space, w_array):
 def _PyArray_DATA(space, w_array):
     # fails on scalars - see PyArray_FromAny()
     assert isinstance(w_array, W_NDimArray)
+    prepare(space, w_array)
     return rffi.cast(rffi.VOIDP, w_array.implementation.storage)
 
 PyArray_Descr = PyObject
@@ -10,6 +10,7 @@ class Module(MixedModule):
         'enable_finalizers': 'interp_gc.enable_finalizers',
         'disable_finalizers': 'interp_gc.disable_finalizers',
         'garbage': 'space.newlist([])',
+        'callbacks': 'space.fromcache(interp_gc.GcCallbacks).w_callbacks',
         #'dump_heap_stats': 'interp_gc.dump_heap_stats',
     }
     appleveldefs = {}
@@ -30,6 +31,18 @@ class Module(MixedModule):
                 'get_referrers': 'referents.get_referrers',
                 '_dump_rpy_heap': 'referents._dump_rpy_heap',
                 'get_typeids_z': 'referents.get_typeids_z',
+                'get_stats': 'interp_gc.get_stats',
+                'set_nursery_size': 'interp_gc.set_nursery_size',
+                'set_major_collect': 'interp_gc.set_major_collect',
+                'set_growth': 'interp_gc.set_growth',
+                'set_max_heap_size': 'interp_gc.set_max_heap_size',
+                'set_increment_step': 'interp_gc.set_increment_step',
                 'GcRef': 'referents.W_GcRef',
                 })
         MixedModule.__init__(self, space, w_name)
+        # report the implicit collections to gc.callbacks whenever the
+        # periodic actions run (every sys.checkinterval bytecodes if
+        # there are threads)
+        from pypy.module.gc.interp_gc import GcCallbacksAction
+        space.actionflag.register_periodic_action(GcCallbacksAction(space),
+                                                  use_bytecode_counter=False)
@@ -1,6 +1,10 @@
+import time
+
 from pypy.interpreter.gateway import unwrap_spec
 from pypy.interpreter.error import OperationError
+from pypy.interpreter.executioncontext import PeriodicAsyncAction
 from rpython.rlib import rgc
+from rpython.rlib.unroll import unrolling_iterable
 
 
 @unwrap_spec(generation=int)
@@ -15,7 +19,19 @@ def collect(space, generation=0):
             from pypy.objspace.std.mapdict import MapAttrCache
             cache = space.fromcache(MapAttrCache)
             cache.clear()
+    callbacks = space.fromcache(GcCallbacks)
+    if not callbacks.has_callbacks():
+        rgc.collect()
+        callbacks.update_counters()
+        return space.wrap(0)
+    # report first the collections that occurred implicitly so far
+    callbacks.report_collections()
+    callbacks.invoke("start", 2, 1, -1.0)
+    start_time = time.time()
     rgc.collect()
+    duration = time.time() - start_time
+    callbacks.update_counters()
+    callbacks.invoke("stop", 2, 1, duration)
     return space.wrap(0)
 
 def enable(space):
@@ -61,3 +77,176 @@ def dump_heap_stats(space, filename):
         f.write("%d %d " % (tb[i].count, tb[i].size))
         f.write(",".join([str(tb[i].links[j]) for j in range(len(tb))]) + "\n")
     f.close()
+
+# ____________________________________________________________
+# Changing the parameters of the GC at run-time
+
+def set_gc_param(space, param_no, value):
+    if not rgc.set_gc_param(param_no, value):
+        raise OperationError(space.w_NotImplementedError,
+                      space.wrap("operation not implemented by this GC"))
+
+@unwrap_spec(size=int)
+def set_nursery_size(space, size):
+    """Replace the nursery with a new one of 'size' bytes, like the
+    environment variable PYPY_GC_NURSERY does at startup.  This does a
+    minor collection first."""
+    if size <= 0:
+        raise OperationError(space.w_ValueError,
+                             space.wrap("the nursery size must be positive"))
+    set_gc_param(space, rgc.GC_PARAM_NURSERY_SIZE, float(size))
+
+@unwrap_spec(factor=float)
+def set_major_collect(space, factor):
+    """Set the major collection memory factor, like PYPY_GC_MAJOR_COLLECT.
+    It is used to compute the threshold at the end of the next major
+    collection."""
+    if not factor > 1.0:
+        raise OperationError(space.w_ValueError,
+                             space.wrap("the factor must be larger than 1.0"))
+    set_gc_param(space, rgc.GC_PARAM_MAJOR_COLLECT, factor)
+
+@unwrap_spec(rate=float)
+def set_growth(space, rate):
+    """Set the major collection threshold's max growth rate, like
+    PYPY_GC_GROWTH."""
+    if not rate > 1.0:
+        raise OperationError(space.w_ValueError,
+                             space.wrap("the rate must be larger than 1.0"))
+    set_gc_param(space, rgc.GC_PARAM_GROWTH, rate)
+
+@unwrap_spec(size=float)
+def set_max_heap_size(space, size):
+    """Set the max heap size in bytes, like PYPY_GC_MAX.  Use 0 to remove
+    the limit."""
+    if size < 0.0:
+        raise OperationError(space.w_ValueError,
+                             space.wrap("the size must not be negative"))
+    set_gc_param(space, rgc.GC_PARAM_MAX_HEAP_SIZE, size)
+
+@unwrap_spec(size=int)
+def set_increment_step(space, size):
+    """Set the amount of memory marked in a step of a major collection,
+    like PYPY_GC_INCREMENT_STEP."""
+    if size <= 0:
+        raise OperationError(space.w_ValueError,
+                             space.wrap("the size must be positive"))
+    set_gc_param(space, rgc.GC_PARAM_INCREMENT_STEP, float(size))
+
+# ____________________________________________________________
+# Statistics
+
+# (key, STAT_* index, is_a_time)
+STATS = unrolling_iterable([
+    ("nursery_size", rgc.STAT_NURSERY_SIZE, False),
+    ("minor_collections", rgc.STAT_MINOR_COLLECTIONS, False),
+    ("major_collections", rgc.STAT_MAJOR_COLLECTIONS, False),
+    ("total_minor_time", rgc.STAT_TOTAL_MINOR_TIME, True),
+    ("max_minor_pause", rgc.STAT_MAX_MINOR_PAUSE, True),
+    ("total_major_time", rgc.STAT_TOTAL_MAJOR_TIME, True),
+    ("max_major_pause", rgc.STAT_MAX_MAJOR_PAUSE, True),
+    ("bytes_promoted", rgc.STAT_BYTES_PROMOTED, False),
+    ("arena_memory", rgc.STAT_ARENA_MEMORY, False),
+    ("rawmalloc_memory", rgc.STAT_RAWMALLOC_MEMORY, False),
+    ("major_collection_threshold", rgc.STAT_MAJOR_THRESHOLD, False),
+    ])
+
+def get_stats(space):
+    """Return a dict with statistics about the garbage collector:
+    the nursery size, the number of minor and major collections so far,
+    the total and the maximum time spent in a single minor collection or
+    a single step of a major collection (in seconds), the number of bytes
+    promoted out of the nursery, the memory used in the arenas and by
+    raw-malloced objects, and the memory usage at which the next major
+    collection starts."""
+    if rgc.get_stats(rgc.STAT_NURSERY_SIZE) < 0.0:
+        raise OperationError(space.w_NotImplementedError,
+                      space.wrap("operation not implemented by this GC"))
+    w_stats = space.newdict()
+    for key, stats_no, is_a_time in STATS:
+        value = rgc.get_stats(stats_no)
+        if is_a_time:
+            w_value = space.wrap(value)
+        else:
+            w_value = space.wrap(int(value))
+        space.setitem_str(w_stats, key, w_value)
+    return w_stats
+
+
+class GcCallbacks(object):
+    """Calls the functions in the app-level list 'gc.callbacks' as
+    'callback(phase, info)', with 'phase' being "start" or "stop".
+    The GC cannot run app-level code while it is collecting, so the
+    collections that happen implicitly are reported after the fact,
+    from GcCallbacksAction: a minor collection (generation 0) only as
+    "stop", and an incremental major collection (generation 2) as
+    "start" while it is in progress and "stop" once it is finished.
+    The 'info' dict contains the generation, the number of collections
+    reported at once and, for "stop", the time spent in them.
+    """
+
+    def __init__(self, space):
+        self.space = space
+        self.w_callbacks = space.newlist([])
+        self.minor_collections = 0
+        self.major_collections = 0
+        self.major_started = 0
+        self.total_minor_time = 0.0
+        self.total_major_time = 0.0
+
+    def has_callbacks(self):
+        return self.space.len_w(self.w_callbacks) > 0
+
+    def update_counters(self):
+        self.minor_collections = int(
+            rgc.get_stats(rgc.STAT_MINOR_COLLECTIONS))
+        self.major_collections = int(
+            rgc.get_stats(rgc.STAT_MAJOR_COLLECTIONS))
+        self.major_started = int(rgc.get_stats(rgc.STAT_MAJOR_STARTED))
+        self.total_minor_time = rgc.get_stats(rgc.STAT_TOTAL_MINOR_TIME)
+        self.total_major_time = rgc.get_stats(rgc.STAT_TOTAL_MAJOR_TIME)
+
+    def report_collections(self):
+        old_minor = self.minor_collections
+        old_major = self.major_collections
+        old_started = self.major_started
+        old_minor_time = self.total_minor_time
+        old_major_time = self.total_major_time
+        self.update_counters()
+        if self.minor_collections > old_minor:
+            self.invoke("stop", 0, self.minor_collections - old_minor,
+                        self.total_minor_time - old_minor_time)
+        if self.major_collections > old_major:
+            self.invoke("stop", 2, self.major_collections - old_major,
+                        self.total_major_time - old_major_time)
+        if (self.major_started > old_started and
+                self.major_started > self.major_collections):
+            self.invoke("start", 2, 1, -1.0)
+
+    def invoke(self, phase, generation, count, duration):
+        space = self.space
+        w_info = space.newdict()
+        space.setitem_str(w_info, "generation", space.wrap(generation))
+        space.setitem_str(w_info, "count", space.wrap(count))
+        if duration >= 0.0:
+            space.setitem_str(w_info, "duration", space.wrap(duration))
+        w_phase = space.wrap(phase)
+        for w_callback in space.listview(self.w_callbacks):
+            try:
+                space.call_function(w_callback, w_phase, w_info)
+            except OperationError, e:
+                e.write_unraisable(space, "gc callback ", w_callback)
+
+
+class GcCallbacksAction(PeriodicAsyncAction):
+    """Reports to gc.callbacks the collections that occurred since the
+    last time this action ran."""
+
+    def perform(self, executioncontext, frame):
+        callbacks = self.space.fromcache(GcCallbacks)
+        if callbacks.has_callbacks():
+            callbacks.report_collections()
+        else:
+            # keep the counters up to date, so that a callback added later
+            # is only told about the collections that follow
+            callbacks.update_counters()
@@ -105,6 +105,176 @@ class AppTestGcDumpHeap(object):
         gc.dump_heap_stats(self.fname)
 
 
+class AppTestGcStats(object):
+    def setup_class(cls):
+        from rpython.rlib import rgc
+        from pypy.interpreter.gateway import interp2app
+        from pypy.module.gc.interp_gc import GcCallbacksAction
+        stats = {}
+        def fake_get_stats(stats_no):
+            return stats.get(stats_no, 0.0)
+        def set_stats(space, w_stats):
+            for w_key in space.listview(space.call_method(w_stats, 'keys')):
+                key = space.str_w(w_key)
+                stats[getattr(rgc, key)] = space.float_w(
+                    space.getitem(w_stats, w_key))
+            GcCallbacksAction(space).perform(None, None)
+        cls._get_stats = staticmethod(rgc.get_stats)
+        rgc.get_stats = fake_get_stats
+        cls.w_set_stats = cls.space.wrap(interp2app(set_stats))
+
+    def teardown_class(cls):
+        from rpython.rlib import rgc
+        rgc.get_stats = cls._get_stats
+
+    def test_get_stats(self):
+        import gc
+        self.set_stats({'STAT_NURSERY_SIZE': 4096.0,
+                        'STAT_MAX_MINOR_PAUSE': 0.25})
+        stats = gc.get_stats()
+        assert stats['nursery_size'] == 4096
+        assert stats['max_minor_pause'] == 0.25
+        assert sorted(stats) == [
+            'arena_memory', 'bytes_promoted', 'major_collection_threshold',
+            'major_collections', 'max_major_pause', 'max_minor_pause',
+            'minor_collections', 'nursery_size', 'rawmalloc_memory',
+            'total_major_time', 'total_minor_time']
+        self.set_stats({'STAT_NURSERY_SIZE': -1.0})
+        raises(NotImplementedError, gc.get_stats)
+
+    def test_callbacks_collect(self):
+        import gc
+        seen = []
+        def callback(phase, info):
+            seen.append((phase, info))
+        gc.callbacks.append(callback)
+        try:
+            gc.collect()
+        finally:
+            gc.callbacks.remove(callback)
+        gc.collect()
+        assert len(seen) == 2
+        assert seen[0] == ("start", {"generation": 2, "count": 1})
+        phase, info = seen[1]
+        assert phase == "stop"
+        assert info["generation"] == 2
+        assert info["duration"] >= 0.0
+
+    def test_callbacks_implicit(self):
+        import gc
+        seen = []
+        def callback(phase, info):
+            seen.append((phase, info))
+        gc.callbacks.append(callback)
+        try:
+            self.set_stats({'STAT_MINOR_COLLECTIONS': 3.0,
+                            'STAT_TOTAL_MINOR_TIME': 0.5,
+                            'STAT_MAJOR_STARTED': 1.0})
+            assert seen == [
+                ("stop", {"generation": 0, "count": 3, "duration": 0.5}),
+                ("start", {"generation": 2, "count": 1})]
+            del seen[:]
+            self.set_stats({'STAT_MINOR_COLLECTIONS': 4.0,
+                            'STAT_TOTAL_MINOR_TIME': 0.75,
+                            'STAT_MAJOR_COLLECTIONS': 1.0,
+                            'STAT_TOTAL_MAJOR_TIME': 2.0})
+            assert seen == [
+                ("stop", {"generation": 0, "count": 1, "duration": 0.25}),
+                ("stop", {"generation": 2, "count": 1, "duration": 2.0})]
+            del seen[:]
+            self.set_stats({})
+            assert seen == []
+        finally:
+            gc.callbacks.remove(callback)
+
+    def test_callbacks_added_later(self):
+        import gc
+        self.set_stats({'STAT_MINOR_COLLECTIONS': 5.0,
+                        'STAT_TOTAL_MINOR_TIME': 1.5,
+                        'STAT_MAJOR_COLLECTIONS': 2.0,
+                        'STAT_TOTAL_MAJOR_TIME': 3.0})
+        seen = []
+        def callback(phase, info):
+            seen.append((phase, info))
+        gc.callbacks.append(callback)
+        try:
+            self.set_stats({'STAT_MINOR_COLLECTIONS': 7.0,
+                            'STAT_TOTAL_MINOR_TIME': 2.0,
+                            'STAT_MAJOR_COLLECTIONS': 2.0,
+                            'STAT_TOTAL_MAJOR_TIME': 3.0})
+            assert seen == [
+                ("stop", {"generation": 0, "count": 2, "duration": 0.5})]
+        finally:
+            gc.callbacks.remove(callback)
+        self.set_stats({})
+
+    def test_callback_error(self):
+        import gc, sys, StringIO
+        def callback(phase, info):
+            raise ValueError
+        gc.callbacks.append(callback)
+        prev = sys.stderr
+        sys.stderr = StringIO.StringIO()
+        try:
+            gc.collect()
+            output = sys.stderr.getvalue()
+        finally:
+            sys.stderr = prev
+            gc.callbacks.remove(callback)
+        assert 'gc callback' in output
+
+
+class AppTestGcParams(object):
+    def setup_class(cls):
+        from rpython.rlib import rgc
+        from pypy.interpreter.gateway import interp2app
+        calls = []
+        def fake_set_gc_param(param_no, value):
+            calls.append((param_no, value))
+            return param_no != rgc.GC_PARAM_GROWTH
+        def get_calls(space):
+            res = space.newlist([space.newtuple([space.wrap(param_no),
+                                                 space.wrap(value)])
+                                 for param_no, value in calls])
+            del calls[:]
+            return res
+        cls._set_gc_param = staticmethod(rgc.set_gc_param)
+        rgc.set_gc_param = fake_set_gc_param
+        cls.w_get_calls = cls.space.wrap(interp2app(get_calls))
+        cls.w_params = cls.space.wrap([rgc.GC_PARAM_NURSERY_SIZE,
+                                       rgc.GC_PARAM_MAJOR_COLLECT,
+                                       rgc.GC_PARAM_GROWTH,
+                                       rgc.GC_PARAM_MAX_HEAP_SIZE,
+                                       rgc.GC_PARAM_INCREMENT_STEP])
+
+    def teardown_class(cls):
+        from rpython.rlib import rgc
+        rgc.set_gc_param = cls._set_gc_param
+
+    def test_set_params(self):
+        import gc
+        nursery, major, growth, max_heap, step = self.params
+        gc.set_nursery_size(8 * 1024 * 1024)
+        gc.set_major_collect(1.5)
+        gc.set_max_heap_size(2 ** 32)
+        gc.set_max_heap_size(0)
+        gc.set_increment_step(1024)
+        assert self.get_calls() == [(nursery, 8 * 1024 * 1024.0),
+                                    (major, 1.5), (max_heap, 2.0 ** 32),
+                                    (max_heap, 0.0), (step, 1024.0)]
+        raises(NotImplementedError, gc.set_growth, 2.0)
+        assert self.get_calls() == [(growth, 2.0)]
+
+    def test_invalid_values(self):
+        import gc
+        raises(ValueError, gc.set_nursery_size, 0)
+        raises(ValueError, gc.set_major_collect, 1.0)
+        raises(ValueError, gc.set_growth, 0.5)
+        raises(ValueError, gc.set_max_heap_size, -1)
+        raises(ValueError, gc.set_increment_step, -5)
+        assert self.get_calls() == []
+
+
 class AppTestGcMethodCache(object):
     spaceconfig = {"objspace.std.withmethodcache": True}
 
@@ -2,7 +2,10 @@ from pypy.interpreter.mixedmodule import MixedModule
 
 
 class MultiArrayModule(MixedModule):
-    appleveldefs = {'arange': 'app_numpy.arange'}
+    appleveldefs = {
+        'arange': 'app_numpy.arange',
+        'median': 'app_numpy.median',
+    }
     interpleveldefs = {
         'ndarray': 'ndarray.W_NDimArray',
         'dtype': 'descriptor.W_Dtype',
@@ -16,6 +19,8 @@ class MultiArrayModule(MixedModule):
         'empty_like': 'ctors.empty_like',
         'fromstring': 'ctors.fromstring',
         'frombuffer': 'ctors.frombuffer',
+        'fromfile': 'ctors.fromfile',
+        'memmap': 'ctors.memmap',
 
         'concatenate': 'arrayops.concatenate',
         'count_nonzero': 'arrayops.count_nonzero',
@@ -23,6 +28,9 @@ class MultiArrayModule(MixedModule):
         'where': 'arrayops.where',
 
         'set_string_function': 'appbridge.set_string_function',
+        'set_num_threads': 'parallel.set_num_threads',
+        'set_parallel_threshold': 'parallel.set_parallel_threshold',
+        'set_lazy_threshold': 'lazy.set_lazy_threshold',
         'typeinfo': 'descriptor.get_dtype_cache(space).w_typeinfo',
         'nditer': 'nditer.W_NDIter',
     }
@@ -22,3 +22,46 @@ def arange(start, stop=None, step=1, dtype=None):
         arr[j] = i
         i += step
     return arr
+
+def median(a, axis=None, out=None, overwrite_input=False):
+    '''median(a, axis=None, out=None, overwrite_input=False)
+    Compute the median along the specified axis.  The middle items are
+    found with partition(), in linear time, on a copy of the array unless
+    overwrite_input is set.
+    '''
+    a = _numpypy.multiarray.array(a, copy=not overwrite_input)
+    if axis is None:
+        a = a.ravel()
+        axis = 0
+    elif axis < 0:
+        axis += a.ndim
+    n = a.shape[axis]
+    if n == 0:
+        # the median of nothing is a nan
+        shape = a.shape[:axis] + a.shape[axis + 1:]
+        if shape:
+            res = _numpypy.multiarray.empty(shape)
+            res.fill(float('nan'))
+        else:
+            res = _numpypy.multiarray.dtype('float64').type('nan')
+    else:
+        kth = [(n - 1) // 2, n // 2]
+        if a.dtype.kind == 'f':
+            # a nan is sorted last, and makes the median a nan
+            kth.append(n - 1)
+        a.partition(kth, axis=axis)
+        index = [slice(None)] * a.ndim
+        index[axis] = slice((n - 1) // 2, n // 2 + 1)
+        middle = a[tuple(index)]
+        res = middle.sum(axis=axis) / float(middle.shape[axis])
+        if a.dtype.kind == 'f':
+            index[axis] = n - 1
+            res = _numpypy.multiarray.where(
+                _numpypy.umath.isnan(a[tuple(index)]), a.dtype.type('nan'),
+                res)
+            if res.ndim == 0:
+                res = res[()]
+    if out is not None:
+        out[...] = res
+        return out
+    return res
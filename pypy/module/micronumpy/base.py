@@ -88,6 +88,8 @@ class W_NDimArray(W_Root):
 
 def convert_to_array(space, w_obj):
     from pypy.module.micronumpy.ctors import array
+    from pypy.module.micronumpy.lazy import prepare
     if isinstance(w_obj, W_NDimArray):
+        prepare(space, w_obj)
         return w_obj
     return array(space, w_obj)
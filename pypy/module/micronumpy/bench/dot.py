@@ -1,3 +1,13 @@
+"""Benchmark of dot() on matrices of several sizes and layouts.
+
+Usage: dot.py [size,size,...] [runs] [dtype]
+
+e.g. 'dot.py 100,300,1000 3 float32'.  For every size n, it times the
+product of two n x n matrices with the right operand in C order, in
+Fortran order (a transposed view) and as a strided view, and the product
+of a n x n matrix by a vector.
+"""
+
 import sys
 import time
 
@@ -6,27 +16,40 @@ try:
 except ImportError:
     import numpy
 
-def get_matrix(n):
-    import random
-    x = numpy.zeros((n,n), dtype=numpy.float64)
-    for i in range(n):
-        for j in range(n):
-            x[i][j] = random.random()
-    return x
-
-def main(n, r):
-    x = get_matrix(n)
-    y = get_matrix(n)
-    a = time.time()
-    for _ in xrange(r):
-        #z = numpy.dot(x, y)  # uses numpy possibly-blas-lib dot
-        z = numpy.core.multiarray.dot(x, y)  # uses strictly numpy C dot
-    b = time.time()
-    print '%d runs, %.2f seconds' % (r, b-a)
-
-n = int(sys.argv[1])
+def get_matrix(n, m, dtype):
+    return (numpy.arange(n * m) % 17 - 8).reshape(n, m).astype(dtype)
+
+def get_layouts(n, dtype):
+    x = get_matrix(n, n, dtype)
+    y = get_matrix(n, n, dtype)
+    y_wide = get_matrix(n, 2 * n, dtype)
+    return [
+        ('C order', x, y),
+        ('Fortran order', x, y.T.copy().T),
+        ('strided', x, y_wide[:, ::2]),
+        ('matrix-vector', x, y[:, 0].copy()),
+    ]
+
+def main(sizes, r, dtype):
+    for n in sizes:
+        for name, x, y in get_layouts(n, dtype):
+            a = time.time()
+            for _ in xrange(r):
+                #z = numpy.dot(x, y)  # uses numpy possibly-blas-lib dot
+                z = numpy.core.multiarray.dot(x, y)  # uses strictly numpy C dot
+            b = time.time()
+            print '%5d x %-5d %-14s %d runs, %.3f seconds' % (n, n, name,
+                                                             r, b - a)
+
+sizes = [100, 300, 1000]
+if len(sys.argv) > 1:
+    sizes = [int(n) for n in sys.argv[1].split(',')]
 try:
     r = int(sys.argv[2])
 except IndexError:
     r = 1
-main(n, r)
+try:
+    dtype = sys.argv[3]
+except IndexError:
+    dtype = 'float64'
+main(sizes, r, dtype)
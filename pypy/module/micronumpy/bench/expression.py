@@ -0,0 +1,35 @@
+"""Benchmark of an expression computed with and without the lazy arrays.
+
+Usage: expression.py [size] [runs]
+"""
+
+import sys
+import time
+
+import numpypy as numpy
+from numpypy import set_lazy_threshold
+
+def main(n, r):
+    a = numpy.arange(n, dtype='float64')
+    b = numpy.ones(n)
+    c = a * 0.5
+    d = b * 3
+    e = a + 7
+    for threshold in [0, 1000]:
+        set_lazy_threshold(threshold)
+        t0 = time.time()
+        for _ in xrange(r):
+            res = a * b + c * d - e
+            res[0]
+        t1 = time.time()
+        print 'threshold %-6d %d runs, %.3f seconds' % (threshold, r, t1 - t0)
+    set_lazy_threshold(0)
+
+n = 1000000
+if len(sys.argv) > 1:
+    n = int(sys.argv[1])
+try:
+    r = int(sys.argv[2])
+except IndexError:
+    r = 10
+main(n, r)
@@ -0,0 +1,41 @@
+"""Benchmark of the radix sort of the integer dtypes against the timsort,
+and of the median found with partition() against a full sort.
+
+Usage: sort.py [size] [runs]
+"""
+
+import sys
+import time
+
+import numpypy as numpy
+
+def timeit(name, f, r):
+    a = time.time()
+    for _ in xrange(r):
+        f()
+    b = time.time()
+    print '%-32s %d runs, %.3f seconds' % (name, r, b - a)
+
+def main(n, r):
+    from random import Random
+    rnd = Random(42)
+    values = [rnd.randint(-2**31, 2**31 - 1) for _ in xrange(n)]
+    for dtype in ['int8', 'int16', 'int32', 'int64']:
+        x = numpy.array(values, dtype=dtype)
+        for kind in ['quicksort', 'stable']:
+            timeit('%s sort(kind=%r)' % (dtype, kind),
+                   lambda: x.copy().sort(kind=kind), r)
+            timeit('%s argsort(kind=%r)' % (dtype, kind),
+                   lambda: x.argsort(kind=kind), r)
+    x = numpy.array(values, dtype='float64')
+    timeit('float64 sort()[n // 2]', lambda: x.copy().sort(), r)
+    timeit('float64 median()', lambda: numpy.median(x), r)
+
+n = 1000000
+if len(sys.argv) > 1:
+    n = int(sys.argv[1])
+try:
+    r = int(sys.argv[2])
+except IndexError:
+    r = 3
+main(n, r)
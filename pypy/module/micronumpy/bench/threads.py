@@ -0,0 +1,45 @@
+"""Benchmark of the ufuncs and reductions computed by several threads.
+
+Usage: threads.py [size] [threads,threads,...] [runs]
+
+e.g. 'threads.py 100000000 1,2,4,8,16 3'.
+"""
+
+import sys
+import time
+
+import numpypy as numpy
+from numpypy import set_num_threads
+
+def main(n, threads, r):
+    x = numpy.arange(n, dtype='float64')
+    y = numpy.ones(n)
+    tests = [
+        ('x + y', lambda: x + y),
+        ('x * 2.5', lambda: x * 2.5),
+        ('sqrt(x)', lambda: numpy.sqrt(x)),
+        ('x.sum()', lambda: x.sum()),
+        ('x.max()', lambda: x.max()),
+    ]
+    for nthreads in threads:
+        set_num_threads(nthreads)
+        for name, f in tests:
+            a = time.time()
+            for _ in xrange(r):
+                f()
+            b = time.time()
+            print '%2d threads %-8s %d runs, %.3f seconds' % (nthreads, name,
+                                                            r, b - a)
+    set_num_threads(1)
+
+n = 10000000
+if len(sys.argv) > 1:
+    n = int(sys.argv[1])
+threads = [1, 2, 4]
+if len(sys.argv) > 2:
+    threads = [int(t) for t in sys.argv[2].split(',')]
+try:
+    r = int(sys.argv[3])
+except IndexError:
+    r = 1
+main(n, threads, r)
@@ -37,6 +37,19 @@ class BaseConcreteArray(object):
         jit.hint(len(backstrides), promote=True)
         return backstrides
 
+    def is_flat(self, shape, dtype):
+        """ True if the items have this shape and dtype and are contiguous
+        in C order, so that they can be walked by adding the item size
+        """
+        if self.dtype is not dtype:
+            return False
+        if not dtype.is_native() and dtype.elsize > 1:
+            return False
+        if self.get_shape() != shape:
+            return False
+        strides, _ = calc_strides(shape, dtype, 'C')
+        return self.get_strides() == strides
+
     def getitem(self, index):
         return self.dtype.itemtype.read(self, index, 0)
 
@@ -310,6 +323,11 @@ class BaseConcreteArray(object):
         l_w = [w_res.descr_getitem(space, space.wrap(d)) for d in range(nd)]
         return space.newtuple(l_w)
 
+    def partition(self, space, w_axis, w_kth):
+        # in-place, so also on views
+        from pypy.module.micronumpy.sort import partition_array
+        return partition_array(self, space, w_axis, w_kth)
+
     def get_storage_as_int(self, space):
         return rffi.cast(lltype.Signed, self.storage) + self.start
 
@@ -356,13 +374,17 @@ class ConcreteArrayNotOwning(BaseConcreteArray):
         assert dtype.elsize == self.dtype.elsize
         self.dtype = dtype
 
-    def argsort(self, space, w_axis):
+    def argsort(self, space, w_axis, kind):
         from pypy.module.micronumpy.sort import argsort_array
-        return argsort_array(self, space, w_axis)
+        return argsort_array(self, space, w_axis, kind)
 
-    def sort(self, space, w_axis, w_order):
+    def sort(self, space, w_axis, w_order, kind):
         from pypy.module.micronumpy.sort import sort_array
-        return sort_array(self, space, w_axis, w_order)
+        return sort_array(self, space, w_axis, w_order, kind)
+
+    def argpartition(self, space, w_axis, w_kth):
+        from pypy.module.micronumpy.sort import argpartition_array
+        return argpartition_array(self, space, w_axis, w_kth)
 
     def base(self):
         return None
@@ -403,6 +425,29 @@ class NonWritableArray(ConcreteArray):
             "assignment destination is read-only"))
 
 
+class ConcreteMmapArray(ConcreteArrayNotOwning):
+    """ An array whose storage is a memory mapping of a file (an instance
+    of rpython.rlib.rmmap.MMap), unmapped when the array goes away
+    """
+    def __init__(self, shape, dtype, order, strides, backstrides, storage,
+                 mmap):
+        ConcreteArrayNotOwning.__init__(self, shape, dtype, order, strides,
+                                        backstrides, storage)
+        self.mmap = mmap
+
+    def __del__(self):
+        try:
+            self.mmap.close()
+        except OSError:
+            pass
+
+
+class ConcreteNonWritableMmapArray(ConcreteMmapArray):
+    def descr_setitem(self, space, orig_array, w_index, w_value):
+        raise OperationError(space.w_ValueError, space.wrap(
+            "assignment destination is read-only"))
+
+
 class SliceArray(BaseConcreteArray):
     def __init__(self, start, strides, backstrides, shape, parent, orig_arr,
                  dtype=None):
@@ -463,6 +508,29 @@ class SliceArray(BaseConcreteArray):
                           self, orig_array)
 
 
+class LazyArray(BaseConcreteArray):
+    """ The result of a ufunc that is not computed yet, see lazy.py.  It has
+    no storage: lazy.prepare() replaces it by a ConcreteArray before
+    anything reads the items.
+    """
+    _immutable_fields_ = ['sig', 'leaves[*]']
+
+    def __init__(self, shape, dtype, sig, leaves):
+        strides, backstrides = calc_strides(shape, dtype, 'C')
+        self.shape = shape[:]
+        self.strides = strides
+        self.backstrides = backstrides
+        self.order = 'C'
+        self.dtype = dtype
+        self.size = support.product(shape) * dtype.elsize
+        self.storage = lltype.nullptr(RAW_STORAGE)
+        self.sig = sig
+        self.leaves = leaves
+
+    def base(self):
+        return None
+
+
 class VoidBoxStorage(BaseConcreteArray):
     def __init__(self, size, dtype):
         self.storage = alloc_raw_storage(size)
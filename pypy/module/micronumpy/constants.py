@@ -74,6 +74,13 @@ CLIP = 0
 WRAP = 1
 RAISE = 2
 
+QUICKSORT = 0
+HEAPSORT = 1
+MERGESORT = 2
+STABLESORT = 2
+
+INTROSELECT = 0
+
 LITTLE = '<'
 BIG = '>'
 NATIVE = '='
@@ -1,4 +1,4 @@
-from pypy.interpreter.error import OperationError
+from pypy.interpreter.error import OperationError, oefmt
 from pypy.module.micronumpy import constants as NPY
 
 
@@ -41,6 +41,29 @@ def clipmode_converter(space, w_mode):
                          space.wrap("clipmode not understood"))
 
 
+def sortkind_converter(space, w_kind):
+    if space.is_none(w_kind):
+        return NPY.QUICKSORT
+    if space.isinstance_w(w_kind, space.w_str):
+        kind = space.str_w(w_kind)
+        if kind.startswith('Q') or kind.startswith('q'):
+            return NPY.QUICKSORT
+        if kind.startswith('H') or kind.startswith('h'):
+            return NPY.HEAPSORT
+        if kind.startswith('M') or kind.startswith('m'):
+            return NPY.MERGESORT
+        if kind.startswith('S') or kind.startswith('s'):
+            return NPY.STABLESORT
+    raise OperationError(space.w_ValueError,
+                         space.wrap("sort kind not understood"))
+
+
+def selectkind_converter(space, kind):
+    if kind == 'introselect':
+        return NPY.INTROSELECT
+    raise oefmt(space.w_ValueError, "Unknown selectkind '%s'", kind)
+
+
 def order_converter(space, w_order, default):
     if space.is_none(w_order):
         return default
@@ -1,11 +1,17 @@
-from pypy.interpreter.error import OperationError, oefmt
+import os
+
+from pypy.interpreter.error import OperationError, oefmt, wrap_oserror2
 from pypy.interpreter.gateway import unwrap_spec, WrappedDefault
+from rpython.rlib import rmmap
 from rpython.rlib.buffer import SubBuffer
+from rpython.rlib.rawstorage import RAW_STORAGE_PTR
 from rpython.rlib.rstring import strip_spaces
 from rpython.rtyper.lltypesystem import lltype, rffi
-from pypy.module.micronumpy import descriptor, loop
+from pypy.module.micronumpy import descriptor, loop, support, \
+    constants as NPY
 from pypy.module.micronumpy.base import W_NDimArray, convert_to_array
-from pypy.module.micronumpy.converters import shape_converter
+from pypy.module.micronumpy.converters import order_converter, \
+    shape_converter
 
 
 def build_scalar(space, w_dtype, w_state):
@@ -201,6 +207,33 @@ def fromstring(space, s, w_dtype=None, count=-1, sep=''):
         return _fromstring_text(space, s, count, sep, length, dtype)
 
 
+@unwrap_spec(count=int, sep=str, w_dtype=WrappedDefault(None))
+def fromfile(space, w_file, w_dtype=None, count=-1, sep=''):
+    dtype = space.interp_w(descriptor.W_Dtype,
+        space.call_function(space.gettypefor(descriptor.W_Dtype), w_dtype))
+    if dtype.elsize == 0:
+        raise oefmt(space.w_ValueError, "itemsize cannot be zero in type")
+    w_file, owned = support.open_file(space, w_file, 'rb')
+    try:
+        if sep == '' and count >= 0:
+            w_data = space.call_method(w_file, 'read',
+                                       space.wrap(count * dtype.elsize))
+        else:
+            w_data = space.call_method(w_file, 'read')
+    finally:
+        if owned:
+            space.call_method(w_file, 'close')
+    s = space.str_w(w_data)
+    length = len(s)
+    if sep == '':
+        # like numpy, ignore a trailing partial item and return fewer
+        # items than requested if the file is too short
+        count = length / dtype.elsize
+        return _fromstring_bin(space, s, count, count * dtype.elsize, dtype)
+    else:
+        return _fromstring_text(space, s, count, sep, length, dtype)
+
+
 def _getbuffer(space, w_buffer):
     try:
         return space.writebuf_w(w_buffer)
@@ -258,3 +291,106 @@ def frombuffer(space, w_buffer, w_dtype=None, count=-1, offset=0):
         writable = not buf.readonly
     return W_NDimArray.from_shape_and_storage(space, [n], storage, dtype=dtype,
                                               w_base=w_buffer, writable=writable)
+
+
+def _mmap_error(space, e):
+    if isinstance(e, rmmap.RValueError):
+        return OperationError(space.w_ValueError, space.wrap(e.message))
+    return OperationError(space.w_TypeError, space.wrap(e.message))
+
+
+@unwrap_spec(filename=str, mode=str, offset=int)
+def memmap(space, filename, w_dtype=None, mode='r+', offset=0, w_shape=None,
+           w_order=None):
+    """ An array backed directly by a memory mapping of (a part of) the
+    file 'filename', starting 'offset' bytes into it.  'mode' is 'r'
+    (read-only), 'r+' (read-write), 'w+' (create or overwrite the file,
+    'shape' must be given) or 'c' (copy-on-write, assignments are not
+    written back to the file).  Without a shape, the array is 1-d and
+    covers the rest of the file.
+    """
+    from pypy.module.micronumpy import concrete
+    from pypy.module.micronumpy.strides import calc_strides
+    if space.is_none(w_dtype):
+        dtype = descriptor.get_dtype_cache(space).w_uint8dtype
+    else:
+        dtype = space.interp_w(descriptor.W_Dtype,
+            space.call_function(space.gettypefor(descriptor.W_Dtype), w_dtype))
+    itemsize = dtype.elsize
+    if itemsize == 0:
+        raise oefmt(space.w_ValueError, "itemsize cannot be zero in type")
+    if offset < 0:
+        raise oefmt(space.w_ValueError, "offset must be non-negative")
+    if order_converter(space, w_order, NPY.CORDER) == NPY.FORTRANORDER:
+        order = 'F'
+    else:
+        order = 'C'
+    if mode == 'r' or mode == 'c':
+        flags = os.O_RDONLY
+    elif mode == 'r+':
+        flags = os.O_RDWR
+    elif mode == 'w+':
+        flags = os.O_RDWR | os.O_CREAT | os.O_TRUNC
+        if space.is_none(w_shape):
+            raise oefmt(space.w_ValueError,
+                        "shape must be given if mode == 'w+'")
+    else:
+        raise oefmt(space.w_ValueError,
+                    "mode must be one of 'r', 'c', 'r+' or 'w+', not '%s'",
+                    mode)
+    try:
+        fd = os.open(filename, flags, 0666)
+    except OSError as e:
+        raise wrap_oserror2(space, e, space.wrap(filename), 'w_IOError')
+    try:
+        try:
+            filesize = os.fstat(fd).st_size
+            if space.is_none(w_shape):
+                available = filesize - offset
+                if available <= 0:
+                    raise oefmt(space.w_ValueError,
+                                "offset is beyond the end of the file")
+                if available % itemsize != 0:
+                    raise oefmt(space.w_ValueError,
+                                "size of available data is not a multiple "
+                                "of the data-type size")
+                shape = [available / itemsize]
+            else:
+                shape = shape_converter(space, w_shape, dtype)
+            nbytes = support.product(shape) * itemsize
+            if nbytes == 0:
+                raise oefmt(space.w_ValueError,
+                            "cannot map an array of size 0")
+            if filesize < offset + nbytes:
+                if flags == os.O_RDONLY:
+                    raise oefmt(space.w_ValueError,
+                                "mmap length is greater than file size")
+                os.ftruncate(fd, offset + nbytes)
+            # the offset of a mapping must be a multiple of the allocation
+            # granularity: map from the start of that block
+            delta = offset % rmmap.ALLOCATIONGRANULARITY
+            # mode 'r' maps the file copy-on-write too: no write through
+            # the array (e.g. as the out argument of a ufunc) can fault
+            # or reach the file
+            if mode == 'r+' or mode == 'w+':
+                access = rmmap.ACCESS_WRITE
+            else:
+                access = rmmap.ACCESS_COPY
+            mm = rmmap.mmap(fd, nbytes + delta, access=access,
+                            offset=offset - delta)
+        except OSError as e:
+            raise wrap_oserror2(space, e, space.wrap(filename), 'w_IOError')
+        except rmmap.RMMapError as e:
+            raise _mmap_error(space, e)
+    finally:
+        os.close(fd)
+    storage = rffi.cast(RAW_STORAGE_PTR, mm.getptr(delta))
+    strides, backstrides = calc_strides(shape, dtype, order)
+    if mode == 'r':
+        impl = concrete.ConcreteNonWritableMmapArray(shape, dtype, order,
+                                                     strides, backstrides,
+                                                     storage, mm)
+    else:
+        impl = concrete.ConcreteMmapArray(shape, dtype, order, strides,
+                                          backstrides, storage, mm)
+    return W_NDimArray(impl)
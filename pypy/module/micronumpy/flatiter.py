@@ -1,5 +1,5 @@
 from pypy.interpreter.error import OperationError, oefmt
-from pypy.module.micronumpy import loop
+from pypy.module.micronumpy import lazy, loop
 from pypy.module.micronumpy.base import W_NDimArray, convert_to_array
 from pypy.module.micronumpy.concrete import BaseConcreteArray
 
@@ -19,6 +19,9 @@ class FakeArrayImplementation(BaseConcreteArray):
     def get_shape(self):
         return self.shape
 
+    def is_flat(self, shape, dtype):
+        return False
+
     def create_iter(self, shape=None, backward_broadcast=False):
         assert isinstance(self.base(), W_NDimArray)
         return self.base().create_iter()
@@ -72,6 +75,7 @@ class W_FlatIterator(W_NDimArray):
         base = self.base
         start, stop, step, length = space.decode_index4(w_idx, base.get_size())
         arr = convert_to_array(space, w_value)
+        lazy.prepare(space, base)
         loop.flatiter_setitem(space, self.base, arr, start, step, length)
 
     def descr_iter(self):
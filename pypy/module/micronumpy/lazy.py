@@ -0,0 +1,398 @@
+""" Deferred evaluation of the element-wise ufuncs.
+
+When set_lazy_threshold() has been given a size, calling a ufunc on arrays
+of at least this many items returns an array whose items are not computed
+yet: its implementation is a concrete.LazyArray, which holds the
+expression as a Signature and the arrays that the expression reads, its
+leaves.  A lazy array used as an operand of another ufunc is not computed
+either, its expression becomes part of the new one, so that an expression
+like 'a * b + c * d - e' is computed by a single loop when its result is
+needed, without the temporary arrays of the intermediate results.  The
+loop has the signature as a green variable, so there is one compiled loop
+per shape of expression and dtypes.
+
+Signatures are interned: two expressions of the same shape share the same
+Signature instance, and a Signature is never modified.
+
+A lazy array is computed by prepare(), before anything other than a ufunc
+reads it.  The leaves are read only then, so prepare() also computes the
+lazy arrays that read the storage of an array before anything is done
+with that array, as it may be written to.  Writes through a buffer or a
+C pointer obtained before the lazy array was made are not seen.
+"""
+
+import weakref
+
+from pypy.interpreter.error import oefmt
+from pypy.interpreter.gateway import unwrap_spec
+from rpython.rlib import jit
+from rpython.rlib.rawstorage import RAW_STORAGE
+from rpython.rtyper.lltypesystem import lltype
+from rpython.tool.sourcetools import func_with_new_name
+from pypy.module.micronumpy import support
+from pypy.module.micronumpy.base import W_NDimArray
+
+
+# an expression cannot have more leaves and operations than that, so
+# that the loops stay reasonably small
+MAX_NODES = 32
+
+# at most that many lazy arrays are pending: prepare() looks at all of
+# them, so past that the oldest ones are computed
+MAX_PENDING = 16
+
+
+class Signature(object):
+    _immutable_fields_ = ['nodes']
+
+    def eval(self, space, leaves, i):
+        """ Return the item i of the expression, boxed in its dtype """
+        raise NotImplementedError
+
+    def shifted(self, state, offset):
+        """ Return the same expression on the leaves offset, offset+1... """
+        raise NotImplementedError
+
+
+class LeafSignature(Signature):
+    """ Reads the item of leaves[index], an array with this dtype, which
+    is either flat or a 0-d array (scalar=True).
+    """
+    _immutable_fields_ = ['index', 'dtype', 'scalar']
+
+    def __init__(self, index, dtype, scalar):
+        self.index = index
+        self.dtype = dtype
+        self.scalar = scalar
+        self.nodes = 1
+
+    def eval(self, space, leaves, i):
+        impl = leaves[self.index]
+        if self.scalar:
+            offset = impl.start
+        else:
+            offset = impl.start + i * self.dtype.elsize
+        return self.dtype.itemtype.read(impl, offset, 0)
+
+    def shifted(self, state, offset):
+        return state.leaf(self.index + offset, self.dtype, self.scalar)
+
+
+class Call1Signature(Signature):
+    _immutable_fields_ = ['ufunc', 'calc_dtype', 'res_dtype', 'child']
+
+    def __init__(self, ufunc, calc_dtype, res_dtype, child):
+        self.ufunc = ufunc
+        self.calc_dtype = calc_dtype
+        self.res_dtype = res_dtype
+        self.child = child
+        self.nodes = child.nodes + 1
+
+    def eval(self, space, leaves, i):
+        w_obj = self.child.eval(space, leaves, i).convert_to(space,
+                                                             self.calc_dtype)
+        return self.ufunc.func(self.calc_dtype, w_obj).convert_to(space,
+                                                            self.res_dtype)
+
+    def shifted(self, state, offset):
+        return state.call1(self.ufunc, self.calc_dtype, self.res_dtype,
+                           self.child.shifted(state, offset))
+
+
+class Call2Signature(Signature):
+    _immutable_fields_ = ['ufunc', 'calc_dtype', 'res_dtype', 'left', 'right']
+
+    def __init__(self, ufunc, calc_dtype, res_dtype, left, right):
+        self.ufunc = ufunc
+        self.calc_dtype = calc_dtype
+        self.res_dtype = res_dtype
+        self.left = left
+        self.right = right
+        self.nodes = left.nodes + right.nodes + 1
+
+    def eval(self, space, leaves, i):
+        w_left = self.left.eval(space, leaves, i).convert_to(space,
+                                                             self.calc_dtype)
+        w_right = self.right.eval(space, leaves, i).convert_to(space,
+                                                               self.calc_dtype)
+        return self.ufunc.func(self.calc_dtype, w_left, w_right).convert_to(
+            space, self.res_dtype)
+
+    def shifted(self, state, offset):
+        return state.call2(self.ufunc, self.calc_dtype, self.res_dtype,
+                           self.left.shifted(state, offset),
+                           self.right.shifted(state, offset))
+
+
+class LazyState(object):
+    def __init__(self, space):
+        self.threshold = 0
+        # weakrefs to the W_NDimArrays that may still be lazy
+        self.pending = []
+        self.leaf_sigs = {}
+        self.call1_sigs = {}
+        self.call2_sigs = {}
+
+    def leaf(self, index, dtype, scalar):
+        key = (index, dtype, scalar)
+        try:
+            return self.leaf_sigs[key]
+        except KeyError:
+            sig = LeafSignature(index, dtype, scalar)
+            self.leaf_sigs[key] = sig
+            return sig
+
+    def call1(self, ufunc, calc_dtype, res_dtype, child):
+        key = (ufunc, calc_dtype, res_dtype, child)
+        try:
+            return self.call1_sigs[key]
+        except KeyError:
+            sig = Call1Signature(ufunc, calc_dtype, res_dtype, child)
+            self.call1_sigs[key] = sig
+            return sig
+
+    def call2(self, ufunc, calc_dtype, res_dtype, left, right):
+        key = (ufunc, calc_dtype, res_dtype, left, right)
+        try:
+            return self.call2_sigs[key]
+        except KeyError:
+            sig = Call2Signature(ufunc, calc_dtype, res_dtype, left, right)
+            self.call2_sigs[key] = sig
+            return sig
+
+
+def get_lazy_state(space):
+    return space.fromcache(LazyState)
+
+
+def _is_lazy(w_arr):
+    from pypy.module.micronumpy.concrete import LazyArray
+    return isinstance(w_arr.implementation, LazyArray)
+
+
+def _storage(impl):
+    """ The raw storage whose items impl reads, or NULL """
+    from pypy.module.micronumpy.concrete import ConcreteArrayNotOwning, \
+        SliceArray
+    if isinstance(impl, ConcreteArrayNotOwning) or \
+            isinstance(impl, SliceArray):
+        return impl.storage
+    return lltype.nullptr(RAW_STORAGE)
+
+
+def prepare(space, w_arr):
+    """ Compute w_arr if it is lazy, and the lazy arrays that read its
+    storage.  To call before w_arr is used by anything else than a ufunc.
+    """
+    if _is_lazy(w_arr):
+        force(space, w_arr)
+    state = get_lazy_state(space)
+    if not state.pending:
+        return
+    storage = _storage(w_arr.implementation)
+    if storage != lltype.nullptr(RAW_STORAGE):
+        _force_readers(space, state, storage)
+
+
+def _force_readers(space, state, storage):
+    pending = state.pending
+    state.pending = []
+    for ref in pending:
+        w_lazy = ref()
+        if w_lazy is None or not _is_lazy(w_lazy):
+            continue
+        if _reads(w_lazy.implementation, storage):
+            force(space, w_lazy)
+        else:
+            state.pending.append(ref)
+
+
+def _reads(impl, storage):
+    from pypy.module.micronumpy.concrete import LazyArray
+    assert isinstance(impl, LazyArray)
+    for leaf in impl.leaves:
+        if _storage(leaf) == storage:
+            return True
+    return False
+
+
+def force_operand(space, w_arr):
+    """ Compute w_arr if it is lazy; unlike prepare(), this is only for
+    reading w_arr.
+    """
+    if _is_lazy(w_arr):
+        force(space, w_arr)
+
+
+lazy_driver = jit.JitDriver(name='numpy_lazy', greens=['sig'], reds='auto')
+
+
+def force(space, w_arr):
+    from pypy.module.micronumpy.concrete import ConcreteArray, LazyArray
+    impl = w_arr.implementation
+    assert isinstance(impl, LazyArray)
+    dtype = impl.dtype
+    out = ConcreteArray(impl.get_shape(), dtype, 'C', impl.get_strides(),
+                        impl.get_backstrides(), zero=False)
+    sig = impl.sig
+    leaves = impl.leaves
+    size = support.product(impl.get_shape())
+    i = 0
+    while i < size:
+        lazy_driver.jit_merge_point(sig=sig)
+        out.setitem(i * dtype.elsize, sig.eval(space, leaves, i))
+        i += 1
+    w_arr.implementation = out
+
+
+def _add_operand(space, state, w_arr, shape, leaves):
+    """ Return the signature that reads w_arr as an operand of the given
+    shape, after the leaves already collected, and add its leaves.  Return
+    None if w_arr cannot be part of a lazy expression.
+    """
+    from pypy.module.micronumpy.concrete import LazyArray
+    if type(w_arr) is not W_NDimArray:
+        # a subtype, or a flatiter
+        return None
+    impl = w_arr.implementation
+    if isinstance(impl, LazyArray):
+        if impl.get_shape() != shape:
+            return None
+        sig = impl.sig.shifted(state, len(leaves))
+        leaves.extend(impl.leaves)
+        return sig
+    dtype = impl.dtype
+    if dtype.is_flexible():
+        return None
+    if len(impl.get_shape()) == 0:
+        scalar = True
+    elif impl.is_flat(shape, dtype):
+        scalar = False
+    else:
+        return None
+    if _storage(impl) == lltype.nullptr(RAW_STORAGE):
+        return None
+    leaves.append(impl)
+    return state.leaf(len(leaves) - 1, dtype, scalar)
+
+
+def _lazy_result(space, state, shape, res_dtype, sig, leaves):
+    from pypy.module.micronumpy.concrete import LazyArray
+    if sig.nodes > MAX_NODES:
+        return None
+    fixed = [None] * len(leaves)
+    for i in range(len(leaves)):
+        fixed[i] = leaves[i]
+    impl = LazyArray(shape, res_dtype, sig, fixed)
+    w_res = W_NDimArray(impl)
+    if len(state.pending) >= MAX_PENDING:
+        _shrink_pending(space, state)
+    state.pending.append(weakref.ref(w_res))
+    return w_res
+
+
+def _shrink_pending(space, state):
+    """ Forget the pending arrays that are not lazy any more, then compute
+    the oldest ones until only half of MAX_PENDING are left, so that this
+    runs at most once every MAX_PENDING // 2 new lazy arrays.
+    """
+    pending = []
+    for ref in state.pending:
+        w_lazy = ref()
+        if w_lazy is not None and _is_lazy(w_lazy):
+            pending.append(ref)
+    extra = len(pending) - MAX_PENDING // 2
+    for i in range(extra):
+        w_lazy = pending[i]()
+        if w_lazy is not None and _is_lazy(w_lazy):
+            force(space, w_lazy)
+    if extra > 0:
+        pending = pending[extra:]
+    state.pending = pending
+
+
+def _enabled(space, state, shape, res_dtype):
+    return (state.threshold > 0 and len(shape) > 0 and
+            support.product(shape) >= state.threshold and
+            not res_dtype.is_flexible())
+
+
+def call1(space, ufunc, shape, calc_dtype, res_dtype, w_obj, out):
+    """ Return a lazy array for ufunc(w_obj), or None if the ufunc must be
+    computed now, in which case w_obj is computed.
+    """
+    state = get_lazy_state(space)
+    if out is None and _enabled(space, state, shape, res_dtype):
+        leaves = []
+        child = _add_operand(space, state, w_obj, shape, leaves)
+        if child is not None:
+            sig = state.call1(ufunc, calc_dtype, res_dtype, child)
+            w_res = _lazy_result(space, state, shape, res_dtype, sig, leaves)
+            if w_res is not None:
+                return w_res
+    force_operand(space, w_obj)
+    return None
+
+
+def call2(space, ufunc, shape, calc_dtype, res_dtype, w_lhs, w_rhs, out):
+    """ Return a lazy array for ufunc(w_lhs, w_rhs), or None if the ufunc
+    must be computed now, in which case w_lhs and w_rhs are computed.
+    """
+    state = get_lazy_state(space)
+    if out is None and _enabled(space, state, shape, res_dtype):
+        leaves = []
+        left = _add_operand(space, state, w_lhs, shape, leaves)
+        right = None
+        if left is not None:
+            right = _add_operand(space, state, w_rhs, shape, leaves)
+        if right is not None:
+            sig = state.call2(ufunc, calc_dtype, res_dtype, left, right)
+            w_res = _lazy_result(space, state, shape, res_dtype, sig, leaves)
+            if w_res is not None:
+                return w_res
+            if _is_lazy(w_lhs) or _is_lazy(w_rhs):
+                # too big: compute the operands, and start a new expression
+                force_operand(space, w_lhs)
+                force_operand(space, w_rhs)
+                return call2(space, ufunc, shape, calc_dtype, res_dtype,
+                             w_lhs, w_rhs, None)
+    force_operand(space, w_lhs)
+    force_operand(space, w_rhs)
+    return None
+
+
+def forcing(func):
+    """ Return a wrapper of the W_NDimArray method func, with the same
+    arguments, that calls prepare() on the array and on the arguments
+    that are arrays first.
+    """
+    code = func.func_code
+    argnames = code.co_varnames[:code.co_argcount]
+    assert argnames[:2] == ('self', 'space')
+    lines = ['def wrapper(%s):' % ', '.join(argnames),
+             '    prepare(space, self)']
+    for name in argnames[2:]:
+        if name.startswith('w_'):
+            lines.append('    if isinstance(%s, W_NDimArray):' % name)
+            lines.append('        prepare(space, %s)' % name)
+    lines.append('    return func(%s)' % ', '.join(argnames))
+    d = {'func': func, 'prepare': prepare, 'W_NDimArray': W_NDimArray}
+    exec '\n'.join(lines) in d
+    wrapper = func_with_new_name(d['wrapper'], func.func_name)
+    wrapper.func_defaults = func.func_defaults
+    wrapper.__dict__.update(func.__dict__)
+    return wrapper
+
+
+@unwrap_spec(size=int)
+def set_lazy_threshold(space, size):
+    """ Make the element-wise ufuncs on arrays of at least this many items
+    return lazy arrays, and return the previous threshold.  0, the
+    default, disables the lazy arrays.
+    """
+    if size < 0:
+        raise oefmt(space.w_ValueError, "threshold must not be negative")
+    state = get_lazy_state(space)
+    old = state.threshold
+    state.threshold = size
+    return space.wrap(old)
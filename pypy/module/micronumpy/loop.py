@@ -6,7 +6,7 @@ from pypy.interpreter.error import OperationError
 from rpython.rlib import jit
 from rpython.rlib.rstring import StringBuilder
 from rpython.rtyper.lltypesystem import lltype, rffi
-from pypy.module.micronumpy import support, constants as NPY
+from pypy.module.micronumpy import support, parallel, constants as NPY
 from pypy.module.micronumpy.base import W_NDimArray
 from pypy.module.micronumpy.iterators import PureShapeIter, AxisIter, \
     AllButAxisIter
@@ -17,7 +17,8 @@ call2_driver = jit.JitDriver(
     greens=['shapelen', 'func', 'calc_dtype', 'res_dtype'],
     reds='auto')
 
-def call2(space, shape, func, calc_dtype, res_dtype, w_lhs, w_rhs, out):
+def call2(space, shape, func, calc_dtype, res_dtype, w_lhs, w_rhs, out,
+          parallel_op=-1):
     # handle array_priority
     # w_lhs and w_rhs could be of different ndarray subtypes. Numpy does:
     # 1. if __array_priorities__ are equal and one is an ndarray and the
@@ -45,6 +46,18 @@ def call2(space, shape, func, calc_dtype, res_dtype, w_lhs, w_rhs, out):
     if out is None:
         out = W_NDimArray.from_shape(space, shape, res_dtype,
                                      w_instance=lhs_for_subtype)
+    if (parallel_op >= 0 and calc_dtype is res_dtype and
+            parallel.call2(space, parallel_op, shape, calc_dtype, w_lhs, w_rhs,
+                           out)):
+        return out
+    if (calc_dtype is res_dtype and
+            w_lhs.implementation.is_flat(shape, calc_dtype) and
+            w_rhs.implementation.is_flat(shape, calc_dtype) and
+            out.implementation.is_flat(shape, res_dtype)):
+        call2_flat(space, support.product(shape), func, calc_dtype,
+                   w_lhs.implementation, w_rhs.implementation,
+                   out.implementation)
+        return out
     left_iter, left_state = w_lhs.create_iter(shape)
     right_iter, right_state = w_rhs.create_iter(shape)
     out_iter, out_state = out.create_iter(shape)
@@ -61,14 +74,48 @@ def call2(space, shape, func, calc_dtype, res_dtype, w_lhs, w_rhs, out):
         out_state = out_iter.next(out_state)
     return out
 
+call2_flat_driver = jit.JitDriver(
+    name='numpy_call2_flat',
+    greens=['func', 'dtype'],
+    reds='auto')
+
+def call2_flat(space, size, func, dtype, left, right, out):
+    # the three arrays are contiguous, with the same shape and dtype.  The
+    # loop does two items per iteration, so that the JIT can turn them
+    # into packed instructions (see optimizeopt/vectorize.py)
+    left_ofs = left.start
+    right_ofs = right.start
+    out_ofs = out.start
+    i = 0
+    while i + 1 < size:
+        call2_flat_driver.jit_merge_point(func=func, dtype=dtype)
+        # a constant, but also the guard_not_invalidated at the start
+        itemsize = dtype.elsize
+        w_res = func(dtype, left.getitem(left_ofs), right.getitem(right_ofs))
+        out.setitem(out_ofs, w_res.convert_to(space, dtype))
+        w_res = func(dtype, left.getitem(left_ofs + itemsize),
+                     right.getitem(right_ofs + itemsize))
+        out.setitem(out_ofs + itemsize, w_res.convert_to(space, dtype))
+        left_ofs += 2 * itemsize
+        right_ofs += 2 * itemsize
+        out_ofs += 2 * itemsize
+        i += 2
+    if i < size:
+        w_res = func(dtype, left.getitem(left_ofs), right.getitem(right_ofs))
+        out.setitem(out_ofs, w_res.convert_to(space, dtype))
+
 call1_driver = jit.JitDriver(
     name='numpy_call1',
     greens=['shapelen', 'func', 'calc_dtype', 'res_dtype'],
     reds='auto')
 
-def call1(space, shape, func, calc_dtype, res_dtype, w_obj, out):
+def call1(space, shape, func, calc_dtype, res_dtype, w_obj, out,
+          parallel_op=-1):
     if out is None:
         out = W_NDimArray.from_shape(space, shape, res_dtype, w_instance=w_obj)
+    if (parallel_op >= 0 and calc_dtype is res_dtype and
+            parallel.call1(space, parallel_op, shape, calc_dtype, w_obj, out)):
+        return out
     obj_iter, obj_state = w_obj.create_iter(shape)
     out_iter, out_state = out.create_iter(shape)
     shapelen = len(shape)
@@ -109,7 +156,12 @@ reduce_driver = jit.JitDriver(name='numpy_reduce',
                                         'calc_dtype'],
                               reds = 'auto')
 
-def compute_reduce(space, obj, calc_dtype, func, done_func, identity):
+def compute_reduce(space, obj, calc_dtype, func, done_func, identity,
+                   parallel_op=-1):
+    if parallel_op >= 0:
+        w_res = parallel.reduce(space, parallel_op, obj, calc_dtype)
+        if w_res is not None:
+            return w_res
     obj_iter, obj_state = obj.create_iter()
     if identity is None:
         cur_value = obj_iter.getitem(obj_state).convert_to(space, calc_dtype)
@@ -273,6 +325,82 @@ def _new_argmin_argmax(op_name):
 argmin = _new_argmin_argmax('min')
 argmax = _new_argmin_argmax('max')
 
+class DotOperand(object):
+    """ The storage of a 2-d operand of dtype.itemtype.dot_blocked(), with
+    the offset of its first item and its strides in bytes.
+    """
+    def __init__(self, storage, offset, stride0, stride1):
+        self.storage = storage
+        self.offset = offset
+        self.stride0 = stride0
+        self.stride1 = stride1
+
+# below this number of multiplications, the loop of multidim_dot() is fine
+DOT_BLOCKED_MIN_SIZE = 4096
+
+def _dot_blocked_dtype(dtype):
+    if dtype.is_bool():
+        return False
+    return dtype.is_int() or dtype.is_float() or dtype.is_complex()
+
+def _same_native_dtype(arr, dtype):
+    arr_dtype = arr.get_dtype()
+    return arr_dtype.num == dtype.num and arr_dtype.is_native()
+
+def _dot_blocked(left, right, result, dtype):
+    """ Compute left.dot(right) with dtype.itemtype.dot_blocked(), which
+    works on the raw storage instead of boxing every item.  Only if both
+    operands have 1 or 2 dimensions and the same native dtype as the
+    result.  Returns False if it is not possible.
+    """
+    left_shape = left.get_shape()
+    right_shape = right.get_shape()
+    if len(left_shape) > 2 or len(right_shape) > 2:
+        return False
+    if len(left_shape) < 2 and len(right_shape) < 2:
+        return False
+    if not (_dot_blocked_dtype(dtype) and dtype.is_native() and
+            _same_native_dtype(left, dtype) and
+            _same_native_dtype(right, dtype)):
+        return False
+    k = left_shape[-1]
+    n = left_shape[0] if len(left_shape) == 2 else 1
+    m = right_shape[1] if len(right_shape) == 2 else 1
+    if n * k * m < DOT_BLOCKED_MIN_SIZE:
+        return False
+    left_impl = left.implementation
+    right_impl = right.implementation
+    out_impl = result.implementation
+    left_strides = left_impl.get_strides()
+    right_strides = right_impl.get_strides()
+    out_strides = out_impl.get_strides()
+    if len(left_shape) == 2:
+        a = DotOperand(left_impl.storage, left_impl.start,
+                       left_strides[0], left_strides[1])
+    else:
+        a = DotOperand(left_impl.storage, left_impl.start,
+                       0, left_strides[0])
+    if len(right_shape) == 2:
+        b = DotOperand(right_impl.storage, right_impl.start,
+                       right_strides[0], right_strides[1])
+    else:
+        b = DotOperand(right_impl.storage, right_impl.start,
+                       right_strides[0], 0)
+    if len(left_shape) == 2 and len(right_shape) == 2:
+        c = DotOperand(out_impl.storage, out_impl.start,
+                       out_strides[0], out_strides[1])
+    elif len(left_shape) == 2:
+        c = DotOperand(out_impl.storage, out_impl.start,
+                       out_strides[0], 0)
+    else:
+        c = DotOperand(out_impl.storage, out_impl.start,
+                       0, out_strides[0])
+    # copying the blocks of the right operand pays off if they are used
+    # by enough rows of the left one
+    pack = n >= 4 and m > 1
+    dtype.itemtype.dot_blocked(a, b, c, n, k, m, pack)
+    return True
+
 dot_driver = jit.JitDriver(name = 'numpy_dot',
                            greens = ['dtype'],
                            reds = 'auto')
@@ -297,6 +425,8 @@ def multidim_dot(space, left, right, result, dtype, right_critical_dim):
     right_impl = right.implementation
     assert left_shape[-1] == right_shape[right_critical_dim]
     assert result.get_dtype() == dtype
+    if _dot_blocked(left, right, result, dtype):
+        return result
     outi, outs = result.create_iter()
     lefti = AllButAxisIter(left_impl, len(left_shape) - 1)
     righti = AllButAxisIter(right_impl, right_critical_dim)
@@ -493,6 +623,46 @@ def tostring(space, arr):
         state = iter.next(state)
     return builder.build()
 
+TOFILE_CHUNK = 1 << 16
+
+tofile_driver = jit.JitDriver(name = 'numpy_tofile',
+                              greens = ['itemsize'],
+                              reds = 'auto')
+
+def tofile(space, arr, w_write):
+    """ Write the bytes of the items of arr in C order, by calling w_write
+    with strings of about TOFILE_CHUNK bytes.  A C-contiguous array is
+    written straight from its storage.
+    """
+    from pypy.module.micronumpy.strides import calc_strides
+    impl = arr.implementation
+    dtype = impl.dtype
+    itemsize = dtype.elsize
+    c_strides, _ = calc_strides(impl.get_shape(), dtype, 'C')
+    if impl.get_strides() == c_strides:
+        data = rffi.cast(rffi.CCHARP, impl.get_storage_as_int(space))
+        total = impl.get_size() * itemsize
+        pos = 0
+        while pos < total:
+            length = min(TOFILE_CHUNK, total - pos)
+            chunk = rffi.charpsize2str(rffi.ptradd(data, pos), length)
+            space.call_function(w_write, space.wrap(chunk))
+            pos += length
+        return
+    storage = rffi.cast(rffi.CCHARP, impl.get_storage())
+    builder = StringBuilder()
+    iter, state = impl.create_iter()
+    while not iter.done(state):
+        tofile_driver.jit_merge_point(itemsize=itemsize)
+        for i in range(itemsize):
+            builder.append(storage[state.offset + i])
+        if builder.getlength() >= TOFILE_CHUNK:
+            space.call_function(w_write, space.wrap(builder.build()))
+            builder = StringBuilder()
+        state = iter.next(state)
+    if builder.getlength() > 0:
+        space.call_function(w_write, space.wrap(builder.build()))
+
 getitem_int_driver = jit.JitDriver(name = 'numpy_getitem_int',
                                    greens = ['shapelen', 'indexlen',
                                              'prefixlen', 'dtype'],
@@ -9,14 +9,15 @@ from rpython.rlib.rawstorage import RAW_STORAGE_PTR
 from rpython.rtyper.lltypesystem import rffi
 from rpython.tool.sourcetools import func_with_new_name
 from pypy.module.micronumpy import descriptor, ufuncs, boxes, arrayops, loop, \
-    support, constants as NPY
+    lazy, support, constants as NPY
 from pypy.module.micronumpy.appbridge import get_appbridge_cache
 from pypy.module.micronumpy.arrayops import repeat, choose, put
 from pypy.module.micronumpy.base import W_NDimArray, convert_to_array, \
     ArrayArgumentException, wrap_impl
 from pypy.module.micronumpy.concrete import BaseConcreteArray
 from pypy.module.micronumpy.converters import multi_axis_converter, \
-    order_converter, shape_converter
+    order_converter, shape_converter, sortkind_converter, \
+    selectkind_converter
 from pypy.module.micronumpy.flagsobj import W_FlagsObject
 from pypy.module.micronumpy.flatiter import W_FlatIterator
 from pypy.module.micronumpy.strides import get_shape_from_iterable, \
@@ -544,8 +545,25 @@ class __extend__(W_NDimArray):
     def fdel___pypy_data__(self, space):
         self.w_pypy_data = None
 
+    @unwrap_spec(kind=str)
+    def descr_argpartition(self, space, w_kth, w_axis=None,
+                           kind='introselect', w_order=None):
+        selectkind_converter(space, kind)
+        if not space.is_none(w_order):
+            raise OperationError(space.w_NotImplementedError, space.wrap(
+                "order not implemented"))
+        if self.is_scalar():
+            raise OperationError(space.w_ValueError, space.wrap(
+                "a 0-d array cannot be partitioned"))
+        # a contiguous native copy, as in descr_argsort
+        dtype = self.get_dtype().descr_newbyteorder(space, NPY.NATIVE)
+        contig = self.implementation.astype(space, dtype)
+        return contig.argpartition(space, w_axis, w_kth)
+
     def descr_argsort(self, space, w_axis=None, w_kind=None, w_order=None):
-        # happily ignore the kind
+        # kind='stable' (or 'mergesort') of integers is a radix sort,
+        # everything else is a timsort
+        kind = sortkind_converter(space, w_kind)
         # create a contiguous copy of the array
         # we must do that, because we need a working set. otherwise
         # we would modify the array in-place. Use this to our advantage
@@ -554,7 +572,7 @@ class __extend__(W_NDimArray):
             return space.wrap(0)
         dtype = self.get_dtype().descr_newbyteorder(space, NPY.NATIVE)
         contig = self.implementation.astype(space, dtype)
-        return contig.argsort(space, w_axis)
+        return contig.argsort(space, w_axis, kind)
 
     def descr_astype(self, space, w_dtype):
         cur_dtype = self.get_dtype()
@@ -619,15 +637,19 @@ class __extend__(W_NDimArray):
             "ctypes not implemented yet"))
 
     def buffer_w(self, space, flags):
+        lazy.prepare(space, self)
         return self.implementation.get_buffer(space, True)
 
     def readbuf_w(self, space):
+        lazy.prepare(space, self)
         return self.implementation.get_buffer(space, True)
 
     def writebuf_w(self, space):
+        lazy.prepare(space, self)
         return self.implementation.get_buffer(space, False)
 
     def charbuf_w(self, space):
+        lazy.prepare(space, self)
         return self.implementation.get_buffer(space, True).as_str()
 
     def descr_get_data(self, space):
@@ -679,6 +701,19 @@ class __extend__(W_NDimArray):
         return self.descr_view(
             space, self.get_dtype().descr_newbyteorder(space, new_order))
 
+    @unwrap_spec(kind=str)
+    def descr_partition(self, space, w_kth, w_axis=None, kind='introselect',
+                        w_order=None):
+        # modify the array in-place
+        selectkind_converter(space, kind)
+        if not space.is_none(w_order):
+            raise OperationError(space.w_NotImplementedError, space.wrap(
+                "order not implemented"))
+        if self.is_scalar():
+            raise OperationError(space.w_ValueError, space.wrap(
+                "a 0-d array cannot be partitioned"))
+        self.implementation.partition(space, w_axis, w_kth)
+
     @unwrap_spec(w_axis=WrappedDefault(None),
                  w_out=WrappedDefault(None))
     def descr_ptp(self, space, w_axis=None, w_out=None):
@@ -754,13 +789,12 @@ class __extend__(W_NDimArray):
         raise OperationError(space.w_NotImplementedError, space.wrap(
             "setflags not implemented yet"))
 
-    @unwrap_spec(kind=str)
-    def descr_sort(self, space, w_axis=None, kind='quicksort', w_order=None):
-        # happily ignore the kind
+    def descr_sort(self, space, w_axis=None, w_kind=None, w_order=None):
         # modify the array in-place
+        kind = sortkind_converter(space, w_kind)
         if self.is_scalar():
             return
-        return self.implementation.sort(space, w_axis, w_order)
+        return self.implementation.sort(space, w_axis, w_order, kind)
 
     def descr_squeeze(self, space, w_axis=None):
         cur_shape = self.get_shape()
@@ -787,9 +821,35 @@ class __extend__(W_NDimArray):
         raise OperationError(space.w_NotImplementedError, space.wrap(
             "strides not implemented yet"))
 
-    def descr_tofile(self, space, w_fid, w_sep="", w_format="%s"):
-        raise OperationError(space.w_NotImplementedError, space.wrap(
-            "tofile not implemented yet"))
+    @unwrap_spec(sep=str, format=str)
+    def descr_tofile(self, space, w_fid, sep="", format="%s"):
+        w_file, owned = support.open_file(space, w_fid, 'wb')
+        try:
+            w_write = space.getattr(w_file, space.wrap('write'))
+            if sep == "":
+                loop.tofile(space, self, w_write)
+            else:
+                self._tofile_text(space, w_write, sep, format)
+        finally:
+            if owned:
+                space.call_method(w_file, 'close')
+
+    def _tofile_text(self, space, w_write, sep, format):
+        dtype = self.get_dtype()
+        w_format = space.wrap(format)
+        builder = StringBuilder()
+        iter, state = self.create_iter()
+        while not iter.done(state):
+            if state.index > 0:
+                builder.append(sep)
+            w_item = dtype.itemtype.to_builtin_type(space, iter.getitem(state))
+            builder.append(space.str_w(space.mod(w_format, w_item)))
+            if builder.getlength() >= loop.TOFILE_CHUNK:
+                space.call_function(w_write, space.wrap(builder.build()))
+                builder = StringBuilder()
+            state = iter.next(state)
+        if builder.getlength() > 0:
+            space.call_function(w_write, space.wrap(builder.build()))
 
     def descr_view(self, space, w_dtype=None, w_type=None):
         if not w_type and w_dtype:
@@ -1320,6 +1380,19 @@ app_searchsort = applevel(r"""
         return result
 """, filename=__file__).interphook('searchsort')
 
+# the methods compute the array if it is lazy, except the operators, which
+# hand it to a ufunc, and the ones that only read its shape or dtype
+for _name, _func in W_NDimArray.__dict__.items():
+    if (hasattr(_func, 'func_code') and
+            _name.startswith(('descr_', 'fget_', 'fset_', 'fdel_')) and
+            not _func.func_name.startswith(('unaryop_', 'binop_')) and
+            _name not in ('descr_get_shape', 'descr_get_dtype',
+                          'descr_get_ndim', 'descr_get_size',
+                          'descr_get_itemsize', 'descr_get_nbytes',
+                          'descr_get_strides', 'descr_len')):
+        setattr(W_NDimArray, _name, lazy.forcing(_func))
+del _name, _func
+
 W_NDimArray.typedef = TypeDef("numpy.ndarray",
     __new__ = interp2app(descr_new_array),
 
@@ -1408,6 +1481,7 @@ W_NDimArray.typedef = TypeDef("numpy.ndarray",
 
     fill = interp2app(W_NDimArray.descr_fill),
     tostring = interp2app(W_NDimArray.descr_tostring),
+    tofile = interp2app(W_NDimArray.descr_tofile),
 
     mean = interp2app(W_NDimArray.descr_mean),
     sum = interp2app(W_NDimArray.descr_sum),
@@ -1454,6 +1528,8 @@ W_NDimArray.typedef = TypeDef("numpy.ndarray",
 
     argsort  = interp2app(W_NDimArray.descr_argsort),
     sort  = interp2app(W_NDimArray.descr_sort),
+    argpartition = interp2app(W_NDimArray.descr_argpartition),
+    partition = interp2app(W_NDimArray.descr_partition),
     astype   = interp2app(W_NDimArray.descr_astype),
     base     = GetSetProperty(W_NDimArray.descr_get_base),
     byteswap = interp2app(W_NDimArray.descr_byteswap),
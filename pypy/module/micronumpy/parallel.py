@@ -0,0 +1,490 @@
+""" Element-wise ufuncs and reductions of large contiguous arrays, split
+into chunks that run on several threads without the GIL.
+
+Only the ufuncs and dtypes listed here have a kernel: they are written in
+C in separate_module_source below, since the worker threads cannot run
+RPython code.  The kernels compute the same items as the RPython loops,
+except that a reduction of floats adds up the items of every chunk
+separately, which may round differently.  Disabled as long as the number
+of threads is 1 (the default); see set_num_threads().
+"""
+
+import sys
+
+from pypy.interpreter.error import oefmt
+from pypy.interpreter.gateway import unwrap_spec
+from rpython.rlib.objectmodel import keepalive_until_here
+from rpython.rtyper.lltypesystem import lltype, rffi
+from rpython.translator.tool.cbuild import ExternalCompilationInfo
+from pypy.module.micronumpy import support
+from pypy.module.micronumpy.base import W_NDimArray
+
+# kind of work
+KIND_UNARY = 0
+KIND_BINARY = 1
+KIND_REDUCE = 2
+
+# operations, as the ufunc names map to them
+OP_ADD = 0
+OP_SUBTRACT = 1
+OP_MULTIPLY = 2
+OP_DIVIDE = 3
+OP_MAXIMUM = 4
+OP_MINIMUM = 5
+OP_NEGATIVE = 6
+OP_ABSOLUTE = 7
+OP_SQRT = 8
+
+BINARY_OPS = {'add': OP_ADD, 'subtract': OP_SUBTRACT,
+              'multiply': OP_MULTIPLY, 'divide': OP_DIVIDE,
+              'true_divide': OP_DIVIDE, 'maximum': OP_MAXIMUM,
+              'minimum': OP_MINIMUM}
+UNARY_OPS = {'negative': OP_NEGATIVE, 'absolute': OP_ABSOLUTE,
+             'sqrt': OP_SQRT}
+REDUCE_OPS = {'add': OP_ADD, 'multiply': OP_MULTIPLY,
+              'maximum': OP_MAXIMUM, 'minimum': OP_MINIMUM}
+FLOAT_ONLY_OPS = [OP_DIVIDE, OP_SQRT]
+
+# item types of the kernels
+TYPE_FLOAT64 = 0
+TYPE_FLOAT32 = 1
+TYPE_INT64 = 2
+TYPE_INT32 = 3
+
+# arrays with fewer items are done by the RPython loops
+PARALLEL_THRESHOLD = 1 << 18
+# no thread gets fewer items than that
+MIN_CHUNK = 8192
+
+separate_module_source = """
+#include <math.h>
+#include <stdint.h>
+#include <string.h>
+#ifndef _WIN32
+#include <pthread.h>
+#endif
+
+#define NP_MAX_THREADS 64
+
+struct np_task {
+    int kind, op, type;
+    char *a, *b, *out;
+    long sa, sb;
+    long start, stop;
+    char partial[8];      /* the partial result of a reduction */
+};
+
+#define NP_FMAX(x, y) (((x) >= (y) || (x) != (x)) ? (x) : (y))
+#define NP_FMIN(x, y) (((x) <= (y) || (x) != (x)) ? (x) : (y))
+#define NP_IMAX(x, y) ((x) >= (y) ? (x) : (y))
+#define NP_IMIN(x, y) ((x) <= (y) ? (x) : (y))
+
+/* one loop per operation, with the 'switch' outside of it */
+#define NP_BINARY_LOOP(T, EXPR)                                              \\
+    for (i = t->start; i < t->stop; i++, pa += t->sa, pb += t->sb) {         \\
+        T x = *(T *)pa, y = *(T *)pb;                                        \\
+        out[i] = (EXPR);                                                     \\
+    }                                                                        \\
+    break;
+
+#define NP_UNARY_LOOP(EXPR)                                                  \\
+    for (i = t->start; i < t->stop; i++)                                     \\
+        out[i] = (EXPR);                                                     \\
+    break;
+
+#define NP_FLOAT_KERNELS(T, SUFFIX)                                          \\
+static int np_binary_##SUFFIX(struct np_task *t) {                           \\
+    T *out = (T *)t->out;                                                    \\
+    char *pa = t->a + t->start * t->sa, *pb = t->b + t->start * t->sb;       \\
+    long i;                                                                  \\
+    switch (t->op) {                                                         \\
+    case 0: NP_BINARY_LOOP(T, x + y)                                         \\
+    case 1: NP_BINARY_LOOP(T, x - y)                                         \\
+    case 2: NP_BINARY_LOOP(T, x * y)                                         \\
+    case 3: NP_BINARY_LOOP(T, x / y)                                         \\
+    case 4: NP_BINARY_LOOP(T, NP_FMAX(x, y))                                 \\
+    case 5: NP_BINARY_LOOP(T, NP_FMIN(x, y))                                 \\
+    default: return -1;                                                      \\
+    }                                                                        \\
+    return 0;                                                                \\
+}                                                                            \\
+static int np_unary_##SUFFIX(struct np_task *t) {                            \\
+    T *a = (T *)t->a, *out = (T *)t->out;                                    \\
+    long i;                                                                  \\
+    switch (t->op) {                                                         \\
+    case 6: NP_UNARY_LOOP(-a[i])                                             \\
+    case 7: NP_UNARY_LOOP((T)fabs(a[i]))                                     \\
+    case 8: NP_UNARY_LOOP((T)sqrt(a[i]))                                     \\
+    default: return -1;                                                      \\
+    }                                                                        \\
+    return 0;                                                                \\
+}                                                                            \\
+static int np_reduce_##SUFFIX(struct np_task *t) {                           \\
+    T *a = (T *)t->a;                                                        \\
+    T acc;                                                                   \\
+    long i = t->start;                                                       \\
+    switch (t->op) {                                                         \\
+    case 0: acc = 0; for (; i < t->stop; i++) acc = acc + a[i]; break;       \\
+    case 2: acc = 1; for (; i < t->stop; i++) acc = acc * a[i]; break;       \\
+    case 4: acc = a[i++]; for (; i < t->stop; i++) acc = NP_FMAX(acc, a[i]); \\
+            break;                                                           \\
+    case 5: acc = a[i++]; for (; i < t->stop; i++) acc = NP_FMIN(acc, a[i]); \\
+            break;                                                           \\
+    default: return -1;                                                      \\
+    }                                                                        \\
+    memcpy(t->partial, &acc, sizeof(T));                                     \\
+    return 0;                                                                \\
+}                                                                            \\
+static void np_combine_##SUFFIX(int op, char *res, char *partial) {          \\
+    T x = *(T *)res, y;                                                      \\
+    memcpy(&y, partial, sizeof(T));                                          \\
+    switch (op) {                                                            \\
+    case 0: *(T *)res = x + y; break;                                        \\
+    case 2: *(T *)res = x * y; break;                                        \\
+    case 4: *(T *)res = NP_FMAX(x, y); break;                                \\
+    case 5: *(T *)res = NP_FMIN(x, y); break;                                \\
+    }                                                                        \\
+}
+
+/* integers wrap around on overflow like the RPython versions, so the
+   arithmetic is done on the unsigned type */
+#define NP_INT_KERNELS(T, UT, SUFFIX)                                        \\
+static int np_binary_##SUFFIX(struct np_task *t) {                           \\
+    T *out = (T *)t->out;                                                    \\
+    char *pa = t->a + t->start * t->sa, *pb = t->b + t->start * t->sb;       \\
+    long i;                                                                  \\
+    switch (t->op) {                                                         \\
+    case 0: NP_BINARY_LOOP(T, (T)((UT)x + (UT)y))                            \\
+    case 1: NP_BINARY_LOOP(T, (T)((UT)x - (UT)y))                            \\
+    case 2: NP_BINARY_LOOP(T, (T)((UT)x * (UT)y))                            \\
+    case 4: NP_BINARY_LOOP(T, NP_IMAX(x, y))                                 \\
+    case 5: NP_BINARY_LOOP(T, NP_IMIN(x, y))                                 \\
+    default: return -1;                                                      \\
+    }                                                                        \\
+    return 0;                                                                \\
+}                                                                            \\
+static int np_unary_##SUFFIX(struct np_task *t) {                            \\
+    T *a = (T *)t->a, *out = (T *)t->out;                                    \\
+    long i;                                                                  \\
+    switch (t->op) {                                                         \\
+    case 6: NP_UNARY_LOOP((T)(0 - (UT)a[i]))                                 \\
+    case 7: NP_UNARY_LOOP(a[i] < 0 ? (T)(0 - (UT)a[i]) : a[i])               \\
+    default: return -1;                                                      \\
+    }                                                                        \\
+    return 0;                                                                \\
+}                                                                            \\
+static int np_reduce_##SUFFIX(struct np_task *t) {                           \\
+    T *a = (T *)t->a;                                                        \\
+    UT acc;                                                                  \\
+    long i = t->start;                                                       \\
+    switch (t->op) {                                                         \\
+    case 0: acc = 0; for (; i < t->stop; i++) acc += (UT)a[i]; break;        \\
+    case 2: acc = 1; for (; i < t->stop; i++) acc *= (UT)a[i]; break;        \\
+    case 4: { T m = a[i++];                                                  \\
+              for (; i < t->stop; i++) m = NP_IMAX(m, a[i]);                 \\
+              acc = (UT)m; break; }                                          \\
+    case 5: { T m = a[i++];                                                  \\
+              for (; i < t->stop; i++) m = NP_IMIN(m, a[i]);                 \\
+              acc = (UT)m; break; }                                          \\
+    default: return -1;                                                      \\
+    }                                                                        \\
+    { T res = (T)acc; memcpy(t->partial, &res, sizeof(T)); }                 \\
+    return 0;                                                                \\
+}                                                                            \\
+static void np_combine_##SUFFIX(int op, char *res, char *partial) {          \\
+    T x = *(T *)res, y;                                                      \\
+    memcpy(&y, partial, sizeof(T));                                          \\
+    switch (op) {                                                            \\
+    case 0: *(T *)res = (T)((UT)x + (UT)y); break;                           \\
+    case 2: *(T *)res = (T)((UT)x * (UT)y); break;                           \\
+    case 4: *(T *)res = NP_IMAX(x, y); break;                                \\
+    case 5: *(T *)res = NP_IMIN(x, y); break;                                \\
+    }                                                                        \\
+}
+
+NP_FLOAT_KERNELS(double, f64)
+NP_FLOAT_KERNELS(float, f32)
+NP_INT_KERNELS(int64_t, uint64_t, i64)
+NP_INT_KERNELS(int32_t, uint32_t, i32)
+
+static int np_run_task(struct np_task *t)
+{
+#define NP_DISPATCH(SUFFIX)                                                  \\
+    switch (t->kind) {                                                       \\
+    case 0: return np_unary_##SUFFIX(t);                                     \\
+    case 1: return np_binary_##SUFFIX(t);                                    \\
+    case 2: return np_reduce_##SUFFIX(t);                                    \\
+    }                                                                        \\
+    return -1;
+    switch (t->type) {
+    case 0: NP_DISPATCH(f64)
+    case 1: NP_DISPATCH(f32)
+    case 2: NP_DISPATCH(i64)
+    case 3: NP_DISPATCH(i32)
+    }
+    return -1;
+#undef NP_DISPATCH
+}
+
+static void np_combine(int type, int op, char *res, char *partial)
+{
+    switch (type) {
+    case 0: np_combine_f64(op, res, partial); break;
+    case 1: np_combine_f32(op, res, partial); break;
+    case 2: np_combine_i64(op, res, partial); break;
+    case 3: np_combine_i32(op, res, partial); break;
+    }
+}
+
+#ifndef _WIN32
+static void *np_worker(void *arg)
+{
+    np_run_task((struct np_task *)arg);
+    return NULL;
+}
+#endif
+
+long pypy_numpy_parallel(long kind, long op, long type, char *a, long sa,
+                         char *b, long sb, char *out, long n, long nthreads)
+{
+    struct np_task tasks[NP_MAX_THREADS];
+#ifndef _WIN32
+    pthread_t threads[NP_MAX_THREADS];
+    int started[NP_MAX_THREADS];
+#endif
+    long i, chunk, result = 0;
+
+    if (nthreads > NP_MAX_THREADS)
+        nthreads = NP_MAX_THREADS;
+    if (nthreads < 1)
+        nthreads = 1;
+#ifdef _WIN32
+    nthreads = 1;
+#endif
+    /* chunks of a multiple of 16 items, so that no two threads write to
+       the same cache line of 'out' */
+    chunk = ((n + nthreads - 1) / nthreads + 15) & ~15L;
+    for (i = 0; i < nthreads; i++) {
+        struct np_task *t = &tasks[i];
+        t->kind = (int)kind;
+        t->op = (int)op;
+        t->type = (int)type;
+        t->a = a;
+        t->b = b;
+        t->out = out;
+        t->sa = sa;
+        t->sb = sb;
+        t->start = i * chunk < n ? i * chunk : n;
+        t->stop = (i + 1) * chunk < n ? (i + 1) * chunk : n;
+    }
+#ifndef _WIN32
+    /* the calling thread does the first chunk itself */
+    for (i = 1; i < nthreads; i++) {
+        started[i] = tasks[i].start < tasks[i].stop &&
+            pthread_create(&threads[i], NULL, np_worker, &tasks[i]) == 0;
+        if (!started[i] && tasks[i].start < tasks[i].stop)
+            result |= np_run_task(&tasks[i]);
+    }
+#endif
+    result |= np_run_task(&tasks[0]);
+#ifndef _WIN32
+    for (i = 1; i < nthreads; i++)
+        if (started[i])
+            pthread_join(threads[i], NULL);
+#endif
+    if (kind == 2 && result == 0) {
+        /* combine the partial results in order */
+        memcpy(out, tasks[0].partial, (type == 0 || type == 2) ? 8 : 4);
+        for (i = 1; i < nthreads; i++)
+            if (tasks[i].start < tasks[i].stop)
+                np_combine((int)type, (int)op, out, tasks[i].partial);
+    }
+    return result;
+}
+"""
+
+if sys.platform == 'win32':
+    libraries = []
+else:
+    libraries = ['pthread']
+
+eci = ExternalCompilationInfo(
+    separate_module_sources=[separate_module_source],
+    post_include_bits=[
+        "long pypy_numpy_parallel(long, long, long, char *, long, char *, "
+        "long, char *, long, long);"],
+    export_symbols=['pypy_numpy_parallel'],
+    libraries=libraries,
+)
+
+c_parallel = rffi.llexternal('pypy_numpy_parallel',
+                             [lltype.Signed, lltype.Signed, lltype.Signed,
+                              rffi.CCHARP, lltype.Signed,
+                              rffi.CCHARP, lltype.Signed,
+                              rffi.CCHARP, lltype.Signed, lltype.Signed],
+                             lltype.Signed, compilation_info=eci,
+                             releasegil=True)
+
+
+class ParallelState(object):
+    def __init__(self, space):
+        self.nthreads = 1
+        self.threshold = PARALLEL_THRESHOLD
+
+
+def get_parallel_state(space):
+    return space.fromcache(ParallelState)
+
+
+def get_op(ops, name):
+    return ops.get(name, -1)
+
+
+def _item_type(dtype):
+    if not dtype.is_native():
+        return -1
+    if dtype.is_float():
+        if dtype.elsize == 8:
+            return TYPE_FLOAT64
+        if dtype.elsize == 4:
+            return TYPE_FLOAT32
+    elif dtype.is_signed():
+        if dtype.elsize == 8:
+            return TYPE_INT64
+        if dtype.elsize == 4:
+            return TYPE_INT32
+    return -1
+
+
+def _get_type(space, op, dtype, size):
+    """ The item type of the kernel to use, or -1 if the work should be
+    done by the RPython loops.
+    """
+    state = get_parallel_state(space)
+    if op < 0 or state.nthreads <= 1 or size < state.threshold:
+        return -1
+    itemtype = _item_type(dtype)
+    if itemtype == TYPE_INT64 or itemtype == TYPE_INT32:
+        if op in FLOAT_ONLY_OPS:
+            return -1
+    return itemtype
+
+
+def _num_threads(space, size):
+    return max(1, min(get_parallel_state(space).nthreads, size // MIN_CHUNK))
+
+
+def _data(space, impl):
+    return rffi.cast(rffi.CCHARP, impl.get_storage_as_int(space))
+
+
+def _overlaps(impl, out):
+    """ True if the chunks of out may be written before the items of impl
+    that the other threads read at the same index.
+    """
+    return impl.storage == out.storage and impl.start != out.start
+
+
+def _operand(space, w_arr, shape, dtype):
+    """ Return (impl, stride) to read w_arr as an operand of the given
+    shape: an array that is flat with this shape and dtype, or a 0-d
+    array, whose item is converted to dtype.  Return (None, 0) otherwise.
+    """
+    impl = w_arr.implementation
+    if impl.is_flat(shape, dtype):
+        return impl, dtype.elsize
+    if w_arr.is_scalar():
+        w_item = w_arr.get_scalar_value()
+        arr = W_NDimArray.from_shape(space, [1], dtype)
+        arr.implementation.setitem(0, w_item.convert_to(space, dtype))
+        return arr.implementation, 0
+    return None, 0
+
+
+def call2(space, op, shape, dtype, w_lhs, w_rhs, out):
+    """ Compute out = w_lhs <op> w_rhs with the threads if possible, and
+    return True if done.  out must already have the dtype.
+    """
+    size = support.product(shape)
+    itemtype = _get_type(space, op, dtype, size)
+    if itemtype < 0 or not out.implementation.is_flat(shape, dtype):
+        return False
+    left, left_stride = _operand(space, w_lhs, shape, dtype)
+    right, right_stride = _operand(space, w_rhs, shape, dtype)
+    if (left is None or right is None or
+            _overlaps(left, out.implementation) or
+            _overlaps(right, out.implementation)):
+        return False
+    res = c_parallel(KIND_BINARY, op, itemtype,
+                     _data(space, left), left_stride,
+                     _data(space, right), right_stride,
+                     _data(space, out.implementation), size,
+                     _num_threads(space, size))
+    keepalive_until_here(left, right, out)
+    return res == 0
+
+
+def call1(space, op, shape, dtype, w_obj, out):
+    """ Compute out = <op> w_obj with the threads if possible, and return
+    True if done.
+    """
+    size = support.product(shape)
+    itemtype = _get_type(space, op, dtype, size)
+    if (itemtype < 0 or not w_obj.implementation.is_flat(shape, dtype) or
+            not out.implementation.is_flat(shape, dtype) or
+            _overlaps(w_obj.implementation, out.implementation)):
+        return False
+    res = c_parallel(KIND_UNARY, op, itemtype,
+                     _data(space, w_obj.implementation), dtype.elsize,
+                     lltype.nullptr(rffi.CCHARP.TO), 0,
+                     _data(space, out.implementation), size,
+                     _num_threads(space, size))
+    keepalive_until_here(w_obj, out)
+    return res == 0
+
+
+def reduce(space, op, obj, dtype):
+    """ Return the reduction of all the items of obj with <op>, computed
+    with the threads, or None.
+    """
+    size = obj.get_size()
+    itemtype = _get_type(space, op, dtype, size)
+    if itemtype < 0 or not obj.implementation.is_flat(obj.get_shape(), dtype):
+        return None
+    out = W_NDimArray.from_shape(space, [1], dtype)
+    res = c_parallel(KIND_REDUCE, op, itemtype,
+                     _data(space, obj.implementation), dtype.elsize,
+                     lltype.nullptr(rffi.CCHARP.TO), 0,
+                     _data(space, out.implementation), size,
+                     _num_threads(space, size))
+    keepalive_until_here(obj, out)
+    if res != 0:
+        return None
+    return out.implementation.getitem(0)
+
+
+@unwrap_spec(nthreads=int)
+def set_num_threads(space, nthreads):
+    """ Set the number of threads that compute the element-wise ufuncs and
+    the reductions of large contiguous arrays, and return the previous
+    number.  1 disables the threads.
+    """
+    if nthreads < 1:
+        raise oefmt(space.w_ValueError, "number of threads must be positive")
+    state = get_parallel_state(space)
+    old = state.nthreads
+    state.nthreads = nthreads
+    return space.wrap(old)
+
+
+@unwrap_spec(size=int)
+def set_parallel_threshold(space, size):
+    """ Set the number of items from which set_num_threads() applies, and
+    return the previous one.
+    """
+    if size < 1:
+        raise oefmt(space.w_ValueError, "threshold must be positive")
+    state = get_parallel_state(space)
+    old = state.threshold
+    state.threshold = size
+    return space.wrap(old)
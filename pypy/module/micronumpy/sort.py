@@ -1,7 +1,7 @@
 from pypy.interpreter.error import oefmt
 from rpython.rlib.listsort import make_timsort_class
 from rpython.rlib.objectmodel import specialize
-from rpython.rlib.rarithmetic import widen
+from rpython.rlib.rarithmetic import widen, intmask
 from rpython.rlib.rawstorage import raw_storage_getitem, raw_storage_setitem, \
         free_raw_storage, alloc_raw_storage
 from rpython.rlib.unroll import unrolling_iterable
@@ -15,8 +15,183 @@ INT_SIZE = rffi.sizeof(lltype.Signed)
 all_types = (types.all_float_types + types.all_complex_types +
              types.all_int_types)
 all_types = [i for i in all_types if not issubclass(i[0], types.Float16)]
+all_types.append((types.Bool, 'bool'))
 all_types = unrolling_iterable(all_types)
 
+RADIX_TYPES = {1: rffi.UCHAR, 2: rffi.USHORT, 4: rffi.UINT, 8: rffi.ULONGLONG}
+
+
+def make_radix_sort(itemtype):
+    """ LSD radix sort of the integer and bool dtypes, one byte per pass.
+    It is stable and linear in the number of items.  The items are read
+    as unsigned integers of the same size; for the signed dtypes the sign
+    bit is flipped in the last (most significant) pass.
+    """
+    size = rffi.sizeof(itemtype.T)
+    UTP = RADIX_TYPES[size]
+    _, unsigned = rffi.size_and_sign(itemtype.T)
+    if unsigned:
+        sign_flip = 0
+    else:
+        sign_flip = 0x80
+
+    def read_keys(storage, start, stride_size, n):
+        return [widen(raw_storage_getitem(UTP, storage, start + i * stride_size))
+                for i in range(n)]
+
+    def radix_sort_keys(keys, order):
+        # sorts keys, and moves the items of order (if not None) along;
+        # returns the two sorted lists, which are not the ones passed in
+        n = len(keys)
+        if n < 2:
+            return keys, order
+        tmp_keys = [keys[0]] * n
+        if order is not None:
+            tmp_order = [0] * n
+        else:
+            tmp_order = None
+        counts = [0] * 256
+        for p in range(size):
+            shift = p * 8
+            flip = 0
+            if p == size - 1:
+                flip = sign_flip
+            for d in range(256):
+                counts[d] = 0
+            for i in range(n):
+                counts[(intmask(keys[i] >> shift) & 0xff) ^ flip] += 1
+            if counts[(intmask(keys[0] >> shift) & 0xff) ^ flip] == n:
+                # all the items have the same digit
+                continue
+            total = 0
+            for d in range(256):
+                count = counts[d]
+                counts[d] = total
+                total += count
+            for i in range(n):
+                key = keys[i]
+                d = (intmask(key >> shift) & 0xff) ^ flip
+                pos = counts[d]
+                counts[d] = pos + 1
+                tmp_keys[pos] = key
+                if order is not None:
+                    tmp_order[pos] = order[i]
+            keys, tmp_keys = tmp_keys, keys
+            order, tmp_order = tmp_order, order
+        return keys, order
+
+    def radix_sort(storage, start, stride_size, n):
+        keys, _ = radix_sort_keys(read_keys(storage, start, stride_size, n),
+                                  None)
+        for i in range(n):
+            raw_storage_setitem(storage, start + i * stride_size,
+                                rffi.cast(UTP, keys[i]))
+
+    def radix_argsort(storage, start, stride_size, n, indexes, index_start,
+                      index_stride_size):
+        _, order = radix_sort_keys(read_keys(storage, start, stride_size, n),
+                                   [i for i in range(n)])
+        for i in range(n):
+            raw_storage_setitem(indexes, index_start + i * index_stride_size,
+                                order[i])
+
+    return radix_sort, radix_argsort
+
+
+def make_introselect(getitem, setitem, length, lt):
+    """ Returns introselect(lst, kths), which moves the items of lst around
+    so that the ones at the (sorted) kths positions are where they would be
+    if lst was sorted, with no larger item before them and no smaller one
+    after.  It is a quickselect with a median of 3 pivot, which falls back
+    to the median of medians when the ranges do not shrink fast enough:
+    linear time in the worst case.
+    """
+    def swap(lst, i, j):
+        item = getitem(lst, i)
+        setitem(lst, i, getitem(lst, j))
+        setitem(lst, j, item)
+
+    def insertion_sort(lst, low, high):
+        for i in range(low + 1, high):
+            item = getitem(lst, i)
+            j = i
+            while j > low and lt(item, getitem(lst, j - 1)):
+                setitem(lst, j, getitem(lst, j - 1))
+                j -= 1
+            setitem(lst, j, item)
+
+    def median_of_3(lst, low, high):
+        # leaves the median of the first, middle and last items at low
+        mid = low + (high - low) // 2
+        if lt(getitem(lst, mid), getitem(lst, low)):
+            swap(lst, mid, low)
+        if lt(getitem(lst, high - 1), getitem(lst, mid)):
+            swap(lst, high - 1, mid)
+            if lt(getitem(lst, mid), getitem(lst, low)):
+                swap(lst, mid, low)
+        swap(lst, low, mid)
+
+    def median_of_medians(lst, low, high):
+        # the medians of the groups of 5 are moved to the front, and
+        # their own median is selected and left at low
+        nmed = 0
+        i = low
+        while i + 5 <= high:
+            insertion_sort(lst, i, i + 5)
+            swap(lst, low + nmed, i + 2)
+            nmed += 1
+            i += 5
+        select(lst, low, low + nmed, low + nmed // 2)
+        swap(lst, low, low + nmed // 2)
+
+    def partition(lst, low, high):
+        # the pivot is at low, returns where it ends up
+        pivot = getitem(lst, low)
+        i = low + 1
+        j = high - 1
+        while True:
+            while i <= j and lt(getitem(lst, i), pivot):
+                i += 1
+            while i <= j and lt(pivot, getitem(lst, j)):
+                j -= 1
+            if i >= j:
+                break
+            swap(lst, i, j)
+            i += 1
+            j -= 1
+        swap(lst, low, j)
+        return j
+
+    def select(lst, low, high, kth):
+        depth = 0
+        n = high - low
+        while n > 1:
+            depth += 2
+            n >>= 1
+        while high - low > 16:
+            if depth == 0:
+                median_of_medians(lst, low, high)
+            else:
+                depth -= 1
+                median_of_3(lst, low, high)
+            p = partition(lst, low, high)
+            if p == kth:
+                return
+            if kth < p:
+                high = p
+            else:
+                low = p + 1
+        insertion_sort(lst, low, high)
+
+    def introselect(lst, kths):
+        # each kth only has to look after the previous one
+        low = 0
+        for kth in kths:
+            select(lst, low, length(lst), kth)
+            low = kth + 1
+
+    return introselect
+
 
 def make_argsort_function(space, itemtype, comp_type, count=1):
     TP = itemtype.T
@@ -49,6 +224,8 @@ def make_argsort_function(space, itemtype, comp_type, count=1):
                 v = float(v)
             elif comp_type == 'complex':
                 v = [float(v[0]),float(v[1])]
+            elif comp_type == 'bool':
+                pass
             else:
                 raise NotImplementedError('cannot reach')
             return (v, raw_storage_getitem(lltype.Signed, self.indexes,
@@ -119,8 +296,20 @@ def make_argsort_function(space, itemtype, comp_type, count=1):
 
     ArgSort = make_timsort_class(arg_getitem, arg_setitem, arg_length,
                                  arg_getitem_slice, arg_lt)
+    introselect = make_introselect(arg_getitem, arg_setitem, arg_length,
+                                   arg_lt)
+    if comp_type == 'int' or comp_type == 'bool':
+        _, radix_argsort = make_radix_sort(itemtype)
+
+    def argsort_lane(r, kind):
+        if comp_type == 'bool' or (comp_type == 'int' and
+                                   kind == NPY.STABLESORT):
+            radix_argsort(r.values, r.start, r.stride_size, r.size,
+                          r.indexes, r.index_start, r.index_stride_size)
+        else:
+            ArgSort(r).sort()
 
-    def argsort(arr, space, w_axis, itemsize):
+    def argsort(arr, space, w_axis, itemsize, kind):
         if w_axis is space.w_None:
             # note that it's fine ot pass None here as we're not going
             # to pass the result around (None is the link to base in slices)
@@ -140,7 +329,7 @@ def make_argsort_function(space, itemtype, comp_type, count=1):
                 raw_storage_setitem(storage, i * INT_SIZE, i)
             r = Repr(INT_SIZE, itemsize, arr.get_size(), arr.get_storage(),
                      storage, 0, arr.start)
-            ArgSort(r).sort()
+            argsort_lane(r, kind)
         else:
             shape = arr.get_shape()
             if axis < 0:
@@ -161,21 +350,112 @@ def make_argsort_function(space, itemtype, comp_type, count=1):
                                         index_state.offset, i)
                 r = Repr(index_stride_size, stride_size, axis_size,
                          arr.get_storage(), storage, index_state.offset, arr_state.offset)
-                ArgSort(r).sort()
+                argsort_lane(r, kind)
                 arr_state = arr_iter.next(arr_state)
                 index_state = index_iter.next(index_state)
         return index_arr
 
-    return argsort
-
+    def argpartition(arr, space, axis, itemsize, kths):
+        dtype = descriptor.get_dtype_cache(space).w_longdtype
+        index_arr = W_NDimArray.from_shape(space, arr.get_shape(), dtype)
+        storage = index_arr.implementation.get_storage()
+        if len(arr.get_shape()) == 1:
+            for i in range(arr.get_size()):
+                raw_storage_setitem(storage, i * INT_SIZE, i)
+            r = Repr(INT_SIZE, itemsize, arr.get_size(), arr.get_storage(),
+                     storage, 0, arr.start)
+            introselect(r, kths)
+        else:
+            arr_iter = AllButAxisIter(arr, axis)
+            arr_state = arr_iter.reset()
+            index_impl = index_arr.implementation
+            index_iter = AllButAxisIter(index_impl, axis)
+            index_state = index_iter.reset()
+            stride_size = arr.strides[axis]
+            index_stride_size = index_impl.strides[axis]
+            axis_size = arr.shape[axis]
+            while not arr_iter.done(arr_state):
+                for i in range(axis_size):
+                    raw_storage_setitem(storage, i * index_stride_size +
+                                        index_state.offset, i)
+                r = Repr(index_stride_size, stride_size, axis_size,
+                         arr.get_storage(), storage, index_state.offset,
+                         arr_state.offset)
+                introselect(r, kths)
+                arr_state = arr_iter.next(arr_state)
+                index_state = index_iter.next(index_state)
+        return index_arr
 
-def argsort_array(arr, space, w_axis):
+    return argsort, argpartition
+
+
+def partition_args(arr, space, w_axis, w_kth):
+    """ Returns the array to partition (flattened for axis=None), the
+    axis and the sorted list of kth positions along it.
+    """
+    if w_axis is space.w_None:
+        if arr.get_size() > 0 and len(arr.get_shape()) != 1:
+            flat = arr.reshape(None, [arr.get_size()])
+            if flat is None:
+                raise oefmt(space.w_NotImplementedError,
+                            "partition with axis=None of a non-contiguous "
+                            "array not supported yet")
+            arr = flat
+        axis = 0
+    elif w_axis is None:
+        axis = -1
+    else:
+        axis = space.int_w(w_axis)
+    shape = arr.get_shape()
+    if axis < 0:
+        axis = len(shape) + axis
+    if axis < 0 or axis >= len(shape):
+        raise oefmt(space.w_ValueError, "axis(=%d) out of bounds", axis)
+    n = shape[axis]
+    if space.isinstance_w(w_kth, space.w_int):
+        kths_w = [w_kth]
+    else:
+        kths_w = space.listview(w_kth)
+    kths = []
+    for w_kth in kths_w:
+        kth = space.int_w(w_kth)
+        if kth < 0:
+            kth += n
+        if kth < 0 or kth >= n:
+            raise oefmt(space.w_ValueError, "kth(=%d) out of bounds (%d)",
+                        space.int_w(w_kth), n)
+        # insertion sort, there are only a few of them
+        i = len(kths)
+        kths.append(kth)
+        while i > 0 and kths[i - 1] > kth:
+            kths[i] = kths[i - 1]
+            i -= 1
+        kths[i] = kth
+    return arr, axis, kths
+
+
+def argsort_array(arr, space, w_axis, kind):
     cache = space.fromcache(ArgSortCache) # that populates ArgSortClasses
     itemtype = arr.dtype.itemtype
     for tp in all_types:
         if isinstance(itemtype, tp[0]):
             return cache._lookup(tp)(arr, space, w_axis,
-                                     itemtype.get_element_size())
+                                     itemtype.get_element_size(), kind)
+    # XXX this should probably be changed
+    raise oefmt(space.w_NotImplementedError,
+                "sorting of non-numeric types '%s' is not implemented",
+                arr.dtype.get_name())
+
+
+def argpartition_array(arr, space, w_axis, w_kth):
+    cache = space.fromcache(ArgSortCache)
+    itemtype = arr.dtype.itemtype
+    arr, axis, kths = partition_args(arr, space, w_axis, w_kth)
+    for tp in all_types:
+        if isinstance(itemtype, tp[0]):
+            return cache._lookup_partition(tp)(arr, space, axis,
+                                               itemtype.get_element_size(),
+                                               kths)
     # XXX this should probably be changed
     raise oefmt(space.w_NotImplementedError,
                 "sorting of non-numeric types '%s' is not implemented",
@@ -209,6 +489,8 @@ def make_sort_function(space, itemtype, comp_type, count=1):
                 v = float(v)
             elif comp_type == 'complex':
                 v = [float(v[0]),float(v[1])]
+            elif comp_type == 'bool':
+                pass
             else:
                 raise NotImplementedError('cannot reach')
             return (v)
@@ -271,8 +553,19 @@ def make_sort_function(space, itemtype, comp_type, count=1):
 
     ArgSort = make_timsort_class(arg_getitem, arg_setitem, arg_length,
                                  arg_getitem_slice, arg_lt)
+    introselect = make_introselect(arg_getitem, arg_setitem, arg_length,
+                                   arg_lt)
+    if comp_type == 'int' or comp_type == 'bool':
+        radix_sort, _ = make_radix_sort(itemtype)
+
+    def sort_lane(r, kind):
+        if comp_type == 'bool' or (comp_type == 'int' and
+                                   kind == NPY.STABLESORT):
+            radix_sort(r.values, r.start, r.stride_size, r.size)
+        else:
+            ArgSort(r).sort()
 
-    def sort(arr, space, w_axis, itemsize):
+    def sort(arr, space, w_axis, itemsize, kind):
         if w_axis is space.w_None:
             # note that it's fine to pass None here as we're not going
             # to pass the result around (None is the link to base in slices)
@@ -286,7 +579,7 @@ def make_sort_function(space, itemtype, comp_type, count=1):
         if len(arr.get_shape()) == 1:
             r = Repr(itemsize, arr.get_size(), arr.get_storage(),
                      arr.start)
-            ArgSort(r).sort()
+            sort_lane(r, kind)
         else:
             shape = arr.get_shape()
             if axis < 0:
@@ -299,13 +592,30 @@ def make_sort_function(space, itemtype, comp_type, count=1):
             axis_size = arr.shape[axis]
             while not arr_iter.done(arr_state):
                 r = Repr(stride_size, axis_size, arr.get_storage(), arr_state.offset)
-                ArgSort(r).sort()
+                sort_lane(r, kind)
                 arr_state = arr_iter.next(arr_state)
 
-    return sort
+    def partition(arr, space, axis, itemsize, kths):
+        if len(arr.get_shape()) == 1:
+            # arr may be a strided view, unlike in sort()
+            r = Repr(arr.strides[0], arr.get_size(), arr.get_storage(),
+                     arr.start)
+            introselect(r, kths)
+        else:
+            arr_iter = AllButAxisIter(arr, axis)
+            arr_state = arr_iter.reset()
+            stride_size = arr.strides[axis]
+            axis_size = arr.shape[axis]
+            while not arr_iter.done(arr_state):
+                r = Repr(stride_size, axis_size, arr.get_storage(),
+                         arr_state.offset)
+                introselect(r, kths)
+                arr_state = arr_iter.next(arr_state)
 
+    return sort, partition
 
-def sort_array(arr, space, w_axis, w_order):
+
+def sort_array(arr, space, w_axis, w_order, kind):
     cache = space.fromcache(SortCache)  # that populates SortClasses
     itemtype = arr.dtype.itemtype
     if arr.dtype.byteorder == NPY.OPPBYTE:
@@ -314,7 +624,25 @@ def sort_array(arr, space, w_axis, w_order):
     for tp in all_types:
         if isinstance(itemtype, tp[0]):
             return cache._lookup(tp)(arr, space, w_axis,
-                                     itemtype.get_element_size())
+                                     itemtype.get_element_size(), kind)
+    # XXX this should probably be changed
+    raise oefmt(space.w_NotImplementedError,
+                "sorting of non-numeric types '%s' is not implemented",
+                arr.dtype.get_name())
+
+
+def partition_array(arr, space, w_axis, w_kth):
+    cache = space.fromcache(SortCache)
+    itemtype = arr.dtype.itemtype
+    if arr.dtype.byteorder == NPY.OPPBYTE:
+        raise oefmt(space.w_NotImplementedError,
+                    "sorting of non-native byteorder not supported yet")
+    arr, axis, kths = partition_args(arr, space, w_axis, w_kth)
+    for tp in all_types:
+        if isinstance(itemtype, tp[0]):
+            return cache._lookup_partition(tp)(arr, space, axis,
+                                               itemtype.get_element_size(),
+                                               kths)
     # XXX this should probably be changed
     raise oefmt(space.w_NotImplementedError,
                 "sorting of non-numeric types '%s' is not implemented",
@@ -335,7 +663,8 @@ class ArgSortCache(object):
             else:
                 cache[cls] = make_argsort_function(space, cls, it)
         self.cache = cache
-        self._lookup = specialize.memo()(lambda tp: cache[tp[0]])
+        self._lookup = specialize.memo()(lambda tp: cache[tp[0]][0])
+        self._lookup_partition = specialize.memo()(lambda tp: cache[tp[0]][1])
 
 
 class SortCache(object):
@@ -352,4 +681,5 @@ class SortCache(object):
             else:
                 cache[cls] = make_sort_function(space, cls, it)
         self.cache = cache
-        self._lookup = specialize.memo()(lambda tp: cache[tp[0]])
+        self._lookup = specialize.memo()(lambda tp: cache[tp[0]][0])
+        self._lookup_partition = specialize.memo()(lambda tp: cache[tp[0]][1])
@@ -40,3 +40,13 @@ def check_and_adjust_index(space, index, size, axis):
     if index < 0:
         index += size
     return index
+
+
+def open_file(space, w_file, mode):
+    """ Return (w_file, owned): w_file opened with the builtin open() if it
+    is a file name, in which case the caller must close it.
+    """
+    if space.isinstance_w(w_file, space.w_basestring):
+        w_open = space.builtin.get('open')
+        return space.call_function(w_open, w_file, space.wrap(mode)), True
+    return w_file, False
@@ -1,3 +1,4 @@
+from pypy.conftest import option
 from pypy.module.micronumpy.test.test_base import BaseNumpyAppTest
 
 
@@ -199,3 +200,68 @@ class AppTestNumSupport(BaseNumpyAppTest):
         a.put(23, -1, mode=1)  # wrap
         assert (a == array([0, 1, -10, -1, -15])).all()
         raises(TypeError, "arange(5).put(22, -5, mode='zzzz')")  # unrecognized mode
+
+
+class AppTestDotBlocked(BaseNumpyAppTest):
+    def setup_class(cls):
+        from pypy.module.micronumpy import loop, types
+        BaseNumpyAppTest.setup_class.im_func(cls)
+        # small blocks, to test the edges of the blocks on small arrays
+        cls.saved = (loop.DOT_BLOCKED_MIN_SIZE, types.DOT_BLOCK_K,
+                     types.DOT_BLOCK_M)
+        if not option.runappdirect:
+            loop.DOT_BLOCKED_MIN_SIZE = 8
+            types.DOT_BLOCK_K = 4
+            types.DOT_BLOCK_M = 8
+
+    def teardown_class(cls):
+        from pypy.module.micronumpy import loop, types
+        (loop.DOT_BLOCKED_MIN_SIZE, types.DOT_BLOCK_K,
+         types.DOT_BLOCK_M) = cls.saved
+
+    def test_dot_blocked(self):
+        from numpypy import arange, dot, zeros
+        a = (arange(5 * 10) % 13 - 6).reshape(5, 10)
+        b = (arange(10 * 19) % 7 - 3).reshape(10, 19)
+        # the reference is the loop on boxes, as the dtypes differ
+        expected = a.dot(b.astype(float))
+        c = a.astype(float).dot(b.astype(float))
+        assert c.dtype == float
+        assert (c == expected).all()
+        assert (a.dot(b) == expected).all()
+        assert (dot(a, b.T.copy().T) == expected).all()
+        assert (dot(a, b[:, 3]) == expected[:, 3]).all()
+        assert (dot(a[2], b) == expected[2]).all()
+        assert (dot(a[::2, ::-1], b[::-1]) == a[::2].dot(b)).all()
+        out = zeros((5, 19), dtype=int)
+        assert dot(a, b, out=out) is out
+        assert (out == expected).all()
+
+    def test_dot_blocked_types(self):
+        from numpypy import arange
+        a = (arange(4 * 10) % 11 * 0.25 - 1).reshape(4, 10)
+        b = (arange(10 * 9) % 9 * 0.5 - 2).reshape(10, 9)
+        # the loop on boxes, as the dtypes differ
+        expected = a.dot(b.astype('float32'))
+        c = a.dot(b)
+        assert (c == expected).all()
+        c = a.astype('float32').dot(b.astype('float32'))
+        assert c.dtype == 'float32'
+        assert (abs(c - expected) < 1e-3).all()
+        # float16 products are added up as doubles, like the loop on boxes
+        a16 = (a * 37.25).astype('float16')
+        b16 = (b * 11.5).astype('float16')
+        c = a16.dot(b16)
+        assert c.dtype == 'float16'
+        expected16 = a16.astype(float).dot(b16.astype(float)).astype('float16')
+        assert (c == expected16).all()
+        assert (a16.dot(b16[:, ::-2]) == expected16[:, ::-2]).all()
+        c = (a + 1j * a).dot(b - 2j * b)
+        assert c.dtype == complex
+        assert (c == (1 + 1j) * (1 - 2j) * expected).all()
+        a8 = (arange(4 * 10) % 11 * 5).reshape(4, 10).astype('int8')
+        b8 = (arange(10 * 9) % 9 * 3).reshape(10, 9).astype('int8')
+        c = a8.dot(b8)
+        assert c.dtype == 'int8'
+        expected = (a8.astype(int).dot(b8.astype(int)) + 128) % 256 - 128
+        assert (c == expected).all()
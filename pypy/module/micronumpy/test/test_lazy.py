@@ -0,0 +1,118 @@
+from pypy.interpreter.gateway import interp2app
+from pypy.module.micronumpy import lazy
+from pypy.module.micronumpy.test.test_base import BaseNumpyAppTest
+
+
+class AppTestLazy(BaseNumpyAppTest):
+    def setup_class(cls):
+        BaseNumpyAppTest.setup_class.im_func(cls)
+
+        def is_lazy(space, w_arr):
+            return space.wrap(lazy._is_lazy(w_arr))
+        cls.w_is_lazy = cls.space.wrap(interp2app(is_lazy))
+
+    def teardown_method(self, meth):
+        lazy.get_lazy_state(self.space).threshold = 0
+
+    def test_threshold(self):
+        from numpypy import set_lazy_threshold
+        assert set_lazy_threshold(10) == 0
+        assert set_lazy_threshold(0) == 10
+        raises(ValueError, set_lazy_threshold, -1)
+
+    def test_expression(self):
+        import numpypy as np
+        a = np.arange(20.0)
+        b = np.arange(20.0) + 1
+        c = np.arange(20) % 3
+        expected = a * b + c * 2.5 - np.sqrt(a)
+        np.set_lazy_threshold(10)
+        res = a * b + c * 2.5 - np.sqrt(a)
+        assert self.is_lazy(res)
+        assert res.dtype == np.float64
+        assert res.shape == (20,)
+        assert self.is_lazy(res)
+        # res is part of the expression of the comparison
+        assert (res == expected).all()
+        assert self.is_lazy(res)
+        assert res.tolist() == expected.tolist()
+        assert not self.is_lazy(res)
+        # below the threshold
+        assert not self.is_lazy(a[:5] + b[:5])
+
+    def test_dtypes(self):
+        import numpypy as np
+        a = np.arange(12, dtype='int8').reshape(3, 4)
+        b = np.arange(12, dtype='int32').reshape(3, 4)
+        np.set_lazy_threshold(10)
+        c = a + b
+        assert self.is_lazy(c)
+        assert c.dtype == np.int32
+        d = (a < 5) & (b > 1)
+        assert d.dtype == np.bool_
+        e = -a * 20
+        assert e.dtype == np.int8
+        assert c[2, 3] == 22
+        assert d.tolist() == [[False, False, True, True],
+                              [True, False, False, False],
+                              [False, False, False, False]]
+        assert e[0, 3] == -60 and e[2, 3] == 36
+
+    def test_leaf_written(self):
+        import numpypy as np
+        np.set_lazy_threshold(10)
+        a = np.arange(20)
+        b = a * 2
+        c = b + a
+        a[3] = 100
+        assert b[3] == 6 and c[3] == 9
+        a = np.arange(20)
+        b = a[::2] + 1
+        v = a[2:]
+        v += 10
+        assert b[2] == 5
+        a = np.arange(20)
+        b = a + 1
+        np.add(a, a, out=a)
+        assert b[19] == 20
+        a = np.arange(20)
+        b = a + 1
+        a.flat[19] = 0
+        assert b[19] == 20
+
+    def test_not_lazy(self):
+        import numpypy as np
+        np.set_lazy_threshold(10)
+        a = np.arange(20).reshape(4, 5)
+        # non-contiguous operands and broadcasting are computed right away
+        assert not self.is_lazy(a.T + 1)
+        assert not self.is_lazy(a + np.arange(5))
+        b = a + 1
+        assert self.is_lazy(b)
+        c = b + np.arange(5)
+        assert not self.is_lazy(b) and not self.is_lazy(c)
+        assert c[3, 4] == 24
+        class sub(np.ndarray):
+            pass
+        assert not self.is_lazy(a.view(sub) + 1)
+
+    def test_max_nodes(self):
+        import numpypy as np
+        np.set_lazy_threshold(10)
+        a = np.ones(20)
+        b = a
+        for i in range(50):
+            b = b + a
+        assert self.is_lazy(b)
+        assert (b == 51).all()
+
+    def test_max_pending(self):
+        import numpypy as np
+        a = np.arange(20.0)
+        np.set_lazy_threshold(10)
+        results = [a + i for i in range(40)]
+        assert not self.is_lazy(results[0])
+        assert self.is_lazy(results[-1])
+        assert len([b for b in results if self.is_lazy(b)]) <= 16
+        for i in range(40):
+            assert (results[i] == a + i).all()
@@ -2453,6 +2453,93 @@ class AppTestNumArrayFromBuffer(BaseNumpyAppTest):
         f.close()
 
 
+class AppTestNumArrayFile(BaseNumpyAppTest):
+    def setup_class(cls):
+        from rpython.tool.udir import udir
+        BaseNumpyAppTest.setup_class.im_func(cls)
+        cls.w_tmpname = cls.space.wrap(str(udir.join('numpy-file-')))
+
+    def test_tofile_fromfile(self):
+        import numpypy as np
+        a = np.arange(12, dtype='int32').reshape(3, 4)
+        a.tofile(self.tmpname)
+        assert open(self.tmpname, 'rb').read() == a.tostring()
+        b = np.fromfile(self.tmpname, dtype='int32')
+        assert b.shape == (12,)
+        assert (b == np.arange(12)).all()
+        # non-contiguous
+        a.T.tofile(self.tmpname)
+        assert open(self.tmpname, 'rb').read() == a.T.tostring()
+        f = open(self.tmpname, 'rb')
+        b = np.fromfile(f, dtype='int32', count=4)
+        assert list(b) == [0, 4, 8, 1]
+        b = np.fromfile(f, dtype='int32', count=100)
+        assert list(b) == [5, 9, 2, 6, 10, 3, 7, 11]
+        f.close()
+
+    def test_tofile_fromfile_text(self):
+        import numpypy as np
+        a = np.array([1.5, 2, 3])
+        f = open(self.tmpname, 'w')
+        a.tofile(f, sep=', ')
+        f.close()
+        assert open(self.tmpname).read() == '1.5, 2.0, 3.0'
+        b = np.fromfile(self.tmpname, sep=',')
+        assert (b == a).all()
+        np.arange(3).tofile(self.tmpname, sep=' ', format='%03d')
+        assert open(self.tmpname).read() == '000 001 002'
+        b = np.fromfile(self.tmpname, dtype=int, sep=' ')
+        assert list(b) == [0, 1, 2]
+
+    def test_memmap(self):
+        import numpypy as np
+        np.arange(10, dtype='int16').tofile(self.tmpname)
+        a = np.memmap(self.tmpname, dtype='int16')
+        assert a.shape == (10,)
+        assert a.dtype == np.int16
+        assert list(a) == range(10)
+        a[1:3] = 42
+        b = a[::3]
+        b[:] = -1
+        del a, b
+        import gc; gc.collect()
+        b = np.fromfile(self.tmpname, dtype='int16')
+        assert list(b) == [-1, 42, 42, -1, 4, 5, -1, 7, 8, -1]
+
+    def test_memmap_shape_offset(self):
+        import numpypy as np
+        np.arange(10, dtype='int16').tofile(self.tmpname)
+        a = np.memmap(self.tmpname, dtype='int16', mode='r', offset=2,
+                      shape=(2, 4))
+        assert (a == np.arange(1, 9).reshape(2, 4)).all()
+        assert (a.T[1] == [2, 6]).all()
+        assert a.sum() == 36
+        raises(ValueError, "a[0, 0] = 5")
+        raises(ValueError, np.memmap, self.tmpname, dtype='int16',
+               mode='r', shape=(20,))
+        raises(ValueError, np.memmap, self.tmpname, dtype='int32',
+               offset=2)
+
+    def test_memmap_modes(self):
+        import numpypy as np
+        a = np.memmap(self.tmpname, dtype='float64', mode='w+', shape=(2, 3))
+        assert (a == 0).all()
+        a[1] = 7.5
+        del a
+        import gc; gc.collect()
+        c = np.memmap(self.tmpname, dtype='float64', mode='c')
+        assert list(c) == [0, 0, 0, 7.5, 7.5, 7.5]
+        c[:] = 1
+        assert (c == 1).all()
+        del c
+        gc.collect()
+        b = np.fromfile(self.tmpname)
+        assert list(b) == [0, 0, 0, 7.5, 7.5, 7.5]
+        raises(ValueError, np.memmap, self.tmpname, mode='w+')
+        raises(ValueError, np.memmap, self.tmpname, mode='x')
+        raises(IOError, np.memmap, self.tmpname + '-missing')
+
+
 class AppTestMultiDim(BaseNumpyAppTest):
     def test_init(self):
         import numpypy
@@ -0,0 +1,97 @@
+from pypy.module.micronumpy import parallel
+from pypy.module.micronumpy.test.test_base import BaseNumpyAppTest
+
+
+class AppTestParallel(BaseNumpyAppTest):
+    def setup_class(cls):
+        BaseNumpyAppTest.setup_class.im_func(cls)
+        cls.old_min_chunk = parallel.MIN_CHUNK
+        parallel.MIN_CHUNK = 16
+        cls.w_size = cls.space.wrap(3 * 16 + 5)
+
+    def teardown_class(cls):
+        parallel.MIN_CHUNK = cls.old_min_chunk
+
+    def teardown_method(self, meth):
+        state = parallel.get_parallel_state(self.space)
+        state.nthreads = 1
+        state.threshold = parallel.PARALLEL_THRESHOLD
+
+    def test_options(self):
+        from numpypy import set_num_threads, set_parallel_threshold
+        assert set_num_threads(4) == 1
+        assert set_num_threads(2) == 4
+        assert set_parallel_threshold(100) == 1 << 18
+        assert set_parallel_threshold(1000) == 100
+        raises(ValueError, set_num_threads, 0)
+        raises(ValueError, set_parallel_threshold, -1)
+
+    def test_binary(self):
+        import numpypy as np
+        n = self.size
+        for dtype in ['float64', 'float32', 'int64', 'int32']:
+            a = (np.arange(n) % 1000 - 300).astype(dtype)
+            b = (np.arange(n) % 7 + 1).astype(dtype)
+            ops = [np.add, np.subtract, np.multiply, np.maximum, np.minimum]
+            if dtype.startswith('float'):
+                ops.append(np.true_divide)
+            expected = [op(a, b) for op in ops] + [a * 3, 2 - a]
+            np.set_num_threads(4)
+            np.set_parallel_threshold(10)
+            got = [op(a, b) for op in ops] + [a * 3, 2 - a]
+            np.set_num_threads(1)
+            for x, y in zip(expected, got):
+                assert x.dtype == y.dtype
+                assert (x == y).all()
+
+    def test_unary_and_reduce(self):
+        import numpypy as np
+        n = self.size
+        for dtype in ['float64', 'float32', 'int64', 'int32']:
+            a = (np.arange(n) % 1000 - 300).astype(dtype)
+            ops = [np.negative, np.absolute]
+            if dtype.startswith('float'):
+                ops.append(np.sqrt)
+            expected = [op(a) for op in ops]
+            expected_red = [a.sum(), a.max(), a.min(), (a % 2 + 1).prod()]
+            np.set_num_threads(4)
+            np.set_parallel_threshold(10)
+            got = [op(a) for op in ops]
+            got_red = [a.sum(), a.max(), a.min(), (a % 2 + 1).prod()]
+            np.set_num_threads(1)
+            for x, y in zip(expected, got):
+                assert x.dtype == y.dtype
+                assert ((x == y) | (x != x)).all()
+            assert got_red == expected_red
+
+    def test_nan_and_overflow(self):
+        import numpypy as np
+        n = self.size
+        a = np.zeros(n)
+        a[40] = np.nan
+        b = np.arange(n, dtype='int32') * 100000
+        c = np.array(1000, dtype='int32')
+        expected = b * c
+        assert expected.dtype == np.int32
+        np.set_num_threads(3)
+        np.set_parallel_threshold(10)
+        assert np.isnan(a.max())
+        assert np.isnan(np.maximum(a, 1.0)[40])
+        assert (b * c == expected).all()
+        assert b.sum() == n * (n - 1) / 2 * 100000
+
+    def test_not_parallel(self):
+        import numpypy as np
+        n = self.size
+        np.set_num_threads(4)
+        np.set_parallel_threshold(10)
+        a = np.arange(n, dtype='float64')
+        # overlapping output: same results as the serial loop
+        a[1:] += a[:-1]
+        assert a[3] == 6 and a[-1] == (n - 1) * n / 2
+        # non-contiguous and mixed dtypes
+        b = np.arange(2 * n)[::2]
+        assert (b + b)[-1] == 4 * (n - 1)
+        assert (np.arange(n, dtype='int32') + 0.5)[-1] == n - 0.5
+        assert np.arange(n, dtype='uint8').sum() == sum(
+            [i % 256 for i in range(n)])
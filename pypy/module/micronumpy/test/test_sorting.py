@@ -370,3 +370,154 @@ class AppTestSorting(BaseNumpyAppTest):
         assert (ret == [0, 5, 1, 2]).all()
         if '__pypy__' in sys.builtin_module_names:
             raises(NotImplementedError, "a.searchsorted(3, sorter=range(6))")
+
+    def test_sort_radix(self):
+        from numpypy import array
+        from _random import Random
+        rnd = Random(1)
+        for dtype, lo, hi in [('int8', -128, 127), ('uint8', 0, 255),
+                              ('int16', -32768, 32767), ('uint16', 0, 65535),
+                              ('int32', -2**31, 2**31 - 1),
+                              ('uint32', 0, 2**32 - 1),
+                              ('int64', -2**63, 2**63 - 1),
+                              ('uint64', 0, 2**64 - 1), ('int', -1000, 1000)]:
+            l = [lo, hi, 0, lo + 1, hi - 1] + [
+                lo + int(rnd.random() * (hi - lo)) for i in range(300)]
+            a = array(l, dtype=dtype)
+            for kind in ['stable', 'mergesort']:
+                b = a.copy()
+                b.sort(kind=kind)
+                assert b.tolist() == sorted(l), dtype
+                res = a.argsort(kind=kind)
+                assert res.tolist() == sorted(range(len(l)),
+                                              key=l.__getitem__), dtype
+        a = array([[3, -2, 1], [1, 2, -3]], dtype='int16')
+        a.sort(axis=0, kind='s')
+        assert a.tolist() == [[1, -2, -3], [3, 2, 1]]
+        assert a.argsort(axis=None, kind='s').tolist() == [2, 1, 0, 5, 4, 3]
+        a = array([], dtype='int32')
+        a.sort(kind='s')
+        assert a.argsort(kind='s').shape == (0,)
+        raises(ValueError, "a.sort(kind='bogus')")
+        raises(ValueError, "a.argsort(kind='')")
+
+    def test_sort_bool(self):
+        from numpypy import array
+        a = array([True, False, True, True, False])
+        assert a.argsort().tolist() == [1, 4, 0, 2, 3]
+        b = a.reshape(1, 5).copy()
+        b.sort()
+        assert b.tolist() == [[False, False, True, True, True]]
+
+    def test_partition(self):
+        from numpypy import array, arange
+        from _random import Random
+        rnd = Random(2)
+        for dtype in ['int8', 'uint16', 'int', 'float32', 'float', bool]:
+            l = [int(rnd.random() * 100) for i in range(200)]
+            a = array(l, dtype=dtype)
+            exp = sorted(a.tolist())
+            for kth in [0, 17, 100, -1, [3, 150, 40], (199, 0)]:
+                b = a.copy()
+                b.partition(kth)
+                if not isinstance(kth, (list, tuple)):
+                    kth = [kth]
+                for k in kth:
+                    assert b[k] == exp[k]
+                    assert (b[:k] <= b[k]).all()
+                    assert (b[k:] >= b[k]).all()
+                assert sorted(b.tolist()) == exp
+        a = arange(1000)[::-1].copy()
+        a.partition(500)
+        assert a[500] == 500
+        assert (a[:500] < 500).all()
+        a = array([3, 1, float('nan'), 2])
+        a.partition(2)
+        assert a[:3].tolist() == [1, 2, 3]
+        assert a[3] != a[3]
+        raises(ValueError, "a.partition(4)")
+        raises(ValueError, "a.partition(-5)")
+        raises(ValueError, "a.partition(1, kind='quicksort')")
+        raises(ValueError, "array(1).partition(0)")
+
+    def test_partition_axis(self):
+        from numpypy import array, arange, median
+        a = array([[9, 1, 8, 2], [0, 7, 3, 6], [5, 4, 11, 10]])
+        b = a.copy()
+        b.partition(1)
+        assert b[:, 1].tolist() == [2, 3, 5]
+        b = a.copy()
+        b.partition(0, axis=0)
+        assert b[0].tolist() == [0, 1, 3, 2]
+        b = a.copy()
+        b.partition(5, axis=None)
+        assert b.shape == (3, 4)
+        assert b.ravel()[5] == 5
+        raises(ValueError, "a.partition(0, axis=2)")
+        # in-place on a view
+        b = a.copy()
+        b[:, ::2].partition(0)
+        assert b.tolist() == [[8, 1, 9, 2], [0, 7, 3, 6], [5, 4, 11, 10]]
+        a = array([9, 100, 8, 100, 7, 100, 6, 100])
+        a[::2].partition(0)
+        assert a[0] == 6
+        assert a[1::2].tolist() == [100] * 4
+        assert sorted(a[::2].tolist()) == [6, 7, 8, 9]
+        a = arange(20)
+        a[::-1].partition(10)
+        assert a[::-1][10] == 10
+        assert sorted(a.tolist()) == range(20)
+        a = arange(21)[::-1].copy()
+        assert median(a[::-3], overwrite_input=True) == 9
+        assert sorted(a.tolist()) == range(21)
+
+    def test_argpartition(self):
+        from numpypy import array, arange
+        from _random import Random
+        rnd = Random(3)
+        l = [rnd.random() for i in range(100)]
+        a = array(l)
+        exp = sorted(l)
+        for kth in [0, 50, 99, [10, 20]]:
+            res = a.argpartition(kth)
+            assert sorted(res.tolist()) == range(100)
+            if not isinstance(kth, list):
+                kth = [kth]
+            for k in kth:
+                assert a[res[k]] == exp[k]
+                assert (a[res[:k]] <= exp[k]).all()
+        assert a.tolist() == l  # not modified
+        a = arange(12)[::-1].reshape(3, 4)
+        res = a.argpartition(0, axis=0)
+        assert res[0].tolist() == [2, 2, 2, 2]
+        assert a.argpartition(11, axis=None)[11] == 0
+
+    def test_median(self):
+        import numpypy as np
+        from numpypy import array, arange, median, zeros
+        assert median([3, 1, 2]) == 2
+        assert median([4, 1, 3, 2]) == 2.5
+        assert median(arange(101)[::-1]) == 50
+        a = array([[10, 7, 4], [3, 2, 1]])
+        assert median(a) == 3.5
+        assert median(a, axis=0).tolist() == [6.5, 4.5, 2.5]
+        assert median(a, axis=-1).tolist() == [7, 2]
+        assert a.tolist() == [[10, 7, 4], [3, 2, 1]]
+        out = zeros(2)
+        assert median(a, axis=1, out=out) is out
+        assert out.tolist() == [7, 2]
+        b = a.copy()
+        median(b, overwrite_input=True)
+        assert sorted(b.ravel().tolist()) == [1, 2, 3, 4, 7, 10]
+        r = median(array([[1, 2, float('nan')], [1, 2, 3]]), axis=1)
+        assert r[0] != r[0] and r[1] == 2
+        r = median([1, float('nan'), 2])
+        assert r != r
+        assert not isinstance(r, np.ndarray)
+        assert isinstance(median([1., 2.]), float)
+        r = median(array([]))
+        assert r != r
+        assert not isinstance(r, np.ndarray)
+        r = median(zeros((3, 0)), axis=1)
+        assert r.shape == (3,)
+        assert (r != r).all()
@@ -5,9 +5,12 @@ good assembler
 import py
 from rpython.jit.metainterp.test.support import LLJitMixin
 from rpython.jit.metainterp.warmspot import reset_jit, get_stats
-from pypy.module.micronumpy import boxes
+from pypy.module.micronumpy import boxes, lazy
 from pypy.module.micronumpy.compile import FakeSpace, Parser, InterpreterState
 from pypy.module.micronumpy.base import W_NDimArray
+from rpython.jit.metainterp.optimizeopt import ALL_OPTS_NAMES
+
+ENABLE_OPTS = ALL_OPTS_NAMES + ':vec'
 
 
 class TestNumpyJit(LLJitMixin):
@@ -41,6 +44,7 @@ class TestNumpyJit(LLJitMixin):
         codes = self.codes
 
         def f(i):
+            lazy.get_lazy_state(space).threshold = 0
             interp = InterpreterState(codes[i])
             interp.run(space)
             if not len(interp.results):
@@ -62,6 +66,7 @@ class TestNumpyJit(LLJitMixin):
                                              listops=True,
                                              listcomp=True,
                                              backendopt=True,
+                                             enable_opts=ENABLE_OPTS,
                                              graph_and_interp_only=True)
             self.__class__.interp = interp
             self.__class__.graph = graph
@@ -82,12 +87,17 @@ class TestNumpyJit(LLJitMixin):
 
     def test_add(self):
         result = self.run("add")
-        py.test.skip("don't run for now")
-        self.check_simple_loop({'raw_load': 2, 'float_add': 1,
-                                'raw_store': 1, 'int_add': 1,
-                                'int_ge': 1, 'guard_false': 1, 'jump': 1,
-                                'arraylen_gc': 1})
         assert result == 3 + 3
+        self.check_trace_count(1)
+        # two items per iteration, packed by the 'vec' optimization
+        self.check_simple_loop({
+            'guard_not_invalidated': 1,
+            'guard_true': 1,
+            'int_add': 5,
+            'int_lt': 1,
+            'jump': 1,
+            'vec_float_add': 1,
+        })
 
     def define_float_add():
         return """
@@ -658,3 +668,31 @@ class TestNumpyJit(LLJitMixin):
             'raw_store': 1,
             'setarrayitem_gc': 4,
         })
+
+    def define_lazy_expression():
+        return """
+        a = |30|
+        b = lazy(a)
+        c = a * a + a - 3
+        c -> 3
+        """
+
+    def test_lazy_expression(self):
+        result = self.run("lazy_expression")
+        assert result == 3 * 3 + 3 - 3
+        # one loop for the whole expression, without temporary arrays
+        self.check_trace_count(1)
+        self.check_simple_loop({
+            'float_add': 1,
+            'float_mul': 1,
+            'float_sub': 1,
+            'guard_not_invalidated': 1,
+            'guard_true': 1,
+            'int_add': 4,
+            'int_lshift': 1,
+            'int_lt': 1,
+            'int_mul': 1,
+            'jump': 1,
+            'raw_load': 4,
+            'raw_store': 1,
+        })
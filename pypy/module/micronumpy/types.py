@@ -7,7 +7,7 @@ from rpython.rlib import clibffi, jit, rfloat, rcomplex
 from rpython.rlib.objectmodel import specialize
 from rpython.rlib.rarithmetic import widen, byteswap, r_ulonglong, \
     most_neg_value_of, LONG_BIT
-from rpython.rlib.rawstorage import (alloc_raw_storage,
+from rpython.rlib.rawstorage import (alloc_raw_storage, free_raw_storage,
     raw_storage_getitem_unaligned, raw_storage_setitem_unaligned)
 from rpython.rlib.rstring import StringBuilder
 from rpython.rlib.rstruct.ieee import (float_pack, float_unpack, unpack_float,
@@ -108,6 +108,76 @@ def raw_binary_op(func):
         )
     return dispatcher
 
+# blocks of the right operand of dot_blocked(), small enough to stay in
+# the cache while all the rows of the left operand use them
+DOT_BLOCK_K = 64
+DOT_BLOCK_M = 256
+
+@jit.dont_look_inside
+def dot_blocked(self, left, right, out, n, k, m, pack):
+    """ out += left * right, with operands of shape (n, k), (k, m) and
+    (n, m) given by their storage, offset and two strides in bytes.  The
+    right operand is walked by blocks of DOT_BLOCK_K x DOT_BLOCK_M, copied
+    to a contiguous buffer first if 'pack' is set.  Every item of 'out' is
+    still the sum of the products in the same order as in the loop of
+    multidim_dot(), so the results are the same.  This is used as a method
+    of the mixins, so it is specialized for every type.
+    """
+    width = self.get_element_size()
+    buf = lltype.nullptr(rffi.CCHARP.TO)
+    if pack:
+        buf = alloc_raw_storage(DOT_BLOCK_K * DOT_BLOCK_M * width,
+                                track_allocation=False, zero=False)
+    try:
+        j0 = 0
+        while j0 < m:
+            jn = min(DOT_BLOCK_M, m - j0)
+            p0 = 0
+            while p0 < k:
+                pn = min(DOT_BLOCK_K, k - p0)
+                if pack:
+                    dst = 0
+                    for p in range(pn):
+                        src = (right.offset + (p0 + p) * right.stride0 +
+                               j0 * right.stride1)
+                        for j in range(jn):
+                            self._write(buf, dst, 0,
+                                        self._read(right.storage, src, 0))
+                            src += right.stride1
+                            dst += width
+                    b_storage = buf
+                    b_start = 0
+                    b_stride0 = jn * width
+                    b_stride1 = width
+                else:
+                    b_storage = right.storage
+                    b_start = (right.offset + p0 * right.stride0 +
+                               j0 * right.stride1)
+                    b_stride0 = right.stride0
+                    b_stride1 = right.stride1
+                for i in range(n):
+                    a_ofs = left.offset + i * left.stride0 + p0 * left.stride1
+                    out_start = out.offset + i * out.stride0 + j0 * out.stride1
+                    b_row = b_start
+                    for p in range(pn):
+                        a = self._read(left.storage, a_ofs, 0)
+                        b_ofs = b_row
+                        out_ofs = out_start
+                        for j in range(jn):
+                            acc = self._read(out.storage, out_ofs, 0)
+                            b = self._read(b_storage, b_ofs, 0)
+                            self._write(out.storage, out_ofs, 0,
+                                        self.dot_step(acc, a, b))
+                            b_ofs += b_stride1
+                            out_ofs += out.stride1
+                        a_ofs += left.stride1
+                        b_row += b_stride0
+                p0 += pn
+            j0 += jn
+    finally:
+        if pack:
+            free_raw_storage(buf, track_allocation=False)
+
 class BaseType(object):
     _immutable_fields_ = ['native']
 
@@ -193,6 +263,15 @@ class Primitive(object):
         for i in xrange(start, stop, width):
             self._write(storage, i, offset, value)
 
+    dot_blocked = dot_blocked
+
+    def dot_step(self, acc, v1, v2):
+        # self.add(acc, self.mul(v1, v2)) on unboxed values
+        prod = rffi.cast(self.T, self.for_computation(v1) *
+                                 self.for_computation(v2))
+        return rffi.cast(self.T, self.for_computation(acc) +
+                                 self.for_computation(prod))
+
     def runpack_str(self, space, s):
         v = rffi.cast(self.T, runpack(self.format_code, s))
         if not self.native:
@@ -1001,6 +1080,47 @@ class Float16(BaseType, Float):
             hbits = byteswap(hbits)
         raw_storage_setitem_unaligned(storage, i + offset, hbits)
 
+    @jit.dont_look_inside
+    def dot_blocked(self, left, right, out, n, k, m, pack):
+        # the loop on boxes adds up the products of float16 items as
+        # doubles, and rounds only the final sum to float16: do the same
+        # on float64 copies of the operands and of the result
+        float64 = Float64()
+        a = self._dot_copy(float64, left, n, k)
+        b = self._dot_copy(float64, right, k, m)
+        c = self._dot_copy(float64, out, n, m)
+        try:
+            float64.dot_blocked(a, b, c, n, k, m, pack)
+            src = 0
+            for i in range(n):
+                dst = out.offset + i * out.stride0
+                for j in range(m):
+                    self._write(out.storage, dst, 0,
+                                float64._read(c.storage, src, 0))
+                    src += c.stride1
+                    dst += out.stride1
+        finally:
+            free_raw_storage(a.storage, track_allocation=False)
+            free_raw_storage(b.storage, track_allocation=False)
+            free_raw_storage(c.storage, track_allocation=False)
+
+    def _dot_copy(self, float64, operand, n, m):
+        """ A contiguous float64 copy of an (n, m) operand of dot_blocked()
+        """
+        from pypy.module.micronumpy.loop import DotOperand
+        width = float64.get_element_size()
+        storage = alloc_raw_storage(n * m * width, track_allocation=False,
+                                    zero=False)
+        dst = 0
+        for i in range(n):
+            src = operand.offset + i * operand.stride0
+            for j in range(m):
+                float64._write(storage, dst, 0,
+                               self._read(operand.storage, src, 0))
+                src += operand.stride1
+                dst += width
+        return DotOperand(storage, 0, m * width, width)
+
 class Float32(BaseType, Float):
     T = rffi.FLOAT
     BoxType = boxes.W_Float32Box
@@ -1148,6 +1268,17 @@ class ComplexFloating(object):
         for i in xrange(start, stop, width):
             self._write(storage, i, offset, value)
 
+    dot_blocked = dot_blocked
+
+    def dot_step(self, acc, v1, v2):
+        # self.add(acc, self.mul(v1, v2)) on unboxed values
+        real, imag = rcomplex.c_mul(self.for_computation(v1),
+                                    self.for_computation(v2))
+        prod = rffi.cast(self.T, real), rffi.cast(self.T, imag)
+        real, imag = rcomplex.c_add(self.for_computation(acc),
+                                    self.for_computation(prod))
+        return rffi.cast(self.T, real), rffi.cast(self.T, imag)
+
     @complex_binary_op
     def add(self, v1, v2):
         return rcomplex.c_add(v1, v2)
@@ -5,7 +5,8 @@ from pypy.interpreter.typedef import TypeDef, GetSetProperty, interp_attrpropert
 from rpython.rlib import jit
 from rpython.rlib.rarithmetic import LONG_BIT, maxint
 from rpython.tool.sourcetools import func_with_new_name
-from pypy.module.micronumpy import boxes, descriptor, loop, constants as NPY
+from pypy.module.micronumpy import boxes, descriptor, lazy, loop, parallel, \
+    constants as NPY
 from pypy.module.micronumpy.base import convert_to_array, W_NDimArray
 from pypy.module.micronumpy.strides import shape_agreement
 
@@ -168,6 +169,8 @@ class W_Ufunc(W_Root):
                         "reduce only supported for binary functions")
         assert isinstance(self, W_Ufunc2)
         obj = convert_to_array(space, w_obj)
+        if out is not None:
+            lazy.prepare(space, out)
         if obj.get_dtype().is_flexible():
             raise oefmt(space.w_TypeError,
                         "cannot perform reduce with flexible type")
@@ -265,7 +268,7 @@ class W_Ufunc(W_Root):
                             "too many dimensions", self.name)
             dtype = out.get_dtype()
         res = loop.compute_reduce(space, obj, dtype, self.func, self.done_func,
-                                  self.identity)
+                                  self.identity, self.parallel_reduce_op)
         if out:
             out.set_scalar_value(res)
             return out
@@ -286,7 +289,7 @@ class W_Ufunc(W_Root):
 
 
 class W_Ufunc1(W_Ufunc):
-    _immutable_fields_ = ["func", "bool_result"]
+    _immutable_fields_ = ["func", "bool_result", "parallel_op"]
     argcount = 1
 
     def __init__(self, func, name, promote_to_largest=False, promote_to_float=False,
@@ -296,6 +299,7 @@ class W_Ufunc1(W_Ufunc):
                          identity, int_only, allow_bool, allow_complex, complex_to_float)
         self.func = func
         self.bool_result = bool_result
+        self.parallel_op = parallel.get_op(parallel.UNARY_OPS, name)
 
     def call(self, space, args_w):
         w_obj = args_w[0]
@@ -304,7 +308,9 @@ class W_Ufunc1(W_Ufunc):
             out = args_w[1]
             if space.is_w(out, space.w_None):
                 out = None
-        w_obj = convert_to_array(space, w_obj)
+        if not isinstance(w_obj, W_NDimArray):
+            # a lazy array stays lazy, see below
+            w_obj = convert_to_array(space, w_obj)
         dtype = w_obj.get_dtype()
         if dtype.is_flexible():
             raise OperationError(space.w_TypeError,
@@ -321,6 +327,7 @@ class W_Ufunc1(W_Ufunc):
         if out is not None:
             if not isinstance(out, W_NDimArray):
                 raise oefmt(space.w_TypeError, 'output must be an array')
+            lazy.prepare(space, out)
             res_dtype = out.get_dtype()
             #if not w_obj.get_dtype().can_cast_to(res_dtype):
             #    raise oefmt(space.w_TypeError,
@@ -347,12 +354,17 @@ class W_Ufunc1(W_Ufunc):
             return out
         shape = shape_agreement(space, w_obj.get_shape(), out,
                                 broadcast_down=False)
+        w_res = lazy.call1(space, self, shape, calc_dtype, res_dtype, w_obj,
+                           out)
+        if w_res is not None:
+            return w_res
         return loop.call1(space, shape, self.func, calc_dtype, res_dtype,
-                          w_obj, out)
+                          w_obj, out, self.parallel_op)
 
 
 class W_Ufunc2(W_Ufunc):
-    _immutable_fields_ = ["func", "comparison_func", "done_func"]
+    _immutable_fields_ = ["func", "comparison_func", "done_func",
+                          "parallel_op", "parallel_reduce_op"]
     argcount = 2
 
     def __init__(self, func, name, promote_to_largest=False, promote_to_float=False,
@@ -362,6 +374,8 @@ class W_Ufunc2(W_Ufunc):
                          identity, int_only, allow_bool, allow_complex, complex_to_float)
         self.func = func
         self.comparison_func = comparison_func
+        self.parallel_op = parallel.get_op(parallel.BINARY_OPS, name)
+        self.parallel_reduce_op = parallel.get_op(parallel.REDUCE_OPS, name)
         if name == 'logical_and':
             self.done_func = done_if_false
         elif name == 'logical_or':
@@ -385,8 +399,11 @@ class W_Ufunc2(W_Ufunc):
         else:
             [w_lhs, w_rhs] = args_w
             w_out = None
-        w_lhs = convert_to_array(space, w_lhs)
-        w_rhs = convert_to_array(space, w_rhs)
+        # a lazy array stays lazy, see below
+        if not isinstance(w_lhs, W_NDimArray):
+            w_lhs = convert_to_array(space, w_lhs)
+        if not isinstance(w_rhs, W_NDimArray):
+            w_rhs = convert_to_array(space, w_rhs)
         w_ldtype = w_lhs.get_dtype()
         w_rdtype = w_rhs.get_dtype()
         if w_ldtype.is_str() and w_rdtype.is_str() and \
@@ -433,6 +450,7 @@ class W_Ufunc2(W_Ufunc):
             raise oefmt(space.w_TypeError, 'output must be an array')
         else:
             out = w_out
+            lazy.prepare(space, out)
             calc_dtype = out.get_dtype()
         if self.comparison_func:
             res_dtype = descriptor.get_dtype_cache(space).w_booldtype
@@ -453,8 +471,12 @@ class W_Ufunc2(W_Ufunc):
             return out
         new_shape = shape_agreement(space, w_lhs.get_shape(), w_rhs)
         new_shape = shape_agreement(space, new_shape, out, broadcast_down=False)
+        w_res = lazy.call2(space, self, new_shape, calc_dtype, res_dtype,
+                           w_lhs, w_rhs, out)
+        if w_res is not None:
+            return w_res
         return loop.call2(space, new_shape, self.func, calc_dtype,
-                          res_dtype, w_lhs, w_rhs, out)
+                          res_dtype, w_lhs, w_rhs, out, self.parallel_op)
 
 
 W_Ufunc.typedef = TypeDef("numpy.ufunc",
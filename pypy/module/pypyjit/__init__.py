@@ -7,15 +7,21 @@ class Module(MixedModule):
     interpleveldefs = {
         'set_param':    'interp_jit.set_param',
         'residual_call': 'interp_jit.residual_call',
+        'compile_pending_bridges': 'interp_jit.compile_pending_bridges',
+        'warm_start': 'interp_warmstart.warm_start',
         'set_compile_hook': 'interp_resop.set_compile_hook',
         'set_optimize_hook': 'interp_resop.set_optimize_hook',
         'set_abort_hook': 'interp_resop.set_abort_hook',
         'get_stats_snapshot': 'interp_resop.get_stats_snapshot',
+        'get_loop_stats': 'interp_loopstats.get_loop_stats',
+        'get_jit_memory_usage': 'interp_loopstats.get_jit_memory_usage',
+        'get_abort_stats': 'interp_loopstats.get_abort_stats',
         'enable_debug': 'interp_resop.enable_debug',
         'disable_debug': 'interp_resop.disable_debug',
         'ResOperation': 'interp_resop.WrappedOp',
         'DebugMergePoint': 'interp_resop.DebugMergePoint',
         'JitLoopInfo': 'interp_resop.W_JitLoopInfo',
+        'JitLoopStats': 'interp_loopstats.W_JitLoopStats',
         'Box': 'interp_resop.WrappedBox',
         'PARAMETER_DOCS': 'space.wrap(rpython.rlib.jit.PARAMETER_DOCS)',
     }
@@ -31,3 +37,7 @@ class Module(MixedModule):
         w_obj = space.wrap(PARAMETERS)
         space.setattr(space.wrap(self), space.wrap('defaults'), w_obj)
         pypy_hooks.space = space
+
+    def shutdown(self, space):
+        from pypy.module.pypyjit.interp_warmstart import dump_at_shutdown
+        dump_at_shutdown(space)
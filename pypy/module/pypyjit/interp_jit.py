@@ -5,7 +5,7 @@ This is transformed to become a JIT by code elsewhere: rpython/jit/*
 
 from rpython.rlib.rarithmetic import r_uint, intmask
 from rpython.rlib.jit import JitDriver, hint, we_are_jitted, dont_look_inside
-from rpython.rlib import jit
+from rpython.rlib import jit, jit_hooks
 from rpython.rlib.jit import current_trace_length, unroll_parameters
 import pypy.interpreter.pyopcode   # for side-effects
 from pypy.interpreter.error import OperationError, oefmt
@@ -80,7 +80,7 @@ class __extend__(PyFrame):
                     decr_by = _get_adapted_tick_counter()
             #
             self.last_instr = intmask(jumpto)
-            ec.bytecode_trace(self, decr_by)
+            ec.bytecode_trace(self, decr_by, self.getcode(), intmask(jumpto))
             jumpto = r_uint(self.last_instr)
         #
         pypyjitdriver.can_enter_jit(frame=self, ec=ec, next_instr=jumpto,
@@ -144,3 +144,10 @@ def residual_call(space, w_callable, __args__):
     '''For testing.  Invokes callable(...), but without letting
     the JIT follow the call.'''
     return space.call_args(w_callable, __args__)
+
+def compile_pending_bridges(space):
+    '''Compile the bridges whose trace is waiting because of the
+    defer_bridges JIT parameter, and return how many were attached.
+    Meant to be called when the program is idle, or regularly from a
+    helper thread.'''
+    return space.wrap(jit_hooks.compile_pending_bridges(None))
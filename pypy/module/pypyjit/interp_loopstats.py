@@ -0,0 +1,265 @@
+"""Statistics about the loops and bridges compiled for Python code.
+
+Every compiled loop and bridge is recorded by the JIT hooks, with a weak
+reference to its loop token, the unique ids of its guards and of its
+labels.  get_loop_stats() combines them with the counters of the backend
+(the 'jit-backend-counts' of PYPYLOG) and with the guards that failed
+without having a bridge, so that only enable_debug() is needed to get
+the numbers; nothing is done at run-time by the compiled code besides
+the usual counters.
+"""
+
+import weakref
+
+from rpython.rlib import jit_hooks
+from rpython.rlib.jit import Counters
+from rpython.rlib.objectmodel import compute_unique_id
+from rpython.rtyper.annlowlevel import hlstr
+from rpython.jit.metainterp.resoperation import rop
+
+from pypy.interpreter.baseobjspace import W_Root
+from pypy.interpreter.error import OperationError
+from pypy.interpreter.gateway import interp2app
+from pypy.interpreter.typedef import (TypeDef, GetSetProperty,
+     interp_attrproperty, interp_attrproperty_w)
+from pypy.module.pypyjit.interp_jit import pypyjitdriver
+from pypy.module.pypyjit.interp_warmstart import pycode_from_box
+
+
+class CompiledTrace(object):
+    def __init__(self, type, looptoken, loop_no, bridge_no, pycode, offset,
+                 asmlen, guard_ids, label_ids):
+        self.type = type
+        self.wref_looptoken = weakref.ref(looptoken)
+        self.loop_no = loop_no
+        self.bridge_no = bridge_no
+        self.pycode = pycode        # None if unknown
+        self.offset = offset
+        self.asmlen = asmlen
+        self.guard_ids = guard_ids
+        self.label_ids = label_ids
+
+    def is_alive(self):
+        return self.wref_looptoken() is not None
+
+
+class LoopStats(object):
+    PRUNE_LIMIT = 64
+
+    def __init__(self, space):
+        self.traces = []
+        self.prune_limit = self.PRUNE_LIMIT
+
+    def record(self, trace):
+        self.traces.append(trace)
+        if len(self.traces) >= self.prune_limit:
+            self.prune()
+            self.prune_limit = max(self.PRUNE_LIMIT, 2 * len(self.traces))
+
+    def prune(self):
+        self.traces = [trace for trace in self.traces if trace.is_alive()]
+
+
+def record_loop_stats(space, debug_info, is_bridge):
+    """Called by the JIT hooks after every compilation."""
+    if debug_info.get_jitdriver() is not pypyjitdriver:
+        return
+    pycode = None
+    offset = -1
+    guard_ids = []
+    label_ids = []
+    for op in debug_info.operations:
+        opnum = op.getopnum()
+        if op.is_guard() and op.getdescr() is not None:
+            guard_ids.append(compute_unique_id(op.getdescr()))
+        elif opnum == rop.LABEL and op.getdescr() is not None:
+            label_ids.append(compute_unique_id(op.getdescr()))
+        elif (opnum == rop.DEBUG_MERGE_POINT and is_bridge and
+              pycode is None):
+            # a bridge starts at the first debug_merge_point
+            greenkey = op.getarglist()[3:]
+            pycode = pycode_from_box(greenkey[2])
+            offset = greenkey[0].getint()
+    if is_bridge:
+        bridge_no = compute_unique_id(debug_info.fail_descr)
+    else:
+        bridge_no = -1
+        pycode = pycode_from_box(debug_info.greenkey[2])
+        offset = debug_info.greenkey[0].getint()
+    asmlen = 0
+    if debug_info.asminfo is not None:
+        asmlen = debug_info.asminfo.asmlen
+    looptoken = debug_info.looptoken
+    trace = CompiledTrace(debug_info.type, looptoken, looptoken.number,
+                          bridge_no, pycode, offset, asmlen, guard_ids,
+                          label_ids)
+    space.fromcache(LoopStats).record(trace)
+
+
+class W_JitLoopStats(W_Root):
+    """ Statistics of a compiled loop or bridge
+    """
+
+    type             = "loop"
+    loop_no          = 0
+    bridge_no        = -1
+    w_green_key      = None
+    asmlen           = 0
+    entry_count      = 0
+    iterations       = 0
+    w_guard_failures = None
+
+    def __init__(self, space, trace, entry_count, iterations,
+                 w_guard_failures):
+        self.type = trace.type
+        self.loop_no = trace.loop_no
+        self.bridge_no = trace.bridge_no
+        if trace.pycode is None:
+            self.w_green_key = space.w_None
+        else:
+            self.w_green_key = space.newtuple([space.wrap(trace.pycode),
+                                               space.wrap(trace.offset)])
+        self.asmlen = trace.asmlen
+        self.entry_count = entry_count
+        self.iterations = iterations
+        self.w_guard_failures = w_guard_failures
+
+    def descr_repr(self, space):
+        if self.type == "bridge":
+            what = 'bridge no %d' % self.bridge_no
+        else:
+            what = '%s no %d' % (self.type, self.loop_no)
+        return space.wrap('<JitLoopStats %s, entered %d times>' %
+                          (what, self.entry_count))
+
+    def descr_get_bridge_no(self, space):
+        if self.type == "bridge":
+            return space.wrap(self.bridge_no)
+        raise OperationError(space.w_TypeError, space.wrap("not a bridge"))
+
+W_JitLoopStats.typedef = TypeDef(
+    'JitLoopStats',
+    __doc__ = W_JitLoopStats.__doc__,
+    type = interp_attrproperty('type', cls=W_JitLoopStats,
+                               doc="Loop type"),
+    loop_no = interp_attrproperty('loop_no', cls=W_JitLoopStats, doc=
+                                  "Loop cardinal number (of the loop that "
+                                  "a bridge belongs to)"),
+    bridge_no = GetSetProperty(W_JitLoopStats.descr_get_bridge_no,
+                               doc="bridge number (if a bridge)"),
+    greenkey = interp_attrproperty_w('w_green_key', cls=W_JitLoopStats,
+               doc="(code, offset) where the loop or bridge starts, or None"),
+    asmlen = interp_attrproperty('asmlen', cls=W_JitLoopStats,
+                                 doc="Length of machine code"),
+    entry_count = interp_attrproperty('entry_count', cls=W_JitLoopStats,
+               doc="Number of times the loop was entered from the "
+                   "interpreter, or number of times the guard of a bridge "
+                   "failed"),
+    iterations = interp_attrproperty('iterations', cls=W_JitLoopStats,
+               doc="Number of times the labels of the loop were reached"),
+    guard_failures = interp_attrproperty_w('w_guard_failures',
+               cls=W_JitLoopStats,
+               doc="{guard number: failures} for the guards that failed"),
+    __repr__ = interp2app(W_JitLoopStats.descr_repr),
+)
+W_JitLoopStats.acceptable_as_base_class = False
+
+
+def get_loop_stats(space):
+    """ Return a list of JitLoopStats for the loops and bridges of Python
+    code that are still alive.  The counters only work after
+    enable_debug().  The failures of a guard that has a bridge are the
+    entry count of the bridge.
+    """
+    stats = space.fromcache(LoopStats)
+    stats.prune()
+    entry_counts = {}
+    label_counts = {}
+    failures = {}
+    ll_times = jit_hooks.stats_get_loop_run_times(None)
+    for i in range(len(ll_times)):
+        type = ll_times[i].type
+        number = ll_times[i].number
+        if type == 'e':
+            entry_counts[number] = ll_times[i].counter
+        elif type == 'l':
+            label_counts[number] = ll_times[i].counter
+        elif type == 'b':
+            failures[number] = ll_times[i].counter
+    ll_failures = jit_hooks.stats_get_guard_failures(None)
+    for i in range(len(ll_failures)):
+        number = ll_failures[i].number
+        failures[number] = failures.get(number, 0) + ll_failures[i].counter
+    result_w = []
+    for trace in stats.traces:
+        if trace.type == "bridge":
+            entry_count = failures.get(trace.bridge_no, 0)
+        else:
+            entry_count = entry_counts.get(trace.loop_no, 0)
+        iterations = 0
+        for label_id in trace.label_ids:
+            iterations += label_counts.get(label_id, 0)
+        w_guard_failures = space.newdict()
+        for guard_id in trace.guard_ids:
+            count = failures.get(guard_id, 0)
+            if count > 0:
+                space.setitem(w_guard_failures, space.wrap(guard_id),
+                              space.wrap(count))
+        result_w.append(space.wrap(W_JitLoopStats(space, trace, entry_count,
+                                                  iterations,
+                                                  w_guard_failures)))
+    return space.newlist(result_w)
+
+
+def get_jit_memory_usage(space):
+    """ Return a dict with the memory used by the JIT: 'code' is the
+    number of bytes of machine code in use, 'allocated' the number of
+    bytes reserved for machine code, 'limit' the max_code_memory
+    parameter (0 for no limit), 'alive_loops' the number of loops kept
+    alive and 'evicted_loops' the number of loops freed so far because
+    of the limit.
+    """
+    usage = jit_hooks.stats_get_memory_usage(None)
+    w_result = space.newdict()
+    space.setitem_str(w_result, 'code', space.wrap(usage.code))
+    space.setitem_str(w_result, 'allocated', space.wrap(usage.allocated))
+    space.setitem_str(w_result, 'limit', space.wrap(usage.limit))
+    space.setitem_str(w_result, 'alive_loops', space.wrap(usage.alive_loops))
+    space.setitem_str(w_result, 'evicted_loops',
+                      space.wrap(usage.evicted_loops))
+    return w_result
+
+
+def get_abort_stats(space):
+    """ Return a list with a dict for every piece of code whose tracing
+    was aborted, or that the JIT stopped inlining because it makes the
+    traces too long.  The keys are 'location', 'count' (the number of
+    aborts), 'reasons' (a dict {reason: number of aborts}),
+    'last_trace_length', 'max_trace_length', 'inlining_disabled' and
+    'backoff' (the counter of the location increases 2**backoff times
+    more slowly than usual).
+    """
+    ll_stats = jit_hooks.stats_get_abort_stats(None)
+    result_w = []
+    for i in range(len(ll_stats)):
+        stats = ll_stats[i]
+        w_reasons = space.newdict()
+        for j in range(len(stats.reasons)):
+            if stats.reasons[j]:
+                name = Counters.counter_names[Counters.ABORT_TOO_LONG + j]
+                space.setitem_str(w_reasons, name,
+                                  space.wrap(stats.reasons[j]))
+        w_stats = space.newdict()
+        space.setitem_str(w_stats, 'location',
+                          space.wrap(hlstr(stats.location)))
+        space.setitem_str(w_stats, 'count', space.wrap(stats.count))
+        space.setitem_str(w_stats, 'reasons', w_reasons)
+        space.setitem_str(w_stats, 'last_trace_length',
+                          space.wrap(stats.last_trace_length))
+        space.setitem_str(w_stats, 'max_trace_length',
+                          space.wrap(stats.max_trace_length))
+        space.setitem_str(w_stats, 'inlining_disabled',
+                          space.wrap(stats.inlining_disabled))
+        space.setitem_str(w_stats, 'backoff', space.wrap(stats.backoff))
+        result_w.append(w_stats)
+    return space.newlist(result_w)
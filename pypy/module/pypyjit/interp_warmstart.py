@@ -0,0 +1,185 @@
+"""Persistent warm-start profile for the JIT.
+
+When enabled, the loops compiled by this process and the guards that
+got a bridge are recorded and written to a file when the space shuts
+down.  A later process that loads the same file primes the JIT counters
+of the recorded loops as soon as the corresponding code objects are
+created, so that they are traced on their first iteration instead of
+after 'threshold' iterations.
+
+Greenkeys cannot be saved as they are, because they contain the code
+objects themselves; instead a code object is identified by its file name,
+name, first line number and bytecode length.  Guards are only saved for
+inspection: they are new objects in every process, so nothing can be
+primed from them.
+
+The file format is one entry per line:
+
+    kind count offset codesize firstlineno name filename
+
+where 'kind' is 'loop' or 'bridge' and 'count' is the number of
+compilations seen at this position.
+"""
+
+import errno
+
+from rpython.rlib import jit
+from rpython.rlib.rarithmetic import r_uint
+from rpython.rlib import streamio
+from rpython.rlib.streamio import StreamErrors
+from rpython.rtyper.annlowlevel import cast_base_ptr_to_instance
+from rpython.rtyper.lltypesystem import lltype
+from rpython.rtyper.lltypesystem.rclass import OBJECT
+from rpython.jit.metainterp.resoperation import rop
+
+from pypy.interpreter.error import wrap_oserror
+from pypy.interpreter.gateway import unwrap_spec
+from pypy.interpreter.pycode import PyCode
+from pypy.module.pypyjit.interp_jit import pypyjitdriver
+
+KIND_LOOP = 'loop'
+KIND_BRIDGE = 'bridge'
+
+
+def code_key(pycode):
+    return '%d %d %s %s' % (len(pycode.co_code), pycode.co_firstlineno,
+                            pycode.co_name, pycode.co_filename)
+
+
+def pycode_from_box(box):
+    ll_code = lltype.cast_opaque_ptr(lltype.Ptr(OBJECT), box.getref_base())
+    return cast_base_ptr_to_instance(PyCode, ll_code)
+
+
+class WarmStartProfile(object):
+    def __init__(self, space):
+        self.space = space
+        self.filename = None
+        # code key -> list of loop offsets to prime
+        self.loop_offsets = {}
+        # 'kind offset codekey' -> count, both loaded and recorded
+        self.counts = {}
+
+    def is_enabled(self):
+        return self.filename is not None
+
+    def load(self, filename):
+        stream = streamio.open_file_as_stream(filename, 'r')
+        try:
+            data = stream.readall()
+        finally:
+            stream.close()
+        for line in data.split('\n'):
+            self.parse_line(line)
+
+    def parse_line(self, line):
+        if not line or line.startswith('#'):
+            return
+        parts = line.split(' ', 3)
+        if len(parts) != 4:
+            return
+        kind = parts[0]
+        if kind != KIND_LOOP and kind != KIND_BRIDGE:
+            return
+        try:
+            count = int(parts[1])
+            offset = int(parts[2])
+        except ValueError:
+            return
+        if count <= 0 or offset < 0:
+            return
+        key = parts[3]
+        self.add(kind, offset, key, count)
+        if kind == KIND_LOOP:
+            try:
+                offsets = self.loop_offsets[key]
+            except KeyError:
+                offsets = self.loop_offsets[key] = []
+            if offset not in offsets:
+                offsets.append(offset)
+
+    def add(self, kind, offset, key, count):
+        entry = '%s %d %s' % (kind, offset, key)
+        self.counts[entry] = self.counts.get(entry, 0) + count
+
+    def record(self, kind, pycode, offset):
+        self.add(kind, offset, code_key(pycode), 1)
+
+    def dump(self):
+        lines = ['# pypyjit warm-start profile\n']
+        for entry, count in self.counts.items():
+            kind, rest = entry.split(' ', 1)
+            lines.append('%s %d %s\n' % (kind, count, rest))
+        stream = streamio.open_file_as_stream(self.filename, 'w')
+        try:
+            stream.write(''.join(lines))
+        finally:
+            stream.close()
+
+    def prime(self, pycode):
+        try:
+            offsets = self.loop_offsets[code_key(pycode)]
+        except KeyError:
+            return
+        for offset in offsets:
+            if 0 <= offset < len(pycode.co_code):
+                jit.trace_next_iteration(pypyjitdriver, r_uint(offset),
+                                         False, pycode)
+
+
+@jit.dont_look_inside
+def prime_new_code(pycode):
+    """Called for every new code object: if the loaded profile contains
+    loops in it, make them be traced at their next iteration."""
+    profile = pycode.space.fromcache(WarmStartProfile)
+    if profile.loop_offsets:
+        profile.prime(pycode)
+
+
+def record_compilation(space, debug_info, is_bridge):
+    profile = space.fromcache(WarmStartProfile)
+    if not profile.is_enabled():
+        return
+    if debug_info.get_jitdriver() is not pypyjitdriver:
+        return
+    if not is_bridge:
+        greenkey = debug_info.greenkey
+        profile.record(KIND_LOOP, pycode_from_box(greenkey[2]),
+                       greenkey[0].getint())
+        return
+    # a bridge starts at the resume position of the failing guard, which
+    # is given by the first debug_merge_point of its operations
+    for op in debug_info.operations:
+        if op.getopnum() == rop.DEBUG_MERGE_POINT:
+            greenkey = op.getarglist()[3:]
+            profile.record(KIND_BRIDGE, pycode_from_box(greenkey[2]),
+                           greenkey[0].getint())
+            return
+
+
+def dump_at_shutdown(space):
+    profile = space.fromcache(WarmStartProfile)
+    if not profile.is_enabled():
+        return
+    try:
+        profile.dump()
+    except StreamErrors:
+        pass    # nothing sensible to do at this point
+
+
+@unwrap_spec(filename='str0')
+def warm_start(space, filename):
+    '''Enable the warm-start profile stored in the given file.
+
+    If the file exists, the loops it lists are traced as soon as their
+    code objects are created.  The loops compiled and the guards that got
+    a bridge in this process are written back to the file at exit.'''
+    profile = space.fromcache(WarmStartProfile)
+    try:
+        profile.load(filename)
+    except streamio.StreamError:
+        pass
+    except OSError, e:
+        if e.errno != errno.ENOENT:     # no profile yet
+            raise wrap_oserror(space, e, filename)
+    profile.filename = filename
@@ -5,6 +5,8 @@ from rpython.rlib.jit import JitHookInterface, Counters
 from pypy.interpreter.error import OperationError
 from pypy.module.pypyjit.interp_resop import (Cache, wrap_greenkey,
     WrappedOp, W_JitLoopInfo, wrap_oplist)
+from pypy.module.pypyjit.interp_warmstart import record_compilation
+from pypy.module.pypyjit.interp_loopstats import record_loop_stats
 
 
 class PyPyJitIface(JitHookInterface):
@@ -30,9 +32,15 @@ class PyPyJitIface(JitHookInterface):
                 cache.in_recursion = False
 
     def after_compile(self, debug_info):
+        record_compilation(self.space, debug_info, is_bridge=False)
+        record_loop_stats(self.space, debug_info, is_bridge=False)
+        self._record_for_sampleprof(debug_info, is_bridge=False)
         self._compile_hook(debug_info, is_bridge=False)
 
     def after_compile_bridge(self, debug_info):
+        record_compilation(self.space, debug_info, is_bridge=True)
+        record_loop_stats(self.space, debug_info, is_bridge=True)
+        self._record_for_sampleprof(debug_info, is_bridge=True)
         self._compile_hook(debug_info, is_bridge=True)
 
     def before_compile(self, debug_info):
@@ -41,6 +49,12 @@ class PyPyJitIface(JitHookInterface):
     def before_compile_bridge(self, debug_info):
         self._optimize_hook(debug_info, is_bridge=True)
 
+    def _record_for_sampleprof(self, debug_info, is_bridge):
+        space = self.space
+        if space.config.objspace.usemodules._sampleprof:
+            from pypy.module._sampleprof import interp_sampleprof
+            interp_sampleprof.record_compilation(space, debug_info, is_bridge)
+
     def _compile_hook(self, debug_info, is_bridge):
         space = self.space
         cache = space.fromcache(Cache)
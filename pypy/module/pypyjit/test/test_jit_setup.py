@@ -1,3 +1,5 @@
+import py
+
 class AppTestPyPyJIT:
     spaceconfig = dict(usemodules=('pypyjit',))
 
@@ -53,3 +55,41 @@ class AppTestPyPyJIT:
             return (args, kwds)
         res = pypyjit.residual_call(f, 4, x=6)
         assert res == ((4,), {'x': 6})
+
+
+class AppTestDeferBridges:
+    spaceconfig = dict(usemodules=('pypyjit',))
+
+    def setup_class(cls):
+        from pypy.interpreter.gateway import interp2app
+        from pypy.module.pypyjit import interp_jit
+        if cls.runappdirect:
+            py.test.skip("Can't run this test with -A")
+        calls = []
+        def fake_compile_pending_bridges(warmrunnerdesc):
+            # the warmrunnerdesc is only filled in by the JIT
+            assert warmrunnerdesc is None
+            calls.append(warmrunnerdesc)
+            return 7 * len(calls)
+        def get_calls(space):
+            return space.wrap(len(calls))
+        cls.orig_compile = interp_jit.jit_hooks.compile_pending_bridges
+        interp_jit.jit_hooks.compile_pending_bridges = \
+            fake_compile_pending_bridges
+        cls.w_get_calls = cls.space.wrap(interp2app(get_calls))
+
+    def teardown_class(cls):
+        from pypy.module.pypyjit import interp_jit
+        interp_jit.jit_hooks.compile_pending_bridges = cls.orig_compile
+
+    def test_compile_pending_bridges(self):
+        import pypyjit
+        # this only checks that the parameter exists; its effect is tested
+        # in rpython/jit/metainterp/test/test_jitiface.py
+        pypyjit.set_param(defer_bridges=10)
+        try:
+            assert pypyjit.compile_pending_bridges() == 7
+            assert pypyjit.compile_pending_bridges() == 14
+            assert self.get_calls() == 2
+        finally:
+            pypyjit.set_param('default')
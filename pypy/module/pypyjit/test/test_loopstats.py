@@ -0,0 +1,197 @@
+
+import py
+from pypy.interpreter.gateway import interp2app
+from rpython.jit.metainterp.history import (JitCellToken, ConstInt, ConstPtr,
+     TargetToken)
+from rpython.jit.metainterp.logger import Logger
+from rpython.rtyper.annlowlevel import cast_instance_to_base_ptr
+from rpython.rtyper.lltypesystem import lltype, llmemory
+from rpython.jit.tool.oparser import parse
+from rpython.rlib.jit import JitDebugInfo, AsmInfo
+from rpython.rlib.jit_hooks import (LOOP_RUN_CONTAINER, MEMORY_USAGE,
+     ABORT_STATS, ABORT_STATS_CONTAINER)
+from rpython.rtyper.annlowlevel import llstr
+from rpython.rlib.objectmodel import compute_unique_id
+from pypy.module.pypyjit import interp_loopstats
+from pypy.module.pypyjit.policy import pypy_hooks
+from pypy.module.pypyjit.test.test_jit_hook import MockJitDriverSD, MockSD
+
+
+def make_container(entries):
+    l = lltype.malloc(LOOP_RUN_CONTAINER, len(entries))
+    for i, (type, number, counter) in enumerate(entries):
+        l[i].type = type
+        l[i].number = number
+        l[i].counter = counter
+    return l
+
+
+class AppTestLoopStats(object):
+    spaceconfig = dict(usemodules=('pypyjit',))
+
+    def setup_class(cls):
+        if cls.runappdirect:
+            py.test.skip("Can't run this test with -A")
+        space = cls.space
+        w_f = space.appexec([], """():
+        def function():
+            pass
+        return function
+        """)
+        ll_code = cast_instance_to_base_ptr(w_f.code)
+        code_gcref = lltype.cast_opaque_ptr(llmemory.GCREF, ll_code)
+        logger = Logger(MockSD())
+        targettoken = TargetToken()
+        loop = parse("""
+        [i1]
+        label(i1, descr=targettoken)
+        debug_merge_point(0, 0, 0, 0, 0, ConstPtr(ptr0))
+        guard_true(i1) []
+        guard_false(i1) []
+        jump(i1, descr=targettoken)
+        """, namespace={'ptr0': code_gcref, 'targettoken': targettoken})
+        guard1 = loop.operations[2].getdescr()
+        guard2 = loop.operations[3].getdescr()
+        bridge = parse("""
+        [i1]
+        debug_merge_point(0, 0, 0, 4, 0, ConstPtr(ptr0))
+        guard_true(i1) []
+        finish()
+        """, namespace={'ptr0': code_gcref})
+        guard3 = bridge.operations[1].getdescr()
+        greenkey = [ConstInt(6), ConstInt(0), ConstPtr(code_gcref)]
+        # the space is shared with the other tests of the hooks
+        space.fromcache(interp_loopstats.LoopStats).traces = []
+        cls.looptoken = JitCellToken()
+        cls.looptoken.number = 5
+        di_loop = JitDebugInfo(MockJitDriverSD, logger, cls.looptoken,
+                               loop.operations, 'loop', greenkey)
+        di_loop.asminfo = AsmInfo({}, 0x1000, 120)
+        di_bridge = JitDebugInfo(MockJitDriverSD, logger, cls.looptoken,
+                                 bridge.operations, 'bridge',
+                                 fail_descr=guard1)
+        di_bridge.asminfo = AsmInfo({}, 0x2000, 40)
+        di_dead = JitDebugInfo(MockJitDriverSD, logger, JitCellToken(),
+                               loop.operations, 'loop', greenkey)
+
+        counts = make_container([
+            ('e', 5, 3),
+            ('l', compute_unique_id(targettoken), 1000),
+            ('b', compute_unique_id(guard1), 70)])
+        failures = make_container([
+            ('g', compute_unique_id(guard2), 4),
+            ('g', compute_unique_id(guard3), 2)])
+        cls.orig_get_loop_run_times = interp_loopstats.jit_hooks.stats_get_loop_run_times
+        cls.orig_get_guard_failures = interp_loopstats.jit_hooks.stats_get_guard_failures
+        interp_loopstats.jit_hooks.stats_get_loop_run_times = lambda wrd: counts
+        interp_loopstats.jit_hooks.stats_get_guard_failures = lambda wrd: failures
+
+        def interp_on_compile():
+            pypy_hooks.after_compile(di_loop)
+            pypy_hooks.after_compile_bridge(di_bridge)
+
+        def interp_on_compile_dead_loop():
+            pypy_hooks.after_compile(di_dead)
+            di_dead.looptoken = None
+
+        cls.w_on_compile = space.wrap(interp2app(interp_on_compile))
+        cls.w_on_compile_dead_loop = space.wrap(
+            interp2app(interp_on_compile_dead_loop))
+        cls.w_f = w_f
+        cls.w_guard1 = space.wrap(compute_unique_id(guard1))
+        cls.w_guard2 = space.wrap(compute_unique_id(guard2))
+        cls.w_guard3 = space.wrap(compute_unique_id(guard3))
+
+    def teardown_class(cls):
+        interp_loopstats.jit_hooks.stats_get_loop_run_times = cls.orig_get_loop_run_times
+        interp_loopstats.jit_hooks.stats_get_guard_failures = cls.orig_get_guard_failures
+
+    def test_get_loop_stats(self):
+        import pypyjit, gc
+        assert pypyjit.get_loop_stats() == []
+        self.on_compile()
+        self.on_compile_dead_loop()
+        gc.collect()
+        stats = pypyjit.get_loop_stats()
+        assert len(stats) == 2
+        loop, bridge = stats
+        assert isinstance(loop, pypyjit.JitLoopStats)
+        assert loop.type == 'loop'
+        assert loop.loop_no == 5
+        raises(TypeError, 'loop.bridge_no')
+        assert loop.greenkey == (self.f.func_code, 6)
+        assert loop.asmlen == 120
+        assert loop.entry_count == 3
+        assert loop.iterations == 1000
+        assert loop.guard_failures == {self.guard1: 70, self.guard2: 4}
+        assert repr(loop) == '<JitLoopStats loop no 5, entered 3 times>'
+        #
+        assert bridge.type == 'bridge'
+        assert bridge.loop_no == 5
+        assert bridge.bridge_no == self.guard1
+        assert bridge.greenkey == (self.f.func_code, 4)
+        assert bridge.asmlen == 40
+        assert bridge.entry_count == 70
+        assert bridge.iterations == 0
+        assert bridge.guard_failures == {self.guard3: 2}
+
+
+class AppTestJitMemoryUsage(object):
+    spaceconfig = dict(usemodules=('pypyjit',))
+
+    def setup_class(cls):
+        if cls.runappdirect:
+            py.test.skip("Can't run this test with -A")
+        usage = lltype.malloc(MEMORY_USAGE)
+        usage.code = 12000
+        usage.allocated = 65536
+        usage.limit = 16000
+        usage.alive_loops = 3
+        usage.evicted_loops = 5
+        cls.orig_get_memory_usage = interp_loopstats.jit_hooks.stats_get_memory_usage
+        interp_loopstats.jit_hooks.stats_get_memory_usage = lambda wrd: usage
+
+    def teardown_class(cls):
+        interp_loopstats.jit_hooks.stats_get_memory_usage = cls.orig_get_memory_usage
+
+    def test_get_jit_memory_usage(self):
+        import pypyjit
+        assert pypyjit.get_jit_memory_usage() == {
+            'code': 12000, 'allocated': 65536, 'limit': 16000,
+            'alive_loops': 3, 'evicted_loops': 5}
+
+
+class AppTestAbortStats(object):
+    spaceconfig = dict(usemodules=('pypyjit',))
+
+    def setup_class(cls):
+        if cls.runappdirect:
+            py.test.skip("Can't run this test with -A")
+        stats = lltype.malloc(ABORT_STATS)
+        stats.location = llstr('<code object f> #12 LOAD_FAST')
+        stats.count = 3
+        stats.reasons = lltype.malloc(ABORT_STATS.reasons.TO, 5, zero=True)
+        stats.reasons[0] = 1     # ABORT_TOO_LONG
+        stats.reasons[3] = 2     # ABORT_ESCAPE
+        stats.last_trace_length = 50
+        stats.max_trace_length = 6000
+        stats.inlining_disabled = True
+        stats.backoff = 2
+        l = lltype.malloc(ABORT_STATS_CONTAINER, 1)
+        l[0] = stats
+        cls.orig_get_abort_stats = interp_loopstats.jit_hooks.stats_get_abort_stats
+        interp_loopstats.jit_hooks.stats_get_abort_stats = lambda wrd: l
+
+    def teardown_class(cls):
+        interp_loopstats.jit_hooks.stats_get_abort_stats = cls.orig_get_abort_stats
+
+    def test_get_abort_stats(self):
+        import pypyjit
+        assert pypyjit.get_abort_stats() == [{
+            'location': '<code object f> #12 LOAD_FAST',
+            'count': 3,
+            'reasons': {'ABORT_TOO_LONG': 1, 'ABORT_ESCAPE': 2},
+            'last_trace_length': 50,
+            'max_trace_length': 6000,
+            'inlining_disabled': True,
+            'backoff': 2}]
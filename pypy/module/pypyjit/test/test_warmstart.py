@@ -0,0 +1,135 @@
+
+import py
+from pypy.interpreter.gateway import interp2app
+from rpython.jit.metainterp.history import JitCellToken, ConstInt, ConstPtr,\
+     BasicFailDescr
+from rpython.jit.metainterp.logger import Logger
+from rpython.rtyper.annlowlevel import cast_instance_to_base_ptr
+from rpython.rtyper.lltypesystem import lltype, llmemory
+from rpython.jit.tool.oparser import parse
+from rpython.rlib.jit import JitDebugInfo
+from pypy.module.pypyjit import interp_warmstart
+from pypy.module.pypyjit.interp_warmstart import WarmStartProfile
+from pypy.module.pypyjit.policy import pypy_hooks
+from pypy.module.pypyjit.test.test_jit_hook import MockJitDriverSD, MockSD
+
+
+class FakeCode(object):
+    co_code = 'x' * 20
+    co_firstlineno = 3
+    co_name = 'f'
+    co_filename = '/tmp/some file.py'
+
+
+def test_parse_and_dump(tmpdir):
+    profile = WarmStartProfile(None)
+    profile.filename = str(tmpdir.join('profile'))
+    profile.parse_line('# comment')
+    profile.parse_line('loop 2 6 20 3 f /tmp/some file.py')
+    profile.parse_line('loop 1 6 20 3 f /tmp/some file.py')
+    profile.parse_line('bridge 1 14 20 3 f /tmp/some file.py')
+    profile.parse_line('loop 1 8 20 3 f')
+    profile.parse_line('garbage')
+    profile.parse_line('loop x 6 20 3 f /tmp/some file.py')
+    profile.parse_line('loop 1 -6 20 3 f /tmp/some file.py')
+    assert profile.loop_offsets == {'20 3 f /tmp/some file.py': [6],
+                                    '20 3 f': [8]}
+    profile.record('bridge', FakeCode(), 14)
+    profile.dump()
+    lines = tmpdir.join('profile').read().splitlines()
+    assert lines[0].startswith('#')
+    assert sorted(lines[1:]) == ['bridge 2 14 20 3 f /tmp/some file.py',
+                                 'loop 1 8 20 3 f',
+                                 'loop 3 6 20 3 f /tmp/some file.py']
+
+
+class AppTestWarmStart(object):
+    spaceconfig = dict(usemodules=('pypyjit',))
+
+    def setup_class(cls):
+        if cls.runappdirect:
+            py.test.skip("Can't run this test with -A")
+        space = cls.space
+        primed = []
+        def trace_next_iteration(driver, next_instr, is_being_profiled,
+                                 pycode):
+            primed.append((pycode.co_name, next_instr))
+        cls.orig_trace_next_iteration = interp_warmstart.jit.trace_next_iteration
+        interp_warmstart.jit.trace_next_iteration = trace_next_iteration
+
+        w_f = space.appexec([], """():
+        def function():
+            pass
+        return function
+        """)
+        ll_code = cast_instance_to_base_ptr(w_f.code)
+        code_gcref = lltype.cast_opaque_ptr(llmemory.GCREF, ll_code)
+        logger = Logger(MockSD())
+        oplist = parse("""
+        [i1]
+        debug_merge_point(0, 0, 0, 0, 0, ConstPtr(ptr0))
+        guard_true(i1) []
+        """, namespace={'ptr0': code_gcref}).operations
+        greenkey = [ConstInt(0), ConstInt(0), ConstPtr(code_gcref)]
+        di_loop = JitDebugInfo(MockJitDriverSD, logger, JitCellToken(),
+                               oplist, 'loop', greenkey)
+        di_bridge = JitDebugInfo(MockJitDriverSD, logger, JitCellToken(),
+                                 oplist, 'bridge', fail_descr=BasicFailDescr())
+
+        def interp_on_compile():
+            pypy_hooks.after_compile(di_loop)
+
+        def interp_on_compile_bridge():
+            pypy_hooks.after_compile_bridge(di_bridge)
+
+        def interp_get_primed():
+            result = space.newlist([space.newtuple([space.wrap(name),
+                                                    space.wrap(offset)])
+                                    for name, offset in primed])
+            del primed[:]
+            return result
+
+        def interp_shutdown():
+            space.getbuiltinmodule('pypyjit').shutdown(space)
+
+        cls.w_on_compile = space.wrap(interp2app(interp_on_compile))
+        cls.w_on_compile_bridge = space.wrap(
+            interp2app(interp_on_compile_bridge))
+        cls.w_get_primed = space.wrap(interp2app(interp_get_primed))
+        cls.w_shutdown = space.wrap(interp2app(interp_shutdown))
+        cls.w_f = w_f
+        cls.w_profile = space.wrap(str(
+            py.test.ensuretemp('warmstart').join('profile')))
+
+    def teardown_class(cls):
+        interp_warmstart.jit.trace_next_iteration = cls.orig_trace_next_iteration
+
+    def test_warm_start(self):
+        import pypyjit
+        import os
+        if os.path.exists(self.profile):
+            os.unlink(self.profile)
+        # no profile yet: recording only
+        pypyjit.warm_start(self.profile)
+        self.on_compile()
+        self.on_compile()
+        self.on_compile_bridge()
+        self.shutdown()
+        with open(self.profile) as f:
+            lines = sorted(f.read().splitlines()[1:])
+        code = self.f.func_code
+        key = '%d %d %s %s' % (len(code.co_code), code.co_firstlineno,
+                               code.co_name, code.co_filename)
+        assert lines == ['bridge 1 0 ' + key, 'loop 2 0 ' + key]
+        #
+        # load the profile: new code objects of 'function' are primed
+        pypyjit.warm_start(self.profile)
+        assert self.get_primed() == []
+        exec compile(
+            '\n' * (code.co_firstlineno - 1) + 'def function():\n    pass\n',
+            code.co_filename, 'exec')
+        assert self.get_primed() == [('function', 0)]
+
+    def test_warm_start_error(self):
+        import pypyjit
+        raises(OSError, pypyjit.warm_start, '/')
@@ -122,13 +122,38 @@ class Handlers:
                 self.handlers_w[signum] = space.w_None
             else:
                 self.handlers_w[signum] = space.wrap(SIG_DFL)
+        # signum -> AsyncAction fired instead of calling the app-level
+        # handler, for the interp-level users of a signal
+        self.actions = {}
 
 def _get_handlers(space):
     return space.fromcache(Handlers).handlers_w
 
 
+def set_interp_level_action(space, signum, action):
+    """Make the signal 'signum' fire the given AsyncAction, or restore
+    the app-level handler if 'action' is None.  The action is performed
+    by the same action dispatcher that polls for the signal."""
+    handlers = space.fromcache(Handlers)
+    if action is not None:
+        handlers.actions[signum] = action
+        pypysig_setflag(signum)
+    elif signum in handlers.actions:
+        del handlers.actions[signum]
+        # a signal may still be pending: keep our C-level handler to
+        # swallow it, unless the app-level handler is SIG_IGN
+        if space.eq_w(handlers.handlers_w[signum], space.wrap(SIG_IGN)):
+            pypysig_ignore(signum)
+
+
 def report_signal(space, n):
-    handlers_w = _get_handlers(space)
+    handlers = space.fromcache(Handlers)
+    action = handlers.actions.get(n, None)
+    if action is not None:
+        pypysig_reinstall(n)
+        action.fire()
+        return
+    handlers_w = handlers.handlers_w
     try:
         w_handler = handlers_w[n]
     except KeyError:
@@ -222,6 +247,8 @@ def signal(space, signum, w_handler):
                                  space.wrap("'handler' must be a callable "
                                             "or SIG_DFL or SIG_IGN"))
         pypysig_setflag(signum)
+    if signum in space.fromcache(Handlers).actions:
+        pypysig_setflag(signum)     # still used at interp-level
 
     handlers_w = _get_handlers(space)
     old_handler = handlers_w[signum]
@@ -0,0 +1,66 @@
+""" memory and speed benchmarks for many small dictionaries, to compare
+a pypy translated with --objspace-std-withcompactdicts against one
+translated without it
+"""
+
+import gc, sys, time
+
+def get_rss_kb():
+    # current resident set size, in kilobytes (Linux only)
+    for line in open('/proc/self/status'):
+        if line.startswith('VmRSS:'):
+            return int(line.split()[1])
+    return 0
+
+def count_operation(name, function):
+    print name
+    t0 = time.time()
+    retval = function()
+    tk = time.time()
+    print name, " takes: %f" % (tk - t0)
+    return retval
+
+def make_dicts(num, size, keyfunc):
+    keys = [keyfunc(i) for i in xrange(size)]
+    return [dict.fromkeys(keys, i) for i in xrange(num)]
+
+def bench_memory(num, size, keyfunc, name):
+    gc.collect()
+    rss0 = get_rss_kb()
+    dicts = count_operation("Creating %d %s dicts of size %d" % (
+                                num, name, size),
+                            lambda: make_dicts(num, size, keyfunc))
+    gc.collect()
+    rss1 = get_rss_kb()
+    print "Memory per dict: %.1f bytes" % ((rss1 - rss0) * 1024.0 / num)
+    return dicts
+
+def iterate(dicts):
+    total = 0
+    for d in dicts:
+        for key, value in d.iteritems():
+            total += value
+    return total
+
+def lookup(dicts, keys):
+    for d in dicts:
+        for key in keys:
+            d[key]
+
+def bench_small_dicts(NUM=1000000):
+    for size in [1, 5, 20]:
+        for keyfunc, name in [(str, "str"), (int, "int"),
+                              (float, "float")]:
+            bench_one(NUM // size, size, keyfunc, name)
+
+def bench_one(num, size, keyfunc, name):
+    dicts = bench_memory(num, size, keyfunc, name)
+    count_operation("Iteration", lambda: iterate(dicts))
+    keys = [keyfunc(i) for i in range(size)]
+    count_operation("Existing key access", lambda: lookup(dicts, keys))
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        bench_small_dicts(int(sys.argv[1]))
+    else:
+        bench_small_dicts()
@@ -0,0 +1,89 @@
+""" lookup speed and memory benchmarks for dicts indexed by (int, int) and
+(str, int) tuples, to compare a pypy translated with
+--objspace-std-withtupledicts against one translated without it.  The
+'object' rows use keys of mixed types, so that they always go through the
+object strategy as a baseline.
+"""
+
+import gc, sys, time
+
+def get_rss_kb():
+    # current resident set size, in kilobytes (Linux only)
+    for line in open('/proc/self/status'):
+        if line.startswith('VmRSS:'):
+            return int(line.split()[1])
+    return 0
+
+def count_operation(name, function):
+    print name
+    t0 = time.time()
+    retval = function()
+    tk = time.time()
+    print name, " takes: %f" % (tk - t0)
+    return retval
+
+def int_int_key(i):
+    return (i >> 10, i & 1023)
+
+def str_int_key(i):
+    return ("k%d" % (i >> 10), i & 1023)
+
+def object_key(i):
+    return (i >> 10, float(i & 1023))
+
+def make_dict(size, keyfunc):
+    d = {}
+    for i in xrange(size):
+        d[keyfunc(i)] = i
+    return d
+
+def bench_memory(size, keyfunc, name):
+    gc.collect()
+    rss0 = get_rss_kb()
+    d = count_operation("Creating %s dict of size %d" % (name, size),
+                        lambda: make_dict(size, keyfunc))
+    gc.collect()
+    rss1 = get_rss_kb()
+    print "Memory per entry: %.1f bytes" % ((rss1 - rss0) * 1024.0 / size)
+    return d
+
+def lookup_int_int(d, size, repeat):
+    # the key tuples are built in the loop, as in typical grid code
+    total = 0
+    for j in xrange(repeat):
+        for i in xrange(size):
+            total += d[i >> 10, i & 1023]
+    return total
+
+def lookup_str_int(d, size, repeat):
+    names = ["k%d" % (i >> 10) for i in xrange(size)]
+    total = 0
+    for j in xrange(repeat):
+        for i in xrange(size):
+            total += d[names[i], i & 1023]
+    return total
+
+def lookup_object(d, size, repeat):
+    total = 0
+    for j in xrange(repeat):
+        for i in xrange(size):
+            total += d[i >> 10, float(i & 1023)]
+    return total
+
+def bench_one(size, repeat, keyfunc, lookupfunc, name):
+    d = bench_memory(size, keyfunc, name)
+    count_operation("Existing key lookup (%d lookups)" % (size * repeat,),
+                    lambda: lookupfunc(d, size, repeat))
+
+def bench_tuple_dicts(SIZE=1000000, REPEAT=10):
+    for keyfunc, lookupfunc, name in [
+            (int_int_key, lookup_int_int, "(int, int)"),
+            (str_int_key, lookup_str_int, "(str, int)"),
+            (object_key, lookup_object, "object")]:
+        bench_one(SIZE, REPEAT, keyfunc, lookupfunc, name)
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        bench_tuple_dicts(int(sys.argv[1]))
+    else:
+        bench_tuple_dicts()
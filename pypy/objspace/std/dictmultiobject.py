@@ -1,8 +1,12 @@
 """The builtin dict implementation"""
 
+from collections import OrderedDict
+
 from rpython.rlib import jit, rerased, objectmodel
 from rpython.rlib.debug import mark_dict_non_null
-from rpython.rlib.objectmodel import newlist_hint, r_dict, specialize
+from rpython.rlib.rfloat import isnan
+from rpython.rlib.objectmodel import (
+    newlist_hint, r_dict, r_ordereddict, specialize)
 from rpython.rlib.unroll import SpecTag
 from rpython.tool.sourcetools import func_renamer, func_with_new_name
 
@@ -12,6 +16,7 @@ from pypy.interpreter.gateway import (
     WrappedDefault, applevel, interp2app, unwrap_spec)
 from pypy.interpreter.mixedmodule import MixedModule
 from pypy.interpreter.signature import Signature
+from pypy.objspace.std.floatobject import W_FloatObject
 from pypy.objspace.std.stdtypedef import StdTypeDef
 from pypy.objspace.std.util import negate
 
@@ -32,6 +37,23 @@ def _never_equal_to_string(space, w_lookup_type):
             space.is_w(w_lookup_type, space.w_float))
 
 
+def new_storage_dict(space):
+    """Return an empty RPython dict to be used as the storage of a typed
+    strategy: the compact, insertion-ordered one if the withcompactdicts
+    option is enabled, the classical sparse one otherwise."""
+    if space.config.objspace.std.withcompactdicts:
+        return OrderedDict()
+    return {}
+
+
+def new_storage_r_dict(space, key_eq, key_hash):
+    """Same as new_storage_dict(), but for keys with custom equality and
+    hash functions."""
+    if space.config.objspace.std.withcompactdicts:
+        return r_ordereddict(key_eq, key_hash, force_non_null=True)
+    return r_dict(key_eq, key_hash, force_non_null=True)
+
+
 @specialize.call_location()
 def w_dict_unrolling_heuristic(w_dct):
     """In which cases iterating over dict items can be unrolled.
@@ -333,7 +355,7 @@ def _add_indirections():
                     length w_keys values items \
                     iterkeys itervalues iteritems \
                     listview_bytes listview_unicode listview_int \
-                    view_as_kwargs".split()
+                    listview_float view_as_kwargs".split()
 
     def make_method(method):
         def f(self, *args):
@@ -490,6 +512,9 @@ class DictStrategy(object):
     def listview_int(self, w_dict):
         return None
 
+    def listview_float(self, w_dict):
+        return None
+
     def view_as_kwargs(self, w_dict):
         return (None, None)
 
@@ -533,8 +558,13 @@ class EmptyDictStrategy(DictStrategy):
         w_type = self.space.type(w_key)
         if self.space.is_w(w_type, self.space.w_int):
             self.switch_to_int_strategy(w_dict)
+        elif self.space.is_w(w_type, self.space.w_float):
+            self.switch_to_float_strategy(w_dict)
         elif withidentitydict and w_type.compares_by_identity():
             self.switch_to_identity_strategy(w_dict)
+        elif (self.space.config.objspace.std.withtupledicts and
+              self.space.is_w(w_type, self.space.w_tuple)):
+            self.switch_to_tuple_strategy(w_dict, w_key)
         else:
             self.switch_to_object_strategy(w_dict)
 
@@ -556,6 +586,12 @@ class EmptyDictStrategy(DictStrategy):
         w_dict.strategy = strategy
         w_dict.dstorage = storage
 
+    def switch_to_float_strategy(self, w_dict):
+        strategy = self.space.fromcache(FloatDictStrategy)
+        storage = strategy.get_empty_storage()
+        w_dict.strategy = strategy
+        w_dict.dstorage = storage
+
     def switch_to_identity_strategy(self, w_dict):
         from pypy.objspace.std.identitydict import IdentityDictStrategy
         strategy = self.space.fromcache(IdentityDictStrategy)
@@ -563,6 +599,18 @@ class EmptyDictStrategy(DictStrategy):
         w_dict.strategy = strategy
         w_dict.dstorage = storage
 
+    def switch_to_tuple_strategy(self, w_dict, w_key):
+        from pypy.objspace.std.tupledict import (IntIntTupleDictStrategy,
+                                                 BytesIntTupleDictStrategy)
+        strategy = self.space.fromcache(IntIntTupleDictStrategy)
+        if not strategy.is_correct_type(w_key):
+            strategy = self.space.fromcache(BytesIntTupleDictStrategy)
+            if not strategy.is_correct_type(w_key):
+                strategy = self.space.fromcache(ObjectDictStrategy)
+        storage = strategy.get_empty_storage()
+        w_dict.strategy = strategy
+        w_dict.dstorage = storage
+
     def switch_to_object_strategy(self, w_dict):
         strategy = self.space.fromcache(ObjectDictStrategy)
         storage = strategy.get_empty_storage()
@@ -923,8 +971,8 @@ class ObjectDictStrategy(AbstractTypedStrategy, DictStrategy):
         return True
 
     def get_empty_storage(self):
-        new_dict = r_dict(self.space.eq_w, self.space.hash_w,
-                          force_non_null=True)
+        new_dict = new_storage_r_dict(self.space, self.space.eq_w,
+                                      self.space.hash_w)
         return self.erase(new_dict)
 
     def _never_equal_to(self, w_lookup_type):
@@ -958,7 +1006,7 @@ class BytesDictStrategy(AbstractTypedStrategy, DictStrategy):
         return space.is_w(space.type(w_obj), space.w_str)
 
     def get_empty_storage(self):
-        res = {}
+        res = new_storage_dict(self.space)
         mark_dict_non_null(res)
         return self.erase(res)
 
@@ -1022,7 +1070,7 @@ class UnicodeDictStrategy(AbstractTypedStrategy, DictStrategy):
         return space.is_w(space.type(w_obj), space.w_unicode)
 
     def get_empty_storage(self):
-        res = {}
+        res = new_storage_dict(self.space)
         mark_dict_non_null(res)
         return self.erase(res)
 
@@ -1084,7 +1132,7 @@ class IntDictStrategy(AbstractTypedStrategy, DictStrategy):
         return self.space.int_w(wrapped)
 
     def get_empty_storage(self):
-        return self.erase({})
+        return self.erase(new_storage_dict(self.space))
 
     def is_correct_type(self, w_obj):
         space = self.space
@@ -1110,6 +1158,55 @@ class IntDictStrategy(AbstractTypedStrategy, DictStrategy):
 create_iterator_classes(IntDictStrategy)
 
 
+class FloatDictStrategy(AbstractTypedStrategy, DictStrategy):
+    erase, unerase = rerased.new_erasing_pair("float")
+    erase = staticmethod(erase)
+    unerase = staticmethod(unerase)
+
+    def wrap(self, unwrapped):
+        return self.space.wrap(unwrapped)
+
+    def unwrap(self, wrapped):
+        return self.space.float_w(wrapped)
+
+    def get_empty_storage(self):
+        return self.erase(new_storage_dict(self.space))
+
+    def is_correct_type(self, w_obj):
+        # NaNs are never stored unboxed: a NaN key can only be found again
+        # by identity, and the identity is lost when unwrapping it.
+        # -0.0 and 0.0 are fine, they compare and hash equal in the
+        # unboxed dict exactly like their boxed versions.
+        return type(w_obj) is W_FloatObject and not isnan(w_obj.floatval)
+
+    def _never_equal_to(self, w_lookup_type):
+        space = self.space
+        # a key of type exactly 'float' that is not of the correct type is
+        # a NaN, which cannot be equal to any key stored here
+        # XXX there are many more types
+        return (space.is_w(w_lookup_type, space.w_float) or
+                space.is_w(w_lookup_type, space.w_NoneType) or
+                space.is_w(w_lookup_type, space.w_str) or
+                space.is_w(w_lookup_type, space.w_unicode)
+                )
+
+    def getitem(self, w_dict, w_key):
+        # -- This is called extremely often.  Hack for performance --
+        if type(w_key) is W_FloatObject:
+            # also correct for NaNs, which are never found
+            return self.unerase(w_dict.dstorage).get(w_key.floatval, None)
+        # -- End of performance hack --
+        return AbstractTypedStrategy.getitem(self, w_dict, w_key)
+
+    def listview_float(self, w_dict):
+        return self.unerase(w_dict.dstorage).keys()
+
+    def wrapkey(space, key):
+        return space.wrap(key)
+
+create_iterator_classes(FloatDictStrategy)
+
+
 def update1(space, w_dict, w_data):
     if isinstance(w_data, W_DictMultiObject):    # optimization case only
         update1_dict_dict(space, w_dict, w_data)
@@ -5,7 +5,8 @@ from rpython.rlib import rerased
 from rpython.rlib.debug import mark_dict_non_null
 from pypy.objspace.std.dictmultiobject import (AbstractTypedStrategy,
                                                DictStrategy,
-                                               create_iterator_classes)
+                                               create_iterator_classes,
+                                               new_storage_dict)
 
 
 # this strategy is selected by EmptyDictStrategy.switch_to_correct_strategy
@@ -65,7 +66,7 @@ class IdentityDictStrategy(AbstractTypedStrategy, DictStrategy):
         return wrapped
 
     def get_empty_storage(self):
-        d = {}
+        d = new_storage_dict(self.space)
         mark_dict_non_null(d)
         return self.erase(d)
 
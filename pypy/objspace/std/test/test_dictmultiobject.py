@@ -668,6 +668,46 @@ class AppTest_DictMultiObject(AppTest_DictObject):
         setattr(a, s, 123)
         assert holder.seen is s
 
+class AppTest_CompactDictObject(AppTest_DictObject):
+    spaceconfig = {"objspace.std.withcompactdicts": True}
+
+    def test_insertion_order(self):
+        class A(object):
+            pass
+        a, b, c = A(), A(), A()
+        for keys in [["c", "a", "b"], [u"c", u"a", u"b"], [3, 1, 2],
+                     [c, a, b], [3.5, "a", 1]]:
+            d = {}
+            for key in keys:
+                d[key] = key
+            assert d.keys() == keys
+            assert d.values() == keys
+            assert d.items() == zip(keys, keys)
+            assert list(d.iteritems()) == zip(keys, keys)
+            assert list(d) == keys
+
+    def test_order_after_delete(self):
+        d = dict.fromkeys(range(10))
+        del d[3]
+        d[3] = None
+        d[5] = 42
+        assert d.keys() == [0, 1, 2, 4, 5, 6, 7, 8, 9, 3]
+
+    def test_order_after_strategy_switch(self):
+        d = {}
+        d[2] = 1
+        d[1] = 2
+        d["x"] = 3
+        d[0] = 4
+        assert d.keys() == [2, 1, "x", 0]
+
+    def test_popitem_last(self):
+        d = {1: 2, 3: 4, 5: 6}
+        assert d.popitem() == (5, 6)
+        assert d.popitem() == (3, 4)
+        d[7] = 8
+        assert d.popitem() == (7, 8)
+
 class AppTestDictViews:
     def test_dictview(self):
         d = {1: 2, 3: 4}
@@ -971,6 +1011,35 @@ class AppTestStrategies(object):
         assert "IntDictStrategy" in self.get_strategy(d)
         assert d[1L] == "hi"
 
+    def test_empty_to_float(self):
+        d = {}
+        d[1.5] = "hi"
+        assert "FloatDictStrategy" in self.get_strategy(d)
+        assert d[1.5] == "hi"
+        d[-0.0] = "zero"
+        assert d[0.0] == "zero"
+        d[0.0] = "positive zero"
+        assert "-0.0" in [str(x) for x in d.keys()]
+        assert len(d) == 2
+        assert float('nan') not in d
+        assert d.get(float('nan')) is None
+        assert d.get(None) is None
+        assert "FloatDictStrategy" in self.get_strategy(d)
+        assert d[0] == "positive zero"
+        assert "ObjectDictStrategy" in self.get_strategy(d)
+
+    def test_float_dict_nan(self):
+        nan = float('nan')
+        d = {1.5: 1}
+        d[nan] = 2
+        assert "ObjectDictStrategy" in self.get_strategy(d)
+        assert d[nan] == 2
+        assert d[1.5] == 1
+        assert len(d) == 2
+        d = {nan: 4}
+        assert "ObjectDictStrategy" in self.get_strategy(d)
+        assert d[nan] == 4
+
     def test_iter_dict_length_change(self):
         d = {1: 2, 3: 4, 5: 6}
         it = d.iteritems()
@@ -1099,6 +1168,8 @@ class Config:
     class objspace:
         class std:
             withsmalldicts = False
+            withcompactdicts = False
+            withtupledicts = False
             withcelldict = False
             withmethodcache = False
             withidentitydict = False
@@ -5,6 +5,8 @@ class Config:
     class objspace:
         class std:
             withsmalldicts = False
+            withcompactdicts = False
+            withtupledicts = False
             withcelldict = False
             withmethodcache = False
             withidentitydict = False
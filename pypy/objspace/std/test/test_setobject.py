@@ -82,7 +82,7 @@ class TestW_SetObject:
 
     def test_create_set_from_list(self):
         from pypy.interpreter.baseobjspace import W_Root
-        from pypy.objspace.std.setobject import BytesSetStrategy, ObjectSetStrategy, UnicodeSetStrategy
+        from pypy.objspace.std.setobject import BytesSetStrategy, FloatSetStrategy, ObjectSetStrategy, UnicodeSetStrategy
         from pypy.objspace.std.floatobject import W_FloatObject
 
         w = self.space.wrap
@@ -119,6 +119,12 @@ class TestW_SetObject:
         w_list = W_ListObject(self.space, [w(1.0), w(2.0), w(3.0)])
         w_set = W_SetObject(self.space)
         _initialize_set(self.space, w_set, w_list)
+        assert w_set.strategy is self.space.fromcache(FloatSetStrategy)
+        assert w_set.strategy.unerase(w_set.sstorage) == {1.0:None, 2.0:None, 3.0:None}
+
+        w_list = W_ListObject(self.space, [w(1.0), w(float("nan"))])
+        w_set = W_SetObject(self.space)
+        _initialize_set(self.space, w_set, w_list)
         assert w_set.strategy is self.space.fromcache(ObjectSetStrategy)
         for item in w_set.strategy.unerase(w_set.sstorage):
             assert isinstance(item, W_FloatObject)
@@ -960,3 +966,33 @@ class AppTestAppSetTest:
         # did not work before because of an optimization that swaps both
         # operands when the first set is larger than the second
         assert type(frozenset([1, 2]) & set([2])) is frozenset
+
+    def test_float_set(self):
+        s = set([1.5, 2.5, -0.0])
+        assert 1.5 in s
+        assert 0.0 in s
+        assert 0 in s
+        assert 3.5 not in s
+        assert float('nan') not in s
+        s.discard(float('nan'))
+        raises(KeyError, s.remove, float('nan'))
+        assert len(s) == 3
+        assert '-0.0' in [str(x) for x in s]
+        s.add(0.0)
+        assert len(s) == 3
+        assert s == set([1.5, 2.5, 0])
+        assert s - set([1.5]) == set([2.5, 0.0])
+        assert s & set([2.5, 'x']) == set([2.5])
+        assert not s.isdisjoint(set([1, 2, 0]))
+
+    def test_float_set_nan(self):
+        nan = float('nan')
+        s = set([1.5, nan])
+        assert nan in s
+        assert len(s) == 2
+        s = set([1.5])
+        s.add(nan)
+        s.add(nan)
+        assert len(s) == 2
+        assert nan in s
+        assert 1.5 in s
@@ -1,6 +1,7 @@
 from pypy.objspace.std.setobject import W_SetObject
 from pypy.objspace.std.setobject import (
     BytesIteratorImplementation, BytesSetStrategy, EmptySetStrategy,
+    FloatIteratorImplementation, FloatSetStrategy,
     IntegerIteratorImplementation, IntegerSetStrategy, ObjectSetStrategy,
     UnicodeIteratorImplementation, UnicodeSetStrategy)
 from pypy.objspace.std.listobject import W_ListObject
@@ -29,6 +30,17 @@ class TestW_SetStrategies:
         s = W_SetObject(self.space, self.wrapped([u"a", u"b"]))
         assert s.strategy is self.space.fromcache(UnicodeSetStrategy)
 
+        s = W_SetObject(self.space, self.wrapped([1.5, 2.5]))
+        assert s.strategy is self.space.fromcache(FloatSetStrategy)
+
+        s = W_SetObject(self.space, self.wrapped([1.5, float("nan")]))
+        assert s.strategy is self.space.fromcache(ObjectSetStrategy)
+
+        l = W_ListObject(self.space, [self.space.wrap(1.5),
+                                      self.space.wrap(2.5)])
+        s = W_SetObject(self.space, l)
+        assert s.strategy is self.space.fromcache(FloatSetStrategy)
+
     def test_switch_to_object(self):
         s = W_SetObject(self.space, self.wrapped([1,2,3,4,5]))
         s.add(self.space.wrap("six"))
@@ -44,6 +56,27 @@ class TestW_SetStrategies:
         s.add(self.space.wrap(u"six"))
         assert s.strategy is self.space.fromcache(UnicodeSetStrategy)
 
+    def test_switch_to_float(self):
+        s = W_SetObject(self.space, self.wrapped([]))
+        s.add(self.space.wrap(1.5))
+        assert s.strategy is self.space.fromcache(FloatSetStrategy)
+        s.add(self.space.wrap(-0.0))
+        assert s.strategy is self.space.fromcache(FloatSetStrategy)
+        s.add(self.space.wrap(float("nan")))
+        assert s.strategy is self.space.fromcache(ObjectSetStrategy)
+
+    def test_float_lookup_nan(self):
+        space = self.space
+        s = W_SetObject(space, self.wrapped([1.5, 2.5]))
+        w_nan = space.wrap(float("nan"))
+        assert not s.has_key(w_nan)
+        assert not s.remove(w_nan)
+        assert s.strategy is space.fromcache(FloatSetStrategy)
+        assert s.has_key(space.wrap(2.5))
+        assert s.remove(space.wrap(2.5))
+        assert not s.has_key(space.wrap(2.5))
+        assert s.strategy is space.fromcache(FloatSetStrategy)
+
     def test_symmetric_difference(self):
         s1 = W_SetObject(self.space, self.wrapped([1,2,3,4,5]))
         s2 = W_SetObject(self.space, self.wrapped(["six", "seven"]))
@@ -133,6 +166,11 @@ class TestW_SetStrategies:
         assert isinstance(it, UnicodeIteratorImplementation)
         assert space.unwrap(it.next()) == u"a"
         assert space.unwrap(it.next()) == u"b"
+        #
+        s = W_SetObject(space, self.wrapped([1.5]))
+        it = s.iter()
+        assert isinstance(it, FloatIteratorImplementation)
+        assert space.unwrap(it.next()) == 1.5
 
     def test_listview(self):
         space = self.space
@@ -144,3 +182,6 @@ class TestW_SetStrategies:
         #
         s = W_SetObject(space, self.wrapped([u"a", u"b"]))
         assert sorted(space.listview_unicode(s)) == [u"a", u"b"]
+        #
+        s = W_SetObject(space, self.wrapped([1.5, 2.5]))
+        assert sorted(space.listview_float(s)) == [1.5, 2.5]
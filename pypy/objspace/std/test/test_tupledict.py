@@ -0,0 +1,100 @@
+import py
+from pypy.objspace.std.test.test_dictmultiobject import AppTest_DictObject
+
+
+class AppTestTupleDict(object):
+    spaceconfig = {"objspace.std.withtupledicts": True}
+
+    def setup_class(cls):
+        if cls.runappdirect:
+            py.test.skip("__repr__ doesn't work on appdirect")
+
+    def w_get_strategy(self, obj):
+        import __pypy__
+        r = __pypy__.internal_repr(obj)
+        return r[r.find("(") + 1: r.find(")")]
+
+    def test_int_int(self):
+        d = {}
+        d[1, 2] = "a"
+        assert "TupleDictStrategy_ii" in self.get_strategy(d)
+        d[3, 4] = "b"
+        assert d[1, 2] == "a"
+        assert d[(3, 4)] == "b"
+        assert d.get((1, 3)) is None
+        assert d.get((1, 2, 3)) is None
+        raises(TypeError, d.get, (1, [], 3))
+        assert d.get(1) is None
+        assert d.get(None) is None
+        assert sorted(d) == [(1, 2), (3, 4)]
+        assert sorted(d.items()) == [((1, 2), "a"), ((3, 4), "b")]
+        del d[1, 2]
+        assert d.keys() == [(3, 4)]
+        assert "TupleDictStrategy_ii" in self.get_strategy(d)
+
+    def test_str_int(self):
+        d = {}
+        d["x", 1] = 1
+        assert "TupleDictStrategy_si" in self.get_strategy(d)
+        d["y", 2] = 2
+        assert d["x", 1] == 1
+        assert ("x", 2) not in d
+        assert (1, "x") not in d
+        assert sorted(d.keys()) == [("x", 1), ("y", 2)]
+
+    def test_devolve(self):
+        d = {(1, 2): 3}
+        d["a", 1] = 4
+        assert "ObjectDictStrategy" in self.get_strategy(d)
+        assert d == {(1, 2): 3, ("a", 1): 4}
+
+        d = {(1, 2): 3}
+        d[1.5, 2] = 4
+        assert "ObjectDictStrategy" in self.get_strategy(d)
+        assert d[1.5, 2] == 4
+
+        d = {(1, 2): 3}
+        d[1] = 4
+        assert "ObjectDictStrategy" in self.get_strategy(d)
+        assert d == {(1, 2): 3, 1: 4}
+
+    def test_not_selected(self):
+        for key in [(1, 2, 3), (1,), (1.5, 2), (1, "a"), ((1, 2), 3)]:
+            d = {}
+            d[key] = 1
+            assert "ObjectDictStrategy" in self.get_strategy(d)
+            assert d[key] == 1
+
+    def test_tuple_subclass(self):
+        class T(tuple):
+            def __hash__(self):
+                return 42
+        d = {}
+        d[T((1, 2))] = 1
+        assert "ObjectDictStrategy" in self.get_strategy(d)
+        d = {(1, 2): 1}
+        d[T((3, 4))] = 2
+        assert "ObjectDictStrategy" in self.get_strategy(d)
+        assert d[T((3, 4))] == 2
+
+    def test_int_subclass_items(self):
+        class I(int):
+            pass
+        d = {(1, 2): 1}
+        assert d[I(1), 2] == 1
+        d[I(3), 4] = 2
+        assert "ObjectDictStrategy" in self.get_strategy(d)
+        assert d[3, 4] == 2
+
+    def test_equal_items_lookup(self):
+        d = {(1, 2): 1}
+        assert d[1L, 2L] == 1
+        d = {(1, 2): 1}
+        assert d[True, 2] == 1
+        d = {(1, 2): 1}
+        assert (1, 2.0) in d
+        assert d == {(1, 2): 1}
+
+
+class AppTest_TupleDictObject(AppTest_DictObject):
+    spaceconfig = {"objspace.std.withtupledicts": True}
@@ -0,0 +1,113 @@
+## ----------------------------------------------------------------------------
+## dict strategy (see dictmultiobject.py)
+
+from rpython.rlib import rerased
+from rpython.rlib.debug import mark_dict_non_null
+from rpython.rlib.objectmodel import specialize
+from rpython.rlib.unroll import unrolling_iterable
+from pypy.objspace.std.bytesobject import W_BytesObject
+from pypy.objspace.std.dictmultiobject import (AbstractTypedStrategy,
+                                               DictStrategy,
+                                               create_iterator_classes,
+                                               new_storage_dict)
+from pypy.objspace.std.intobject import W_IntObject
+from pypy.objspace.std.tupleobject import W_AbstractTupleObject
+
+
+@specialize.arg(1)
+def _is_item_of_type(w_item, tp):
+    if tp is int:
+        return type(w_item) is W_IntObject
+    elif tp is str:
+        return type(w_item) is W_BytesObject
+    else:
+        raise AssertionError
+
+@specialize.arg(2)
+def _unwrap_item(space, w_item, tp):
+    if tp is int:
+        return space.int_w(w_item)
+    elif tp is str:
+        return space.str_w(w_item)
+    else:
+        raise AssertionError
+
+
+def make_pair_dict_strategy(typetuple):
+    """Make a strategy for dicts whose keys are all exact tuples of length
+    two, with items of the exact types given by 'typetuple' (int or str).
+    The keys are stored as unboxed RPython tuples: the app-level tuple and
+    its items need not be allocated to look up a key, so a tuple built just
+    for the lookup is virtual for the JIT."""
+    assert len(typetuple) == 2
+    iter_n = unrolling_iterable(enumerate(typetuple))
+    name = ''.join([tp.__name__[0] for tp in typetuple])
+
+    class PairDictStrategy(AbstractTypedStrategy, DictStrategy):
+        erase, unerase = rerased.new_erasing_pair("tuple_" + name)
+        erase = staticmethod(erase)
+        unerase = staticmethod(unerase)
+
+        def wrap(self, unwrapped):
+            space = self.space
+            return space.newtuple([space.wrap(unwrapped[0]),
+                                   space.wrap(unwrapped[1])])
+
+        def unwrap(self, wrapped):
+            space = self.space
+            assert isinstance(wrapped, W_AbstractTupleObject)
+            return (_unwrap_item(space, wrapped.getitem(space, 0),
+                                 typetuple[0]),
+                    _unwrap_item(space, wrapped.getitem(space, 1),
+                                 typetuple[1]))
+
+        def get_empty_storage(self):
+            d = new_storage_dict(self.space)
+            mark_dict_non_null(d)
+            return self.erase(d)
+
+        def is_correct_type(self, w_obj):
+            space = self.space
+            # subclasses of tuple may override __eq__ and __hash__
+            if not isinstance(w_obj, W_AbstractTupleObject):
+                return False
+            if not space.is_w(space.type(w_obj), space.w_tuple):
+                return False
+            if w_obj.length() != 2:
+                return False
+            for i, tp in iter_n:
+                if not _is_item_of_type(w_obj.getitem(space, i), tp):
+                    return False
+            return True
+
+        def getitem(self, w_dict, w_key):
+            space = self.space
+            if (isinstance(w_key, W_AbstractTupleObject) and
+                    space.is_w(space.type(w_key), space.w_tuple) and
+                    w_key.length() != 2):
+                # can't be equal to any key, but may be unhashable
+                space.hash(w_key)
+                return None
+            return AbstractTypedStrategy.getitem(self, w_dict, w_key)
+
+        def _never_equal_to(self, w_lookup_type):
+            space = self.space
+            # XXX there are many more types
+            return (space.is_w(w_lookup_type, space.w_NoneType) or
+                    space.is_w(w_lookup_type, space.w_int) or
+                    space.is_w(w_lookup_type, space.w_float) or
+                    space.is_w(w_lookup_type, space.w_str) or
+                    space.is_w(w_lookup_type, space.w_unicode)
+                    )
+
+        def wrapkey(space, key):
+            return space.newtuple([space.wrap(key[0]), space.wrap(key[1])])
+
+    PairDictStrategy.__name__ = 'TupleDictStrategy_' + name
+    create_iterator_classes(PairDictStrategy)
+    return PairDictStrategy
+
+
+# this strategy is selected by EmptyDictStrategy.switch_to_correct_strategy
+IntIntTupleDictStrategy = make_pair_dict_strategy((int, int))
+BytesIntTupleDictStrategy = make_pair_dict_strategy((str, int))
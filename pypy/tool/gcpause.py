@@ -0,0 +1,114 @@
+#! /usr/bin/env python
+"""
+Measures the latency of a request loop running on top of a large heap of
+long-lived objects, to see how much the garbage collector adds to the worst
+pauses.  Each "request" allocates some short-lived objects and modifies a
+few of the old ones, which keeps the write barrier busy while a major
+collection is marking.
+
+Run it with the pypy to measure::
+
+    $ pypy pypy/tool/gcpause.py [options]
+
+With --compare, the benchmark is run twice in subprocesses, with
+PYPY_GC_LOW_PAUSE=0 and PYPY_GC_LOW_PAUSE=1, and the two reports are
+printed one after the other.  The other PYPY_GC_* environment variables
+are passed unchanged, so e.g. PYPY_GC_INCREMENT_STEP can be tried too.
+"""
+
+import sys, os, time, random
+import optparse
+
+
+class Node(object):
+    def __init__(self, value, next):
+        self.value = value
+        self.next = next
+        self.payload = [value] * 4
+
+
+def build_heap(size):
+    # a list of chains of nodes, so that the marking has to follow pointers
+    chains = []
+    for i in xrange(size // 16):
+        node = None
+        for j in xrange(16):
+            node = Node(i * 16 + j, node)
+        chains.append(node)
+    return chains
+
+
+def request(heap, rnd, garbage, writes):
+    # short-lived objects
+    tmp = []
+    for i in xrange(garbage):
+        tmp.append((i, str(i), [i]))
+    # modify some old objects
+    n = len(heap)
+    for i in xrange(writes):
+        node = heap[rnd.randrange(n)]
+        node.payload = [len(tmp), i]
+        heap[rnd.randrange(n)] = Node(i, node.next)
+    return len(tmp)
+
+
+def percentile(sorted_times, p):
+    index = int(len(sorted_times) * p / 100.0)
+    if index >= len(sorted_times):
+        index = len(sorted_times) - 1
+    return sorted_times[index]
+
+
+def run(options):
+    rnd = random.Random(42)
+    t0 = time.time()
+    heap = build_heap(options.heap)
+    print "heap of %d objects built in %.2f seconds" % (options.heap,
+                                                       time.time() - t0)
+    times = []
+    t0 = time.time()
+    for i in xrange(options.requests):
+        t1 = time.time()
+        request(heap, rnd, options.garbage, options.writes)
+        times.append(time.time() - t1)
+    total = time.time() - t0
+    times.sort()
+    print "%d requests in %.2f seconds" % (options.requests, total)
+    for p in [50, 90, 99, 99.9]:
+        print "  p%-5s %8.3f ms" % (p, percentile(times, p) * 1000.0)
+    print "  max    %8.3f ms" % (times[-1] * 1000.0,)
+
+
+def compare(argv):
+    args = [arg for arg in argv if arg != '--compare']
+    for value in ['0', '1']:
+        env = os.environ.copy()
+        env['PYPY_GC_LOW_PAUSE'] = value
+        print "PYPY_GC_LOW_PAUSE=%s" % (value,)
+        sys.stdout.flush()
+        os.spawnve(os.P_WAIT, sys.executable,
+                   [sys.executable, __file__] + args, env)
+        print
+
+
+def main(argv):
+    parser = optparse.OptionParser(usage="%prog [options]")
+    parser.add_option("--heap", type="int", default=2000000,
+                      help="number of long-lived objects (default: 2000000)")
+    parser.add_option("--requests", type="int", default=20000,
+                      help="number of requests (default: 20000)")
+    parser.add_option("--garbage", type="int", default=200,
+                      help="short-lived objects per request (default: 200)")
+    parser.add_option("--writes", type="int", default=20,
+                      help="old objects modified per request (default: 20)")
+    parser.add_option("--compare", action="store_true",
+                      help="run with and without PYPY_GC_LOW_PAUSE")
+    options, args = parser.parse_args(argv)
+    if options.compare:
+        compare(argv)
+    else:
+        run(options)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,119 @@
+#! /usr/bin/env python
+"""
+Measures how long a fresh process takes to reach its steady state, with
+and without a JIT warm-start profile.  The workload is a handful of
+small functions with hot loops, run in rounds; the time of every round
+is printed, and the first rounds are slower while the loops are traced.
+
+Run it with the pypy to measure::
+
+    $ pypy pypy/tool/jitwarmstart.py [options]
+
+With --compare, the benchmark is run in subprocesses: once without a
+profile, once with PYPY_JIT_PROFILE set to a new file (which records it)
+and once more with the same file (which uses it).
+"""
+
+import sys, os, time, tempfile
+import optparse
+
+
+def count_words(text):
+    counts = {}
+    for word in text.split():
+        counts[word] = counts.get(word, 0) + 1
+    return len(counts)
+
+
+def checksum(data):
+    total = 0
+    for i in xrange(len(data)):
+        total = (total * 31 + ord(data[i])) & 0xffffff
+    return total
+
+
+class Point(object):
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+
+def closest(points, target):
+    best = None
+    best_dist = 0.0
+    for p in points:
+        dist = (p.x - target.x) ** 2 + (p.y - target.y) ** 2
+        if best is None or dist < best_dist:
+            best = p
+            best_dist = dist
+    return best
+
+
+def one_round(size):
+    text = ' '.join([str(i % 97) for i in xrange(size)])
+    points = [Point(i * 0.5, i % 13) for i in xrange(size // 10)]
+    count_words(text)
+    checksum(text)
+    closest(points, Point(3.0, 4.0))
+
+
+def run(options):
+    t0 = time.time()
+    times = []
+    for i in xrange(options.rounds):
+        t1 = time.time()
+        one_round(options.size)
+        times.append(time.time() - t1)
+    total = time.time() - t0
+    steady = sorted(times[len(times) // 2:])[len(times) // 4]
+    print "%d rounds in %.3f seconds, steady state %.3f ms per round" % (
+        options.rounds, total, steady * 1000.0)
+    for i in range(min(options.rounds, 10)):
+        print "  round %-3d %8.3f ms" % (i, times[i] * 1000.0)
+    for i in range(len(times)):
+        if times[i] <= steady * 1.1:
+            print "  steady state reached after %.3f seconds" % (
+                sum(times[:i + 1]),)
+            break
+
+
+def compare(argv):
+    args = [arg for arg in argv if arg != '--compare']
+    fd, profile = tempfile.mkstemp(prefix='jitprofile')
+    os.close(fd)
+    os.unlink(profile)
+    try:
+        for label, value in [('no profile', None),
+                             ('recording the profile', profile),
+                             ('using the profile', profile)]:
+            env = os.environ.copy()
+            env.pop('PYPY_JIT_PROFILE', None)
+            if value is not None:
+                env['PYPY_JIT_PROFILE'] = value
+            print label
+            sys.stdout.flush()
+            os.spawnve(os.P_WAIT, sys.executable,
+                       [sys.executable, __file__] + args, env)
+            print
+    finally:
+        if os.path.exists(profile):
+            os.unlink(profile)
+
+
+def main(argv):
+    parser = optparse.OptionParser(usage="%prog [options]")
+    parser.add_option("--rounds", type="int", default=50,
+                      help="number of rounds (default: 50)")
+    parser.add_option("--size", type="int", default=20000,
+                      help="size of the data of each round (default: 20000)")
+    parser.add_option("--compare", action="store_true",
+                      help="run without profile, recording it, and using it")
+    options, args = parser.parse_args(argv)
+    if options.compare:
+        compare(argv)
+    else:
+        run(options)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,269 @@
+#! /usr/bin/env python
+"""
+Converts the log written by the _sampleprof module::
+
+    import _sampleprof
+    f = open('profile.log', 'wb')
+    _sampleprof.enable(f.fileno())
+    ...
+    _sampleprof.disable()
+
+to the "collapsed stacks" text used by flamegraph.pl, or to the format of
+KCacheGrind (like rpython/tool/lsprofcalltree.py)::
+
+    $ python pypy/tool/sampleprof.py profile.log > profile.folded
+    $ python pypy/tool/sampleprof.py --calltree profile.log > profile.kcg
+
+The weights are in microseconds: every sample counts for the period of the
+profiler, and the time spent in the GC since the previous sample is added
+as a '[gc]' entry on top of the stack of the sample.  The JIT-compiled
+samples end with a '[jit loop N]' entry, and the samples taken while the
+JIT was tracing or compiling end with '[tracing]'.
+"""
+
+import sys, struct
+import optparse
+
+KIND_INTERP = 0
+KIND_JIT = 1
+KIND_TRACING = 2
+
+LOOP_TYPES = ['loop', 'entry bridge', 'bridge']
+
+
+class Code(object):
+    def __init__(self, name, filename, firstlineno):
+        self.name = name
+        self.filename = filename
+        self.firstlineno = firstlineno
+
+    def label(self):
+        return '%s %s:%d' % (self.name, self.filename, self.firstlineno)
+
+
+class Sample(object):
+    def __init__(self, kind, timestamp, gc_us, loop, stack):
+        self.kind = kind
+        self.timestamp = timestamp
+        self.gc_us = gc_us
+        self.loop = loop        # loop number or None
+        self.stack = stack      # [(code, lineno)], innermost first
+
+
+class Loop(object):
+    def __init__(self, type, number, loop_number, code, next_instr):
+        self.type = type
+        self.number = number
+        self.loop_number = loop_number
+        self.code = code
+        self.next_instr = next_instr
+
+
+class Log(object):
+    def __init__(self):
+        self.period_us = 0
+        self.codes = {}
+        self.samples = []
+        self.loops = []
+
+
+class Reader(object):
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+
+    def read(self, n):
+        if self.pos + n > len(self.data):
+            raise EOFError
+        s = self.data[self.pos:self.pos + n]
+        self.pos += n
+        return s
+
+    def read_byte(self):
+        return ord(self.read(1))
+
+    def read_int(self):
+        return struct.unpack('<q', self.read(8))[0]
+
+    def read_str(self):
+        return self.read(self.read_int())
+
+
+def read_log(data):
+    log = Log()
+    reader = Reader(data)
+    if reader.read(4) != 'SPRF':
+        raise ValueError("not a _sampleprof log")
+    version = reader.read_byte()
+    if version != 1:
+        raise ValueError("unsupported log version %d" % (version,))
+    log.period_us = reader.read_int()
+    # loop number currently compiled at every (code_id, next_instr)
+    loop_at = {}
+    try:
+        while reader.pos < len(data):
+            tag = reader.read(1)
+            if tag == 'C':
+                code_id = reader.read_int()
+                firstlineno = reader.read_int()
+                name = reader.read_str()
+                filename = reader.read_str()
+                log.codes[code_id] = Code(name, filename, firstlineno)
+            elif tag == 'S':
+                kind = reader.read_byte()
+                timestamp = reader.read_int()
+                gc_us = reader.read_int()
+                jit_next_instr = reader.read_int()
+                depth = reader.read_int()
+                stack = []
+                for i in range(depth):
+                    code_id = reader.read_int()
+                    lineno = reader.read_int()
+                    stack.append((log.codes[code_id], lineno))
+                loop = None
+                if kind == KIND_JIT:
+                    loop = loop_at.get((stack[0][0], jit_next_instr))
+                log.samples.append(Sample(kind, timestamp, gc_us, loop,
+                                          stack))
+            elif tag == 'L':
+                loop_type = reader.read_byte()
+                number = reader.read_int()
+                loop_number = reader.read_int()
+                code_id = reader.read_int()
+                next_instr = reader.read_int()
+                code = log.codes.get(code_id)
+                log.loops.append(Loop(LOOP_TYPES[loop_type], number,
+                                      loop_number, code, next_instr))
+                if loop_type != 2:
+                    loop_at[code, next_instr] = loop_number
+            else:
+                raise ValueError("corrupted log: unknown record %r at %d" %
+                                 (tag, reader.pos - 1))
+    except EOFError:
+        pass     # truncated log, e.g. the process was killed
+    return log
+
+
+def sample_entries(log, sample):
+    """Yield (stack, weight) for the sample, with the stack as a list of
+    labels, outermost first."""
+    stack = ['%s:%s' % (code.filename, code.name)
+             for code, lineno in reversed(sample.stack)]
+    if sample.kind == KIND_JIT:
+        if sample.loop is not None:
+            leaf = '[jit loop %d]' % (sample.loop,)
+        else:
+            leaf = '[jit]'
+        yield stack + [leaf], log.period_us
+    elif sample.kind == KIND_TRACING:
+        yield stack + ['[tracing]'], log.period_us
+    else:
+        yield stack, log.period_us
+    if sample.gc_us > 0:
+        yield stack + ['[gc]'], sample.gc_us
+
+
+def write_flamegraph(log, out):
+    totals = {}
+    for sample in log.samples:
+        for stack, weight in sample_entries(log, sample):
+            key = ';'.join(stack) or '[unknown]'
+            totals[key] = totals.get(key, 0) + weight
+    for key in sorted(totals):
+        print >> out, '%s %d' % (key, totals[key])
+
+
+def write_calltree(log, out):
+    # self cost per (code, lineno), and inclusive cost of the calls
+    # from (caller code, lineno) to callee code
+    self_cost = {}
+    calls = {}
+    total = 0
+    for sample in log.samples:
+        weight = log.period_us + max(sample.gc_us, 0)
+        total += weight
+        if not sample.stack:
+            continue
+        code, lineno = sample.stack[0]
+        self_cost[code, lineno] = self_cost.get((code, lineno), 0) + weight
+        seen = set()
+        for i in range(1, len(sample.stack)):
+            caller, caller_lineno = sample.stack[i]
+            callee = sample.stack[i - 1][0]
+            key = (caller, caller_lineno, callee)
+            if key in seen:
+                continue      # recursion: count the time only once
+            seen.add(key)
+            calls[key] = calls.get(key, 0) + weight
+    codes = set([code for code, lineno in self_cost])
+    codes.update([caller for caller, lineno, callee in calls])
+    print >> out, 'events: Microseconds'
+    print >> out, 'summary: %d' % (total,)
+    for code in sorted(codes, key=Code.label):
+        print >> out, 'fi=%s' % (code.filename,)
+        print >> out, 'fn=%s' % (code.label(),)
+        for (c, lineno), cost in sorted(self_cost.items()):
+            if c is code:
+                print >> out, '%d %d' % (lineno, cost)
+        for (caller, lineno, callee), cost in sorted(calls.items()):
+            if caller is code:
+                print >> out, 'cfi=%s' % (callee.filename,)
+                print >> out, 'cfn=%s' % (callee.label(),)
+                print >> out, 'calls=1 %d' % (callee.firstlineno,)
+                print >> out, '%d %d' % (lineno, cost)
+        print >> out
+
+
+def write_summary(log, out):
+    counts = [0, 0, 0]
+    gc_us = 0
+    loops = {}
+    for sample in log.samples:
+        counts[sample.kind] += 1
+        gc_us += max(sample.gc_us, 0)
+        if sample.loop is not None:
+            loops[sample.loop] = loops.get(sample.loop, 0) + 1
+    total = len(log.samples)
+    print >> out, '%d samples, period %d us' % (total, log.period_us)
+    for name, count in zip(['interpreter', 'jit', 'tracing'], counts):
+        print >> out, '  %-12s %6d' % (name, count)
+    print >> out, '  %-12s %9.3f s' % ('gc', gc_us / 1000000.0)
+    by_number = dict([(loop.loop_number, loop) for loop in log.loops
+                      if loop.type != 'bridge'])
+    for number, count in sorted(loops.items(), key=lambda x: -x[1]):
+        loop = by_number.get(number)
+        if loop is None or loop.code is None:
+            print >> out, '  loop %-6d %6d' % (number, count)
+        else:
+            print >> out, '  loop %-6d %6d  %s #%d' % (number, count,
+                                                      loop.code.label(),
+                                                      loop.next_instr)
+
+
+def main(argv):
+    parser = optparse.OptionParser(usage="%prog [options] logfile")
+    parser.add_option("--calltree", action="store_true",
+                      help="write the KCacheGrind format")
+    parser.add_option("--summary", action="store_true",
+                      help="write the number of samples per kind and loop")
+    parser.add_option("-o", "--outfile", default=None,
+                      help="output file (default: stdout)")
+    options, args = parser.parse_args(argv)
+    if len(args) != 1:
+        parser.error("expected one log file")
+    with open(args[0], 'rb') as f:
+        log = read_log(f.read())
+    if options.outfile:
+        out = open(options.outfile, 'w')
+    else:
+        out = sys.stdout
+    if options.calltree:
+        write_calltree(log, out)
+    elif options.summary:
+        write_summary(log, out)
+    else:
+        write_flamegraph(log, out)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
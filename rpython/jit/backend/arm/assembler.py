@@ -22,6 +22,7 @@ from rpython.jit.backend.model import CompiledLoopToken
 from rpython.jit.codewriter.effectinfo import EffectInfo
 from rpython.jit.metainterp.history import AbstractFailDescr, FLOAT, INT, VOID
 from rpython.jit.metainterp.resoperation import rop
+from rpython.jit.metainterp.jitlog import jitlog, KIND_LOOP
 from rpython.rlib.debug import debug_print, debug_start, debug_stop
 from rpython.rlib.jit import AsmInfo
 from rpython.rlib.objectmodel import we_are_translated, specialize, compute_unique_id
@@ -624,7 +625,8 @@ class AssemblerARM(ResOpAssembler):
         ops_offset = self.mc.ops_offset
         if logger is not None:
             logger.log_loop(inputargs, operations, 0, "rewritten",
-                            name=loopname, ops_offset=ops_offset)
+                            name=loopname, ops_offset=ops_offset,
+                            looptoken_number=looptoken.number)
         self.teardown()
 
         debug_start("jit-backend-addr")
@@ -634,6 +636,10 @@ class AssemblerARM(ResOpAssembler):
             r_uint(rawstart + size_excluding_failure_stuff),
             r_uint(rawstart)))
         debug_stop("jit-backend-addr")
+        if jitlog.is_enabled():
+            jitlog.log_asm_addr(KIND_LOOP, looptoken.number,
+                                rawstart + loop_head,
+                                rawstart + size_excluding_failure_stuff)
 
         return AsmInfo(ops_offset, rawstart + loop_head,
                        size_excluding_failure_stuff - loop_head)
@@ -701,7 +707,7 @@ class AssemblerARM(ResOpAssembler):
         self.update_frame_depth(frame_depth)
         if logger:
             logger.log_bridge(inputargs, operations, "rewritten",
-                              ops_offset=ops_offset)
+                              faildescr, ops_offset=ops_offset)
         self.teardown()
 
         debug_bridge(descr_number, rawstart, codeendpos)
@@ -231,6 +231,7 @@ class LLGraphCPU(model.AbstractCPU):
     supports_floats = True
     supports_longlong = r_uint is not r_ulonglong
     supports_singlefloats = True
+    supports_vector_ops = True
     translate_support_code = False
     is_llgraph = True
 
@@ -1035,6 +1036,16 @@ class LLFrame(object):
     def execute_cond_call_gc_wb_array(self, descr, a, b):
         py.test.skip("cond_call_gc_wb_array not supported")
 
+    def _execute_vec(self, descr, func, dstbase, dstofs, base1, ofs1,
+                     base2, ofs2):
+        # the two items, one after the other
+        itemsize = self.cpu.unpack_arraydescr_size(descr)[1]
+        for i in range(2):
+            x = self.cpu.bh_raw_load(base1, ofs1 + i * itemsize, descr)
+            y = self.cpu.bh_raw_load(base2, ofs2 + i * itemsize, descr)
+            self.cpu.bh_raw_store(dstbase, dstofs + i * itemsize, func(x, y),
+                                  descr)
+
     def execute_keepalive(self, descr, x):
         pass
 
@@ -1065,6 +1076,14 @@ def _setup():
         _op_default_implementation.func_name = 'execute_' + opname
         return _op_default_implementation
 
+    def _make_impl_vec(opname):
+        from rpython.jit.metainterp.blackhole import BlackholeInterpreter
+        func = BlackholeInterpreter.__dict__['bhimpl_' + opname.lower()]
+        def execute(self, descr, *args):
+            return self._execute_vec(descr, func, *args)
+        execute.func_name = 'execute_vec_' + opname.lower()
+        return execute
+
     def _new_execute(opname):
         def execute(self, descr, *args):
             if descr is not None:
@@ -1079,6 +1098,9 @@ def _setup():
         if not k.startswith("_"):
             fname = 'execute_' + k.lower()
             if not hasattr(LLFrame, fname):
+                if k.startswith('VEC_'):
+                    setattr(LLFrame, fname, _make_impl_vec(k[4:]))
+                    continue
                 func = _make_impl_from_blackhole_interp(k)
                 if func is None:
                     func = _new_execute(k.lower())
@@ -4,6 +4,7 @@ from rpython.jit.backend.llsupport.symbolic import WORD
 from rpython.jit.metainterp.history import (INT, REF, FLOAT, JitCellToken,
     ConstInt, BoxInt, AbstractFailDescr)
 from rpython.jit.metainterp.resoperation import ResOperation, rop
+from rpython.jit.metainterp.jitlog import jitlog, KIND_BRIDGE
 from rpython.rlib import rgc
 from rpython.rlib.debug import (debug_start, debug_stop, have_debug_prints,
                                 debug_print)
@@ -65,6 +66,7 @@ class BaseAssembler(object):
         self.memcpy_addr = 0
         self.rtyper = cpu.rtyper
         self._debug = False
+        self.linear_scan = False
 
     def setup_once(self):
         # the address of the function called by 'new'
@@ -118,7 +120,7 @@ class BaseAssembler(object):
             # set_debug by hand before initializing the assembler. Leave it
             # as it is
             debug_start('jit-backend-counts')
-            self.set_debug(have_debug_prints())
+            self.set_debug(have_debug_prints() or jitlog.is_enabled())
             debug_stop('jit-backend-counts')
         # when finishing, we only have one value at [0], the rest dies
         self.gcmap_for_finish = lltype.malloc(jitframe.GCMAP, 1,
@@ -299,6 +301,9 @@ class BaseAssembler(object):
                 else:
                     prefix = 'entry ' + str(struct.number)
                 debug_print(prefix + ':' + str(struct.i))
+                if jitlog.is_enabled():
+                    jitlog.log_entry_count(struct.type, struct.number,
+                                           struct.i)
             debug_stop('jit-backend-counts')
 
     @staticmethod
@@ -379,4 +384,7 @@ def debug_bridge(descr_number, rawstart, codeendpos):
                 (r_uint(descr_number), r_uint(rawstart),
                     r_uint(rawstart + codeendpos)))
     debug_stop("jit-backend-addr")
+    if jitlog.is_enabled():
+        jitlog.log_asm_addr(KIND_BRIDGE, descr_number, rawstart,
+                            rawstart + codeendpos)
 
@@ -16,6 +16,7 @@ from rpython.jit.backend.llsupport.descr import (
     FLAG_POINTER, FLAG_FLOAT)
 from rpython.jit.backend.llsupport.asmmemmgr import AsmMemoryManager
 from rpython.rlib.unroll import unrolling_iterable
+from rpython.rlib.rarithmetic import intmask
 
 
 class AbstractLLCPU(AbstractCPU):
@@ -199,6 +200,12 @@ class AbstractLLCPU(AbstractCPU):
         deadframe = lltype.cast_opaque_ptr(jitframe.JITFRAMEPTR, deadframe)
         return deadframe.jf_savedata
 
+    def get_code_memory_usage(self):
+        return intmask(self.asmmemmgr.total_mallocs)
+
+    def get_code_memory_allocated(self):
+        return intmask(self.asmmemmgr.total_memory_allocated)
+
     def free_loop_and_bridges(self, compiled_loop_token):
         AbstractCPU.free_loop_and_bridges(self, compiled_loop_token)
         blocks = compiled_loop_token.asmmemmgr_blocks
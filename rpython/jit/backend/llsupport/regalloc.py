@@ -1,4 +1,4 @@
-import os
+import os, sys
 from rpython.jit.metainterp.history import Const, Box, REF, JitCellToken
 from rpython.rlib.objectmodel import we_are_translated, specialize
 from rpython.jit.metainterp.resoperation import rop
@@ -288,6 +288,9 @@ class RegisterManager(object):
         self.position = -1
         self.frame_manager = frame_manager
         self.assembler = assembler
+        # in linear-scan mode, see compute_linear_scan_hints()
+        self.uses = None
+        self.reg_hints = {}
 
     def is_still_alive(self, v):
         # Check if 'v' is alive at the current position.
@@ -392,10 +395,21 @@ class RegisterManager(object):
             return self.reg_bindings[v]
         except KeyError:
             if self.free_regs:
-                loc = self.free_regs.pop()
+                loc = self._pop_free_reg(v)
                 self.reg_bindings[v] = loc
                 return loc
 
+    def _pop_free_reg(self, v):
+        # like free_regs.pop(), but takes the register hinted for 'v'
+        # if it is free
+        hint = self.reg_hints.get(v, None)
+        if hint is not None:
+            for i in range(len(self.free_regs)):
+                if self.free_regs[i] is hint:
+                    del self.free_regs[i]
+                    return hint
+        return self.free_regs.pop()
+
     def _spill_var(self, v, forbidden_vars, selected_reg,
                    need_lower_byte=False):
         v_to_spill = self._pick_variable_to_spill(v, forbidden_vars,
@@ -409,7 +423,9 @@ class RegisterManager(object):
 
     def _pick_variable_to_spill(self, v, forbidden_vars, selected_reg=None,
                                 need_lower_byte=False):
-        """ Slightly less silly algorithm.
+        """ Slightly less silly algorithm: spill the variable that lives
+        the longest, or in linear-scan mode the one that is needed again
+        the furthest away.
         """
         cur_max_age = -1
         candidate = None
@@ -424,7 +440,10 @@ class RegisterManager(object):
                     continue
             if need_lower_byte and reg in self.no_lower_byte_regs:
                 continue
-            max_age = self.longevity[next][1]
+            if self.uses is not None:
+                max_age = self.next_use(next)
+            else:
+                max_age = self.longevity[next][1]
             if cur_max_age < max_age:
                 cur_max_age = max_age
                 candidate = next
@@ -526,7 +545,7 @@ class RegisterManager(object):
 
     def _move_variable_away(self, v, prev_loc):
         if self.free_regs:
-            loc = self.free_regs.pop()
+            loc = self._pop_free_reg(v)
             self.reg_bindings[v] = loc
             self.assembler.regalloc_mov(prev_loc, loc)
         else:
@@ -607,6 +626,124 @@ class RegisterManager(object):
         self.free_regs = [fr for fr in self.free_regs if fr is not r]
         return r
 
+    # linear-scan mode
+
+    def compute_linear_scan_hints(self, inputargs, operations, uses,
+                                  fixed_hints):
+        """ Walk the live ranges of the variables of this register class
+        in the order in which they start, and give each one the register
+        it would get from a linear-scan allocator.  The result is only
+        used as 'reg_hints', i.e. as the preferred register when the
+        variable is (re)loaded; 'uses' (from compute_vars_uses()) makes
+        spilling pick the variable needed again the furthest away, which
+        splits the live ranges where they are not used.  'fixed_hints'
+        maps variables to the register they should preferably end in,
+        e.g. the one expected by the target of the final JUMP.
+        """
+        self.uses = uses
+        calls_before = [0] * (len(operations) + 1)
+        for i in range(len(operations)):
+            calls_before[i + 1] = calls_before[i]
+            if operations[i].is_call():
+                calls_before[i + 1] += 1
+        active = []
+        free_regs = self.all_regs[:]
+        for v in inputargs:
+            self._scan_variable(v, 0, active, free_regs, calls_before,
+                                fixed_hints)
+        for i in range(len(operations)):
+            v = operations[i].result
+            if v is not None:
+                self._scan_variable(v, i, active, free_regs, calls_before,
+                                    fixed_hints)
+        for v, reg in fixed_hints.items():
+            if self._is_of_this_class(v):
+                self.reg_hints[v] = reg
+
+    def _is_of_this_class(self, v):
+        return self.box_types is None or v.type in self.box_types
+
+    def _scan_variable(self, v, start, active, free_regs, calls_before,
+                       fixed_hints):
+        if not self._is_of_this_class(v) or v not in self.longevity:
+            return
+        end = self.longevity[v][1]
+        if end < 0:
+            return      # unused input argument
+        # free the registers of the variables that are dead at 'start'
+        i = 0
+        while i < len(active):
+            w = active[i]
+            if self.longevity[w][1] <= start:
+                free_regs.append(self.reg_hints[w])
+                del active[i]
+            else:
+                i += 1
+        # a variable already in a register (e.g. an input argument of
+        # a bridge) keeps it
+        reg = self.reg_bindings.get(v, None)
+        if reg is None or reg not in free_regs:
+            crosses_call = calls_before[end] > calls_before[start + 1]
+            reg = self._choose_scan_reg(free_regs, fixed_hints.get(v, None),
+                                        crosses_call)
+        if reg is None:
+            # no free register: the live range of the variable that is
+            # needed again the furthest away is split here
+            saved_position = self.position
+            self.position = start
+            victim = None
+            victim_use = self.next_use(v)
+            for w in active:
+                use = self.next_use(w)
+                if use > victim_use:
+                    victim = w
+                    victim_use = use
+            self.position = saved_position
+            if victim is None:
+                return
+            active.remove(victim)
+            reg = self.reg_hints[victim]
+        else:
+            free_regs.remove(reg)
+        self.reg_hints[v] = reg
+        active.append(v)
+
+    def _choose_scan_reg(self, free_regs, hint, crosses_call):
+        if not free_regs:
+            return None
+        if hint is not None and hint in free_regs:
+            return hint
+        # variables that live across a call should not be in a register
+        # that the call clobbers, and the other ones should leave the
+        # callee-saved registers free
+        for reg in free_regs:
+            if (reg in self.save_around_call_regs) != crosses_call:
+                return reg
+        return free_regs[0]
+
+    def next_use(self, v):
+        """ The position of the next operation that needs 'v' in a
+        register, starting from the current one, or sys.maxint if 'v' is
+        only kept alive by the fail_args of guards or by a JUMP.
+        """
+        if isinstance(v, TempBox):
+            return self.position      # needed by the current operation
+        lst = self.uses.get(v, None)
+        if lst is None:
+            return sys.maxint
+        # binary search for the first position >= self.position
+        lo = 0
+        hi = len(lst)
+        while lo < hi:
+            mid = (lo + hi) >> 1
+            if lst[mid] < self.position:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == len(lst):
+            return sys.maxint
+        return lst[lo]
+
     # abstract methods, override
 
     def convert_to_imm(self, c):
@@ -727,6 +864,27 @@ def compute_vars_longevity(inputargs, operations):
     assert len(last_used) == 0
     return longevity, last_real_usage
 
+def compute_vars_uses(operations):
+    # compute a dictionary that maps variables to the sorted list of the
+    # positions of the operations that use them, not counting the
+    # fail_args of the guards nor the arguments of JUMP and LABEL
+    uses = {}
+    for i in range(len(operations)):
+        op = operations[i]
+        opnum = op.getopnum()
+        if opnum == rop.JUMP or opnum == rop.LABEL:
+            continue
+        for j in range(op.numargs()):
+            arg = op.getarg(j)
+            if not isinstance(arg, Box):
+                continue
+            lst = uses.get(arg, None)
+            if lst is None:
+                uses[arg] = [i]
+            elif lst[-1] != i:
+                lst.append(i)
+    return uses
+
 def is_comparison_or_ovf_op(opnum):
     from rpython.jit.metainterp.resoperation import opclasses
     cls = opclasses[opnum]
@@ -2,6 +2,9 @@ import py
 from rpython.jit.metainterp.history import BoxInt, ConstInt, BoxFloat, INT, FLOAT,\
      BoxPtr
 from rpython.jit.backend.llsupport.regalloc import FrameManager, LinkedList
+from rpython.jit.backend.llsupport.regalloc import (compute_vars_longevity,
+     compute_vars_uses)
+from rpython.jit.metainterp.resoperation import ResOperation, rop
 from rpython.jit.backend.llsupport.regalloc import RegisterManager as BaseRegMan
 
 def newboxes(*values):
@@ -378,6 +381,88 @@ class TestRegalloc(object):
         rm._check_invariants()
 
 
+    def test_spilling_next_use(self):
+        b0, b1, b2, b3, b4 = newboxes(0, 1, 2, 3, 4)
+        longevity = {b0: (0, 10), b1: (0, 8), b2: (0, 4), b3: (0, 4),
+                     b4: (2, 3)}
+        uses = {b0: [5, 10], b1: [1, 8], b2: [3, 4], b3: [3, 4], b4: [3]}
+        # the greedy allocator spills the variable that lives the longest,
+        # the linear-scan mode the one that is needed the furthest away
+        for linear_scan, expected in [(False, b0), (True, b1)]:
+            fm = TFrameManager()
+            asm = MockAsm()
+            rm = RegisterManager(longevity, frame_manager=fm, assembler=asm)
+            if linear_scan:
+                rm.uses = uses
+            rm.next_instruction()
+            for b in b0, b1, b2, b3:
+                rm.force_allocate_reg(b)
+            rm.next_instruction(2)
+            loc = rm.loc(expected)
+            assert rm.force_allocate_reg(b4) is loc
+            assert expected not in rm.reg_bindings
+            assert asm.moves == [(loc, fm.loc(expected))]
+            rm._check_invariants()
+
+    def test_reg_hints(self):
+        b0, b1 = newboxes(0, 1)
+        longevity = {b0: (0, 1), b1: (0, 1)}
+        rm = RegisterManager(longevity)
+        rm.reg_hints[b1] = r2
+        rm.next_instruction()
+        assert rm.try_allocate_reg(b0) is r0
+        assert rm.try_allocate_reg(b1) is r2
+        rm._check_invariants()
+
+    def test_compute_vars_uses(self):
+        i0, i1, i2, i3 = newboxes(0, 1, 2, 3)
+        ops = [ResOperation(rop.INT_ADD, [i0, ConstInt(1)], i1),
+               ResOperation(rop.INT_MUL, [i1, i1], i2),
+               ResOperation(rop.INT_ADD, [i1, i2], i3),
+               ResOperation(rop.JUMP, [i3], None)]
+        assert compute_vars_uses(ops) == {i0: [0], i1: [1, 2], i2: [2]}
+
+    def test_linear_scan_hints(self):
+        class XRegisterManager(RegisterManager):
+            save_around_call_regs = [r0, r1]
+
+        i0, i1, i2, i3 = newboxes(0, 1, 2, 3)
+        ops = [ResOperation(rop.INT_ADD, [i0, ConstInt(1)], i1),
+               ResOperation(rop.CALL, [ConstInt(123), i1], i2),
+               ResOperation(rop.INT_ADD, [i1, i2], i3),
+               ResOperation(rop.JUMP, [i3], None)]
+        longevity, _ = compute_vars_longevity([i0], ops)
+        rm = XRegisterManager(longevity)
+        rm.compute_linear_scan_hints([i0], ops, compute_vars_uses(ops),
+                                     {i3: r3})
+        # i1 lives across the call: it gets a register not clobbered by
+        # calls, while i0 and i2 leave these registers free
+        assert rm.reg_hints[i0] is r0
+        assert rm.reg_hints[i1] is r2
+        assert rm.reg_hints[i2] is r1
+        # i3 goes where the JUMP wants it
+        assert rm.reg_hints[i3] is r3
+
+    def test_linear_scan_split(self):
+        boxes = newboxes(*range(6))
+        ops = [ResOperation(rop.SAME_AS, [ConstInt(i)], boxes[i])
+               for i in range(6)]
+        ops.append(ResOperation(rop.INT_ADD, [boxes[0], boxes[4]], None))
+        ops.append(ResOperation(rop.INT_ADD, [boxes[5], boxes[2]], None))
+        ops.append(ResOperation(rop.SAME_AS, [boxes[1]], None))
+        ops.append(ResOperation(rop.SAME_AS, [boxes[3]], None))
+        ops.append(ResOperation(rop.FINISH, [], None))
+        longevity = {}
+        for i in range(6):
+            longevity[boxes[i]] = (i, len(ops) - 2)
+        rm = RegisterManager(longevity)
+        rm.compute_linear_scan_hints([], ops, compute_vars_uses(ops), {})
+        # boxes[4] takes the register of boxes[3], which is needed the
+        # furthest away, and boxes[5] the one of boxes[1]
+        assert rm.reg_hints[boxes[4]] is rm.reg_hints[boxes[3]]
+        assert rm.reg_hints[boxes[5]] is rm.reg_hints[boxes[1]]
+        assert len(dict.fromkeys(rm.reg_hints.values())) == 4
+
     def test_hint_frame_locations_1(self):
         for hint_value in range(11):
             b0, = newboxes(0)
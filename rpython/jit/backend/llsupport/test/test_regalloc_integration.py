@@ -689,3 +689,27 @@ class TestRegAllocCallAndStackDepth(BaseTestRegalloc):
         self.run(loop, 4, 7)
         assert self.getint(0) == 29
 
+
+
+class LinearScanMixin(object):
+    # run the tests with the 'linear_scan' JIT parameter
+
+    def setup_method(self, meth):
+        BaseTestRegalloc.setup_method(self, meth)
+        self.cpu.set_linear_scan(True)
+
+    def teardown_method(self, meth):
+        self.cpu.set_linear_scan(False)
+
+class TestRegallocSimpleLinearScan(LinearScanMixin, TestRegallocSimple):
+    pass
+
+class TestRegallocCompOpsLinearScan(LinearScanMixin, TestRegallocCompOps):
+    pass
+
+class TestRegallocMoreRegistersLinearScan(LinearScanMixin,
+                                          TestRegallocMoreRegisters):
+    pass
+
+class TestRegallocFloatsLinearScan(LinearScanMixin, TestRegallocFloats):
+    pass
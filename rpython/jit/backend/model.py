@@ -19,6 +19,8 @@ class AbstractCPU(object):
     # longlongs are supported by the JIT, but stored as doubles.
     # Boxes and Consts are BoxFloats and ConstFloats.
     supports_singlefloats = False
+    supports_vector_ops = False
+    # ^^^ the vec_* operations, used if 'vec' is in enable_opts
 
     propagate_exception_descr = None
 
@@ -45,12 +47,30 @@ class AbstractCPU(object):
         """
         raise NotImplementedError
 
+    def get_code_memory_usage(self):
+        """ Return the number of bytes of machine code currently in use by
+        the compiled loops and bridges, or 0 if the backend does not know.
+        """
+        return 0
+
+    def get_code_memory_allocated(self):
+        """ Return the number of bytes reserved so far to write machine code
+        into, including the free parts.
+        """
+        return 0
+
     def set_debug(self, value):
         """ Enable or disable debugging info. Does nothing by default. Returns
         the previous setting.
         """
         return False
 
+    def set_linear_scan(self, value):
+        """ Select the linear-scan register allocator (if True) or the
+        default greedy one.  Does nothing by default.
+        """
+        pass
+
     def compile_loop(self, inputargs, operations, looptoken,
                      log=True, name='', logger=None):
         """Assemble the given loop.
@@ -308,6 +328,14 @@ class CompiledLoopToken(object):
         debug_print("allocating Bridge #", self.bridges_count, "of Loop #", self.number)
         debug_stop("jit-mem-looptoken-alloc")
 
+    def get_code_size(self):
+        # the machine code of the loop and all its bridges
+        size = 0
+        if self.asmmemmgr_blocks is not None:
+            for rawstart, rawstop in self.asmmemmgr_blocks:
+                size += rawstop - rawstart
+        return size
+
     def update_frame_info(self, oldlooptoken, baseofs):
         new_fi = self.frame_info
         new_loop_tokens = []
@@ -4160,6 +4160,48 @@ class LLtypeBackendTest(BaseBackendTest):
                     rffi.cast(lltype.Float, value))
             rawstorage.free_raw_storage(p)
 
+    def test_vec_ops(self):
+        if not self.cpu.supports_vector_ops:
+            py.test.skip("requires vector operations")
+        ops = """
+        [i0, i1, i2, i3]
+        vec_%s(i0, i1, i0, i2, i0, i3, descr=arraydescr)
+        finish()
+        """
+        for opname, T, func in [
+                ('float_add', rffi.DOUBLE, lambda x, y: x + y),
+                ('float_sub', rffi.DOUBLE, lambda x, y: x - y),
+                ('float_mul', rffi.DOUBLE, lambda x, y: x * y),
+                ('float_truediv', rffi.DOUBLE, lambda x, y: x / y),
+                ('int_add', lltype.Signed, lambda x, y: x + y),
+                ('int_sub', lltype.Signed, lambda x, y: x - y),
+                ('int_and', lltype.Signed, lambda x, y: x & y),
+                ('int_or', lltype.Signed, lambda x, y: x | y),
+                ('int_xor', lltype.Signed, lambda x, y: x ^ y)]:
+            arraydescr = self.cpu.arraydescrof(rffi.CArray(T))
+            loop = parse(ops % opname, self.cpu, namespace=locals())
+            looptoken = JitCellToken()
+            self.cpu.compile_loop(loop.inputargs, loop.operations, looptoken)
+            # the last two overlap: the second item loaded is the first one
+            # stored, so the items must be done one after the other
+            for dst, src1, src2 in [(6, 0, 2), (0, 0, 2), (2, 2, 2),
+                                    (1, 0, 2), (3, 0, 2)]:
+                a = lltype.malloc(rffi.CArray(T), 8, flavor='raw')
+                expected = []
+                for i in range(8):
+                    a[i] = rffi.cast(T, i * 3 + 5)
+                    expected.append(a[i])
+                for i in range(2):
+                    expected[dst + i] = func(expected[src1 + i],
+                                             expected[src2 + i])
+                adr = rffi.cast(lltype.Signed, a)
+                size = rffi.sizeof(T)
+                self.cpu.execute_token(looptoken, adr, dst * size,
+                                       src1 * size, src2 * size)
+                got = [a[i] for i in range(8)]
+                lltype.free(a, flavor='raw')
+                assert got == expected
+
     def test_forcing_op_with_fail_arg_in_reg(self):
         values = []
         def maybe_force(token, flag):
@@ -27,6 +27,7 @@ from rpython.jit.backend.x86.regloc import (eax, ecx, edx, ebx, esp, ebp, esi,
 from rpython.rlib.objectmodel import we_are_translated
 from rpython.jit.backend.x86 import rx86, codebuf, callbuilder
 from rpython.jit.metainterp.resoperation import rop
+from rpython.jit.metainterp.jitlog import jitlog, KIND_LOOP
 from rpython.jit.backend.x86 import support
 from rpython.rlib.debug import debug_print, debug_start, debug_stop
 from rpython.rlib import rgc
@@ -490,6 +491,10 @@ class Assembler386(BaseAssembler):
             r_uint(rawstart + size_excluding_failure_stuff),
             r_uint(rawstart)))
         debug_stop("jit-backend-addr")
+        if jitlog.is_enabled():
+            jitlog.log_asm_addr(KIND_LOOP, looptoken.number,
+                                rawstart + looppos,
+                                rawstart + size_excluding_failure_stuff)
         self.patch_pending_failure_recoveries(rawstart)
         #
         ops_offset = self.mc.ops_offset
@@ -501,7 +506,8 @@ class Assembler386(BaseAssembler):
         looptoken._ll_function_addr = rawstart
         if logger:
             logger.log_loop(inputargs, operations, 0, "rewritten",
-                            name=loopname, ops_offset=ops_offset)
+                            name=loopname, ops_offset=ops_offset,
+                            looptoken_number=looptoken.number)
 
         self.fixup_target_tokens(rawstart)
         self.teardown()
@@ -551,7 +557,7 @@ class Assembler386(BaseAssembler):
                           frame_depth_no_fixed_size + JITFRAME_FIXED_SIZE)
         if logger:
             logger.log_bridge(inputargs, operations, "rewritten",
-                              ops_offset=ops_offset)
+                              faildescr, ops_offset=ops_offset)
         self.fixup_target_tokens(rawstart)
         self.update_frame_depth(frame_depth)
         self.teardown()
@@ -715,6 +721,8 @@ class Assembler386(BaseAssembler):
     def _assemble(self, regalloc, inputargs, operations):
         self._regalloc = regalloc
         regalloc.compute_hint_frame_locations(operations)
+        if self.linear_scan:
+            regalloc.compute_linear_scan_hints(inputargs, operations)
         regalloc.walk_operations(inputargs, operations)
         if we_are_translated() or self.cpu.dont_keepalive_stuff:
             self._regalloc = None   # else keep it around for debugging
@@ -1507,6 +1515,56 @@ class Assembler386(BaseAssembler):
         dest_addr = AddressLoc(base_loc, ofs_loc, 0, baseofs.value)
         self.save_into_mem(dest_addr, value_loc, size_loc)
 
+    def _vecop(packed, scalar):
+        def genop_discard_vec(self, op, arglocs):
+            (dstbase_loc, dstofs_loc, base1_loc, ofs1_loc, base2_loc,
+             ofs2_loc, tmp1_loc, tmp2_loc, xtmp1_loc, xtmp2_loc) = arglocs
+            dst_addr = addr_add(dstbase_loc, dstofs_loc)
+            src1_addr = addr_add(base1_loc, ofs1_loc)
+            src2_addr = addr_add(base2_loc, ofs2_loc)
+            # the packed instructions load both items before storing the
+            # first one: if it is stored over the second item of a source,
+            # i.e. if 'dst - src' is in [1, 15], do the items one by one
+            jb_locations = []
+            for src_addr in [src1_addr, src2_addr]:
+                self.mc.LEA(tmp1_loc, dst_addr.add_offset(-1))
+                self.mc.LEA(tmp2_loc, src_addr)
+                self.mc.SUB(tmp1_loc, tmp2_loc)
+                self.mc.CMP(tmp1_loc, imm(15))
+                self.mc.J_il8(rx86.Conditions['B'], 0)    # JB .one_by_one
+                jb_locations.append(self.mc.get_relative_pos())
+            self.mc.MOVUPD(xtmp1_loc, src1_addr)
+            self.mc.MOVUPD(xtmp2_loc, src2_addr)
+            getattr(self.mc, packed)(xtmp1_loc, xtmp2_loc)
+            self.mc.MOVUPD(dst_addr, xtmp1_loc)
+            self.mc.JMP_l8(0)                              # JMP .done
+            jmp_location = self.mc.get_relative_pos()
+            for jb_location in jb_locations:               # .one_by_one:
+                offset = jmp_location - jb_location
+                assert 0 < offset <= 127
+                self.mc.overwrite(jb_location - 1, chr(offset))
+            for i in range(2):
+                self.mc.MOVSD(xtmp1_loc, src1_addr.add_offset(i * 8))
+                self.mc.MOVSD(xtmp2_loc, src2_addr.add_offset(i * 8))
+                getattr(self.mc, scalar)(xtmp1_loc, xtmp2_loc)
+                self.mc.MOVSD(dst_addr.add_offset(i * 8), xtmp1_loc)
+            offset = self.mc.get_relative_pos() - jmp_location  # .done:
+            assert 0 < offset <= 127
+            self.mc.overwrite(jmp_location - 1, chr(offset))
+        return genop_discard_vec
+
+    # the integer operations work on the low quadword of the registers
+    # too, so they are also used for the items one by one
+    genop_discard_vec_float_add = _vecop('ADDPD', 'ADDSD')
+    genop_discard_vec_float_sub = _vecop('SUBPD', 'SUBSD')
+    genop_discard_vec_float_mul = _vecop('MULPD', 'MULSD')
+    genop_discard_vec_float_truediv = _vecop('DIVPD', 'DIVSD')
+    genop_discard_vec_int_add = _vecop('PADDQ', 'PADDQ')
+    genop_discard_vec_int_sub = _vecop('PSUBQ', 'PSUBQ')
+    genop_discard_vec_int_and = _vecop('PAND', 'PAND')
+    genop_discard_vec_int_or = _vecop('POR', 'POR')
+    genop_discard_vec_int_xor = _vecop('PXOR', 'PXOR')
+
     def genop_discard_strsetitem(self, op, arglocs):
         base_loc, ofs_loc, val_loc = arglocs
         basesize, itemsize, ofs_length = symbolic.get_array_token(rstr.STR,
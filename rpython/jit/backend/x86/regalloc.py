@@ -8,7 +8,8 @@ from rpython.jit.backend.llsupport.descr import (ArrayDescr, CallDescr,
     unpack_arraydescr, unpack_fielddescr, unpack_interiorfielddescr)
 from rpython.jit.backend.llsupport.gcmap import allocate_gcmap
 from rpython.jit.backend.llsupport.regalloc import (FrameManager, BaseRegalloc,
-     RegisterManager, TempBox, compute_vars_longevity, is_comparison_or_ovf_op)
+     RegisterManager, TempBox, compute_vars_longevity, compute_vars_uses,
+     is_comparison_or_ovf_op)
 from rpython.jit.backend.x86 import rx86
 from rpython.jit.backend.x86.arch import (WORD, JITFRAME_FIXED_SIZE, IS_X86_32,
     IS_X86_64)
@@ -1018,6 +1019,34 @@ class RegAlloc(BaseRegalloc):
     consider_setarrayitem_raw = consider_setarrayitem_gc
     consider_raw_store = consider_setarrayitem_gc
 
+    def consider_vec_float_add(self, op):
+        args = op.getarglist()
+        locs = [self.rm.make_sure_var_in_reg(arg, args) for arg in args]
+        tmp1_box = TempBox()
+        tmp2_box = TempBox()
+        forbidden_vars = args + [tmp1_box, tmp2_box]
+        locs.append(self.rm.force_allocate_reg(tmp1_box, forbidden_vars))
+        locs.append(self.rm.force_allocate_reg(tmp2_box, forbidden_vars))
+        xtmp1_box = TempBox()
+        xtmp2_box = TempBox()
+        forbidden_vars = [xtmp1_box, xtmp2_box]
+        locs.append(self.xrm.force_allocate_reg(xtmp1_box, forbidden_vars))
+        locs.append(self.xrm.force_allocate_reg(xtmp2_box, forbidden_vars))
+        self.perform_discard(op, locs)
+        self.rm.possibly_free_var(tmp1_box)
+        self.rm.possibly_free_var(tmp2_box)
+        self.xrm.possibly_free_var(xtmp1_box)
+        self.xrm.possibly_free_var(xtmp2_box)
+
+    consider_vec_float_sub = consider_vec_float_add
+    consider_vec_float_mul = consider_vec_float_add
+    consider_vec_float_truediv = consider_vec_float_add
+    consider_vec_int_add = consider_vec_float_add
+    consider_vec_int_sub = consider_vec_float_add
+    consider_vec_int_and = consider_vec_float_add
+    consider_vec_int_or = consider_vec_float_add
+    consider_vec_int_xor = consider_vec_float_add
+
     def consider_getfield_gc(self, op):
         ofs, size, sign = unpack_fielddescr(op.getdescr())
         ofs_loc = imm(ofs)
@@ -1259,6 +1288,23 @@ class RegAlloc(BaseRegalloc):
                 loc = arglocs[i]
                 if isinstance(loc, FrameLoc):
                     self.fm.hint_frame_pos[box] = self.fm.get_loc_index(loc)
+                elif self.assembler.linear_scan:
+                    assert isinstance(loc, RegLoc)
+                    if box.type == FLOAT:
+                        self.xrm.reg_hints[box] = loc
+                    else:
+                        self.rm.reg_hints[box] = loc
+
+    def compute_linear_scan_hints(self, inputargs, operations):
+        # with the 'linear_scan' JIT parameter: give every variable its
+        # preferred register, keeping the ones that the final JUMP wants
+        # (see compute_hint_frame_locations()) for the variables passed
+        # to it
+        uses = compute_vars_uses(operations)
+        self.rm.compute_linear_scan_hints(inputargs, operations, uses,
+                                          self.rm.reg_hints.copy())
+        self.xrm.compute_linear_scan_hints(inputargs, operations, uses,
+                                           self.xrm.reg_hints.copy())
 
     def consider_jump(self, op):
         assembler = self.assembler
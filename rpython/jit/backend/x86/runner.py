@@ -49,6 +49,9 @@ class AbstractX86CPU(AbstractLLCPU):
     def set_debug(self, flag):
         return self.assembler.set_debug(flag)
 
+    def set_linear_scan(self, flag):
+        self.assembler.linear_scan = flag
+
     def get_failargs_limit(self):
         if self.opts is not None:
             return self.opts.failargs_limit
@@ -162,5 +165,6 @@ class CPU_X86_64(AbstractX86CPU):
     CALLEE_SAVE_REGISTERS = [regloc.ebx, regloc.r12, regloc.r13, regloc.r14, regloc.r15]
 
     IS_64_BIT = True
+    supports_vector_ops = True     # needs more registers than on x86-32
 
 CPU = CPU386
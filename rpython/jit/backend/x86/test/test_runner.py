@@ -1,4 +1,5 @@
 import py
+from rpython.tool.udir import udir
 from rpython.rtyper.lltypesystem import lltype, llmemory, rffi, rstr
 from rpython.jit.metainterp.history import ResOperation, TargetToken,\
      JitCellToken
@@ -519,6 +520,15 @@ class TestX86(LLtypeBackendTest):
             assert self.cpu.get_int_value(deadframe, 3) == 42
 
 
+class TestX86LinearScan(TestX86):
+    # the same tests, with the 'linear_scan' JIT parameter
+
+    def get_cpu(self):
+        cpu = TestX86.get_cpu(self)
+        cpu.set_linear_scan(True)
+        return cpu
+
+
 class TestDebuggingAssembler(object):
     def setup_method(self, meth):
         self.cpu = CPU(rtyper=None, stats=FakeStats())
@@ -565,3 +575,37 @@ class TestDebuggingAssembler(object):
         l1 = ('debug_print', preambletoken.repr_of_descr() + ':1')
         l2 = ('debug_print', targettoken.repr_of_descr() + ':9')
         assert ('jit-backend-counts', [l0, l1, l2]) in dlog
+
+    def test_jitlog(self):
+        from rpython.jit.metainterp.jitlog import jitlog, KIND_LOOP
+        from rpython.tool.jitlogparser.binlog import read_binlog
+
+        filename = str(udir.join('test_jitlog'))
+        jitlog.open(filename)
+        try:
+            # the counters are enabled by the binary log alone
+            self.cpu = CPU(rtyper=None, stats=FakeStats())
+            self.cpu.setup_once()
+            assert self.cpu.assembler._debug
+            targettoken = TargetToken()
+            ops = parse('''
+            [i0]
+            label(i0, descr=targettoken)
+            i1 = int_add(i0, 1)
+            i2 = int_ge(i1, 10)
+            guard_false(i2) []
+            jump(i1, descr=targettoken)
+            ''', namespace={'targettoken': targettoken})
+            looptoken = JitCellToken()
+            looptoken.number = 17
+            self.cpu.compile_loop(ops.inputargs, ops.operations, looptoken)
+            self.cpu.execute_token(looptoken, 0)
+            self.cpu.finish_once()
+        finally:
+            jitlog.finish()
+            jitlog.__init__()
+        log = read_binlog(filename)
+        start, end = log.addrs[KIND_LOOP, 17]
+        assert looptoken._ll_function_addr <= start < end
+        assert log.counts['entry 17'] == 1
+        assert log.counts[targettoken.repr_of_descr()] == 10
@@ -1,8 +1,9 @@
 import weakref
 from rpython.rtyper.lltypesystem import lltype, llmemory
 from rpython.rtyper.annlowlevel import cast_instance_to_gcref
-from rpython.rlib.objectmodel import we_are_translated
-from rpython.rlib.debug import debug_start, debug_stop, debug_print
+from rpython.rlib.objectmodel import we_are_translated, compute_unique_id
+from rpython.rlib.debug import (debug_start, debug_stop, debug_print,
+    have_debug_prints)
 from rpython.rlib.rarithmetic import r_uint, intmask
 from rpython.rlib import rstack
 from rpython.rlib.jit import JitDebugInfo, Counters, dont_look_inside
@@ -15,7 +16,8 @@ from rpython.jit.metainterp.history import (TreeLoop, Box, JitCellToken,
 from rpython.jit.metainterp import history, jitexc
 from rpython.jit.metainterp.optimize import InvalidLoop
 from rpython.jit.metainterp.inliner import Inliner
-from rpython.jit.metainterp.resume import NUMBERING, PENDINGFIELDSP, ResumeDataDirectReader
+from rpython.jit.metainterp.resume import (NUMBERING, PENDINGFIELDSP,
+    ResumeDataDirectReader, ResumeDataSize)
 from rpython.jit.codewriter import heaptracker, longlong
 
 
@@ -362,6 +364,7 @@ def send_loop_to_backend(greenkey, jitdriver_sd, metainterp_sd, loop, type):
     metainterp_sd.logger_ops.log_loop(loop.inputargs, loop.operations, n,
                                       type, ops_offset,
                                       name=loopname)
+    log_resume_data_size(loop.operations, n, -1)
     #
     if metainterp_sd.warmrunnerdesc is not None:    # for tests
         metainterp_sd.warmrunnerdesc.memory_manager.keep_loop_alive(original_jitcell_token)
@@ -404,11 +407,29 @@ def send_bridge_to_backend(jitdriver_sd, metainterp_sd, faildescr, inputargs,
         ops_offset = None
     metainterp_sd.logger_ops.log_bridge(inputargs, operations, None, faildescr,
                                         ops_offset)
+    log_resume_data_size(operations, original_loop_token.number,
+                         compute_unique_id(faildescr))
     #
     #if metainterp_sd.warmrunnerdesc is not None:    # for tests
     #    metainterp_sd.warmrunnerdesc.memory_manager.keep_loop_alive(
     #        original_loop_token)
 
+def log_resume_data_size(operations, loop_number, guard_number):
+    # see rpython/jit/tool/resumesize.py
+    debug_start("jit-resume-size")
+    if have_debug_prints():
+        size = ResumeDataSize()
+        for op in operations:
+            descr = op.getdescr()
+            if op.is_guard() and isinstance(descr, ResumeGuardDescr):
+                size.add_storage(descr)
+        if guard_number == -1:
+            debug_print("loop", loop_number)
+        else:
+            debug_print("bridge", guard_number, "of loop", loop_number)
+        size.debug_prints()
+    debug_stop("jit-resume-size")
+
 # ____________________________________________________________
 
 class _DoneWithThisFrameDescr(AbstractFailDescr):
@@ -494,6 +515,15 @@ class ResumeGuardDescr(ResumeDescr):
     rd_pendingfields = lltype.nullptr(PENDINGFIELDSP.TO)
 
     status = r_uint(0)
+    # the number of failures without a bridge, only counted when enabled
+    # by jit_hooks.stats_set_debug(), see count_guard_failure() in pyjitpl
+    failure_count = 0
+    # the state of the deferred bridge of this guard, see PendingBridge
+    deferred_bridge = 0
+
+    DB_NONE         = 0        # no deferred bridge
+    DB_PENDING      = 1        # traced, waits for compile_pending_bridges()
+    DB_FAILED       = 2        # could not be compiled: don't defer it again
 
     ST_BUSY_FLAG    = 0x01     # if set, busy tracing from the guard
     ST_TYPE_MASK    = 0x06     # mask for the type (TY_xxx)
@@ -535,7 +565,9 @@ class ResumeGuardDescr(ResumeDescr):
             self.status = ty | (r_uint(i) << self.ST_SHIFT)
 
     def handle_fail(self, deadframe, metainterp_sd, jitdriver_sd):
-        if self.must_compile(deadframe, metainterp_sd, jitdriver_sd):
+        metainterp_sd.globaldata.count_guard_failure(self)
+        if (self.must_compile(deadframe, metainterp_sd, jitdriver_sd) and
+                not compile_if_pending(metainterp_sd, self)):
             self.start_compiling()
             try:
                 self._trace_and_compile_from_bridge(deadframe, metainterp_sd,
@@ -623,12 +655,17 @@ class ResumeGuardDescr(ResumeDescr):
         # We managed to create a bridge.  Attach the new operations
         # to the corresponding guard_op and compile from there
         assert metainterp.resumekey_original_loop_token is not None
-        new_loop.original_jitcell_token = metainterp.resumekey_original_loop_token
-        inputargs = metainterp.history.inputargs
+        self.attach_bridge(metainterp.jitdriver_sd, metainterp.staticdata,
+                           metainterp.resumekey_original_loop_token,
+                           metainterp.history.inputargs, new_loop)
+
+    def attach_bridge(self, jitdriver_sd, metainterp_sd, original_loop_token,
+                      inputargs, new_loop):
+        new_loop.original_jitcell_token = original_loop_token
         if not we_are_translated():
             self._debug_suboperations = new_loop.operations
         propagate_original_jitcell_token(new_loop)
-        send_bridge_to_backend(metainterp.jitdriver_sd, metainterp.staticdata,
+        send_bridge_to_backend(jitdriver_sd, metainterp_sd,
                                self, inputargs, new_loop.operations,
                                new_loop.original_jitcell_token)
 
@@ -689,6 +726,7 @@ class ResumeGuardForcedDescr(ResumeGuardDescr):
         # the virtualrefs and virtualizable have been forced by
         # handle_async_forcing() just a moment ago.
         from rpython.jit.metainterp.blackhole import resume_in_blackhole
+        metainterp_sd.globaldata.count_guard_failure(self)
         hidden_all_virtuals = metainterp_sd.cpu.get_savedata_ref(deadframe)
         obj = AllVirtuals.show(metainterp_sd.cpu, hidden_all_virtuals)
         all_virtuals = obj.cache
@@ -810,6 +848,133 @@ def compile_trace(metainterp, resumekey):
         metainterp.retrace_needed(new_trace)
         return None
 
+# ____________________________________________________________
+#
+# Deferred bridges: with the 'defer_bridges' parameter, the trace of a
+# bridge that ends in a jump to an existing loop is only recorded when
+# the guard becomes hot; the tracing metainterp continues in the target
+# loop, and the guard keeps failing into the blackhole interpreter.  The
+# trace is optimized and sent to the backend later, by
+# compile_pending_bridges(), which can be called when the program is
+# idle or from a helper thread.  Until then the guard is not traced
+# again, and keeps failing into the blackhole interpreter however hot it
+# is.  At most max_pending_bridges traces wait: past that, the next
+# bridges are compiled directly, and so are the pending ones whose guard
+# is hot again if the parameter was lowered.  The backend attaches the
+# bridge to the guard only once it is completely written.
+
+class PendingBridge(object):
+    def __init__(self, resumekey, jitdriver_sd, original_loop_token,
+                 inputargs, operations, call_pure_results):
+        self.resumekey = resumekey
+        self.jitdriver_sd = jitdriver_sd
+        # keeps the loop alive until the bridge is attached
+        self.original_loop_token = original_loop_token
+        self.inputargs = inputargs
+        self.operations = operations
+        self.call_pure_results = call_pure_results
+
+    def compile(self, metainterp_sd):
+        from rpython.jit.metainterp.optimizeopt import optimize_trace
+
+        resumekey = self.resumekey
+        new_trace = TreeLoop(metainterp_sd.stats.name_for_new_loop())
+        new_trace.call_pure_results = self.call_pure_results
+        new_trace.inputargs = self.inputargs[:]
+        new_trace.operations = self.operations
+        state = self.jitdriver_sd.warmstate
+        inline_short_preamble = not isinstance(resumekey,
+                                               ResumeAtPositionDescr)
+        debug_start("jit-deferred-bridge")
+        try:
+            try:
+                optimize_trace(metainterp_sd, new_trace, state.enable_opts,
+                               inline_short_preamble)
+            except InvalidLoop:
+                debug_print("InvalidLoop in deferred bridge")
+                return False
+            if new_trace.operations[-1].getopnum() == rop.LABEL:
+                # would need a retrace, which needs the tracing metainterp
+                debug_print("deferred bridge needs a retrace")
+                return False
+            resumekey.attach_bridge(self.jitdriver_sd, metainterp_sd,
+                                    self.original_loop_token,
+                                    self.inputargs, new_trace)
+            record_loop_or_bridge(metainterp_sd, new_trace)
+            return True
+        finally:
+            debug_stop("jit-deferred-bridge")
+
+def must_defer_trace(metainterp, resumekey):
+    if not isinstance(resumekey, ResumeGuardDescr):
+        return False
+    if metainterp.partial_trace:
+        return False
+    warmrunnerdesc = metainterp.staticdata.warmrunnerdesc
+    if warmrunnerdesc is None:      # for tests
+        return False
+    globaldata = metainterp.staticdata.globaldata
+    max_pending = warmrunnerdesc.memory_manager.max_pending_bridges
+    if len(globaldata.pending_bridges) >= max_pending:
+        return False
+    # if a previous deferred attempt did not work, compile directly
+    return resumekey.deferred_bridge != ResumeGuardDescr.DB_FAILED
+
+def defer_trace(metainterp, resumekey):
+    """Record the bridge in the history, ending in a JUMP, to be compiled
+    later by compile_pending_bridges().
+    """
+    assert isinstance(resumekey, ResumeGuardDescr)
+    assert metainterp.resumekey_original_loop_token is not None
+    operations = [op.clone() for op in metainterp.history.operations]
+    pending = PendingBridge(resumekey, metainterp.jitdriver_sd,
+                            metainterp.resumekey_original_loop_token,
+                            metainterp.history.inputargs[:], operations,
+                            metainterp.call_pure_results)
+    metainterp.staticdata.globaldata.pending_bridges.append(pending)
+    resumekey.deferred_bridge = ResumeGuardDescr.DB_PENDING
+    debug_print("deferred the bridge from guard", compute_unique_id(resumekey))
+
+def _compile_pending_bridge(metainterp_sd, pending):
+    resumekey = pending.resumekey
+    if not pending.compile(metainterp_sd):
+        resumekey.deferred_bridge = ResumeGuardDescr.DB_FAILED
+        return False
+    resumekey.deferred_bridge = ResumeGuardDescr.DB_NONE
+    return True
+
+def compile_if_pending(metainterp_sd, resumekey):
+    """Called when 'resumekey' is hot: return True if its bridge is
+    already traced.  It is left for compile_pending_bridges(), unless
+    'defer_bridges' was lowered below the number of pending bridges since
+    then, in which case it is compiled now.  The current failure is still
+    handled by the blackhole interpreter.
+    """
+    if resumekey.deferred_bridge != ResumeGuardDescr.DB_PENDING:
+        return False
+    memory_manager = metainterp_sd.warmrunnerdesc.memory_manager
+    pending_bridges = metainterp_sd.globaldata.pending_bridges
+    if len(pending_bridges) > memory_manager.max_pending_bridges:
+        for i in range(len(pending_bridges)):
+            pending = pending_bridges[i]
+            if pending.resumekey is resumekey:
+                del pending_bridges[i]
+                _compile_pending_bridge(metainterp_sd, pending)
+                break
+    return True
+
+def compile_pending_bridges(metainterp_sd):
+    """Compile all the deferred bridges.  Returns the number of bridges
+    attached.
+    """
+    globaldata = metainterp_sd.globaldata
+    count = 0
+    while globaldata.pending_bridges:
+        pending = globaldata.pending_bridges.pop(0)
+        if _compile_pending_bridge(metainterp_sd, pending):
+            count += 1
+    return count
+
 # ____________________________________________________________
 
 memory_error = MemoryError()
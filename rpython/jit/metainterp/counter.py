@@ -136,6 +136,18 @@ class JitCounter:
             return True
     tick._always_inline_ = True
 
+    def change_current_fraction(self, hash, new_fraction):
+        """Change the value stored for 'hash' to be the given 'new_fraction',
+        which should be a float between 0.0 and 1.0.  If it is 1.0, the
+        next tick() will reach the bound."""
+        p_entry = self.timetable[self._get_index(hash)]
+        subhash = self._get_subhash(hash)
+        if p_entry.subhashes[0] == subhash:
+            n = 0
+        else:
+            n = self._tick_slowpath(p_entry, subhash)
+        p_entry.times[n] = r_singlefloat(new_fraction)
+
     def reset(self, hash):
         p_entry = self.timetable[self._get_index(hash)]
         subhash = self._get_subhash(hash)
@@ -348,6 +348,8 @@ def _make_execute_list():
                          rop.LABEL,
                          ):      # list of opcodes never executed by pyjitpl
                 continue
+            if rop._VEC_FIRST <= value <= rop._VEC_LAST:
+                continue    # only produced by optimizeopt/vectorize.py
             raise AssertionError("missing %r" % (key,))
     return execute_by_num_args
 
@@ -0,0 +1,256 @@
+""" A binary log of the JIT, enabled with PYPYJITLOG=filename.
+
+It contains the same information as the 'jit-log-*', 'jit-backend-addr'
+and 'jit-backend-counts' sections of PYPYLOG, but it is much smaller and
+much faster to read: see rpython/tool/jitlogparser/binlog.py.
+
+The file starts with the header 'JITLOG' followed by a version byte, and
+continues with records.  Every record is a tag byte, the length of the
+payload and the payload, so that a reader can skip the records it is not
+interested in.  Numbers are encoded as variable-length integers (7 bits
+per byte, zigzag for signed numbers), and strings as a length followed by
+the bytes.  Strings that are likely to repeat (arguments, descrs,
+locations) are interned: the first time a string is used, a STRING
+record gives its number.
+
+    STRING       number string
+    OPNAMES      count (opnum name)*count
+    TRACE        stage kind number type_id name_id nargs arg_id* nops op*
+                 -- 'kind' is KIND_LOOP or KIND_BRIDGE; 'number' is the loop
+                 -- number (-1 before optimization), or the number of the
+                 -- guard for bridges; 'type_id' and 'name_id' are the loop
+                 -- type ('loop', 'entry bridge'...) and location
+    ASM_ADDR     kind number start end
+    ENTRY_COUNT  type number count
+                 -- 'type' is 'l', 'b' or 'e' like the counters of the
+                 -- backend; 'number' is the TargetToken, the guard or the
+                 -- loop number
+
+and every op is:
+
+    opnum flags [offset] [result_id] nargs arg_id* [descr] [nfail fail_id*]
+
+where 'descr' is the number of the guard for guards, and the interned
+string of the descr otherwise (the location for debug_merge_points).
+"""
+
+import os
+
+from rpython.jit.metainterp.resoperation import rop, opname
+from rpython.rlib.objectmodel import compute_unique_id
+from rpython.rlib.rarithmetic import r_uint, intmask
+from rpython.rlib.rstring import StringBuilder
+
+VERSION = 1
+
+MARK_STRING = 'S'
+MARK_OPNAMES = 'O'
+MARK_TRACE = 'T'
+MARK_ASM_ADDR = 'A'
+MARK_ENTRY_COUNT = 'C'
+
+STAGE_NOOPT = 0
+STAGE_OPT = 1
+STAGE_ASM = 2
+
+KIND_LOOP = 0
+KIND_BRIDGE = 1
+
+FLAG_OFFSET = 1
+FLAG_RESULT = 2
+FLAG_DESCR = 4
+FLAG_GUARD = 8
+FLAG_FAILARGS = 16
+
+FLUSH_SIZE = 65536
+
+
+def encode_uint(builder, value):
+    value = r_uint(value)
+    while value >= 0x80:
+        builder.append(chr(intmask(value & 0x7f) | 0x80))
+        value >>= 7
+    builder.append(chr(intmask(value)))
+
+def encode_int(builder, value):
+    # zigzag encoding: 0, -1, 1, -2, 2... become 0, 1, 2, 3, 4...
+    encode_uint(builder, (r_uint(value) << 1) ^ r_uint(value >> (r_uint.BITS - 1)))
+
+def encode_str(builder, s):
+    encode_uint(builder, len(s))
+    builder.append(s)
+
+
+class JitLog(object):
+    def __init__(self):
+        self.fd = -1
+        self.setup_done = False
+        self.builder = None
+        self.strings = {}
+
+    def _cleanup_(self):
+        # the file is opened at run-time, according to the environment
+        self.__init__()
+
+    def setup(self):
+        self.setup_done = True
+        filename = os.environ.get('PYPYJITLOG')
+        if filename:
+            self.open(filename)
+
+    def open(self, filename):
+        try:
+            self.fd = os.open(filename, os.O_WRONLY | os.O_CREAT |
+                              os.O_TRUNC, 0666)
+        except OSError:
+            os.write(2, "PYPYJITLOG: cannot open '%s'\n" % (filename,))
+            self.fd = -1
+            return
+        self.setup_done = True
+        self.builder = StringBuilder()
+        self.strings = {'': 0}
+        self.builder.append('JITLOG')
+        self.builder.append(chr(VERSION))
+        payload = StringBuilder()
+        names = opname.items()
+        encode_uint(payload, len(names))
+        for opnum, name in names:
+            encode_uint(payload, opnum)
+            encode_str(payload, name.lower())
+        self._record(MARK_OPNAMES, payload.build())
+
+    def is_enabled(self):
+        if not self.setup_done:
+            self.setup()
+        return self.fd >= 0
+
+    def _record(self, mark, payload):
+        builder = self.builder
+        builder.append(mark)
+        encode_uint(builder, len(payload))
+        builder.append(payload)
+        if builder.getlength() > FLUSH_SIZE:
+            self.flush()
+
+    def flush(self):
+        if self.fd < 0:
+            return
+        data = self.builder.build()
+        self.builder = StringBuilder()
+        while data:
+            try:
+                count = os.write(self.fd, data)
+            except OSError:
+                os.close(self.fd)
+                self.fd = -1
+                return
+            data = data[count:]
+
+    def finish(self):
+        if self.fd >= 0:
+            self.flush()
+            os.close(self.fd)
+            self.fd = -1
+
+    def intern(self, s):
+        try:
+            return self.strings[s]
+        except KeyError:
+            number = len(self.strings)
+            self.strings[s] = number
+            payload = StringBuilder()
+            encode_uint(payload, number)
+            encode_str(payload, s)
+            self._record(MARK_STRING, payload.build())
+            return number
+
+    # ____________________________________________________________
+
+    def log_trace(self, logops, stage, kind, number, type, name, inputargs,
+                  operations, ops_offset):
+        """'logops' is a LogOperations, used for the names of the boxes."""
+        payload = StringBuilder()
+        payload.append(chr(stage))
+        payload.append(chr(kind))
+        encode_int(payload, number)
+        encode_uint(payload, self.intern(type))
+        encode_uint(payload, self.intern(name))
+        if inputargs is None:
+            inputargs = []
+        encode_uint(payload, len(inputargs))
+        for arg in inputargs:
+            encode_uint(payload, self.intern(logops.repr_of_arg(arg)))
+        encode_uint(payload, len(operations))
+        for op in operations:
+            self._encode_op(payload, logops, op, ops_offset)
+        self._record(MARK_TRACE, payload.build())
+
+    def _encode_op(self, payload, logops, op, ops_offset):
+        opnum = op.getopnum()
+        flags = 0
+        offset = -1
+        if ops_offset is not None:
+            offset = ops_offset.get(op, -1)
+            if offset != -1:
+                flags |= FLAG_OFFSET
+        if op.result is not None:
+            flags |= FLAG_RESULT
+        descr = op.getdescr()
+        is_guard = op.is_guard()
+        if opnum == rop.DEBUG_MERGE_POINT:
+            flags |= FLAG_DESCR
+        elif descr is not None:
+            if is_guard:
+                flags |= FLAG_GUARD
+            else:
+                flags |= FLAG_DESCR
+        if is_guard and op.getfailargs() is not None:
+            flags |= FLAG_FAILARGS
+        encode_uint(payload, opnum)
+        payload.append(chr(flags))
+        if flags & FLAG_OFFSET:
+            encode_uint(payload, offset)
+        if opnum == rop.DEBUG_MERGE_POINT:
+            # the jitdriver index and the greenkey are replaced with the
+            # location, like in the text log
+            encode_uint(payload, 2)
+            encode_uint(payload, self.intern(str(op.getarg(1).getint())))
+            encode_uint(payload, self.intern(str(op.getarg(2).getint())))
+            jd_sd = logops.metainterp_sd.jitdrivers_sd[op.getarg(0).getint()]
+            location = jd_sd.warmstate.get_location_str(op.getarglist()[3:])
+            encode_uint(payload, self.intern(location))
+            return
+        # the boxes are numbered in the same order as in the text log
+        args = [self.intern(logops.repr_of_arg(op.getarg(i)))
+                for i in range(op.numargs())]
+        if flags & FLAG_RESULT:
+            encode_uint(payload, self.intern(logops.repr_of_arg(op.result)))
+        encode_uint(payload, len(args))
+        for arg in args:
+            encode_uint(payload, arg)
+        if flags & FLAG_GUARD:
+            encode_int(payload, compute_unique_id(descr))
+        elif flags & FLAG_DESCR:
+            encode_uint(payload, self.intern(logops.repr_of_descr(descr)))
+        if flags & FLAG_FAILARGS:
+            failargs = op.getfailargs()
+            encode_uint(payload, len(failargs))
+            for arg in failargs:
+                encode_uint(payload, self.intern(logops.repr_of_arg(arg)))
+
+    def log_asm_addr(self, kind, number, start, end):
+        payload = StringBuilder()
+        payload.append(chr(kind))
+        encode_int(payload, number)
+        encode_uint(payload, start)
+        encode_uint(payload, end)
+        self._record(MARK_ASM_ADDR, payload.build())
+
+    def log_entry_count(self, type, number, count):
+        payload = StringBuilder()
+        payload.append(type)
+        encode_int(payload, number)
+        encode_uint(payload, count)
+        self._record(MARK_ENTRY_COUNT, payload.build())
+
+jitlog = JitLog()
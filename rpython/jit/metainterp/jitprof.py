@@ -46,6 +46,9 @@ class EmptyProfiler(BaseProfiler):
     def get_counter(self, num):
         return -1.0
 
+    def get_current_event(self):
+        return -1
+
 class Profiler(BaseProfiler):
     initialized = False
     timer = time.time
@@ -109,6 +112,11 @@ class Profiler(BaseProfiler):
             return self.cpu.tracker.total_freed_bridges
         return self.counters[num]
 
+    def get_current_event(self):
+        if self.current:
+            return self.current[-1]
+        return -1
+
     def count_ops(self, opnum, kind=Counters.OPS):
         from rpython.jit.metainterp.resoperation import rop
         self.counters[kind] += 1
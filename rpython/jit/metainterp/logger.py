@@ -1,6 +1,7 @@
 from rpython.jit.metainterp.history import (ConstInt, BoxInt, ConstFloat,
     BoxFloat, TargetToken)
 from rpython.jit.metainterp.resoperation import rop
+from rpython.jit.metainterp import jitlog
 from rpython.rlib.debug import (have_debug_prints, debug_start, debug_stop,
     debug_print)
 from rpython.rlib.objectmodel import we_are_translated, compute_unique_id
@@ -12,7 +13,22 @@ class Logger(object):
         self.metainterp_sd = metainterp_sd
         self.guard_number = guard_number
 
-    def log_loop(self, inputargs, operations, number=0, type=None, ops_offset=None, name=''):
+    def log_loop(self, inputargs, operations, number=0, type=None, ops_offset=None, name='',
+                 looptoken_number=-1):
+        # 'looptoken_number' is only used by the binary log, for the
+        # "rewritten" loops which are not numbered in the text log
+        if jitlog.jitlog.is_enabled() and number != -2:
+            if type is None:
+                stage = jitlog.STAGE_NOOPT
+                number = -1     # not numbered yet
+            elif type == "rewritten":
+                stage = jitlog.STAGE_ASM
+                number = looptoken_number
+            else:
+                stage = jitlog.STAGE_OPT
+            jitlog.jitlog.log_trace(self._make_log_operations(), stage,
+                                    jitlog.KIND_LOOP, number, type or '',
+                                    name, inputargs, operations, ops_offset)
         if type is None:
             debug_start("jit-log-noopt-loop")
             logops = self._log_operations(inputargs, operations, ops_offset)
@@ -35,6 +51,18 @@ class Logger(object):
 
     def log_bridge(self, inputargs, operations, extra=None,
                    descr=None, ops_offset=None):
+        if (jitlog.jitlog.is_enabled() and descr is not None and
+                extra != "compiling"):
+            if extra == "noopt":
+                stage = jitlog.STAGE_NOOPT
+            elif extra == "rewritten":
+                stage = jitlog.STAGE_ASM
+            else:
+                stage = jitlog.STAGE_OPT
+            jitlog.jitlog.log_trace(self._make_log_operations(), stage,
+                                    jitlog.KIND_BRIDGE,
+                                    compute_unique_id(descr), '', '',
+                                    inputargs, operations, ops_offset)
         if extra == "noopt":
             debug_start("jit-log-noopt-bridge")
             logops = self._log_operations(inputargs, operations, ops_offset)
@@ -1,7 +1,9 @@
 import math
+import weakref
 from rpython.rlib.rarithmetic import r_int64
 from rpython.rlib.debug import debug_start, debug_print, debug_stop
 from rpython.rlib.objectmodel import we_are_translated
+from rpython.rlib.listsort import make_timsort_class
 
 #
 # Logic to decide which loops are old and not used any more.
@@ -19,10 +21,28 @@ from rpython.rlib.objectmodel import we_are_translated
 # 'generation' field is much smaller than the current generation, and
 # removed from the set.
 #
+# Independently, if a limit is given to the size of the machine code
+# (the 'max_code_memory' parameter), then after each compilation which
+# leaves more than that in use, the loops that were least recently
+# entered are removed from 'alive_loops' until the code that they use
+# brings the total back to 3/4 of the limit.  Bridges are attached to
+# their loop, so they are freed together with it, and the freed blocks
+# go back to the AsmMemoryManager of the backend to be reused.
+#
+# The machine code of a loop removed from 'alive_loops' is only freed
+# when the GC collects its LoopToken, which may be much later.  Until
+# then it is still counted by cpu.get_code_memory_usage(): the loops
+# in 'pending_free' are weakrefs to those, whose code is subtracted
+# from the usage, so that they are not evicted again and again.
+#
+
+TokenSort = make_timsort_class(lt=lambda a, b: a.generation < b.generation)
+
 
 class MemoryManager(object):
 
-    def __init__(self):
+    def __init__(self, cpu=None):
+        self.cpu = cpu
         self.check_frequency = -1
         # NB. use of r_int64 to be extremely far on the safe side:
         # this is increasing by one after each loop or bridge is
@@ -38,6 +58,10 @@ class MemoryManager(object):
         self.current_generation = r_int64(1)
         self.next_check = r_int64(-1)
         self.alive_loops = {}
+        self.max_code_memory = 0
+        self.evicted_loops = 0
+        self.pending_free = []
+        self.max_pending_bridges = 0
 
     def set_max_age(self, max_age, check_frequency=0):
         if max_age <= 0:
@@ -54,6 +78,47 @@ class MemoryManager(object):
         if self.current_generation == self.next_check:
             self._kill_old_loops_now()
             self.next_check = self.current_generation + self.check_frequency
+        if self.max_code_memory > 0:
+            used = self.get_code_memory_usage()
+            if used > self.max_code_memory:
+                self._evict_loops_now(used)
+
+    def set_max_code_memory(self, max_code_memory):
+        if max_code_memory <= 0:
+            self.max_code_memory = 0
+        else:
+            self.max_code_memory = max_code_memory
+
+    def get_code_memory_usage(self):
+        if self.cpu is None:
+            return 0
+        return self.cpu.get_code_memory_usage() - self._get_pending_free()
+
+    def _get_pending_free(self):
+        # the code of the loops removed from 'alive_loops' but not freed
+        # yet; forget the ones that were freed, or that are alive again
+        total = 0
+        pending_free = []
+        for ref in self.pending_free:
+            looptoken = ref()
+            if looptoken is not None and looptoken not in self.alive_loops:
+                size = self.get_code_size(looptoken)
+                if size > 0:
+                    total += size
+                    pending_free.append(ref)
+        self.pending_free = pending_free
+        return total
+
+    def _remove_loop(self, looptoken):
+        del self.alive_loops[looptoken]
+        if self.max_code_memory > 0:
+            self.pending_free.append(weakref.ref(looptoken))
+
+    def get_code_size(self, looptoken):
+        compiled_loop_token = looptoken.compiled_loop_token
+        if compiled_loop_token is None:
+            return 0
+        return compiled_loop_token.get_code_size()
 
     def keep_loop_alive(self, looptoken):
         if looptoken.generation != self.current_generation:
@@ -70,7 +135,7 @@ class MemoryManager(object):
         for looptoken in self.alive_loops.keys():
             if (0 <= looptoken.generation < max_generation or
                 looptoken.invalidated):
-                del self.alive_loops[looptoken]
+                self._remove_loop(looptoken)
         newtotal = len(self.alive_loops)
         debug_print("Loop tokens freed: ", oldtotal - newtotal)
         debug_print("Loop tokens left:  ", newtotal)
@@ -81,3 +146,36 @@ class MemoryManager(object):
             # a single one is not enough for all tests :-(
             rgc.collect(); rgc.collect(); rgc.collect()
         debug_stop("jit-mem-collect")
+
+    def _evict_loops_now(self, used):
+        debug_start("jit-mem-evict")
+        debug_print("Code memory used: ", used)
+        debug_print("Code memory limit:", self.max_code_memory)
+        oldtotal = len(self.alive_loops)
+        to_free = used - (self.max_code_memory - self.max_code_memory // 4)
+        # the loops entered or compiled since the previous generation
+        # are never evicted: they are the ones in use right now
+        min_generation = self.current_generation - 1
+        tokens = []
+        for looptoken in self.alive_loops.keys():
+            if looptoken.invalidated:
+                to_free -= self.get_code_size(looptoken)
+                self._remove_loop(looptoken)
+            elif looptoken.generation < min_generation:
+                tokens.append(looptoken)
+        TokenSort(tokens).sort()
+        for looptoken in tokens:
+            if to_free <= 0:
+                break
+            to_free -= self.get_code_size(looptoken)
+            self._remove_loop(looptoken)
+        newtotal = len(self.alive_loops)
+        self.evicted_loops += oldtotal - newtotal
+        debug_print("Loop tokens evicted:", oldtotal - newtotal)
+        debug_print("Loop tokens left:   ", newtotal)
+        if not we_are_translated() and oldtotal != newtotal:
+            looptoken = None
+            tokens = None
+            from rpython.rlib import rgc
+            rgc.collect(); rgc.collect(); rgc.collect()
+        debug_stop("jit-mem-evict")
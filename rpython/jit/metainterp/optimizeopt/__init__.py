@@ -8,6 +8,7 @@ from rpython.jit.metainterp.optimizeopt.unroll import optimize_unroll
 from rpython.jit.metainterp.optimizeopt.simplify import OptSimplify
 from rpython.jit.metainterp.optimizeopt.pure import OptPure
 from rpython.jit.metainterp.optimizeopt.earlyforce import OptEarlyForce
+from rpython.jit.metainterp.optimizeopt.vectorize import vectorize_operations
 from rpython.rlib.jit import PARAMETERS, ENABLE_ALL_OPTS
 from rpython.rlib.unroll import unrolling_iterable
 from rpython.rlib.debug import debug_start, debug_stop, debug_print
@@ -24,6 +25,9 @@ ALL_OPTS = [('intbounds', OptIntBounds),
 # no direct instantiation of unroll
 unroll_all_opts = unrolling_iterable(ALL_OPTS)
 
+# not part of 'all': they must be asked for explicitly, e.g. 'all:vec'
+EXTRA_OPTS = ['vec']
+
 ALL_OPTS_DICT = dict.fromkeys([name for name, _ in ALL_OPTS])
 ALL_OPTS_LIST = [name for name, _ in ALL_OPTS]
 ALL_OPTS_NAMES = ':'.join([name for name, _ in ALL_OPTS])
@@ -61,6 +65,9 @@ def optimize_trace(metainterp_sd, loop, enable_opts, inline_short_preamble=True)
         else:
             optimizer = Optimizer(metainterp_sd, loop, optimizations)
             optimizer.propagate_all_forward()
+        if 'vec' in enable_opts and metainterp_sd.cpu.supports_vector_ops:
+            loop.operations = vectorize_operations(metainterp_sd.cpu,
+                                                   loop.operations)
     finally:
         debug_stop("jit-optimize")
 
@@ -0,0 +1,104 @@
+from rpython.jit.metainterp.optimizeopt.test.test_util import (
+    LLtypeMixin, BaseTest)
+from rpython.jit.metainterp.optimizeopt.vectorize import vectorize_operations
+
+
+class BaseTestVectorize(BaseTest):
+
+    def vectorize(self, ops, expected):
+        loop = self.parse(ops)
+        loop.operations = vectorize_operations(self.cpu, loop.operations)
+        self.assert_equal(loop, self.parse(expected))
+
+    def test_float_add(self):
+        ops = """
+        [i0, i1, i2, i3]
+        f0 = raw_load(i0, i3, descr=rawarraydescr_float)
+        f1 = raw_load(i1, i3, descr=rawarraydescr_float)
+        f2 = float_add(f0, f1)
+        raw_store(i2, i3, f2, descr=rawarraydescr_float)
+        i4 = int_add(i3, 8)
+        f3 = raw_load(i0, i4, descr=rawarraydescr_float)
+        f4 = raw_load(i1, i4, descr=rawarraydescr_float)
+        f5 = float_add(f3, f4)
+        raw_store(i2, i4, f5, descr=rawarraydescr_float)
+        i5 = int_add(i3, 16)
+        jump(i0, i1, i2, i5)
+        """
+        expected = """
+        [i0, i1, i2, i3]
+        vec_float_add(i2, i3, i0, i3, i1, i3, descr=rawarraydescr_float)
+        i5 = int_add(i3, 16)
+        jump(i0, i1, i2, i5)
+        """
+        self.vectorize(ops, expected)
+
+    def test_same_load_and_different_offsets(self):
+        ops = """
+        [i0, i2, i3, i6]
+        i4 = int_add(i3, 8)
+        i10 = raw_load(i0, i3, descr=rawarraydescr)
+        i1 = int_mul(i10, 3)
+        i7 = int_add(i6, 8)
+        i11 = raw_load(i0, i3, descr=rawarraydescr)
+        i8 = int_sub(i11, i11)
+        raw_store(i2, i6, i8, descr=rawarraydescr)
+        i12 = raw_load(i0, i4, descr=rawarraydescr)
+        i9 = int_sub(i12, i12)
+        raw_store(i2, i7, i9, descr=rawarraydescr)
+        jump(i0, i2, i4, i7, i1)
+        """
+        expected = """
+        [i0, i2, i3, i6]
+        i4 = int_add(i3, 8)
+        i10 = raw_load(i0, i3, descr=rawarraydescr)
+        i1 = int_mul(i10, 3)
+        i7 = int_add(i6, 8)
+        vec_int_sub(i2, i6, i0, i3, i0, i3, descr=rawarraydescr)
+        jump(i0, i2, i4, i7, i1)
+        """
+        self.vectorize(ops, expected)
+
+    def test_not_vectorized(self):
+        ops_template = """
+        [i0, i1, i2, i3]
+        f0 = raw_load(i0, i3, descr=rawarraydescr_float)
+        f1 = raw_load(i1, i3, descr=rawarraydescr_float)
+        f2 = float_add(f0, f1)
+        raw_store(i2, i3, f2, descr=rawarraydescr_float)
+        i4 = int_add(i3, %d)
+        %s
+        f3 = raw_load(i0, i4, descr=rawarraydescr_float)
+        f4 = raw_load(%s, i4, descr=rawarraydescr_float)
+        f5 = %s(f3, f4)
+        raw_store(i2, i4, f5, descr=rawarraydescr_float)
+        jump(i0, i1, i2, i4, %s)
+        """
+        for args in [
+                (16, '', 'i1', 'float_add', 'i0'),   # not the next item
+                (8, '', 'i2', 'float_add', 'i0'),    # not the same array
+                (8, '', 'i1', 'float_sub', 'i0'),    # not the same operation
+                (8, '', 'i1', 'float_add', 'f0'),    # f0 used later
+                (8, 'guard_true(i3) []', 'i1', 'float_add', 'i0'),
+                (8, 'i7 = getfield_gc(i0, descr=valuedescr)', 'i1',
+                 'float_add', 'i0')]:
+            ops = ops_template % args
+            self.vectorize(ops, ops)
+
+    def test_item_too_small(self):
+        ops = """
+        [i0, i3]
+        i1 = raw_load(i0, i3, descr=rawarraydescr_char)
+        i2 = int_add(i1, i1)
+        raw_store(i0, i3, i2, descr=rawarraydescr_char)
+        i4 = int_add(i3, 1)
+        i5 = raw_load(i0, i4, descr=rawarraydescr_char)
+        i6 = int_add(i5, i5)
+        raw_store(i0, i4, i6, descr=rawarraydescr_char)
+        jump(i0, i4)
+        """
+        self.vectorize(ops, ops)
+
+
+class TestLLtype(BaseTestVectorize, LLtypeMixin):
+    pass
@@ -0,0 +1,246 @@
+""" Packing of pairs of operations on consecutive items of raw memory.
+
+This is not one of the optimizations of the chain: it runs on the result
+of the other ones, if 'vec' is in enable_opts and if the backend has
+supports_vector_ops.  It looks for groups of operations like
+
+    f1 = raw_load(p1, i1, descr=arraydescr)
+    f2 = raw_load(p2, i2, descr=arraydescr)
+    f3 = float_add(f1, f2)
+    raw_store(p3, i3, f3, descr=arraydescr)
+
+where f1, f2 and f3 are not used anywhere else, and for two such groups
+whose offsets differ by exactly the size of the item, like the ones of
+the unrolled loops of micronumpy, it replaces them with
+
+    vec_float_add(p3, i3, p1, i1, p2, i2, descr=arraydescr)
+
+The vec_* operations have the same effect as the two groups done one after
+the other; the backend checks that the memory does not overlap before
+using the packed instructions.
+"""
+
+from rpython.jit.metainterp.history import Const
+from rpython.jit.metainterp.resoperation import rop, ResOperation
+
+
+VECTORIZABLE = {
+    rop.FLOAT_ADD: rop.VEC_FLOAT_ADD,
+    rop.FLOAT_SUB: rop.VEC_FLOAT_SUB,
+    rop.FLOAT_MUL: rop.VEC_FLOAT_MUL,
+    rop.FLOAT_TRUEDIV: rop.VEC_FLOAT_TRUEDIV,
+    rop.INT_ADD: rop.VEC_INT_ADD,
+    rop.INT_SUB: rop.VEC_INT_SUB,
+    rop.INT_AND: rop.VEC_INT_AND,
+    rop.INT_OR: rop.VEC_INT_OR,
+    rop.INT_XOR: rop.VEC_INT_XOR,
+}
+
+ITEMSIZE = 8     # two items fill the 16 bytes of an SSE2 register
+
+
+class Group(object):
+    """raw_load, raw_load, operation, raw_store of one item."""
+
+    def __init__(self, load1, load2, op, store, positions):
+        self.load1 = load1
+        self.load2 = load2
+        self.op = op
+        self.store = store
+        self.positions = positions     # of the operations, sorted
+        self.paired = False
+
+    def first(self):
+        return self.positions[0]
+
+    def last(self):
+        return self.positions[-1]
+
+
+class Vectorizer(object):
+
+    def __init__(self, cpu, operations):
+        self.cpu = cpu
+        self.operations = operations
+        self.uses = {}
+        self.producers = {}
+        self.linear = {}       # box -> (box, constant)
+
+    def count_uses(self, box):
+        if box is not None:
+            self.uses[box] = self.uses.get(box, 0) + 1
+
+    def scan(self):
+        for i in range(len(self.operations)):
+            op = self.operations[i]
+            for arg in op.getarglist():
+                self.count_uses(arg)
+            if op.is_guard():
+                for arg in op.getfailargs():
+                    self.count_uses(arg)
+            if op.result is not None:
+                self.producers[op.result] = i
+                self.record_linear(op)
+
+    def record_linear(self, op):
+        opnum = op.getopnum()
+        if opnum == rop.INT_ADD or opnum == rop.INT_SUB:
+            arg0 = op.getarg(0)
+            arg1 = op.getarg(1)
+            if isinstance(arg1, Const):
+                root, c = self.get_linear(arg0)
+                if opnum == rop.INT_ADD:
+                    self.linear[op.result] = (root, c + arg1.getint())
+                else:
+                    self.linear[op.result] = (root, c - arg1.getint())
+            elif isinstance(arg0, Const) and opnum == rop.INT_ADD:
+                root, c = self.get_linear(arg1)
+                self.linear[op.result] = (root, c + arg0.getint())
+
+    def get_linear(self, box):
+        if isinstance(box, Const):
+            return None, box.getint()
+        return self.linear.get(box, (box, 0))
+
+    def is_next_offset(self, ofs1, ofs2):
+        root1, c1 = self.get_linear(ofs1)
+        root2, c2 = self.get_linear(ofs2)
+        return root1 is root2 and c2 - c1 == ITEMSIZE
+
+    def get_load(self, box, descr):
+        i = self.producers.get(box, -1)
+        if i < 0:
+            return -1
+        op = self.operations[i]
+        if op.getopnum() != rop.RAW_LOAD or op.getdescr() is not descr:
+            return -1
+        return i
+
+    def find_group(self, i):
+        store = self.operations[i]
+        descr = store.getdescr()
+        value = store.getarg(2)
+        if self.uses.get(value, 0) != 1:
+            return None
+        j = self.producers.get(value, -1)
+        if j < 0:
+            return None
+        op = self.operations[j]
+        if op.getopnum() not in VECTORIZABLE:
+            return None
+        if self.cpu.unpack_arraydescr_size(descr)[1] != ITEMSIZE:
+            return None
+        arg0 = op.getarg(0)
+        arg1 = op.getarg(1)
+        k1 = self.get_load(arg0, descr)
+        k2 = self.get_load(arg1, descr)
+        if k1 < 0 or k2 < 0:
+            return None
+        if arg0 is arg1:
+            if self.uses[arg0] != 2:
+                return None
+            positions = [k1, j, i]
+        else:
+            if self.uses[arg0] != 1 or self.uses[arg1] != 1:
+                return None
+            positions = [k1, k2, j, i]
+            positions.sort()
+        return Group(self.operations[k1], self.operations[k2], op, store,
+                     positions)
+
+    def same_base(self, box1, box2):
+        if box1 is box2:
+            return True
+        return (isinstance(box1, Const) and isinstance(box2, Const) and
+                box1.same_constant(box2))
+
+    def can_pair(self, g1, g2):
+        if g1.op.getopnum() != g2.op.getopnum():
+            return False
+        if g1.store.getdescr() is not g2.store.getdescr():
+            return False
+        if (g1.load1 is g1.load2) != (g2.load1 is g2.load2):
+            return False
+        for op1, op2 in [(g1.store, g2.store), (g1.load1, g2.load1),
+                         (g1.load2, g2.load2)]:
+            if not self.same_base(op1.getarg(0), op2.getarg(0)):
+                return False
+            if not self.is_next_offset(op1.getarg(1), op2.getarg(1)):
+                return False
+        # the vec operation does the first group before the second one
+        if g1.last() > g2.first():
+            return False
+        # the operations of both groups are moved down to the store of
+        # the second one: nothing in-between may read or write memory, or
+        # be a guard
+        in_groups = {}
+        for pos in g1.positions + g2.positions:
+            in_groups[pos] = None
+        for pos in range(g1.first(), g2.last()):
+            if pos in in_groups:
+                continue
+            op = self.operations[pos]
+            if not op.is_always_pure() or op.is_guard():
+                return False
+        return True
+
+    def vectorize(self):
+        self.scan()
+        groups = []
+        for i in range(len(self.operations)):
+            if self.operations[i].getopnum() == rop.RAW_STORE:
+                group = self.find_group(i)
+                if group is not None:
+                    groups.append(group)
+        replaced = {}
+        for n in range(len(groups) - 1):
+            g1 = groups[n]
+            g2 = groups[n + 1]
+            if g1.paired:
+                continue
+            if not self.can_pair(g1, g2):
+                continue
+            g1.paired = g2.paired = True
+            for pos in g1.positions + g2.positions:
+                replaced[pos] = None
+            args = [g1.store.getarg(0), g1.store.getarg(1),
+                    g1.load1.getarg(0), g1.load1.getarg(1),
+                    g1.load2.getarg(0), g1.load2.getarg(1)]
+            replaced[g2.last()] = ResOperation(VECTORIZABLE[g1.op.getopnum()],
+                                               args, None,
+                                               descr=g1.store.getdescr())
+        if not replaced:
+            return self.operations
+        newoperations = []
+        for i in range(len(self.operations)):
+            if i in replaced:
+                if replaced[i] is not None:
+                    newoperations.append(replaced[i])
+            else:
+                newoperations.append(self.operations[i])
+        return remove_dead_operations(newoperations)
+
+
+def remove_dead_operations(operations):
+    # the offsets of the second items are usually not needed any more
+    used = {}
+    newoperations = []
+    for i in range(len(operations) - 1, -1, -1):
+        op = operations[i]
+        if (op.result is not None and op.result not in used and
+                op.is_always_pure()):
+            continue
+        for arg in op.getarglist():
+            used[arg] = None
+        if op.is_guard():
+            for arg in op.getfailargs():
+                if arg is not None:
+                    used[arg] = None
+        newoperations.append(op)
+    newoperations.reverse()
+    return newoperations
+
+
+def vectorize_operations(cpu, operations):
+    """Return the list of operations with the vec_* operations."""
+    return Vectorizer(cpu, operations).vectorize()
@@ -1,4 +1,5 @@
 import sys
+import weakref
 
 import py
 
@@ -1638,6 +1639,52 @@ class MetaInterpGlobalData(object):
         self.indirectcall_dict = None
         self.addr2name = None
         self.loopnumbering = 0
+        # weakrefs to the descrs of the guards that failed without having
+        # a bridge, which count their failures in 'failure_count'.  Only
+        # enabled by jit_hooks.stats_set_debug(), like the counters of the
+        # backend.  The dead ones are dropped when the list gets too long.
+        self.guard_failures = None
+        self.guard_failures_limit = 0
+        # the bridges traced but not compiled yet, if 'defer_bridges' is
+        # set (see compile.PendingBridge)
+        self.pending_bridges = []
+        # the warmstate.AbortStats of the greenkeys whose tracing was
+        # aborted, or whose inlining was disabled, most recent last; see
+        # warmstate.remember_abort_stats()
+        self.abort_stats = []
+
+    def set_count_guard_failures(self, flag):
+        if not flag:
+            for descr in self.get_failed_guards():
+                descr.failure_count = 0
+            self.guard_failures = None
+        elif self.guard_failures is None:
+            self.guard_failures = []
+            self.guard_failures_limit = 64
+
+    def count_guard_failure(self, descr):
+        if self.guard_failures is not None:
+            if descr.failure_count == 0:
+                if len(self.guard_failures) >= self.guard_failures_limit:
+                    alive = len(self.get_failed_guards())
+                    self.guard_failures_limit = max(64, alive * 2)
+                self.guard_failures.append(weakref.ref(descr))
+            descr.failure_count += 1
+
+    def get_failed_guards(self):
+        """The descrs still alive of the guards counted by
+        count_guard_failure()."""
+        if self.guard_failures is None:
+            return []
+        descrs = []
+        alive = []
+        for ref in self.guard_failures:
+            descr = ref()
+            if descr is not None:
+                descrs.append(descr)
+                alive.append(ref)
+        self.guard_failures = alive
+        return descrs
 
 # ____________________________________________________________
 
@@ -1658,6 +1705,7 @@ class MetaInterp(object):
         self.forced_virtualizable = None
         self.partial_trace = None
         self.retracing_from = -1
+        self.disabled_inlining = False
         self.call_pure_results = args_dict()
         self.heapcache = HeapCache()
 
@@ -1970,6 +2018,9 @@ class MetaInterp(object):
             greenkey = None # we're in the bridge
         else:
             greenkey = self.current_merge_points[0][0][:jd_sd.num_green_args]
+            jd_sd.warmstate.record_abort(greenkey, reason,
+                                         len(self.history.operations),
+                                         self.disabled_inlining)
             self.staticdata.warmrunnerdesc.hooks.on_abort(reason,
                                                           jd_sd.jitdriver,
                                                           greenkey,
@@ -1987,6 +2038,7 @@ class MetaInterp(object):
             if greenkey_of_huge_function is not None:
                 warmrunnerstate.disable_noninlinable_function(
                     greenkey_of_huge_function)
+                self.disabled_inlining = True
             raise SwitchToBlackhole(Counters.ABORT_TOO_LONG)
 
     def _interpret(self):
@@ -2319,10 +2371,21 @@ class MetaInterp(object):
 
         self.history.record(rop.JUMP, live_arg_boxes[num_green_args:], None,
                             descr=target_jitcell_token)
+        deferred = False
         try:
-            target_token = compile.compile_trace(self, self.resumekey)
+            if compile.must_defer_trace(self, self.resumekey):
+                compile.defer_trace(self, self.resumekey)
+                deferred = True
+                target_token = None
+            else:
+                target_token = compile.compile_trace(self, self.resumekey)
         finally:
             self.history.operations.pop()     # remove the JUMP
+        if deferred:
+            # continue in the target loop; the guard is blackholed until
+            # the bridge is compiled
+            self.raise_continue_running_normally(live_arg_boxes,
+                                                 target_jitcell_token)
         if target_token is not None: # raise if it *worked* correctly
             assert isinstance(target_token, TargetToken)
             jitcell_token = target_token.targeting_jitcell_token
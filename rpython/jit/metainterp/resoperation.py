@@ -501,6 +501,20 @@ _oplist = [
     'SETINTERIORFIELD_GC/3d',
     'SETINTERIORFIELD_RAW/3d',    # right now, only used by tests
     'RAW_STORE/3d',
+    '_VEC_FIRST',
+    # [dstbase, dstofs, base1, ofs1, base2, ofs2]: like two raw_loads, the
+    # operation and a raw_store, done for the item at the given offsets and
+    # then for the next one.  Only produced by optimizeopt/vectorize.py.
+    'VEC_FLOAT_ADD/6d',
+    'VEC_FLOAT_SUB/6d',
+    'VEC_FLOAT_MUL/6d',
+    'VEC_FLOAT_TRUEDIV/6d',
+    'VEC_INT_ADD/6d',
+    'VEC_INT_SUB/6d',
+    'VEC_INT_AND/6d',
+    'VEC_INT_OR/6d',
+    'VEC_INT_XOR/6d',
+    '_VEC_LAST',
     'SETFIELD_GC/2d',
     'SETFIELD_RAW/2d',
     'STRSETITEM/3',
@@ -12,6 +12,8 @@ from rpython.rtyper import annlowlevel
 from rpython.rtyper.lltypesystem import lltype, llmemory, rffi, rstr
 from rpython.rtyper.lltypesystem.rclass import OBJECTPTR
 from rpython.jit.metainterp.walkvirtual import VirtualVisitor
+from rpython.jit.metainterp.resumecode import (NUMBERING, create_numbering,
+    unpack_numbering, numbering_equals)
 
 
 # Logic to encode the chain of frames and the state of the boxes at a
@@ -75,21 +77,8 @@ def capture_resumedata(framestack, virtualizable_boxes, virtualref_boxes,
         storage.rd_frame_info_list = None
         storage.rd_snapshot = Snapshot(None, boxes)
 
-#
-# The following is equivalent to the RPython-level declaration:
-#
-#     class Numbering: __slots__ = ['prev', 'nums']
-#
-# except that it is more compact in translated programs, because the
-# array 'nums' is inlined in the single NUMBERING object.  This is
-# important because this is often the biggest single consumer of memory
-# in a pypy-c-jit.
-#
-NUMBERINGP = lltype.Ptr(lltype.GcForwardReference())
-NUMBERING = lltype.GcStruct('Numbering',
-                            ('prev', NUMBERINGP),
-                            ('nums', lltype.Array(rffi.SHORT)))
-NUMBERINGP.TO.become(NUMBERING)
+# The numberings are often the biggest single consumer of memory in a
+# pypy-c-jit; see resumecode.py for their compact encoding.
 
 PENDINGFIELDSTRUCT = lltype.Struct('PendingField',
                                    ('lldescr', OBJECTPTR),
@@ -147,6 +136,8 @@ class ResumeDataLoopMemo(object):
         self.large_ints = {}
         self.refs = self.cpu.ts.new_ref_dict_2()
         self.numberings = {}
+        self.last_numbering = lltype.nullptr(NUMBERING)
+        self.last_virtuals = None
         self.cached_boxes = {}
         self.cached_virtuals = {}
 
@@ -200,7 +191,7 @@ class ResumeDataLoopMemo(object):
         n = len(liveboxes) - v
         boxes = snapshot.boxes
         length = len(boxes)
-        numb = lltype.malloc(NUMBERING, length)
+        nums = [UNASSIGNED] * length
         for i in range(length):
             box = boxes[i]
             value = optimizer.getvalue(box)
@@ -218,15 +209,21 @@ class ResumeDataLoopMemo(object):
                     tagged = tag(n, TAGBOX)
                     n += 1
                 liveboxes[box] = tagged
-            numb.nums[i] = tagged
+            nums[i] = tagged
         #
-        numb.prev = numb1
+        # consecutive guards in the same frame often have the same
+        # numbering, even if the snapshots are different: share it
+        numb = self.last_numbering
+        if not (numb and numb.prev == numb1 and numbering_equals(numb, nums)):
+            numb = create_numbering(nums, numb1)
+            self.last_numbering = numb
         self.numberings[snapshot] = numb, liveboxes, v
         return numb, liveboxes.copy(), v
 
     def forget_numberings(self, virtualbox):
         # XXX ideally clear only the affected numberings
         self.numberings.clear()
+        self.last_numbering = lltype.nullptr(NUMBERING)
         self.clear_box_virtual_numbers()
 
     # caching for virtuals and boxes inside them
@@ -256,9 +253,22 @@ class ResumeDataLoopMemo(object):
             num = self.cached_virtuals[box] = -len(self.cached_virtuals) - 1
         return num
 
+    def share_virtuals(self, virtuals):
+        # consecutive guards often have the same virtuals: share the list
+        last = self.last_virtuals
+        if last is not None and len(last) == len(virtuals):
+            for i in range(len(virtuals)):
+                if last[i] is not virtuals[i]:
+                    break
+            else:
+                return last
+        self.last_virtuals = virtuals
+        return virtuals
+
     def clear_box_virtual_numbers(self):
         self.cached_boxes.clear()
         self.cached_virtuals.clear()
+        self.last_virtuals = None
 
     def update_counters(self, profiler):
         profiler.count(jitprof.Counters.NVIRTUALS, self.nvirtuals)
@@ -436,6 +446,7 @@ class ResumeDataVirtualAdder(VirtualVisitor):
                 if vinfo.fieldnums is not fieldnums:
                     memo.nvreused += 1
                 virtuals[num] = vinfo
+            storage.rd_virtuals = memo.share_virtuals(virtuals)
 
         if self._invalidation_needed(len(liveboxes), nholes):
             memo.clear_box_virtual_numbers()
@@ -803,6 +814,7 @@ class AbstractResumeDataReader(object):
     def _init(self, cpu, storage):
         self.cpu = cpu
         self.cur_numb = storage.rd_numb
+        self.cur_nums = None
         self.count = storage.rd_count
         self.consts = storage.rd_consts
 
@@ -815,7 +827,7 @@ class AbstractResumeDataReader(object):
         # Note that this may be called recursively; that's why the
         # allocate() methods must fill in the cache as soon as they
         # have the object, before they fill its fields.
-        assert self.virtuals_cache is not None
+        self._ensure_virtuals_cache()
         v = self.virtuals_cache.get_ptr(index)
         if not v:
             assert self.rd_virtuals is not None
@@ -824,7 +836,7 @@ class AbstractResumeDataReader(object):
         return v
 
     def getvirtual_int(self, index):
-        assert self.virtuals_cache is not None
+        self._ensure_virtuals_cache()
         v = self.virtuals_cache.get_int(index)
         if not v:
             v = self.rd_virtuals[index]
@@ -837,6 +849,7 @@ class AbstractResumeDataReader(object):
     def force_all_virtuals(self):
         rd_virtuals = self.rd_virtuals
         if rd_virtuals:
+            self._ensure_virtuals_cache()
             for i in range(len(rd_virtuals)):
                 rd_virtual = rd_virtuals[i]
                 if rd_virtual is not None:
@@ -851,12 +864,20 @@ class AbstractResumeDataReader(object):
     def _prepare_virtuals(self, virtuals):
         if virtuals:
             self.rd_virtuals = virtuals
+            # the cache is only made when the first virtual is needed:
+            # many guard failures only read boxes
+
+    def _ensure_virtuals_cache(self):
+        if self.virtuals_cache is None:
+            assert self.rd_virtuals is not None
+            length = len(self.rd_virtuals)
             # XXX: this is suboptimal, because we are creating two lists, one
             # for REFs and one for INTs: but for each index, we are using
             # either one or the other, so we should think of a way to
             # "compact" them
-            self.virtuals_cache = self.VirtualCache([self.virtual_ptr_default] * len(virtuals),
-                                                    [self.virtual_int_default] * len(virtuals))
+            self.virtuals_cache = self.VirtualCache(
+                [self.virtual_ptr_default] * length,
+                [self.virtual_int_default] * length)
 
     def _prepare_pendingfields(self, pendingfields):
         if pendingfields:
@@ -890,17 +911,23 @@ class AbstractResumeDataReader(object):
                             self._callback_f,
                             self.unique_id)    # <-- annotation hack
         self.cur_numb = self.cur_numb.prev
+        self.cur_nums = None
+
+    def _get_cur_nums(self):
+        if self.cur_nums is None:
+            self.cur_nums = unpack_numbering(self.cur_numb)
+        return self.cur_nums
 
     def _callback_i(self, index, register_index):
-        value = self.decode_int(self.cur_numb.nums[index])
+        value = self.decode_int(self._get_cur_nums()[index])
         self.write_an_int(register_index, value)
 
     def _callback_r(self, index, register_index):
-        value = self.decode_ref(self.cur_numb.nums[index])
+        value = self.decode_ref(self._get_cur_nums()[index])
         self.write_a_ref(register_index, value)
 
     def _callback_f(self, index, register_index):
-        value = self.decode_float(self.cur_numb.nums[index])
+        value = self.decode_float(self._get_cur_nums()[index])
         self.write_a_float(register_index, value)
 
 # ---------- when resuming for pyjitpl.py, make boxes ----------
@@ -941,36 +968,36 @@ class ResumeDataBoxReader(AbstractResumeDataReader):
         self.boxes_f = boxes_f
         self._prepare_next_section(info)
 
-    def consume_virtualizable_boxes(self, vinfo, numb):
+    def consume_virtualizable_boxes(self, vinfo, nums):
         # we have to ignore the initial part of 'nums' (containing vrefs),
         # find the virtualizable from nums[-1], and use it to know how many
         # boxes of which type we have to return.  This does not write
         # anything into the virtualizable.
-        index = len(numb.nums) - 1
-        virtualizablebox = self.decode_ref(numb.nums[index])
+        index = len(nums) - 1
+        virtualizablebox = self.decode_ref(nums[index])
         virtualizable = vinfo.unwrap_virtualizable_box(virtualizablebox)
-        return vinfo.load_list_of_boxes(virtualizable, self, numb)
+        return vinfo.load_list_of_boxes(virtualizable, self, nums)
 
-    def consume_virtualref_boxes(self, numb, end):
+    def consume_virtualref_boxes(self, nums, end):
         # Returns a list of boxes, assumed to be all BoxPtrs.
         # We leave up to the caller to call vrefinfo.continue_tracing().
         assert (end & 1) == 0
-        return [self.decode_ref(numb.nums[i]) for i in range(end)]
+        return [self.decode_ref(nums[i]) for i in range(end)]
 
     def consume_vref_and_vable_boxes(self, vinfo, ginfo):
-        numb = self.cur_numb
-        self.cur_numb = numb.prev
+        nums = unpack_numbering(self.cur_numb)
+        self.cur_numb = self.cur_numb.prev
         if vinfo is not None:
-            virtualizable_boxes = self.consume_virtualizable_boxes(vinfo, numb)
-            end = len(numb.nums) - len(virtualizable_boxes)
+            virtualizable_boxes = self.consume_virtualizable_boxes(vinfo, nums)
+            end = len(nums) - len(virtualizable_boxes)
         elif ginfo is not None:
-            index = len(numb.nums) - 1
-            virtualizable_boxes = [self.decode_ref(numb.nums[index])]
-            end = len(numb.nums) - 1
+            index = len(nums) - 1
+            virtualizable_boxes = [self.decode_ref(nums[index])]
+            end = len(nums) - 1
         else:
             virtualizable_boxes = None
-            end = len(numb.nums)
-        virtualref_boxes = self.consume_virtualref_boxes(numb, end)
+            end = len(nums)
+        virtualref_boxes = self.consume_virtualref_boxes(nums, end)
         return virtualizable_boxes, virtualref_boxes
 
     def allocate_with_vtable(self, known_class):
@@ -1247,7 +1274,7 @@ class ResumeDataDirectReader(AbstractResumeDataReader):
         info = blackholeinterp.get_current_position_info()
         self._prepare_next_section(info)
 
-    def consume_virtualref_info(self, vrefinfo, numb, end):
+    def consume_virtualref_info(self, vrefinfo, nums, end):
         # we have to decode a list of references containing pairs
         # [..., virtual, vref, ...]  stopping at 'end'
         if vrefinfo is None:
@@ -1255,22 +1282,22 @@ class ResumeDataDirectReader(AbstractResumeDataReader):
             return
         assert (end & 1) == 0
         for i in range(0, end, 2):
-            virtual = self.decode_ref(numb.nums[i])
-            vref = self.decode_ref(numb.nums[i + 1])
+            virtual = self.decode_ref(nums[i])
+            vref = self.decode_ref(nums[i + 1])
             # For each pair, we store the virtual inside the vref.
             vrefinfo.continue_tracing(vref, virtual)
 
-    def consume_vable_info(self, vinfo, numb):
+    def consume_vable_info(self, vinfo, nums):
         # we have to ignore the initial part of 'nums' (containing vrefs),
         # find the virtualizable from nums[-1], load all other values
         # from the CPU stack, and copy them into the virtualizable
         if vinfo is None:
-            return len(numb.nums)
-        index = len(numb.nums) - 1
-        virtualizable = self.decode_ref(numb.nums[index])
+            return len(nums)
+        index = len(nums) - 1
+        virtualizable = self.decode_ref(nums[index])
         # just reset the token, we'll force it later
         vinfo.reset_token_gcref(virtualizable)
-        return vinfo.write_from_resume_data_partial(virtualizable, self, numb)
+        return vinfo.write_from_resume_data_partial(virtualizable, self, nums)
 
     def load_value_of_type(self, TYPE, tagged):
         from rpython.jit.metainterp.warmstate import specialize_value
@@ -1290,10 +1317,11 @@ class ResumeDataDirectReader(AbstractResumeDataReader):
         numb = self.cur_numb
         self.cur_numb = numb.prev
         if self.resume_after_guard_not_forced != 2:
-            end_vref = self.consume_vable_info(vinfo, numb)
+            nums = unpack_numbering(numb)
+            end_vref = self.consume_vable_info(vinfo, nums)
             if ginfo is not None:
                 end_vref -= 1
-            self.consume_virtualref_info(vrefinfo, numb, end_vref)
+            self.consume_virtualref_info(vrefinfo, nums, end_vref)
 
     def allocate_with_vtable(self, known_class):
         from rpython.jit.metainterp.executor import exec_new_with_vtable
@@ -1456,3 +1484,68 @@ class ResumeDataDirectReader(AbstractResumeDataReader):
 
     def int_add_const(self, base, offset):
         return base + offset
+
+# ---------- estimated size of the resume data, for PYPYLOG ----------
+
+WORD = rarithmetic.LONG_BIT // 8
+
+def _round_up(size):
+    return (size + WORD - 1) & ~(WORD - 1)
+
+class ResumeDataSize(object):
+    """Estimate the memory used by the resume data of the guards of a
+    loop or bridge, counting only once what is shared between guards.
+    The sizes are the ones of a 64-bit translated pypy-c-jit, with a GC
+    header of one word.
+    """
+
+    def __init__(self):
+        self.guards = 0
+        self.numberings = 0
+        self.virtuals = 0
+        self.pendingfields = 0
+        self.consts = 0
+        self.seen_numberings = {}
+        self.seen_vinfos = {}
+        self.seen_consts = None
+        self.last_virtuals = None
+
+    def add_storage(self, storage):
+        self.guards += 1
+        numb = storage.rd_numb
+        while numb:
+            key = compute_unique_id(numb)
+            if key in self.seen_numberings:
+                break
+            self.seen_numberings[key] = None
+            # GC header, 'prev', length of 'code'
+            self.numberings += _round_up(3 * WORD + len(numb.code))
+            numb = numb.prev
+        virtuals = storage.rd_virtuals
+        if virtuals is not None and virtuals is not self.last_virtuals:
+            self.last_virtuals = virtuals
+            self.virtuals += 3 * WORD + len(virtuals) * WORD
+            for vinfo in virtuals:
+                if vinfo is not None and vinfo not in self.seen_vinfos:
+                    self.seen_vinfos[vinfo] = None
+                    self.virtuals += (4 * WORD +
+                                      _round_up(2 * len(vinfo.fieldnums)))
+        if storage.rd_pendingfields:
+            self.pendingfields += (2 * WORD + len(storage.rd_pendingfields) *
+                                   _round_up(WORD + 2 + 2 + 4))
+        consts = storage.rd_consts
+        if consts is not None and consts is not self.seen_consts:
+            # the list is shared by all the guards of a loop, but grows
+            self.seen_consts = consts
+            self.consts = 3 * WORD + len(consts) * 4 * WORD
+
+    def total(self):
+        return self.numberings + self.virtuals + self.pendingfields + self.consts
+
+    def debug_prints(self):
+        debug_print("guards:", self.guards)
+        debug_print("numberings:", self.numberings)
+        debug_print("virtuals:", self.virtuals)
+        debug_print("pendingfields:", self.pendingfields)
+        debug_print("consts:", self.consts)
+        debug_print("total:", self.total())
@@ -0,0 +1,83 @@
+""" Compact encoding of the numberings of resume.py.
+
+A numbering is a list of tagged numbers (see resume.tag()), which are
+16-bit values but most of the time small positive or negative numbers.
+They are stored as a list of bytes, each number being zigzag-encoded
+(0, -1, 1, -2, 2... become 0, 1, 2, 3, 4...) and then written 7 bits at
+a time, the high bit of a byte saying that more bytes follow.  This
+needs one byte for the numbers between -64 and 63, i.e. the first 16
+boxes or the small integer constants, and never more than three bytes.
+
+    class Numbering: __slots__ = ['prev', 'code']
+
+where 'prev' is the numbering of the parent frame, shared by all the
+guards of the frame.
+"""
+
+from rpython.rtyper.lltypesystem import lltype, rffi
+from rpython.rlib import rarithmetic
+
+
+NUMBERINGP = lltype.Ptr(lltype.GcForwardReference())
+NUMBERING = lltype.GcStruct('Numbering',
+                            ('prev', NUMBERINGP),
+                            ('code', lltype.Array(rffi.UCHAR)))
+NUMBERINGP.TO.become(NUMBERING)
+
+
+def encode(lst):
+    # returns the list of bytes, as integers
+    code = []
+    for item in lst:
+        item = rarithmetic.widen(item)
+        value = (item << 1) ^ (item >> 15)    # zigzag, on 16 bits
+        value &= 0xffff
+        while value >= 0x80:
+            code.append((value & 0x7f) | 0x80)
+            value >>= 7
+        code.append(value)
+    return code
+
+def create_numbering(lst, prev):
+    code = encode(lst)
+    numb = lltype.malloc(NUMBERING, len(code))
+    for i in range(len(code)):
+        numb.code[i] = rffi.cast(rffi.UCHAR, code[i])
+    numb.prev = prev
+    return numb
+
+def numb_next_item(numb, index):
+    # returns the next tagged number starting at 'index' in numb.code,
+    # and the index of the following one
+    value = 0
+    shift = 0
+    while True:
+        byte = rffi.cast(lltype.Signed, numb.code[index])
+        index += 1
+        value |= (byte & 0x7f) << shift
+        shift += 7
+        if byte < 0x80:
+            break
+    value = (value >> 1) ^ -(value & 1)
+    return rffi.cast(rffi.SHORT, value), index
+
+def unpack_numbering(numb):
+    # returns the list of tagged numbers
+    nums = []
+    index = 0
+    length = len(numb.code)
+    while index < length:
+        item, index = numb_next_item(numb, index)
+        nums.append(item)
+    return nums
+
+def numbering_equals(numb, lst):
+    index = 0
+    length = len(numb.code)
+    for i in range(len(lst)):
+        if index >= length:
+            return False
+        item, index = numb_next_item(numb, index)
+        if rarithmetic.widen(item) != rarithmetic.widen(lst[i]):
+            return False
+    return index == length
@@ -2722,7 +2722,7 @@ class BasicTests:
             res = self.meta_interp(f, [23, 4])
             assert res == 23
             self.check_trace_count(0)
-            self.check_aborted_count(3)
+            self.check_aborted_count(2)
             #
             res = self.meta_interp(f, [23, 20])
             assert res == 23
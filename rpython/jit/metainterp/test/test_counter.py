@@ -56,6 +56,31 @@ def test_tick():
         r = jc.tick(index2hash(jc, 108), incr)
         assert r is (i == 3)
 
+def test_change_current_fraction():
+    jc = JitCounter()
+    incr = jc.compute_threshold(8)
+    # change_current_fraction() with a fresh new hash
+    jc.change_current_fraction(index2hash(jc, 104), 0.95)
+    r = jc.tick(index2hash(jc, 104), incr)
+    assert r is True
+    # change_current_fraction() with an already-existing hash
+    r = jc.tick(index2hash(jc, 104), incr)
+    assert r is False
+    jc.change_current_fraction(index2hash(jc, 104), 0.95)
+    r = jc.tick(index2hash(jc, 104), incr)
+    assert r is True
+    # change_current_fraction() with a smaller incr
+    incr = jc.compute_threshold(32)
+    jc.change_current_fraction(index2hash(jc, 104), 0.95)
+    r = jc.tick(index2hash(jc, 104), incr)
+    assert r is False
+    r = jc.tick(index2hash(jc, 104), incr)
+    assert r is True
+    # 1.0 reaches the bound with any increment
+    jc.change_current_fraction(index2hash(jc, 105), 1.0)
+    r = jc.tick(index2hash(jc, 105), jc.compute_threshold(10000))
+    assert r is True
+
 def test_collisions():
     jc = JitCounter(size=4)     # 2 bits
     incr = jc.compute_threshold(4)
@@ -1,5 +1,6 @@
 
-from rpython.rlib.jit import JitDriver, JitHookInterface, Counters
+from rpython.rlib.jit import JitDriver, JitHookInterface, Counters, \
+     dont_look_inside, set_param
 from rpython.rlib import jit_hooks
 from rpython.jit.metainterp.test.support import LLJitMixin
 from rpython.jit.codewriter.policy import JitPolicy
@@ -178,6 +179,186 @@ class JitHookInterfaceTests(object):
 
         self.meta_interp(main, [], ProfilerClass=Profiler)
 
+    def test_get_current_event(self):
+        driver = JitDriver(greens = [], reds = ['i'])
+
+        class Events(object):
+            tracing = 0
+        events = Events()
+
+        @dont_look_inside
+        def record():
+            if jit_hooks.stats_get_current_event(None) == Counters.TRACING:
+                events.tracing += 1
+
+        def loop(i):
+            while i > 0:
+                driver.jit_merge_point(i=i)
+                record()
+                i -= 1
+
+        def main():
+            loop(30)
+            assert jit_hooks.stats_get_current_event(None) == -1
+            return events.tracing
+
+        res = self.meta_interp(main, [], ProfilerClass=Profiler)
+        assert res > 0
+
+    def test_get_guard_failures(self):
+        driver = JitDriver(greens = [], reds = ['i', 's'])
+
+        def loop(i):
+            s = 0
+            while i > 0:
+                driver.jit_merge_point(i=i, s=s)
+                if i % 10 == 0:
+                    s += 1
+                i -= 1
+            return s
+
+        def main(b):
+            set_param(driver, 'trace_eagerness', 1000)
+            jit_hooks.stats_set_debug(None, b)
+            loop(200)
+            l = jit_hooks.stats_get_guard_failures(None)
+            largest = 0
+            for i in range(len(l)):
+                assert l[i].type == 'g'
+                largest = max(largest, l[i].counter)
+            return len(l) * 1000 + largest
+
+        res = self.meta_interp(main, [True])
+        # the guard of the 'if' fails once every 10 iterations of the
+        # compiled loop and never gets a bridge; the guard of the 'while'
+        # fails when leaving the loop
+        assert res // 1000 == 2
+        assert 10 <= res % 1000 <= 20
+        res = self.meta_interp(main, [False])
+        assert res == 0
+
+    def test_get_memory_usage(self):
+        driver = JitDriver(greens = [], reds = ['i'])
+
+        def loop(i):
+            while i > 0:
+                driver.jit_merge_point(i=i)
+                i -= 1
+
+        def main():
+            set_param(driver, 'max_code_memory', 5000)
+            loop(30)
+            usage = jit_hooks.stats_get_memory_usage(None)
+            assert usage.code >= 0
+            assert usage.allocated >= usage.code
+            assert usage.limit == 5000
+            assert usage.evicted_loops == 0
+            return usage.alive_loops
+
+        res = self.meta_interp(main, [])
+        assert res == 1
+
+    def test_get_abort_stats(self):
+        driver = JitDriver(greens = ['code'], reds = ['i', 's'],
+                           get_printable_location=lambda code: 'blah')
+
+        def loop(code, i):
+            s = 0
+            while i > 0:
+                driver.jit_merge_point(code=code, i=i, s=s)
+                s += i * code
+                s -= i // code
+                s ^= i
+                i -= 1
+            return s
+
+        def main(code, n):
+            set_param(driver, 'trace_limit', 5)
+            loop(code, n)
+            l = jit_hooks.stats_get_abort_stats(None)
+            assert len(l) == 1
+            stats = l[0]
+            assert len(stats.location.chars) == 4
+            assert stats.reasons[0] == stats.count    # ABORT_TOO_LONG
+            assert stats.max_trace_length > 5
+            assert stats.last_trace_length > 5
+            assert not stats.inlining_disabled
+            return stats.count * 10 + stats.backoff
+
+        res = self.meta_interp(main, [3, 30])
+        assert res == 33
+
+    def test_defer_bridges(self):
+        driver = JitDriver(greens = [], reds = ['i', 's'])
+
+        def loop(i):
+            s = 0
+            while i > 0:
+                driver.jit_merge_point(i=i, s=s)
+                if i % 3 == 0:
+                    s += 1
+                i -= 1
+            return s
+
+        def main(n):
+            set_param(driver, 'defer_bridges', 5)
+            s = loop(18)
+            compiled = jit_hooks.compile_pending_bridges(None)
+            s += loop(n)
+            return compiled * 1000 + s
+
+        res = self.meta_interp(main, [30])
+        assert res == 1000 + 6 + 10
+        # the loop, the deferred bridge, and the bridge leaving the loop
+        self.check_trace_count(3)
+
+    def test_defer_bridges_not_compiled_when_hot_again(self):
+        driver = JitDriver(greens = [], reds = ['i', 's'])
+
+        def loop(i):
+            s = 0
+            while i > 0:
+                driver.jit_merge_point(i=i, s=s)
+                if i % 3 == 0:
+                    s += 1
+                i -= 1
+            return s
+
+        def main():
+            set_param(driver, 'defer_bridges', 5)
+            s = loop(100)
+            return jit_hooks.compile_pending_bridges(None) * 1000 + s
+
+        res = self.meta_interp(main, [])
+        # the guard kept failing until compile_pending_bridges()
+        assert res == 1000 + 33
+        self.check_trace_count(2)
+
+    def test_defer_bridges_lowered(self):
+        driver = JitDriver(greens = [], reds = ['i', 's'])
+
+        def loop(i):
+            s = 0
+            while i > 0:
+                driver.jit_merge_point(i=i, s=s)
+                if i % 3 == 0:
+                    s += 1
+                i -= 1
+            return s
+
+        def main():
+            set_param(driver, 'defer_bridges', 5)
+            s = loop(30)
+            # the pending bridge is compiled when its guard is hot again
+            set_param(driver, 'defer_bridges', 0)
+            s += loop(100)
+            return jit_hooks.compile_pending_bridges(None) * 1000 + s
+
+        res = self.meta_interp(main, [])
+        assert res == 10 + 33
+        # the loop, the deferred bridge, and the bridge leaving the loop
+        self.check_trace_count(3)
+
 class LLJitHookInterfaceTests(JitHookInterfaceTests):
     # use this for any backend, instead of the super class
     
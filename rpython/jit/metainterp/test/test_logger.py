@@ -238,3 +238,49 @@ i4 = int_mul(i2, 2)
 +30: jump(i4)
 +40: --end of the loop--
 """.strip()
+
+    def test_binary_log(self):
+        from rpython.jit.metainterp.jitlog import jitlog, STAGE_NOOPT, \
+             STAGE_OPT, STAGE_ASM, KIND_LOOP, KIND_BRIDGE
+        from rpython.tool.jitlogparser.binlog import read_binlog
+        from rpython.tool.udir import udir
+        from rpython.rlib.objectmodel import compute_unique_id
+        inp = '''
+        [i0]
+        i1 = int_add(i0, 1)
+        guard_true(i1, descr=faildescr) [i1]
+        jump(i1)
+        '''
+        faildescr = BasicFailDescr()
+        loop = pure_parse(inp, namespace={'faildescr': faildescr})
+        bare_logger = logger.Logger(self.make_metainterp_sd())
+        filename = str(udir.join('test_logger_binary_log'))
+        jitlog.open(filename)
+        try:
+            bare_logger.log_loop(loop.inputargs, loop.operations)
+            bare_logger.log_loop(loop.inputargs, loop.operations, -2,
+                                 'compiling')
+            bare_logger.log_loop(loop.inputargs, loop.operations, 0,
+                                 'rewritten', {loop.operations[0]: 16},
+                                 looptoken_number=3)
+            bare_logger.log_loop(loop.inputargs, loop.operations, 3, 'loop',
+                                 name='xyz')
+            bare_logger.log_bridge(loop.inputargs, loop.operations,
+                                   'compiling', faildescr)
+            bare_logger.log_bridge(loop.inputargs, loop.operations, None,
+                                   faildescr)
+        finally:
+            jitlog.finish()
+            jitlog.__init__()
+        log = read_binlog(filename)
+        guard = compute_unique_id(faildescr)
+        assert [(t.stage, t.kind, t.number) for t in log.traces] == [
+            (STAGE_NOOPT, KIND_LOOP, -1), (STAGE_ASM, KIND_LOOP, 3),
+            (STAGE_OPT, KIND_LOOP, 3), (STAGE_OPT, KIND_BRIDGE, guard)]
+        assert log.traces[2].name == 'xyz'
+        assert log.traces[2].type == 'loop'
+        assert log.traces[1].as_text().splitlines()[1:] == [
+            '[i0]',
+            '+16: i2 = int_add(i0, 1)',
+            'guard_true(i2, descr=<Guard0x%x>) [i2]' % guard,
+            'jump(i2)']
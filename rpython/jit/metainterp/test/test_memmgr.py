@@ -21,6 +21,31 @@ from rpython.rlib import rgc
 class FakeLoopToken:
     generation = 0
     invalidated = False
+    compiled_loop_token = None
+
+class FakeCompiledLoopToken:
+    def __init__(self, cpu, size):
+        self.cpu = cpu
+        self.size = size
+        cpu.used += size
+    def get_code_size(self):
+        return self.size
+    def __del__(self):
+        # like CompiledLoopToken, the code is only freed when the GC
+        # collects the token
+        self.cpu.used -= self.size
+
+class FakeCPU:
+    # counts the code of the tokens until they are freed, like the
+    # AsmMemoryManager of the real backends
+    used = 0
+    def get_code_memory_usage(self):
+        return self.used
+
+def make_sized_token(cpu, size):
+    token = FakeLoopToken()
+    token.compiled_loop_token = FakeCompiledLoopToken(cpu, size)
+    return token
 
 
 class _TestMemoryManager:
@@ -78,6 +103,70 @@ class _TestMemoryManager:
             else:
                 assert tokens[i] in memmgr.alive_loops
 
+    def test_max_code_memory_disabled(self):
+        cpu = FakeCPU()
+        memmgr = MemoryManager(cpu)
+        memmgr.set_max_code_memory(0)
+        tokens = [make_sized_token(cpu, 100) for i in range(10)]
+        for token in tokens:
+            memmgr.keep_loop_alive(token)
+            memmgr.next_generation()
+        assert memmgr.alive_loops == dict.fromkeys(tokens)
+        assert memmgr.evicted_loops == 0
+
+    def test_max_code_memory(self):
+        cpu = FakeCPU()
+        memmgr = MemoryManager(cpu)
+        memmgr.set_max_code_memory(1000)
+        tokens = []
+        for i in range(10):
+            token = make_sized_token(cpu, 300)
+            tokens.append(token)
+            memmgr.keep_loop_alive(token)
+            memmgr.next_generation()
+        # above 1000 bytes, keep at most 750: the two most recent loops.
+        # The evicted ones are still referenced from 'tokens', as if the GC
+        # had not collected them yet: their code is still counted by the
+        # cpu, but not by the memmgr, which doesn't evict more loops for it
+        assert memmgr.alive_loops == dict.fromkeys(tokens[-2:])
+        assert memmgr.evicted_loops == 8
+        assert cpu.used == 3000
+        assert memmgr.get_code_memory_usage() == 600
+        del token
+        del tokens[:8]
+        assert cpu.used == 600
+        assert memmgr.get_code_memory_usage() == 600
+        assert memmgr.pending_free == []
+
+    def test_max_code_memory_least_recently_entered(self):
+        cpu = FakeCPU()
+        memmgr = MemoryManager(cpu)
+        memmgr.set_max_code_memory(1000)
+        tokens = [make_sized_token(cpu, 300) for i in range(3)]
+        for token in tokens:
+            memmgr.keep_loop_alive(token)
+            memmgr.next_generation()
+        memmgr.keep_loop_alive(tokens[0])    # entered again
+        memmgr.next_generation()
+        new_token = make_sized_token(cpu, 300)
+        memmgr.keep_loop_alive(new_token)
+        memmgr.next_generation()
+        assert memmgr.alive_loops == dict.fromkeys([tokens[0], new_token])
+
+    def test_max_code_memory_invalidated_first(self):
+        cpu = FakeCPU()
+        memmgr = MemoryManager(cpu)
+        memmgr.set_max_code_memory(1000)
+        tokens = [make_sized_token(cpu, 300) for i in range(3)]
+        for token in tokens:
+            memmgr.keep_loop_alive(token)
+            memmgr.next_generation()
+        tokens[2].invalidated = True
+        new_token = make_sized_token(cpu, 300)
+        memmgr.keep_loop_alive(new_token)
+        memmgr.next_generation()
+        assert memmgr.alive_loops == dict.fromkeys([tokens[1], new_token])
+
 
 class _TestIntegration(LLJitMixin):
     # See comments in TestMemoryManager.  To get temporarily the normal
@@ -98,3 +98,21 @@ def test_get_name_from_address():
     assert metainterp_sd.get_name_from_address(123) == 'a'
     assert metainterp_sd.get_name_from_address(456) == 'b'
     assert metainterp_sd.get_name_from_address(789) == ''
+
+def test_count_guard_failures():
+    from rpython.jit.metainterp.compile import ResumeGuardDescr
+    globaldata = pyjitpl.MetaInterpGlobalData(None)
+    d1, d2 = ResumeGuardDescr(), ResumeGuardDescr()
+    globaldata.count_guard_failure(d1)
+    assert globaldata.get_failed_guards() == []    # not enabled
+    globaldata.set_count_guard_failures(True)
+    globaldata.count_guard_failure(d1)
+    globaldata.count_guard_failure(d2)
+    globaldata.count_guard_failure(d1)
+    assert globaldata.get_failed_guards() == [d1, d2]
+    assert d1.failure_count == 2 and d2.failure_count == 1
+    # the dead guards are forgotten, and their counts with them
+    del d2
+    assert globaldata.get_failed_guards() == [d1]
+    globaldata.set_count_guard_failures(False)
+    assert d1.failure_count == 0
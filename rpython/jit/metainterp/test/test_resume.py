@@ -52,8 +52,8 @@ def dump_storage(storage, liveboxes):
             frameinfo = frameinfo.prev
         numb = storage.rd_numb
         while numb:
-            debug_print('\tnumb', str([untag(numb.nums[i])
-                                       for i in range(len(numb.nums))]),
+            debug_print('\tnumb', str([untag(item)
+                                       for item in unpack_numbering(numb)]),
                         'at', compute_unique_id(numb))
             numb = numb.prev
         for const in storage.rd_consts:
@@ -256,11 +256,7 @@ def _next_section(reader, *expected):
 
 
 def Numbering(prev, nums):
-    numb = lltype.malloc(NUMBERING, len(nums))
-    numb.prev = prev or lltype.nullptr(NUMBERING)
-    for i in range(len(nums)):
-        numb.nums[i] = nums[i]
-    return numb
+    return create_numbering(nums, prev or lltype.nullptr(NUMBERING))
 
 def test_simple_read():
     #b1, b2, b3 = [BoxInt(), BoxPtr(), BoxInt()]
@@ -528,12 +524,12 @@ def test_Numbering_create():
     l = [rffi.r_short(1), rffi.r_short(2)]
     numb = Numbering(None, l)
     assert not numb.prev
-    assert list(numb.nums) == l
+    assert unpack_numbering(numb) == l
 
     l1 = [rffi.r_short(3)]
     numb1 = Numbering(numb, l1)
     assert numb1.prev == numb
-    assert list(numb1.nums) == l1
+    assert unpack_numbering(numb1) == l1
 
 def test_capture_resumedata():
     b1, b2, b3 = [BoxInt(), BoxPtr(), BoxInt()]
@@ -899,11 +895,11 @@ def test_ResumeDataLoopMemo_number():
 
     assert liveboxes == {b1: tag(0, TAGBOX), b2: tag(1, TAGBOX),
                          b3: tag(2, TAGBOX)}
-    assert list(numb.nums) == [tag(3, TAGINT), tag(2, TAGBOX), tag(0, TAGBOX),
-                               tag(1, TAGINT)]
-    assert list(numb.prev.nums) == [tag(0, TAGBOX), tag(1, TAGINT),
-                                    tag(1, TAGBOX),
-                                    tag(0, TAGBOX), tag(2, TAGINT)]
+    assert unpack_numbering(numb) == [tag(3, TAGINT), tag(2, TAGBOX), tag(0, TAGBOX),
+                                      tag(1, TAGINT)]
+    assert unpack_numbering(numb.prev) == [tag(0, TAGBOX), tag(1, TAGINT),
+                                           tag(1, TAGBOX),
+                                           tag(0, TAGBOX), tag(2, TAGINT)]
     assert not numb.prev.prev
 
     numb2, liveboxes2, v = memo.number(FakeOptimizer({}), snap2)
@@ -912,8 +908,8 @@ def test_ResumeDataLoopMemo_number():
     assert liveboxes2 == {b1: tag(0, TAGBOX), b2: tag(1, TAGBOX),
                          b3: tag(2, TAGBOX)}
     assert liveboxes2 is not liveboxes
-    assert list(numb2.nums) == [tag(3, TAGINT), tag(2, TAGBOX), tag(0, TAGBOX),
-                                tag(3, TAGINT)]
+    assert unpack_numbering(numb2) == [tag(3, TAGINT), tag(2, TAGBOX), tag(0, TAGBOX),
+                                       tag(3, TAGINT)]
     assert numb2.prev == numb.prev
 
     env3 = [c3, b3, b1, c3]
@@ -936,8 +932,8 @@ def test_ResumeDataLoopMemo_number():
     assert v == 0
     
     assert liveboxes3 == {b1: tag(0, TAGBOX), b2: tag(1, TAGBOX)}
-    assert list(numb3.nums) == [tag(3, TAGINT), tag(4, TAGINT), tag(0, TAGBOX),
-                                tag(3, TAGINT)]
+    assert unpack_numbering(numb3) == [tag(3, TAGINT), tag(4, TAGINT), tag(0, TAGBOX),
+                                       tag(3, TAGINT)]
     assert numb3.prev == numb.prev
 
     # virtual
@@ -950,8 +946,8 @@ def test_ResumeDataLoopMemo_number():
     
     assert liveboxes4 == {b1: tag(0, TAGBOX), b2: tag(1, TAGBOX),
                           b4: tag(0, TAGVIRTUAL)}
-    assert list(numb4.nums) == [tag(3, TAGINT), tag(0, TAGVIRTUAL),
-                                tag(0, TAGBOX), tag(3, TAGINT)]
+    assert unpack_numbering(numb4) == [tag(3, TAGINT), tag(0, TAGVIRTUAL),
+                                       tag(0, TAGBOX), tag(3, TAGINT)]
     assert numb4.prev == numb.prev
 
     env5 = [b1, b4, b5]
@@ -964,10 +960,27 @@ def test_ResumeDataLoopMemo_number():
     
     assert liveboxes5 == {b1: tag(0, TAGBOX), b2: tag(1, TAGBOX),
                           b4: tag(0, TAGVIRTUAL), b5: tag(1, TAGVIRTUAL)}
-    assert list(numb5.nums) == [tag(0, TAGBOX), tag(0, TAGVIRTUAL),
-                                                tag(1, TAGVIRTUAL)]
+    assert unpack_numbering(numb5) == [tag(0, TAGBOX), tag(0, TAGVIRTUAL),
+                                                       tag(1, TAGVIRTUAL)]
     assert numb5.prev == numb4
 
+def test_ResumeDataLoopMemo_number_shared():
+    b1, b2 = [BoxInt(), BoxInt()]
+    snap = Snapshot(None, [b1])
+    snap1 = Snapshot(snap, [b2, ConstInt(1)])
+    snap2 = Snapshot(snap, [b2, ConstInt(1)])
+    snap3 = Snapshot(snap, [b2, ConstInt(2)])
+
+    memo = ResumeDataLoopMemo(FakeMetaInterpStaticData())
+    numb1, liveboxes1, v = memo.number(FakeOptimizer({}), snap1)
+    numb2, liveboxes2, v = memo.number(FakeOptimizer({}), snap2)
+    assert numb2 == numb1
+    assert liveboxes2 == liveboxes1
+    numb3, liveboxes3, v = memo.number(FakeOptimizer({}), snap3)
+    assert numb3 != numb1
+    assert numb3.prev == numb1.prev
+    assert unpack_numbering(numb3) == [tag(1, TAGBOX), tag(2, TAGINT)]
+
 def test_ResumeDataLoopMemo_number_boxes():
     memo = ResumeDataLoopMemo(FakeMetaInterpStaticData())
     b1, b2 = [BoxInt(), BoxInt()]
@@ -1103,7 +1116,7 @@ class ResumeDataFakeReader(ResumeDataBoxReader):
         class MyInfo:
             @staticmethod
             def enumerate_vars(callback_i, callback_r, callback_f, _):
-                for index, tagged in enumerate(self.cur_numb.nums):
+                for index, tagged in enumerate(unpack_numbering(self.cur_numb)):
                     _, tag = untag(tagged)
                     if tag == TAGVIRTUAL:
                         kind = REF
@@ -1226,8 +1239,9 @@ def test_virtual_adder_make_virtual():
 
     metainterp = MyMetaInterp()
     reader = ResumeDataFakeReader(storage, newboxes, metainterp)
-    assert len(reader.virtuals_cache.virtuals_ptr_cache) == 2
+    assert reader.virtuals_cache is None     # only made when needed
     b2t = reader.decode_ref(modifier._gettagged(b2s))
+    assert len(reader.virtuals_cache.virtuals_ptr_cache) == 2
     b4t = reader.decode_ref(modifier._gettagged(b4s))
     trace = metainterp.trace
     b2new = (rop.NEW_WITH_VTABLE, [ConstAddr(LLtypeMixin.node_vtable_adr,
@@ -1294,8 +1308,9 @@ def test_virtual_adder_make_varray():
     # resume
     metainterp = MyMetaInterp()
     reader = ResumeDataFakeReader(storage, newboxes, metainterp)
-    assert len(reader.virtuals_cache.virtuals_ptr_cache) == 1
+    assert reader.virtuals_cache is None     # only made when needed
     b2t = reader.decode_ref(tag(0, TAGVIRTUAL))
+    assert len(reader.virtuals_cache.virtuals_ptr_cache) == 1
     trace = metainterp.trace
     expected = [
         (rop.NEW_ARRAY, [ConstInt(2)], b2t, LLtypeMixin.arraydescr),
@@ -1340,8 +1355,9 @@ def test_virtual_adder_make_vstruct():
     NULL = ConstPtr.value
     metainterp = MyMetaInterp()
     reader = ResumeDataFakeReader(storage, newboxes, metainterp)
-    assert len(reader.virtuals_cache.virtuals_ptr_cache) == 1
+    assert reader.virtuals_cache is None     # only made when needed
     b2t = reader.decode_ref(tag(0, TAGVIRTUAL))
+    assert len(reader.virtuals_cache.virtuals_ptr_cache) == 1
 
     trace = metainterp.trace
     expected = [
@@ -1517,3 +1533,24 @@ def test_invalidation_needed():
     assert not modifier._invalidation_needed(10, 3)
     assert modifier._invalidation_needed(10, 4)        
     
+
+def test_resume_data_size():
+    numb0 = Numbering(None, [tag(0, TAGBOX)])
+    storage1 = Storage()
+    storage1.rd_numb = Numbering(numb0, [tag(1, TAGBOX), tag(1, TAGINT)])
+    vinfo = VirtualInfo(123, ["fielddescr1"])
+    vinfo.fieldnums = [tag(0, TAGBOX)]
+    storage1.rd_virtuals = [vinfo]
+    storage2 = Storage()
+    storage2.rd_numb = Numbering(numb0, [tag(2, TAGBOX)])
+    storage2.rd_virtuals = storage1.rd_virtuals
+    size = ResumeDataSize()
+    size.add_storage(storage1)
+    assert size.numberings == 2 * 4 * WORD
+    assert size.virtuals == 4 * WORD + 5 * WORD
+    size.add_storage(storage2)
+    # numb0 and the virtuals are shared
+    assert size.guards == 2
+    assert size.numberings == 3 * 4 * WORD
+    assert size.virtuals == 4 * WORD + 5 * WORD
+    assert size.total() == size.numberings + size.virtuals + size.consts
@@ -0,0 +1,39 @@
+from rpython.rtyper.lltypesystem import lltype
+from rpython.jit.metainterp.resumecode import (NUMBERING, encode,
+    create_numbering, unpack_numbering, numbering_equals)
+from rpython.jit.metainterp.resume import (tag, TAGCONST, TAGINT, TAGBOX,
+    TAGVIRTUAL, NULLREF, UNASSIGNED)
+
+
+examples = [
+    [],
+    [tag(1, TAGINT), tag(0, TAGBOX), NULLREF],
+    [tag(-1, TAGINT), tag(-4096, TAGINT), tag(4095, TAGINT)],
+    [tag(8191, TAGBOX), tag(-8192, TAGVIRTUAL), UNASSIGNED],
+    [tag(i, TAGCONST) for i in range(-200, 200)],
+]
+
+def test_roundtrip():
+    for lst in examples:
+        numb = create_numbering(lst, lltype.nullptr(NUMBERING))
+        assert unpack_numbering(numb) == lst
+        assert numbering_equals(numb, lst)
+
+def test_sizes():
+    assert encode([tag(0, TAGBOX)]) == [tag(0, TAGBOX) * 2]
+    assert len(encode([tag(15, TAGBOX), tag(-16, TAGINT)])) == 2
+    assert len(encode([tag(16, TAGBOX)])) == 2
+    assert len(encode([tag(8191, TAGBOX), tag(-8192, TAGBOX)])) == 6
+
+def test_numbering_equals():
+    lst = [tag(1, TAGINT), tag(300, TAGBOX)]
+    numb = create_numbering(lst, lltype.nullptr(NUMBERING))
+    assert not numbering_equals(numb, lst[:1])
+    assert not numbering_equals(numb, lst + [tag(0, TAGBOX)])
+    assert not numbering_equals(numb, [tag(1, TAGINT), tag(301, TAGBOX)])
+
+def test_prev():
+    numb1 = create_numbering([tag(0, TAGBOX)], lltype.nullptr(NUMBERING))
+    numb2 = create_numbering([tag(1, TAGBOX)], numb1)
+    assert numb2.prev == numb1
+    assert not numb1.prev
@@ -620,7 +620,7 @@ class ImplicitVirtualizableTests(object):
 
         res = self.meta_interp(f, [123], policy=StopAtXPolicy(g))
         assert res == f(123)
-        self.check_aborted_count(2)
+        self.check_aborted_count(1)
         self.check_jitcell_token_count(0)
 
     def test_external_read_with_exception(self):
@@ -660,7 +660,7 @@ class ImplicitVirtualizableTests(object):
 
         res = self.meta_interp(f, [123], policy=StopAtXPolicy(g))
         assert res == f(123)
-        self.check_aborted_count(2)
+        self.check_aborted_count(1)
         self.check_jitcell_token_count(0)
 
     def test_external_write(self):
@@ -693,7 +693,7 @@ class ImplicitVirtualizableTests(object):
 
         res = self.meta_interp(f, [240], policy=StopAtXPolicy(g))
         assert res == f(240)
-        self.check_aborted_count(3)
+        self.check_aborted_count(2)
         self.check_jitcell_token_count(0)
 
     def test_external_read_sometimes(self):
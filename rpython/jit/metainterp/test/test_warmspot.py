@@ -2,6 +2,7 @@ import py
 from rpython.jit.metainterp import jitexc
 from rpython.jit.metainterp.warmspot import get_stats
 from rpython.rlib.jit import JitDriver, set_param, unroll_safe, jit_callback
+from rpython.rlib.jit import trace_next_iteration
 from rpython.jit.backend.llgraph import runner
 
 from rpython.jit.metainterp.test.support import LLJitMixin
@@ -108,6 +109,32 @@ class WarmspotTests(object):
         assert res == 0
         self.check_resops(new_with_vtable=0)
 
+    def test_trace_next_iteration(self):
+        myjitdriver = JitDriver(greens = ['g'], reds = ['n'])
+
+        def loop(g, n):
+            while n > 0:
+                myjitdriver.can_enter_jit(g=g, n=n)
+                myjitdriver.jit_merge_point(g=g, n=n)
+                n -= 1
+            return n
+        def f(n, prime, threshold):
+            set_param(myjitdriver, 'threshold', threshold)
+            if prime:
+                trace_next_iteration(myjitdriver, 5)
+            return loop(5, n) + loop(6, n)
+
+        res = self.meta_interp(f, [10, 0, 50])
+        assert res == 0
+        self.check_trace_count(0)
+        res = self.meta_interp(f, [10, 1, 50])
+        assert res == 0
+        self.check_trace_count(1)
+        # the JIT is turned off
+        res = self.meta_interp(f, [10, 1, -1])
+        assert res == 0
+        self.check_trace_count(0)
+
     def test_unwanted_loops(self):
         mydriver = JitDriver(reds = ['n', 'total', 'm'], greens = [])
 
@@ -633,6 +660,9 @@ class TestWarmspotDirect(object):
             def make_execute_token(self, *ARGS):
                 return "not callable"
 
+            def set_linear_scan(self, value):
+                pass
+
         driver = JitDriver(reds = ['red'], greens = ['green'])
 
         def f(green):
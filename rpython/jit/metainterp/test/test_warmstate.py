@@ -3,12 +3,15 @@ from rpython.rtyper.lltypesystem import lltype, llmemory, rstr, rffi
 from rpython.rtyper.annlowlevel import llhelper
 from rpython.jit.metainterp.warmstate import wrap, unwrap, specialize_value
 from rpython.jit.metainterp.warmstate import equal_whatever, hash_whatever
-from rpython.jit.metainterp.warmstate import WarmEnterState
+from rpython.jit.metainterp.warmstate import WarmEnterState, AbortStats
+from rpython.jit.metainterp.warmstate import MAX_ABORT_BACKOFF
+from rpython.jit.metainterp.warmstate import remember_abort_stats, BaseJitCell
 from rpython.jit.metainterp.history import BoxInt, BoxFloat, BoxPtr
 from rpython.jit.metainterp.history import ConstInt, ConstFloat, ConstPtr
 from rpython.jit.metainterp.counter import DeterministicJitCounter
 from rpython.jit.codewriter import longlong
 from rpython.rlib.rarithmetic import r_singlefloat
+from rpython.rlib.jit import Counters
 
 def boxfloat(x):
     return BoxFloat(longlong.getfloatstorage(x))
@@ -187,3 +190,54 @@ def test_make_jitdriver_callbacks_5():
     state.make_jitdriver_callbacks()
     res = state.can_never_inline(5, 42.5)
     assert res is True
+
+def test_set_param_enable_opts():
+    import py
+    from rpython.jit.metainterp.optimizeopt import ALL_OPTS_DICT
+    class FakeJitDriverSD:
+        _green_args_spec = []
+    state = WarmEnterState(None, FakeJitDriverSD())
+    state.set_param_enable_opts('all')
+    assert state.enable_opts == ALL_OPTS_DICT
+    state.set_param_enable_opts('all:vec')
+    assert state.enable_opts == dict(ALL_OPTS_DICT, vec=None)
+    state.set_param_enable_opts('intbounds:vec')
+    assert state.enable_opts == {'intbounds': None, 'vec': None}
+    py.test.raises(ValueError, state.set_param_enable_opts, 'all:foo')
+
+def test_abort_stats():
+    stats = AbortStats('loc')
+    stats.record(Counters.ABORT_TOO_LONG, 120, retry_soon=True)
+    assert stats.count == 1
+    assert stats.backoff == 0
+    assert stats.increment_scale == 1.0
+    stats.record(Counters.ABORT_ESCAPE, 50, retry_soon=False)
+    stats.record(Counters.ABORT_ESCAPE, 60, retry_soon=False)
+    assert stats.count == 3
+    assert stats.reasons[0] == 1
+    assert stats.reasons[Counters.ABORT_ESCAPE - Counters.ABORT_TOO_LONG] == 2
+    assert stats.last_trace_length == 60
+    assert stats.max_trace_length == 120
+    assert stats.backoff == 2
+    assert stats.increment_scale == 0.25
+    for i in range(MAX_ABORT_BACKOFF + 5):
+        stats.record(Counters.ABORT_BAD_LOOP, 10, retry_soon=False)
+    assert stats.backoff == MAX_ABORT_BACKOFF
+    assert stats.increment_scale == 1.0 / 2 ** MAX_ABORT_BACKOFF
+
+def test_remember_abort_stats():
+    all_stats = []
+    s1, s2, s3 = AbortStats('a'), AbortStats('b'), AbortStats('c')
+    remember_abort_stats(all_stats, s1, max_stats=2)
+    remember_abort_stats(all_stats, s2, max_stats=2)
+    remember_abort_stats(all_stats, s1, max_stats=2)
+    assert all_stats == [s2, s1]
+    remember_abort_stats(all_stats, s3, max_stats=2)
+    assert all_stats == [s1, s3]
+    assert s2.evicted and not s1.evicted and not s3.evicted
+    # the cell of an evicted greenkey can be removed again
+    cell = BaseJitCell()
+    cell.abort_stats = s1
+    assert not cell.should_remove_jitcell()
+    cell.abort_stats = s2
+    assert cell.should_remove_jitcell()
@@ -20,6 +20,7 @@ from rpython.translator.unsimplify import call_final_function
 from rpython.jit.metainterp import history, pyjitpl, gc, memmgr, jitexc
 from rpython.jit.metainterp.pyjitpl import MetaInterpStaticData
 from rpython.jit.metainterp.jitprof import Profiler, EmptyProfiler
+from rpython.jit.metainterp.jitlog import jitlog
 from rpython.jit.metainterp.jitdriver import JitDriverStaticData
 from rpython.jit.codewriter import support, codewriter
 from rpython.jit.codewriter.policy import JitPolicy
@@ -68,7 +69,7 @@ def ll_meta_interp(function, args, backendopt=False, type_system='lltype',
 def jittify_and_run(interp, graph, args, repeat=1, graph_and_interp_only=False,
                     backendopt=False, trace_limit=sys.maxint,
                     inline=False, loop_longevity=0, retrace_limit=5,
-                    function_threshold=4,
+                    function_threshold=4, max_code_memory=0,
                     enable_opts=ALL_OPTS_NAMES, max_retrace_guards=15, **kwds):
     from rpython.config.config import ConfigError
     translator = interp.typer.annotator.translator
@@ -88,6 +89,7 @@ def jittify_and_run(interp, graph, args, repeat=1, graph_and_interp_only=False,
         jd.warmstate.set_param_trace_limit(trace_limit)
         jd.warmstate.set_param_inlining(inline)
         jd.warmstate.set_param_loop_longevity(loop_longevity)
+        jd.warmstate.set_param_max_code_memory(max_code_memory)
         jd.warmstate.set_param_retrace_limit(retrace_limit)
         jd.warmstate.set_param_max_retrace_guards(max_retrace_guards)
         jd.warmstate.set_param_enable_opts(enable_opts)
@@ -98,6 +100,7 @@ def jittify_and_run(interp, graph, args, repeat=1, graph_and_interp_only=False,
     if not kwds.get('translate_support_code', False):
         warmrunnerdesc.metainterp_sd.profiler.finish()
         warmrunnerdesc.metainterp_sd.cpu.finish_once()
+        jitlog.flush()
     print '~~~ return value:', repr(res)
     while repeat > 1:
         print '~' * 79
@@ -149,6 +152,9 @@ def locate_jit_merge_point(graph):
 def find_set_param(graphs):
     return _find_jit_marker(graphs, 'set_param')
 
+def find_trace_next_iteration(graphs):
+    return _find_jit_marker(graphs, 'trace_next_iteration')
+
 def find_force_quasi_immutable(graphs):
     results = []
     for graph in graphs:
@@ -189,6 +195,7 @@ class WarmRunnerDesc(object):
         self.set_translator(translator)
         self.memory_manager = memmgr.MemoryManager()
         self.build_cpu(CPUClass, **kwds)
+        self.memory_manager.cpu = self.cpu
         self.inline_inlineable_portals()
         self.find_portals()
         self.codewriter = codewriter.CodeWriter(self.cpu, self.jitdrivers_sd)
@@ -229,6 +236,7 @@ class WarmRunnerDesc(object):
         self.codewriter.make_jitcodes(verbose=verbose)
         self.rewrite_can_enter_jits()
         self.rewrite_set_param_and_get_stats()
+        self.rewrite_trace_next_iteration()
         self.rewrite_force_virtual(vrefinfo)
         self.rewrite_force_quasi_immutable()
         self.add_finish()
@@ -678,7 +686,7 @@ class WarmRunnerDesc(object):
         # make sure we make a copy of function so it no longer belongs
         # to extregistry
         func = op.args[1].value
-        if func.func_name.startswith('stats_'):
+        if func.func_name.startswith(('stats_', 'compile_')):
             # get special treatment since we rewrite it to a call that accepts
             # jit driver
             func = func_with_new_name(func, func.func_name + '_compiled')
@@ -918,6 +926,7 @@ class WarmRunnerDesc(object):
             if self.metainterp_sd.profiler.initialized:
                 self.metainterp_sd.profiler.finish()
             self.metainterp_sd.cpu.finish_once()
+            jitlog.finish()
 
         if self.cpu.translate_support_code:
             call_final_function(self.translator, finish,
@@ -971,6 +980,28 @@ class WarmRunnerDesc(object):
             op.opname = 'direct_call'
             op.args[:3] = [closures[key]]
 
+    def rewrite_trace_next_iteration(self):
+        closures = {}
+        graphs = self.translator.graphs
+        for graph, block, i in find_trace_next_iteration(graphs):
+            op = block.operations[i]
+            for jd in self.jitdrivers_sd:
+                if jd.jitdriver is op.args[1].value:
+                    break
+            else:
+                assert 0, "jitdriver of trace_next_iteration() not found"
+            ARGS = [v.concretetype for v in op.args[2:]]
+            assert ARGS == jd._green_args_spec, (
+                "trace_next_iteration() called with arguments of the wrong "
+                "types: %r instead of %r" % (ARGS, jd._green_args_spec))
+            if jd not in closures:
+                FUNCPTR = lltype.Ptr(lltype.FuncType(ARGS, lltype.Void))
+                func = jd.warmstate.make_trace_next_iteration()
+                closures[jd] = Constant(self.helper_func(FUNCPTR, func),
+                                        FUNCPTR)
+            op.opname = 'direct_call'
+            op.args[:2] = [closures[jd]]
+
     def rewrite_force_virtual(self, vrefinfo):
         all_graphs = self.translator.graphs
         vrefinfo.replace_force_virtual_with_call(all_graphs)
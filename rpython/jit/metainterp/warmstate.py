@@ -4,7 +4,7 @@ import weakref
 from rpython.jit.codewriter import support, heaptracker, longlong
 from rpython.jit.metainterp import history
 from rpython.rlib.debug import debug_start, debug_stop, debug_print
-from rpython.rlib.jit import PARAMETERS
+from rpython.rlib.jit import PARAMETERS, Counters
 from rpython.rlib.nonconst import NonConstant
 from rpython.rlib.objectmodel import specialize, we_are_translated, r_dict
 from rpython.rlib.rarithmetic import intmask, r_uint
@@ -131,6 +131,7 @@ JC_TEMPORARY       = 0x04
 class BaseJitCell(object):
     flags = 0     # JC_xxx flags
     wref_procedure_token = None
+    abort_stats = None
     next = None
 
     def get_procedure_token(self):
@@ -154,10 +155,66 @@ class BaseJitCell(object):
     def should_remove_jitcell(self):
         if self.get_procedure_token() is not None:
             return False    # don't remove JitCells with a procedure_token
-        # don't remove JitCells that are being traced, or JitCells with
-        # the "don't trace here" flag.  Other JitCells can be removed.
+        # don't remove JitCells that are being traced, JitCells with
+        # the "don't trace here" flag, or JitCells whose tracing was
+        # aborted recently.  Other JitCells can be removed.
+        if self.abort_stats is not None and not self.abort_stats.evicted:
+            return False
         return (self.flags & (JC_TRACING | JC_DONT_TRACE_HERE)) == 0
 
+
+NUM_ABORT_REASONS = (Counters.ABORT_FORCE_QUASIIMMUT -
+                     Counters.ABORT_TOO_LONG + 1)
+MAX_ABORT_BACKOFF = 10
+MAX_ABORT_STATS = 1000
+
+class AbortStats(object):
+    """How often and why tracing from one greenkey was aborted.
+
+    After every abort that will probably happen again the next time, the
+    counter of the greenkey increases twice more slowly, up to
+    2**MAX_ABORT_BACKOFF times more slowly.  This is not the case if the
+    trace was too long because of a function that is now not inlined any
+    more, as the next trace should be shorter, or if a quasi-immutable
+    field was changed during tracing.
+    """
+    def __init__(self, location):
+        self.location = location
+        self.reasons = [0] * NUM_ABORT_REASONS
+        self.count = 0
+        self.last_trace_length = 0
+        self.max_trace_length = 0
+        self.inlining_disabled = False
+        self.backoff = 0
+        self.increment_scale = 1.0
+        self.evicted = False
+
+    def record(self, reason, trace_length, retry_soon):
+        self.reasons[reason - Counters.ABORT_TOO_LONG] += 1
+        self.count += 1
+        self.last_trace_length = trace_length
+        if trace_length > self.max_trace_length:
+            self.max_trace_length = trace_length
+        if not retry_soon and self.backoff < MAX_ABORT_BACKOFF:
+            self.backoff += 1
+            self.increment_scale = 1.0 / (1 << self.backoff)
+
+
+def remember_abort_stats(all_stats, stats, max_stats=MAX_ABORT_STATS):
+    """Move 'stats' to the end of 'all_stats', the list of the most
+    recently aborted greenkeys.  Only the last 'max_stats' are kept: the
+    older ones are marked as evicted, and their JitCells can be removed
+    again, together with the green arguments that they keep alive.
+    """
+    if all_stats and all_stats[-1] is stats:
+        return
+    if stats in all_stats:
+        all_stats.remove(stats)
+    all_stats.append(stats)
+    while len(all_stats) > max_stats:
+        oldest = all_stats.pop(0)
+        oldest.evicted = True
+
 # ____________________________________________________________
 
 
@@ -202,7 +259,8 @@ class WarmEnterState(object):
         self.inlining = value
 
     def set_param_enable_opts(self, value):
-        from rpython.jit.metainterp.optimizeopt import ALL_OPTS_DICT, ALL_OPTS_NAMES
+        from rpython.jit.metainterp.optimizeopt import (ALL_OPTS_DICT,
+            ALL_OPTS_NAMES, EXTRA_OPTS)
 
         d = {}
         if NonConstant(False):
@@ -210,8 +268,11 @@ class WarmEnterState(object):
         if value is None or value == 'all':
             value = ALL_OPTS_NAMES
         for name in value.split(":"):
-            if name:
-                if name not in ALL_OPTS_DICT:
+            if name == 'all':
+                for name1 in ALL_OPTS_NAMES.split(":"):
+                    d[name1] = None
+            elif name:
+                if name not in ALL_OPTS_DICT and name not in EXTRA_OPTS:
                     raise ValueError('Unknown optimization ' + name)
                 d[name] = None
         self.enable_opts = d
@@ -222,6 +283,17 @@ class WarmEnterState(object):
             self.warmrunnerdesc.memory_manager is not None):   # all for tests
             self.warmrunnerdesc.memory_manager.set_max_age(value)
 
+    def set_param_max_code_memory(self, value):
+        # note: it's a global parameter, not a per-jitdriver one
+        if (self.warmrunnerdesc is not None and
+            self.warmrunnerdesc.memory_manager is not None):   # all for tests
+            self.warmrunnerdesc.memory_manager.set_max_code_memory(value)
+
+    def set_param_linear_scan(self, value):
+        # note: it's a global parameter, not a per-jitdriver one
+        if self.warmrunnerdesc is not None and self.cpu is not None:
+            self.cpu.set_linear_scan(value != 0)     # ^^^ for tests
+
     def set_param_retrace_limit(self, value):
         if self.warmrunnerdesc:
             if self.warmrunnerdesc.memory_manager:
@@ -232,6 +304,11 @@ class WarmEnterState(object):
             if self.warmrunnerdesc.memory_manager:
                 self.warmrunnerdesc.memory_manager.max_retrace_guards = value
 
+    def set_param_defer_bridges(self, value):
+        if self.warmrunnerdesc:
+            if self.warmrunnerdesc.memory_manager:
+                self.warmrunnerdesc.memory_manager.max_pending_bridges = value
+
     def set_param_max_unroll_loops(self, value):
         if self.warmrunnerdesc:
             if self.warmrunnerdesc.memory_manager:
@@ -240,11 +317,42 @@ class WarmEnterState(object):
     def disable_noninlinable_function(self, greenkey):
         cell = self.JitCell.ensure_jit_cell_at_key(greenkey)
         cell.flags |= JC_DONT_TRACE_HERE
+        # the function is not inlined any more, but traced on its own when
+        # it is hot enough: see maybe_compile_and_run()
+        self._get_abort_stats(cell, greenkey).inlining_disabled = True
         debug_start("jit-disableinlining")
         loc = self.get_location_str(greenkey)
         debug_print("disabled inlining", loc)
         debug_stop("jit-disableinlining")
 
+    def record_abort(self, greenkey, reason, trace_length, disabled_inlining):
+        """Called when tracing from 'greenkey' is aborted.
+        'disabled_inlining' tells if a function inlined in the trace was
+        just disabled by disable_noninlinable_function().
+        """
+        cell = self.JitCell.ensure_jit_cell_at_key(greenkey)
+        stats = self._get_abort_stats(cell, greenkey)
+        if reason == Counters.ABORT_FORCE_QUASIIMMUT:
+            retry_soon = True    # usually a quasi-immutable set only once
+        else:
+            retry_soon = (disabled_inlining and
+                          (cell.flags & JC_DONT_TRACE_HERE) == 0)
+        stats.record(reason, trace_length, retry_soon)
+        debug_start("jit-abort-stats")
+        debug_print("aborted", stats.location, "reason", reason,
+                    "length", trace_length, "backoff", stats.backoff)
+        debug_stop("jit-abort-stats")
+
+    def _get_abort_stats(self, cell, greenkey):
+        stats = cell.abort_stats
+        if stats is None or stats.evicted:
+            stats = AbortStats(self.get_location_str(greenkey))
+            cell.abort_stats = stats
+        if self.warmrunnerdesc is not None:    # for tests
+            globaldata = self.warmrunnerdesc.metainterp_sd.globaldata
+            remember_abort_stats(globaldata.abort_stats, stats)
+        return stats
+
     def attach_procedure_to_interp(self, greenkey, procedure_token):
         cell = self.JitCell.ensure_jit_cell_at_key(greenkey)
         old_token = cell.get_procedure_token()
@@ -365,8 +473,16 @@ class WarmEnterState(object):
             # machine code was already compiled for these greenargs
             procedure_token = cell.get_procedure_token()
             if procedure_token is None:
-                # it was an aborted compilation, or maybe a weakref that
-                # has been freed
+                stats = cell.abort_stats
+                if stats is not None and not stats.evicted:
+                    # an aborted compilation, or a function that is not
+                    # inlined any more: count more slowly after each abort
+                    increment = increment_threshold * stats.increment_scale
+                    if jitcounter.tick(hash, increment):
+                        bound_reached(hash, cell, *args)
+                    return
+                # a weakref that has been freed, or an abort that was
+                # evicted from the table of the abort stats
                 jitcounter.cleanup_chain(hash)
                 return
             if not confirm_enter_jit(*args):
@@ -485,6 +601,20 @@ class WarmEnterState(object):
 
     # ----------
 
+    def make_trace_next_iteration(self):
+        "NOT_RPYTHON"
+        JitCell = self.make_jitcell_subclass()
+        jitcounter = self.warmrunnerdesc.jitcounter
+        #
+        def trace_next_iteration(*greenargs):
+            # if 'increment_threshold' is 0.0, the JIT is turned off
+            if self.increment_threshold > 0.0:
+                hash = JitCell.get_uhash(*greenargs)
+                jitcounter.change_current_fraction(hash, 1.0)
+        return trace_next_iteration
+
+    # ----------
+
     def make_jitdriver_callbacks(self):
         if hasattr(self, 'get_location_str'):
             return
@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+"""
+Report the estimated size of the resume data of the loops and bridges
+of a log produced with PYPYLOG=jit-resume-size:logfile.
+
+Usage: resumesize.py [--sort] logfile
+"""
+
+import sys
+import optparse
+from rpython.tool import logparser
+
+FIELDS = ['guards', 'numberings', 'virtuals', 'pendingfields', 'consts',
+          'total']
+
+def parse_sizes(log):
+    """Yield (name, {field: value}) for each loop or bridge of the log."""
+    for text in logparser.extract_category(log, 'jit-resume-size'):
+        lines = text.splitlines()
+        if not lines:
+            continue
+        name = lines[0].strip()
+        sizes = {}
+        for line in lines[1:]:
+            key, value = line.split(':')
+            sizes[key.strip()] = int(value)
+        yield name, sizes
+
+def summarize(entries):
+    total = dict.fromkeys(FIELDS, 0)
+    for name, sizes in entries:
+        for key in FIELDS:
+            total[key] += sizes.get(key, 0)
+    return total
+
+def main(logfile, options):
+    log = logparser.parse_log_file(logfile, verbose=False)
+    entries = list(parse_sizes(log))
+    if options.sort:
+        entries.sort(key=lambda (name, sizes): -sizes['total'])
+    print '%-32s %s' % ('', ' '.join(['%13s' % key for key in FIELDS]))
+    for name, sizes in entries:
+        print '%-32s %s' % (name, ' '.join(['%13d' % sizes.get(key, 0)
+                                            for key in FIELDS]))
+    total = summarize(entries)
+    print '%-32s %s' % ('TOTAL', ' '.join(['%13d' % total[key]
+                                           for key in FIELDS]))
+    if total['guards']:
+        print 'bytes per guard: %.1f' % (float(total['total']) /
+                                         total['guards'])
+
+if __name__ == '__main__':
+    parser = optparse.OptionParser(usage="%prog [--sort] logfile")
+    parser.add_option('--sort', action='store_true', default=False,
+                      help='biggest loops and bridges first')
+    options, args = parser.parse_args()
+    if len(args) != 1:
+        parser.print_help()
+        sys.exit(2)
+    main(args[0], options)
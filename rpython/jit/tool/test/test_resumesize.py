@@ -0,0 +1,36 @@
+from rpython.tool import logparser
+from rpython.jit.tool.resumesize import parse_sizes, summarize
+
+LOG = """\
+[1200] {jit-resume-size
+loop 0
+guards: 10
+numberings: 400
+virtuals: 96
+pendingfields: 0
+consts: 56
+total: 552
+[1201] jit-resume-size}
+[1300] {jit-backend
+[1301] jit-backend}
+[1400] {jit-resume-size
+bridge 140000 of loop 0
+guards: 2
+numberings: 64
+virtuals: 0
+pendingfields: 40
+consts: 56
+total: 160
+[1401] jit-resume-size}
+"""
+
+def test_parse_sizes():
+    log = logparser.parse_log(LOG.splitlines(True))
+    entries = list(parse_sizes(log))
+    assert [name for name, sizes in entries] == ['loop 0',
+                                                 'bridge 140000 of loop 0']
+    assert entries[0][1]['numberings'] == 400
+    assert entries[1][1]['pendingfields'] == 40
+    total = summarize(entries)
+    assert total['guards'] == 12
+    assert total['total'] == 712
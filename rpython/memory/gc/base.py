@@ -178,6 +178,12 @@ class GCBase(object):
     def set_max_heap_size(self, size):
         raise NotImplementedError
 
+    def get_stats(self, stats_no):
+        return -1.0
+
+    def set_gc_param(self, param_no, value):
+        return False
+
     def trace(self, obj, callback, arg):
         """Enumerate the locations inside the given obj that can contain
         GC pointers.  For each such location, callback(pointer, arg) is
@@ -16,6 +16,14 @@ Environment variables can be used to fine-tune the following parameters:
                          to size that survives minor collection * 1.5 so we
                          reclaim anything all the time.
 
+ PYPY_GC_LOW_PAUSE       Set to 1 to never exceed PYPY_GC_INCREMENT_STEP
+                         in a marking step.  By default, the objects
+                         modified by the program while marking are traced
+                         all at once, which can make the last marking step
+                         much longer than the others.  With this option
+                         they are traced incrementally too, unless the
+                         marking fails to converge.
+
  PYPY_GC_MAJOR_COLLECT   Major collection memory factor.  Default is '1.82',
                          which means trigger a major collection when the
                          memory consumed equals 1.82 times the memory
@@ -53,7 +61,7 @@ Environment variables can be used to fine-tune the following parameters:
 # XXX total addressable size.  Maybe by keeping some minimarkpage arenas
 # XXX pre-reserved, enough for a few nursery collections?  What about
 # XXX raw-malloced memory?
-import sys
+import sys, time
 from rpython.rtyper.lltypesystem import lltype, llmemory, llarena, llgroup
 from rpython.rtyper.lltypesystem.lloperation import llop
 from rpython.rtyper.lltypesystem.llmemory import raw_malloc_usage
@@ -64,6 +72,7 @@ from rpython.rlib.rarithmetic import ovfcheck, LONG_BIT, intmask, r_uint
 from rpython.rlib.rarithmetic import LONG_BIT_SHIFT
 from rpython.rlib.debug import ll_assert, debug_print, debug_start, debug_stop
 from rpython.rlib.objectmodel import specialize
+from rpython.rlib import rgc
 
 
 #
@@ -231,6 +240,11 @@ class IncrementalMiniMarkGC(MovingGCBase):
         # usage; this avoids that the upper bound grows too fast.
         "growth_rate_max": 1.4,
 
+        # If True, the marking steps are strictly bounded by
+        # 'gc_increment_step': the objects modified during marking are
+        # traced incrementally instead of all at once at the end.
+        "low_pause": False,
+
         # The number of array indices that are mapped to a single bit in
         # write_barrier_from_array().  Must be a power of two.  The default
         # value of 128 means that card pages are 512 bytes (1024 on 64-bits)
@@ -260,6 +274,7 @@ class IncrementalMiniMarkGC(MovingGCBase):
                  small_request_threshold=5*WORD,
                  major_collection_threshold=2.5,
                  growth_rate_max=2.5,   # for tests
+                 low_pause=False,
                  card_page_indices=0,
                  large_object=8*WORD,
                  ArenaCollectionClass=None,
@@ -272,8 +287,18 @@ class IncrementalMiniMarkGC(MovingGCBase):
         self.small_request_threshold = small_request_threshold
         self.major_collection_threshold = major_collection_threshold
         self.growth_rate_max = growth_rate_max
+        self.low_pause = low_pause
+        self.marking_work_left = 0.0
         self.num_major_collects = 0
+        self.num_major_started = 0
+        self.num_minor_collects = 0
+        self.total_minor_time = 0.0
+        self.max_minor_pause = 0.0
+        self.total_major_time = 0.0
+        self.max_major_pause = 0.0
+        self.total_bytes_promoted = 0.0
         self.min_heap_size = 0.0
+        self.min_heap_size_from_env = 0.0
         self.max_heap_size = 0.0
         self.max_heap_size_already_raised = False
         self.max_delta = float(r_uint(-1))
@@ -405,6 +430,7 @@ class IncrementalMiniMarkGC(MovingGCBase):
             min_heap_size = env.read_uint_from_env('PYPY_GC_MIN')
             if min_heap_size > 0:
                 self.min_heap_size = float(min_heap_size)
+                self.min_heap_size_from_env = self.min_heap_size
             else:
                 # defaults to 8 times the nursery
                 self.min_heap_size = newsize * 8
@@ -425,6 +451,10 @@ class IncrementalMiniMarkGC(MovingGCBase):
             else:
                 self.gc_increment_step = newsize * 4
             #
+            low_pause = env.read_uint_from_env('PYPY_GC_LOW_PAUSE')
+            if low_pause > 0:
+                self.low_pause = True
+            #
             self.minor_collection()    # to empty the nursery
             llarena.arena_free(self.nursery)
             self.nursery_size = newsize
@@ -432,6 +462,9 @@ class IncrementalMiniMarkGC(MovingGCBase):
         #
         if self.nursery_cleanup < self.nonlarge_max + 1:
             self.nursery_cleanup = self.nonlarge_max + 1
+        self.set_initial_cleanup()
+
+    def set_initial_cleanup(self):
         # We need exactly initial_cleanup + N*nursery_cleanup = nursery_size.
         # We choose the value of initial_cleanup to be between 1x and 2x the
         # value of nursery_cleanup.
@@ -511,16 +544,27 @@ class IncrementalMiniMarkGC(MovingGCBase):
             debug_start("gc-debug")
             self.debug_rotating_nurseries = lltype.malloc(
                 NURSARRAY, 22, flavor='raw', track_allocation=False)
-            i = 0
-            while i < 22:
-                nurs = self._alloc_nursery()
-                llarena.arena_protect(nurs, self._nursery_memory_size(), True)
-                self.debug_rotating_nurseries[i] = nurs
-                i += 1
+            self.debug_alloc_rotating_nurseries()
             debug_print("allocated", len(self.debug_rotating_nurseries),
                         "extra nurseries")
             debug_stop("gc-debug")
 
+    def debug_alloc_rotating_nurseries(self):
+        i = 0
+        while i < len(self.debug_rotating_nurseries):
+            nurs = self._alloc_nursery()
+            llarena.arena_protect(nurs, self._nursery_memory_size(), True)
+            self.debug_rotating_nurseries[i] = nurs
+            i += 1
+
+    def debug_free_rotating_nurseries(self):
+        i = 0
+        while i < len(self.debug_rotating_nurseries):
+            nurs = self.debug_rotating_nurseries[i]
+            llarena.arena_protect(nurs, self._nursery_memory_size(), False)
+            llarena.arena_free(nurs)
+            i += 1
+
     def debug_rotate_nursery(self):
         if self.debug_rotating_nurseries:
             debug_start("gc-debug")
@@ -856,13 +900,115 @@ class IncrementalMiniMarkGC(MovingGCBase):
     # Other functions in the GC API
 
     def set_max_heap_size(self, size):
-        self.max_heap_size = float(size)
+        self._set_max_heap_size(float(size))
+
+    def _set_max_heap_size(self, max_heap_size):
+        self.max_heap_size = max_heap_size
         if self.max_heap_size > 0.0:
             if self.max_heap_size < self.next_major_collection_initial:
                 self.next_major_collection_initial = self.max_heap_size
             if self.max_heap_size < self.next_major_collection_threshold:
                 self.next_major_collection_threshold = self.max_heap_size
 
+    def get_stats(self, stats_no):
+        if stats_no == rgc.STAT_NURSERY_SIZE:
+            return float(self.nursery_size)
+        elif stats_no == rgc.STAT_MINOR_COLLECTIONS:
+            return float(self.num_minor_collects)
+        elif stats_no == rgc.STAT_MAJOR_COLLECTIONS:
+            return float(self.num_major_collects)
+        elif stats_no == rgc.STAT_MAJOR_STARTED:
+            return float(self.num_major_started)
+        elif stats_no == rgc.STAT_TOTAL_MINOR_TIME:
+            return self.total_minor_time
+        elif stats_no == rgc.STAT_MAX_MINOR_PAUSE:
+            return self.max_minor_pause
+        elif stats_no == rgc.STAT_TOTAL_MAJOR_TIME:
+            return self.total_major_time
+        elif stats_no == rgc.STAT_MAX_MAJOR_PAUSE:
+            return self.max_major_pause
+        elif stats_no == rgc.STAT_BYTES_PROMOTED:
+            return self.total_bytes_promoted
+        elif stats_no == rgc.STAT_ARENA_MEMORY:
+            return float(self.ac.total_memory_used)
+        elif stats_no == rgc.STAT_RAWMALLOC_MEMORY:
+            return float(self.rawmalloced_total_size)
+        elif stats_no == rgc.STAT_MAJOR_THRESHOLD:
+            return self.next_major_collection_threshold
+        return -1.0
+
+    def set_gc_param(self, param_no, value):
+        if param_no == rgc.GC_PARAM_NURSERY_SIZE:
+            self.set_nursery_size(int(value))
+        elif param_no == rgc.GC_PARAM_MAJOR_COLLECT:
+            if value <= 1.0:
+                return False
+            self.major_collection_threshold = value
+            self.update_min_heap_size()
+        elif param_no == rgc.GC_PARAM_GROWTH:
+            if value <= 1.0:
+                return False
+            self.growth_rate_max = value
+        elif param_no == rgc.GC_PARAM_MAX_HEAP_SIZE:
+            if value < 0.0:
+                return False
+            if value == 0.0 or value > self.max_heap_size:
+                # give again a MemoryError before aborting the process
+                self.max_heap_size_already_raised = False
+            self._set_max_heap_size(value)
+        elif param_no == rgc.GC_PARAM_INCREMENT_STEP:
+            if value <= 0.0:
+                return False
+            self.gc_increment_step = int(value)
+        else:
+            return False
+        return True
+
+    def set_nursery_size(self, newsize):
+        """Replace the nursery with a new one of 'newsize' bytes, after
+        emptying the current one with a minor collection.  Note that the
+        JIT only inlines the addresses of 'nursery_free' and 'nursery_top',
+        not their values, so it is fine to move the nursery elsewhere.
+        """
+        minsize = 2 * (self.nonlarge_max + 1)
+        if newsize < minsize:
+            newsize = minsize
+        newsize &= ~(WORD-1)
+        #
+        self.minor_collection()
+        debug_start("gc-set-nursery-size")
+        debug_print("nursery size:", newsize)
+        if self.debug_rotating_nurseries:
+            self.debug_free_rotating_nurseries()
+        llarena.arena_free(self.nursery)
+        self.nursery_size = newsize
+        self.nursery = self._alloc_nursery()
+        self.set_initial_cleanup()
+        self.nursery_free = self.nursery
+        self.nursery_top = self.nursery + self.initial_cleanup
+        self.nursery_real_top = self.nursery + self.nursery_size
+        if self.debug_rotating_nurseries:
+            self.debug_alloc_rotating_nurseries()
+        self.update_min_heap_size()
+        debug_stop("gc-set-nursery-size")
+
+    def update_min_heap_size(self):
+        """Recompute min_heap_size like allocate_nursery() does at start-up,
+        after a change of the nursery size or of major_collection_threshold,
+        and raise the next major collection threshold up to it if needed.
+        """
+        if self.min_heap_size_from_env > 0.0:
+            min_heap_size = self.min_heap_size_from_env
+        elif self.read_from_env:
+            # defaults to 8 times the nursery, see setup()
+            min_heap_size = float(self.nursery_size * 8)
+        else:
+            min_heap_size = 0.0
+        self.min_heap_size = max(min_heap_size, self.nursery_size *
+                                                self.major_collection_threshold)
+        if self.next_major_collection_initial < self.min_heap_size:
+            self.set_major_threshold_from(0.0)
+
     def raw_malloc_memory_pressure(self, sizehint):
         # Decrement by 'sizehint' plus a very little bit extra.  This
         # is needed e.g. for _rawffi, which may allocate a lot of tiny
@@ -1387,6 +1533,7 @@ class IncrementalMiniMarkGC(MovingGCBase):
         that remain alive and move them out."""
         #
         debug_start("gc-minor")
+        start_time = time.time()
         #
         # Before everything else, remove from 'old_objects_pointing_to_young'
         # the young arrays.
@@ -1465,6 +1612,13 @@ class IncrementalMiniMarkGC(MovingGCBase):
         #
         self.root_walker.finished_minor_collection()
         #
+        self.num_minor_collects += 1
+        self.total_bytes_promoted += self.nursery_surviving_size
+        pause = time.time() - start_time
+        if pause > 0.0:    # the clock may go backward
+            self.total_minor_time += pause
+            if pause > self.max_minor_pause:
+                self.max_minor_pause = pause
         debug_stop("gc-minor")
 
 
@@ -1790,6 +1944,7 @@ class IncrementalMiniMarkGC(MovingGCBase):
     def major_collection_step(self, reserving_size=0):
         debug_start("gc-collect-step")
         debug_print("starting gc state: ", GC_STATES[self.gc_state])
+        start_time = time.time()
         # Debugging checks
         ll_assert(self.nursery_free == self.nursery,
                   "nursery not empty in major_collection_step()")
@@ -1802,7 +1957,11 @@ class IncrementalMiniMarkGC(MovingGCBase):
             self.objects_to_trace = self.AddressStack()
             self.collect_roots()
             self.gc_state = STATE_MARKING
+            self.num_major_started += 1
             self.more_objects_to_trace = self.AddressStack()
+            # in low-pause mode, how much tracing we do incrementally
+            # before giving up and finishing the marking in one step
+            self.marking_work_left = 2.0 * float(self.get_total_memory_used())
             #END SCANNING
         elif self.gc_state == STATE_MARKING:
             debug_print("number of objects to mark",
@@ -1816,7 +1975,9 @@ class IncrementalMiniMarkGC(MovingGCBase):
             estimate = intmask(estimate)
             remaining = self.visit_all_objects_step(estimate)
             #
-            if remaining >= estimate // 2:
+            if self.low_pause:
+                self.low_pause_marking_step(estimate, remaining)
+            elif remaining >= estimate // 2:
                 if self.more_objects_to_trace.non_empty():
                     # We consumed less than 1/2 of our step's time, and
                     # there are more objects added during the marking steps
@@ -1932,9 +2093,36 @@ class IncrementalMiniMarkGC(MovingGCBase):
         else:
             pass #XXX which exception to raise here. Should be unreachable.
 
+        pause = time.time() - start_time
+        if pause > 0.0:
+            self.total_major_time += pause
+            if pause > self.max_major_pause:
+                self.max_major_pause = pause
         debug_print("stopping, now in gc state: ", GC_STATES[self.gc_state])
         debug_stop("gc-collect-step")
 
+    def low_pause_marking_step(self, estimate, remaining):
+        # Continue with the objects modified by the mutator since the
+        # marking started, but don't exceed 'estimate' in this step.
+        while remaining > 0 and self.more_objects_to_trace.non_empty():
+            swap = self.objects_to_trace
+            self.objects_to_trace = self.more_objects_to_trace
+            self.more_objects_to_trace = swap
+            remaining = self.visit_all_objects_step(remaining)
+        #
+        # The mutator may modify objects faster than we trace them.  To
+        # ensure termination, once we traced twice the size of the heap,
+        # we finish the marking now, like in the default mode.
+        self.marking_work_left -= estimate - remaining
+        if self.marking_work_left < 0.0:
+            while (self.objects_to_trace.non_empty() or
+                   self.more_objects_to_trace.non_empty()):
+                if not self.objects_to_trace.non_empty():
+                    swap = self.objects_to_trace
+                    self.objects_to_trace = self.more_objects_to_trace
+                    self.more_objects_to_trace = swap
+                self.visit_all_objects()
+
     def _free_if_unvisited(self, hdr):
         size_gc_header = self.gcheaderbuilder.size_gc_header
         obj = hdr + size_gc_header
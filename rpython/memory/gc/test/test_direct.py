@@ -661,5 +661,150 @@ class TestIncrementalMiniMarkGCSimple(TestMiniMarkGCSimple):
         self.gc.debug_gc_step_until(incminimark.STATE_SCANNING)
         assert self.stackroots[1].x == 13
 
+    def _count_visited_in_chain(self):
+        visited = length = 0
+        obj = self.stackroots[0]
+        while obj:
+            hdr = self.gc.header(llmemory.cast_ptr_to_adr(obj))
+            if hdr.tid & incminimark.GCFLAG_VISITED:
+                visited += 1
+            length += 1
+            obj = obj.next
+        return visited, length
+
+    def _mark_chain_then_modify_it(self):
+        # a chain of 100 objects, fully marked, which is then modified
+        # while the marking is still in progress
+        self.stackroots.append(self.malloc(S))
+        for i in range(99):
+            obj = self.malloc(S)
+            obj.x = i
+            self.write(obj, 'next', self.stackroots[0])
+            self.stackroots[0] = obj
+        self.gc.debug_gc_step_until(incminimark.STATE_MARKING)
+        size_gc_header = self.gc.gcheaderbuilder.size_gc_header
+        objsize = llmemory.raw_malloc_usage(size_gc_header +
+                                            llmemory.sizeof(S))
+        self.gc.gc_increment_step = 5 * objsize
+        self.gc.visit_all_objects()
+        assert self._count_visited_in_chain() == (100, 100)
+        obj = self.stackroots[0]
+        while obj.next:
+            self.write(obj, 'prev', obj.next)
+            obj = obj.next
+        self.gc.minor_collection()
+        assert self._count_visited_in_chain() == (1, 100)
+
+    def test_marking_modified_objects_at_once(self):
+        self._mark_chain_then_modify_it()
+        self.gc.major_collection_step()
+        assert self._count_visited_in_chain() == (100, 100)
+
+    def test_low_pause_marking_steps_are_bounded(self):
+        self._mark_chain_then_modify_it()
+        self.gc.major_collection_step()
+        visited, length = self._count_visited_in_chain()
+        assert 1 < visited <= 7
+        assert self.gc.gc_state == incminimark.STATE_MARKING
+        self.gc.debug_gc_step_until(incminimark.STATE_SCANNING)
+        assert self._count_visited_in_chain() == (0, 100)
+    test_low_pause_marking_steps_are_bounded.GC_PARAMS = {'low_pause': True}
+
+    def test_low_pause_marking_terminates(self):
+        self._mark_chain_then_modify_it()
+        # pretend that the marking is not converging
+        self.gc.marking_work_left = 0.0
+        self.gc.major_collection_step()
+        assert self._count_visited_in_chain() == (100, 100)
+    test_low_pause_marking_terminates.GC_PARAMS = {'low_pause': True}
+
+    def test_get_stats(self):
+        from rpython.rlib import rgc
+        assert self.gc.get_stats(rgc.STAT_MINOR_COLLECTIONS) == 0.0
+        assert self.gc.get_stats(rgc.STAT_MAJOR_COLLECTIONS) == 0.0
+        assert self.gc.get_stats(rgc.STAT_NURSERY_SIZE) == (
+            self.gc.nursery_size)
+        for i in range(2):
+            self.stackroots.append(self.malloc(S))
+        self.gc.minor_collection()
+        assert self.gc.get_stats(rgc.STAT_MINOR_COLLECTIONS) == 1.0
+        size_gc_header = self.gc.gcheaderbuilder.size_gc_header
+        objsize = llmemory.raw_malloc_usage(size_gc_header +
+                                            llmemory.sizeof(S))
+        assert self.gc.get_stats(rgc.STAT_BYTES_PROMOTED) == 2 * objsize
+        assert self.gc.get_stats(rgc.STAT_ARENA_MEMORY) == 2 * objsize
+        assert self.gc.get_stats(rgc.STAT_RAWMALLOC_MEMORY) == 0.0
+        #
+        self.gc.collect()
+        assert self.gc.get_stats(rgc.STAT_MAJOR_COLLECTIONS) == 1.0
+        assert self.gc.get_stats(rgc.STAT_MAJOR_STARTED) == 1.0
+        minors = self.gc.get_stats(rgc.STAT_MINOR_COLLECTIONS)
+        assert minors > 1.0
+        assert self.gc.get_stats(rgc.STAT_MAJOR_THRESHOLD) == (
+            self.gc.next_major_collection_threshold)
+        total = self.gc.get_stats(rgc.STAT_TOTAL_MINOR_TIME)
+        assert 0.0 <= self.gc.get_stats(rgc.STAT_MAX_MINOR_PAUSE) <= total
+        total = self.gc.get_stats(rgc.STAT_TOTAL_MAJOR_TIME)
+        assert 0.0 <= self.gc.get_stats(rgc.STAT_MAX_MAJOR_PAUSE) <= total
+        assert self.gc.get_stats(rgc.NUM_STATS) == -1.0
+
+    def test_set_nursery_size(self):
+        from rpython.rlib import rgc
+        for i in range(3):
+            curobj = self.malloc(S)
+            curobj.x = i
+            self.stackroots.append(curobj)
+        oldnursery = self.gc.nursery
+        newsize = self.gc.nursery_size * 2
+        assert self.gc.set_gc_param(rgc.GC_PARAM_NURSERY_SIZE, newsize)
+        assert self.gc.nursery_size == newsize
+        assert self.gc.nursery != oldnursery
+        assert self.gc.nursery_free == self.gc.nursery
+        assert self.gc.nursery_top - self.gc.nursery == (
+            self.gc.initial_cleanup)
+        assert self.gc.nursery_real_top - self.gc.nursery == newsize
+        # the minimal heap size follows the nursery size
+        assert self.gc.min_heap_size == (newsize *
+                                         self.gc.major_collection_threshold)
+        assert (self.gc.next_major_collection_threshold >=
+                self.gc.min_heap_size)
+        # the objects were moved out of the old nursery
+        for i in range(3):
+            assert self.stackroots[i].x == i
+            adr = llmemory.cast_ptr_to_adr(self.stackroots[i])
+            assert not self.gc.is_in_nursery(adr)
+        # fill the new nursery a few times
+        for i in range(100):
+            curobj = self.malloc(S)
+            curobj.x = i
+            self.write(curobj, 'next', self.stackroots[-1])
+            self.stackroots[-1] = curobj
+        self.gc.collect()
+        assert self.stackroots[-1].x == 99
+        assert self.stackroots[-1].next.x == 98
+        # too small values are rounded up
+        assert self.gc.set_gc_param(rgc.GC_PARAM_NURSERY_SIZE, 1)
+        assert self.gc.nursery_size == 2 * (self.gc.nonlarge_max + 1)
+        self.malloc(S)
+
+    def test_set_gc_params(self):
+        from rpython.rlib import rgc
+        assert self.gc.set_gc_param(rgc.GC_PARAM_MAJOR_COLLECT, 3.5)
+        assert self.gc.major_collection_threshold == 3.5
+        assert self.gc.min_heap_size == self.gc.nursery_size * 3.5
+        assert not self.gc.set_gc_param(rgc.GC_PARAM_MAJOR_COLLECT, 0.5)
+        assert self.gc.set_gc_param(rgc.GC_PARAM_GROWTH, 1.25)
+        assert self.gc.growth_rate_max == 1.25
+        assert self.gc.set_gc_param(rgc.GC_PARAM_INCREMENT_STEP, 800.0)
+        assert self.gc.gc_increment_step == 800
+        assert self.gc.set_gc_param(rgc.GC_PARAM_MAX_HEAP_SIZE, 100.0)
+        assert self.gc.max_heap_size == 100.0
+        assert self.gc.next_major_collection_threshold <= 100.0
+        self.gc.max_heap_size_already_raised = True
+        assert self.gc.set_gc_param(rgc.GC_PARAM_MAX_HEAP_SIZE, 0.0)
+        assert self.gc.max_heap_size == 0.0
+        assert not self.gc.max_heap_size_already_raised
+        assert not self.gc.set_gc_param(-1, 0.0)
+
 class TestIncrementalMiniMarkGCFull(DirectGCTest):
     from rpython.memory.gc.incminimark import IncrementalMiniMarkGC as GCClass
@@ -457,6 +457,13 @@ class BaseFrameworkGCTransformer(GCTransformer):
                                            [s_gc,
                                             annmodel.SomeInteger(nonneg=True)],
                                            annmodel.s_None)
+        self.get_stats_ptr = getfn(GCClass.get_stats.im_func,
+                                   [s_gc, annmodel.SomeInteger()],
+                                   annmodel.SomeFloat())
+        self.set_gc_param_ptr = getfn(GCClass.set_gc_param.im_func,
+                                      [s_gc, annmodel.SomeInteger(),
+                                       annmodel.SomeFloat()],
+                                      annmodel.s_Bool)
 
         self.write_barrier_ptr = None
         self.write_barrier_from_array_ptr = None
@@ -969,6 +976,22 @@ class BaseFrameworkGCTransformer(GCTransformer):
                                   self.c_const_gc,
                                   v_size])
 
+    def gct_gc_get_stats(self, hop):
+        [v_stats_no] = hop.spaceop.args
+        hop.genop("direct_call",
+                  [self.get_stats_ptr, self.c_const_gc, v_stats_no],
+                  resultvar=hop.spaceop.result)
+
+    def gct_gc_set_param(self, hop):
+        # changing the nursery size does a minor collection
+        livevars = self.push_roots(hop)
+        [v_param_no, v_value] = hop.spaceop.args
+        hop.genop("direct_call",
+                  [self.set_gc_param_ptr, self.c_const_gc, v_param_no,
+                   v_value],
+                  resultvar=hop.spaceop.result)
+        self.pop_roots(hop, livevars)
+
     def gct_gc_thread_run(self, hop):
         assert self.translator.config.translation.thread
         if hasattr(self.root_walker, 'thread_run_ptr'):
@@ -361,6 +361,13 @@ class BaseGCTransformer(object):
         return hop.cast_result(rmodel.inputconst(lltype.Ptr(ARRAY_TYPEID_MAP),
                                         lltype.nullptr(ARRAY_TYPEID_MAP)))
 
+    def gct_gc_get_stats(self, hop):
+        # statistics are only available with the framework GCs
+        return hop.cast_result(rmodel.inputconst(lltype.Float, -1.0))
+
+    def gct_gc_set_param(self, hop):
+        return hop.cast_result(rmodel.inputconst(lltype.Bool, False))
+
 class MinimalGCTransformer(BaseGCTransformer):
     def __init__(self, parenttransformer):
         BaseGCTransformer.__init__(self, parenttransformer.translator)
@@ -122,6 +122,12 @@ class GCManagedHeap(object):
     def can_move(self, addr):
         return self.gc.can_move(addr)
 
+    def get_stats(self, stats_no):
+        return self.gc.get_stats(stats_no)
+
+    def set_gc_param(self, param_no, value):
+        return self.gc.set_gc_param(param_no, value)
+
     def weakref_create_getlazy(self, objgetter):
         # we have to be lazy in reading the llinterp variable containing
         # the 'obj' pointer, because the gc.malloc() call below could
@@ -1293,6 +1293,52 @@ class TestIncrementalMiniMarkGC(TestMiniMarkGC):
                          }
             root_stack_depth = 200
 
+    def define_get_stats(cls):
+        S = lltype.GcStruct('S', ('x', lltype.Signed))
+        def f():
+            before = rgc.get_stats(rgc.STAT_MAJOR_COLLECTIONS)
+            for i in range(100):
+                lltype.malloc(S)
+            rgc.collect()
+            after = rgc.get_stats(rgc.STAT_MAJOR_COLLECTIONS)
+            minors = rgc.get_stats(rgc.STAT_MINOR_COLLECTIONS)
+            nursery = rgc.get_stats(rgc.STAT_NURSERY_SIZE)
+            return ((after == before + 1.0) * 100 + (minors > 1.0) * 10 +
+                    (nursery > 0.0))
+        return f
+
+    def test_get_stats(self):
+        run = self.runner("get_stats")
+        res = run([])
+        assert res == 111
+
+    def define_set_nursery_size(cls):
+        S = lltype.GcStruct('S', ('x', lltype.Signed),
+                            ('next', lltype.Ptr(lltype.GcForwardReference())))
+        S.next.TO.become(S)
+        def f():
+            head = lltype.nullptr(S)
+            for i in range(200):
+                if i == 50:
+                    rgc.set_gc_param(rgc.GC_PARAM_NURSERY_SIZE, 64.0 * WORD)
+                if i == 150:
+                    rgc.set_gc_param(rgc.GC_PARAM_NURSERY_SIZE, 1.0)
+                s = lltype.malloc(S)
+                s.x = i
+                s.next = head
+                head = s
+            total = 0
+            while head:
+                total += head.x
+                head = head.next
+            return total
+        return f
+
+    def test_set_nursery_size(self):
+        run = self.runner("set_nursery_size")
+        res = run([])
+        assert res == 199 * 200 // 2
+
 
 # ________________________________________________________________
 # tagged pointers
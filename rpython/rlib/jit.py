@@ -448,11 +448,16 @@ PARAMETER_DOCS = {
     'trace_limit': 'number of recorded operations before we abort tracing with ABORT_TOO_LONG',
     'inlining': 'inline python functions or not (1/0)',
     'loop_longevity': 'a parameter controlling how long loops will be kept before being freed, an estimate',
+    'max_code_memory': 'number of bytes of machine code above which the least recently used loops are freed (0=no limit)',
+    'linear_scan': 'use the linear-scan register allocator of the backend instead of the greedy one (1/0)',
     'retrace_limit': 'how many times we can try retracing before giving up',
     'max_retrace_guards': 'number of extra guards a retrace can cause',
     'max_unroll_loops': 'number of extra unrollings a loop can cause',
+    'defer_bridges': 'number of traced bridges that can wait to be compiled by pypyjit.compile_pending_bridges() (0=compile immediately)',
     'enable_opts': 'INTERNAL USE ONLY (MAY NOT WORK OR LEAD TO CRASHES): '
-                   'optimizations to enable, or all = %s' % ENABLE_ALL_OPTS,
+                   'optimizations to enable, or all = %s; '
+                   'the packing of raw memory operations, vec, is not part '
+                   'of all (use all:vec)' % ENABLE_ALL_OPTS,
     }
 
 PARAMETERS = {'threshold': 1039, # just above 1024, prime
@@ -462,9 +467,12 @@ PARAMETERS = {'threshold': 1039, # just above 1024, prime
               'trace_limit': 6000,
               'inlining': 1,
               'loop_longevity': 1000,
+              'max_code_memory': 0,
+              'linear_scan': 0,
               'retrace_limit': 5,
               'max_retrace_guards': 15,
               'max_unroll_loops': 0,
+              'defer_bridges': 0,
               'enable_opts': 'all',
               }
 unroll_parameters = unrolling_iterable(PARAMETERS.items())
@@ -659,6 +667,14 @@ def set_param_to_default(driver, name):
     """Reset one of the tunable JIT parameters to its default value."""
     _set_param(driver, name, None)
 
+def trace_next_iteration(driver, *greenargs):
+    """Make the JIT start tracing the next time it reaches the
+    jit_merge_point() or a can_enter_jit() of 'driver' with these green
+    arguments, as if their counter had already reached the threshold.
+    Used to warm up the JIT with the hot loops of a previous run.
+    """
+    # special-cased by ExtRegistryEntry
+
 def set_user_param(driver, text):
     """Set the tunable JIT parameters from a user-supplied string
     following the format 'param=value,param=value', or 'off' to
@@ -880,6 +896,25 @@ class ExtSetParam(ExtRegistryEntry):
         return hop.genop('jit_marker', vlist,
                          resulttype=lltype.Void)
 
+class ExtTraceNextIteration(ExtRegistryEntry):
+    _about_ = trace_next_iteration
+
+    def compute_result_annotation(self, s_driver, *args_s):
+        from rpython.annotator import model as annmodel
+        assert s_driver.is_constant()
+        assert len(args_s) == len(s_driver.const.greens)
+        return annmodel.s_None
+
+    def specialize_call(self, hop):
+        from rpython.rtyper.lltypesystem import lltype
+        hop.exception_cannot_occur()
+        driver = hop.inputarg(lltype.Void, arg=0)
+        vlist = [hop.inputconst(lltype.Void, "trace_next_iteration"), driver]
+        for i in range(1, hop.nb_args):
+            vlist.append(hop.inputarg(hop.args_r[i], arg=i))
+        return hop.genop('jit_marker', vlist,
+                         resulttype=lltype.Void)
+
 class AsmInfo(object):
     """ An addition to JitDebugInfo concerning assembler. Attributes:
 
@@ -1,10 +1,10 @@
 from rpython.annotator import model as annmodel
 from rpython.rtyper.llannotation import SomePtr, lltype_to_annotation
-from rpython.rlib.objectmodel import specialize
+from rpython.rlib.objectmodel import specialize, compute_unique_id
 from rpython.rtyper.annlowlevel import (cast_instance_to_base_ptr,
     cast_base_ptr_to_instance, llstr)
 from rpython.rtyper.extregistry import ExtRegistryEntry
-from rpython.rtyper.lltypesystem import llmemory, lltype, rclass
+from rpython.rtyper.lltypesystem import llmemory, lltype, rclass, rstr
 
 
 def register_helper(s_result):
@@ -117,10 +117,18 @@ def box_isint(llbox):
     from rpython.jit.metainterp.history import INT
     return _cast_to_box(llbox).type == INT
 
+@register_helper(annmodel.SomeInteger())
+def compile_pending_bridges(warmrunnerdesc):
+    # see the 'defer_bridges' JIT parameter; returns the number of
+    # bridges attached
+    from rpython.jit.metainterp.compile import compile_pending_bridges
+    return compile_pending_bridges(warmrunnerdesc.metainterp_sd)
+
 # ------------------------- stats interface ---------------------------
 
 @register_helper(annmodel.SomeBool())
 def stats_set_debug(warmrunnerdesc, flag):
+    warmrunnerdesc.metainterp_sd.globaldata.set_count_guard_failures(flag)
     return warmrunnerdesc.metainterp_sd.cpu.set_debug(flag)
 
 @register_helper(annmodel.SomeInteger())
@@ -131,6 +139,12 @@ def stats_get_counter_value(warmrunnerdesc, no):
 def stats_get_times_value(warmrunnerdesc, no):
     return warmrunnerdesc.metainterp_sd.profiler.times[no]
 
+@register_helper(annmodel.SomeInteger())
+def stats_get_current_event(warmrunnerdesc):
+    # Counters.TRACING or Counters.BACKEND while the JIT is compiling,
+    # or -1
+    return warmrunnerdesc.metainterp_sd.profiler.get_current_event()
+
 LOOP_RUN_CONTAINER = lltype.GcArray(lltype.Struct('elem',
                                                   ('type', lltype.Char),
                                                   ('number', lltype.Signed),
@@ -139,3 +153,72 @@ LOOP_RUN_CONTAINER = lltype.GcArray(lltype.Struct('elem',
 @register_helper(lltype.Ptr(LOOP_RUN_CONTAINER))
 def stats_get_loop_run_times(warmrunnerdesc):
     return warmrunnerdesc.metainterp_sd.cpu.get_all_loop_runs()
+
+@register_helper(lltype.Ptr(LOOP_RUN_CONTAINER))
+def stats_get_guard_failures(warmrunnerdesc):
+    # the guards that failed without going to a bridge, with type 'g' and
+    # the unique id of the guard's descr as number.  The failures of the
+    # guards that have a bridge are the 'b' counters of the backend.
+    descrs = warmrunnerdesc.metainterp_sd.globaldata.get_failed_guards()
+    l = lltype.malloc(LOOP_RUN_CONTAINER, len(descrs))
+    for i in range(len(descrs)):
+        l[i].type = 'g'
+        l[i].number = compute_unique_id(descrs[i])
+        l[i].counter = descrs[i].failure_count
+    return l
+
+MEMORY_USAGE = lltype.GcStruct('memory_usage',
+                               ('code', lltype.Signed),
+                               ('allocated', lltype.Signed),
+                               ('limit', lltype.Signed),
+                               ('alive_loops', lltype.Signed),
+                               ('evicted_loops', lltype.Signed))
+
+@register_helper(lltype.Ptr(MEMORY_USAGE))
+def stats_get_memory_usage(warmrunnerdesc):
+    # the bytes of machine code in use, the bytes reserved for it, the
+    # 'max_code_memory' limit, and the loops kept alive or evicted by
+    # the memory manager
+    memmgr = warmrunnerdesc.memory_manager
+    cpu = warmrunnerdesc.metainterp_sd.cpu
+    usage = lltype.malloc(MEMORY_USAGE)
+    usage.code = cpu.get_code_memory_usage()
+    usage.allocated = cpu.get_code_memory_allocated()
+    usage.limit = memmgr.max_code_memory
+    usage.alive_loops = len(memmgr.alive_loops)
+    usage.evicted_loops = memmgr.evicted_loops
+    return usage
+
+ABORT_STATS = lltype.GcStruct('abort_stats',
+                              ('location', lltype.Ptr(rstr.STR)),
+                              ('count', lltype.Signed),
+                              ('reasons', lltype.Ptr(lltype.GcArray(
+                                  lltype.Signed))),
+                              ('last_trace_length', lltype.Signed),
+                              ('max_trace_length', lltype.Signed),
+                              ('inlining_disabled', lltype.Bool),
+                              ('backoff', lltype.Signed))
+ABORT_STATS_CONTAINER = lltype.GcArray(lltype.Ptr(ABORT_STATS))
+
+@register_helper(lltype.Ptr(ABORT_STATS_CONTAINER))
+def stats_get_abort_stats(warmrunnerdesc):
+    # one entry per greenkey whose tracing was aborted or whose inlining
+    # was disabled; 'reasons' counts the aborts by reason, starting at
+    # Counters.ABORT_TOO_LONG
+    all_stats = warmrunnerdesc.metainterp_sd.globaldata.abort_stats
+    l = lltype.malloc(ABORT_STATS_CONTAINER, len(all_stats))
+    for i in range(len(all_stats)):
+        stats = all_stats[i]
+        item = lltype.malloc(ABORT_STATS)
+        item.location = llstr(stats.location)
+        item.count = stats.count
+        item.reasons = lltype.malloc(ABORT_STATS.reasons.TO,
+                                     len(stats.reasons))
+        for j in range(len(stats.reasons)):
+            item.reasons[j] = stats.reasons[j]
+        item.last_trace_length = stats.last_trace_length
+        item.max_trace_length = stats.max_trace_length
+        item.inlining_disabled = stats.inlining_disabled
+        item.backoff = stats.backoff
+        l[i] = item
+    return l
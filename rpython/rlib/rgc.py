@@ -50,6 +50,68 @@ class SetMaxHeapSizeEntry(ExtRegistryEntry):
         return hop.genop('gc_set_max_heap_size', [v_nbytes],
                          resulttype=lltype.Void)
 
+# Statistics returned by get_stats(), indexed by these numbers.  The
+# times are in seconds and the sizes in bytes.
+STAT_NURSERY_SIZE       = 0
+STAT_MINOR_COLLECTIONS  = 1
+STAT_MAJOR_COLLECTIONS  = 2
+STAT_MAJOR_STARTED      = 3
+STAT_TOTAL_MINOR_TIME   = 4
+STAT_MAX_MINOR_PAUSE    = 5
+STAT_TOTAL_MAJOR_TIME   = 6
+STAT_MAX_MAJOR_PAUSE    = 7
+STAT_BYTES_PROMOTED     = 8
+STAT_ARENA_MEMORY       = 9
+STAT_RAWMALLOC_MEMORY   = 10
+STAT_MAJOR_THRESHOLD    = 11
+NUM_STATS               = 12
+
+def get_stats(stats_no):
+    """Return one of the STAT_* counters of the GC, as a float.
+    Returns -1.0 if the GC does not support statistics.
+    """
+    return 0.0
+
+class GetStatsEntry(ExtRegistryEntry):
+    _about_ = get_stats
+
+    def compute_result_annotation(self, s_stats_no):
+        from rpython.annotator import model as annmodel
+        return annmodel.SomeFloat()
+
+    def specialize_call(self, hop):
+        [v_stats_no] = hop.inputargs(lltype.Signed)
+        hop.exception_cannot_occur()
+        return hop.genop('gc_get_stats', [v_stats_no],
+                         resulttype=hop.r_result)
+
+# Parameters that can be changed by set_gc_param().
+GC_PARAM_NURSERY_SIZE   = 0
+GC_PARAM_MAJOR_COLLECT  = 1
+GC_PARAM_GROWTH         = 2
+GC_PARAM_MAX_HEAP_SIZE  = 3
+GC_PARAM_INCREMENT_STEP = 4
+
+def set_gc_param(param_no, value):
+    """Change at run-time one of the GC_PARAM_* parameters, which are
+    otherwise read from the PYPY_GC_* environment variables at startup.
+    Changing the nursery size causes a minor collection.  Returns False
+    if the GC does not support changing this parameter.
+    """
+    return False
+
+class SetGcParamEntry(ExtRegistryEntry):
+    _about_ = set_gc_param
+
+    def compute_result_annotation(self, s_param_no, s_value):
+        from rpython.annotator import model as annmodel
+        return annmodel.s_Bool
+
+    def specialize_call(self, hop):
+        vlist = hop.inputargs(lltype.Signed, lltype.Float)
+        hop.exception_cannot_occur()
+        return hop.genop('gc_set_param', vlist, resulttype=hop.r_result)
+
 def can_move(p):
     """Check if the GC object 'p' is at an address that can move.
     Must not be called with None.  With non-moving GCs, it is always False.
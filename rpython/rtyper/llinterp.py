@@ -901,6 +901,12 @@ class LLFrame(object):
     def op_gc_typeids_z(self):
         raise NotImplementedError("gc_typeids_z")
 
+    def op_gc_get_stats(self, stats_no):
+        return self.heap.get_stats(stats_no)
+
+    def op_gc_set_param(self, param_no, value):
+        return self.heap.set_gc_param(param_no, value)
+
     def op_gc_gcflag_extra(self, subopnum, *args):
         return self.heap.gcflag_extra(subopnum, *args)
 
@@ -156,8 +156,11 @@ class OrderedDictRepr(AbstractDictRepr):
 
     def __init__(self, rtyper, key_repr, value_repr, dictkey, dictvalue,
                  custom_eq_hash=None, force_non_null=False):
-        assert not force_non_null
+        # 'force_non_null' is accepted for compatibility with DictRepr but
+        # ignored: deleted entries are marked with a dummy object or an
+        # explicit flag, never with NULL, so NULL keys and values are fine.
         self.rtyper = rtyper
+        self.force_non_null = force_non_null
         self.finalized = False
         self.DICT = lltype.GcForwardReference()
         self.lowleveltype = lltype.Ptr(self.DICT)
@@ -289,6 +292,11 @@ class OrderedDictRepr(AbstractDictRepr):
         hop.exception_cannot_occur()
         return hop.gendirectcall(ll_dict_update, v_dic1, v_dic2)
 
+    def rtype_method__prepare_dict_update(self, hop):
+        v_dict, v_num = hop.inputargs(self, lltype.Signed)
+        hop.exception_cannot_occur()
+        hop.gendirectcall(ll_prepare_dict_update, v_dict, v_num)
+
     def _rtype_method_kvi(self, hop, ll_func):
         v_dic, = hop.inputargs(self)
         r_list = hop.r_result
@@ -1014,6 +1022,33 @@ def ll_dict_update(dic1, dic2):
         i += 1
 ll_dict_update.oopspec = 'odict.update(dic1, dic2)'
 
+def ll_prepare_dict_update(d, num_extra):
+    # Prescale 'd' for 'num_extra' items, assuming that most items don't
+    # collide.  If this assumption is false, 'd' becomes too large by at
+    # most 'num_extra'.  The logic is based on:
+    #      (d.resize_counter - 1) // 3 = room left in d
+    #  so, if num_extra == 1, we need d.resize_counter > 3
+    #      if num_extra == 2, we need d.resize_counter > 6  etc.
+    jit.conditional_call(d.resize_counter <= num_extra * 3,
+                         _ll_dict_resize_to, d, num_extra)
+
+def _ll_dict_resize_to(d, num_extra):
+    # grow the dense 'entries' array first, so that the following
+    # num_extra insertions don't need to reallocate it, and then pick
+    # an index array large enough for it (see MIN_INDEXES_MINUS_ENTRIES)
+    new_allocated = d.num_used_items + num_extra
+    if len(d.entries) < new_allocated:
+        newitems = lltype.malloc(lltype.typeOf(d).TO.entries.TO, new_allocated)
+        rgc.ll_arraycopy(d.entries, newitems, 0, 0, d.num_used_items)
+        d.entries = newitems
+    else:
+        new_allocated = len(d.entries)
+    new_estimate = new_allocated * 2
+    new_size = DICT_INITSIZE
+    while new_size <= new_estimate:
+        new_size *= 2
+    ll_dict_reindex(d, new_size)
+
 # this is an implementation of keys(), values() and items()
 # in a single function.
 # note that by specialization on func, three different
@@ -251,6 +251,26 @@ class TestRDictDirect(object):
         assert rordereddict.ll_dict_pop_default(ll_d, llstr("k"), 40) == 40
         assert rordereddict.ll_dict_pop_default(ll_d, llstr("j"), 39) == 39
 
+    def test_prepare_dict_update(self):
+        DICT = self._get_str_dict()
+        ll_d = rordereddict.ll_newdict(DICT)
+        rordereddict.ll_dict_setitem(ll_d, llstr("k"), 5)
+        rordereddict.ll_dict_setitem(ll_d, llstr("j"), 6)
+        rordereddict.ll_dict_delitem(ll_d, llstr("k"))
+        rordereddict.ll_prepare_dict_update(ll_d, 100)
+        assert len(ll_d.entries) >= 102
+        assert ll_d.resize_counter > 300
+        entries = ll_d.entries
+        indexes_length = len(get_indexes(ll_d))
+        for i in range(100):
+            rordereddict.ll_dict_setitem(ll_d, llstr(str(i)), i)
+        assert ll_d.entries == entries      # no reallocation
+        assert len(get_indexes(ll_d)) == indexes_length
+        assert ll_d.num_items == 101
+        assert rordereddict.ll_dict_getitem(ll_d, llstr("j")) == 6
+        for i in range(100):
+            assert rordereddict.ll_dict_getitem(ll_d, llstr(str(i))) == i
+
 class TestRDictDirectDummyKey(TestRDictDirect):
     class dummykeyobj:
         ll_dummy_value = llstr("dupa")
@@ -344,3 +364,52 @@ class TestOrderedRDict(BaseTestRDict):
 
         res = self.interpret(func, [])
         assert res in [5263, 6352]
+
+    def test_r_dict_force_non_null(self):
+        def eq(a, b):
+            return a == b
+        def rhash(a):
+            return 3
+
+        def func(i):
+            d = objectmodel.r_ordereddict(eq, rhash, force_non_null=True)
+            if not i:
+                d[None] = i
+            else:
+                d[str(i)] = i
+            return "12" in d, d
+
+        llres = self.interpret(func, [12])
+        assert llres.item0 == 1
+
+    def test_prebuilt_r_ordereddict(self):
+        def deq(n, m):
+            return n == m
+        def dhash(n):
+            return ~n
+        prebuilt = objectmodel.r_ordereddict(deq, dhash)
+        prebuilt[3] = 4
+        prebuilt[1] = 2
+        def func(n):
+            d = prebuilt.copy()
+            d[n] = 6
+            res = 0
+            for key, value in d.iteritems():
+                res = res * 10 + key
+                res = res * 10 + value
+            return res
+
+        res = self.interpret(func, [5])
+        assert res == 341256
+
+    def test_prepare_dict_update(self):
+        def func(n):
+            d = OrderedDict()
+            d[-1] = -1
+            objectmodel.prepare_dict_update(d, n)
+            for i in range(n):
+                d[i] = i * 2
+            return len(d) * 1000 + d[n - 1]
+
+        res = self.interpret(func, [50])
+        assert res == 51098
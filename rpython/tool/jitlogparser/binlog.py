@@ -0,0 +1,282 @@
+""" Reader for the binary log written with PYPYJITLOG=filename, see
+rpython/jit/metainterp/jitlog.py for the format.
+
+Reading the log is done in one pass that only decodes the headers of the
+records: the operations of the traces are decoded when they are asked for.
+The traces can be turned back into the text of the 'jit-log-*' sections
+of PYPYLOG, so that the tools based on parser.py work unchanged.
+"""
+
+import sys, mmap
+
+from rpython.jit.metainterp.jitlog import (MARK_STRING, MARK_OPNAMES,
+    MARK_TRACE, MARK_ASM_ADDR, MARK_ENTRY_COUNT, STAGE_NOOPT, STAGE_OPT,
+    STAGE_ASM, KIND_LOOP, KIND_BRIDGE, FLAG_OFFSET, FLAG_RESULT, FLAG_DESCR,
+    FLAG_GUARD, FLAG_FAILARGS, VERSION)
+from rpython.tool.jitlogparser.parser import SimpleParser, split_trace
+
+STAGE_NAMES = {STAGE_NOOPT: 'noopt', STAGE_OPT: 'opt', STAGE_ASM: 'rewritten'}
+
+
+class BinlogError(Exception):
+    pass
+
+
+def read_uint(data, pos):
+    result = 0
+    shift = 0
+    while True:
+        byte = ord(data[pos])
+        pos += 1
+        result |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+def read_int(data, pos):
+    value, pos = read_uint(data, pos)
+    return (value >> 1) ^ -(value & 1), pos
+
+
+class Op(object):
+    def __init__(self, name, offset, result, args, descr, guard, failargs):
+        self.name = name
+        self.offset = offset        # -1 if unknown
+        self.result = result        # None if no result
+        self.args = args
+        self.descr = descr          # string or None
+        self.guard = guard          # number of the guard or None
+        self.failargs = failargs    # list or None
+
+    def as_text(self):
+        if self.name == 'debug_merge_point':
+            # like in the text log, commas are used for argument splitting
+            return "debug_merge_point(%s, %s, '%s')" % (
+                self.args[0], self.args[1], self.descr.replace(',', '.'))
+        args = self.args[:]
+        if self.guard is not None:
+            args.append('descr=<Guard0x%x>' % self.guard)
+        elif self.descr is not None:
+            args.append('descr=' + self.descr)
+        s = '%s(%s)' % (self.name, ', '.join(args))
+        if self.result is not None:
+            s = '%s = %s' % (self.result, s)
+        if self.offset != -1:
+            s = '+%d: %s' % (self.offset, s)
+        if self.failargs is not None:
+            s += ' [%s]' % (', '.join(self.failargs),)
+        return s
+
+
+class Trace(object):
+    """A loop or a bridge at one stage of the compilation.  The operations
+    are only decoded when needed."""
+
+    def __init__(self, log, stage, kind, number, type, name, start, stop):
+        self.log = log
+        self.stage = stage
+        self.kind = kind
+        self.number = number     # loop number, or guard number for bridges
+        self.type = type
+        self.name = name
+        self._start = start
+        self._stop = stop
+
+    def is_bridge(self):
+        return self.kind == KIND_BRIDGE
+
+    def get_addr(self):
+        """(start, end) of the machine code, or None."""
+        return self.log.addrs.get((self.kind, self.number))
+
+    def decode(self):
+        """Return (inputargs, operations)."""
+        data = self.log.data
+        strings = self.log.strings
+        opnames = self.log.opnames
+        nargs, pos = read_uint(data, self._start)
+        inputargs = []
+        for i in range(nargs):
+            arg, pos = read_uint(data, pos)
+            inputargs.append(strings[arg])
+        nops, pos = read_uint(data, pos)
+        operations = []
+        for i in range(nops):
+            opnum, pos = read_uint(data, pos)
+            flags = ord(data[pos])
+            pos += 1
+            offset = -1
+            result = descr = guard = failargs = None
+            if flags & FLAG_OFFSET:
+                offset, pos = read_uint(data, pos)
+            if flags & FLAG_RESULT:
+                res, pos = read_uint(data, pos)
+                result = strings[res]
+            nargs, pos = read_uint(data, pos)
+            args = []
+            for j in range(nargs):
+                arg, pos = read_uint(data, pos)
+                args.append(strings[arg])
+            if flags & FLAG_GUARD:
+                guard, pos = read_int(data, pos)
+            elif flags & FLAG_DESCR:
+                d, pos = read_uint(data, pos)
+                descr = strings[d]
+            if flags & FLAG_FAILARGS:
+                nfail, pos = read_uint(data, pos)
+                failargs = []
+                for j in range(nfail):
+                    arg, pos = read_uint(data, pos)
+                    failargs.append(strings[arg])
+            operations.append(Op(opnames[opnum], offset, result, args,
+                                 descr, guard, failargs))
+        assert pos == self._stop
+        return inputargs, operations
+
+    def comment(self, nops):
+        if self.kind == KIND_BRIDGE:
+            return '# bridge out of Guard 0x%x with %d ops' % (self.number,
+                                                               nops)
+        return '# Loop %d (%s) : %s with %d ops' % (self.number, self.name,
+                                                   self.type, nops)
+
+    def as_text(self):
+        """The trace in the format of the text log."""
+        inputargs, operations = self.decode()
+        lines = [self.comment(len(operations)),
+                 '[%s]' % (', '.join(inputargs),)]
+        for op in operations:
+            lines.append(op.as_text())
+        return '\n'.join(lines) + '\n'
+
+    def parse(self, ParserCls=SimpleParser):
+        parser = ParserCls(self.as_text(), None, {}, 'lltype', None,
+                           nonstrict=True)
+        return parser.parse()
+
+    def __repr__(self):
+        if self.kind == KIND_BRIDGE:
+            what = 'bridge out of guard 0x%x' % (self.number,)
+        else:
+            what = 'loop %d' % (self.number,)
+        return '<Trace %s %s>' % (STAGE_NAMES[self.stage], what)
+
+
+class BinaryLog(object):
+    """The index of a binary log: strings, traces, machine code addresses
+    and entry counts."""
+
+    def __init__(self, data):
+        self.data = data
+        self.strings = ['']
+        self.opnames = {}
+        self.traces = []
+        self.addrs = {}      # (kind, number) -> (start, end)
+        self.counts = {}     # 'entry N', 'bridge N', 'TargetToken(N)' -> count
+        self.truncated = False
+        self._index()
+
+    def _index(self):
+        data = self.data
+        if data[:6] != 'JITLOG':
+            raise BinlogError("not a binary JIT log")
+        if ord(data[6]) != VERSION:
+            raise BinlogError("unsupported version %d" % (ord(data[6]),))
+        pos = 7
+        end = len(data)
+        strings = self.strings
+        while pos < end:
+            mark = data[pos]
+            try:
+                length, start = read_uint(data, pos + 1)
+            except IndexError:
+                self.truncated = True
+                break
+            stop = start + length
+            if stop > end:
+                self.truncated = True   # e.g. the process was killed
+                break
+            if mark == MARK_STRING:
+                number, p = read_uint(data, start)
+                size, p = read_uint(data, p)
+                assert number == len(strings)
+                strings.append(data[p:p + size])
+            elif mark == MARK_TRACE:
+                stage = ord(data[start])
+                kind = ord(data[start + 1])
+                number, p = read_int(data, start + 2)
+                type, p = read_uint(data, p)
+                name, p = read_uint(data, p)
+                self.traces.append(Trace(self, stage, kind, number,
+                                         strings[type], strings[name],
+                                         p, stop))
+            elif mark == MARK_ASM_ADDR:
+                kind = ord(data[start])
+                number, p = read_int(data, start + 1)
+                addr_start, p = read_uint(data, p)
+                addr_end, p = read_uint(data, p)
+                self.addrs[kind, number] = (addr_start, addr_end)
+            elif mark == MARK_ENTRY_COUNT:
+                type = data[start]
+                number, p = read_int(data, start + 1)
+                count, p = read_uint(data, p)
+                if type == 'l':
+                    key = 'TargetToken(%d)' % (number,)
+                elif type == 'b':
+                    key = 'bridge %d' % (number,)
+                else:
+                    key = 'entry %d' % (number,)
+                self.counts[key] = count
+            elif mark == MARK_OPNAMES:
+                count, p = read_uint(data, start)
+                for i in range(count):
+                    opnum, p = read_uint(data, p)
+                    size, p = read_uint(data, p)
+                    self.opnames[opnum] = data[p:p + size]
+                    p += size
+            # unknown records are skipped
+            pos = stop
+
+    def get_traces(self, stage=STAGE_OPT):
+        return [trace for trace in self.traces if trace.stage == stage]
+
+
+def read_binlog(filename):
+    f = open(filename, 'rb')
+    try:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    finally:
+        f.close()
+    return BinaryLog(data)
+
+
+def import_binlog(filename, ParserCls=SimpleParser):
+    """Like parser.import_log(), but for a binary log: return the log and
+    the list of optimized loops split at their labels, with the entry
+    counts already set."""
+    log = read_binlog(filename)
+    loops = []
+    for trace in log.get_traces(STAGE_OPT):
+        loops += split_trace(trace.parse(ParserCls))
+    for loop in loops:
+        if loop.descr in log.counts:
+            loop.count = log.counts[loop.descr]
+    return log, loops
+
+
+def main(argv):
+    """Print a binary log in the format of PYPYLOG."""
+    log = read_binlog(argv[0])
+    for trace in log.traces:
+        section = 'jit-log-%s-%s' % (STAGE_NAMES[trace.stage],
+                                     ['loop', 'bridge'][trace.kind])
+        print '[0] {%s' % (section,)
+        sys.stdout.write(trace.as_text())
+        print '[0] %s}' % (section,)
+    print '[0] {jit-backend-counts'
+    for key, count in sorted(log.counts.items()):
+        print '%s:%d' % (key, count)
+    print '[0] jit-backend-counts}'
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,152 @@
+import py
+from rpython.jit.tool.oparser import pure_parse
+from rpython.jit.metainterp import jitlog
+from rpython.jit.metainterp.history import BasicFailDescr, AbstractDescr
+from rpython.jit.metainterp.logger import LogOperations
+from rpython.jit.metainterp.test import test_logger
+from rpython.tool.jitlogparser.binlog import (read_binlog, import_binlog,
+    read_uint, read_int, BinlogError)
+from rpython.rlib.rstring import StringBuilder
+
+
+def test_varints():
+    for value in [0, 1, 127, 128, 300, 2**31, 2**63 - 1]:
+        builder = StringBuilder()
+        jitlog.encode_uint(builder, value)
+        data = builder.build()
+        assert read_uint(data, 0) == (value, len(data))
+    for value in [0, -1, 1, -64, 64, -2**40, 2**40, -2**63, 2**63 - 1]:
+        builder = StringBuilder()
+        jitlog.encode_int(builder, value)
+        data = builder.build()
+        assert read_int(data, 0) == (value, len(data))
+    builder = StringBuilder()
+    jitlog.encode_int(builder, -1)
+    assert builder.build() == '\x01'
+
+
+class TestBinaryLog(object):
+    def setup_method(self, meth):
+        self.metainterp_sd = test_logger.TestLogger().make_metainterp_sd()
+        self.filename = str(py.test.ensuretemp('binlog').join(meth.__name__))
+        self.log = jitlog.JitLog()
+        self.log.open(self.filename)
+
+    def text_of(self, loop, ops_offset=None):
+        logops = LogOperations(self.metainterp_sd, True)
+        return test_logger.capturing(logops._log_operations,
+                                     loop.inputargs, loop.operations,
+                                     ops_offset)
+
+    def log_trace(self, loop, stage, kind, number, ops_offset=None):
+        self.log.log_trace(LogOperations(self.metainterp_sd, True), stage,
+                           kind, number, 'loop', 'name', loop.inputargs,
+                           loop.operations, ops_offset)
+
+    def test_roundtrip(self):
+        namespace = {'fdescr': BasicFailDescr(), 'xdescr': NamedDescr('x')}
+        loop = pure_parse('''
+        [i0, p1, f2]
+        debug_merge_point(0, 1, 2)
+        i3 = int_add(i0, 1)
+        i4 = int_lt(i3, 10)
+        guard_true(i4, descr=fdescr) [i3, p1]
+        f5 = float_add(f2, 1.5)
+        i6 = getfield_gc(p1, descr=xdescr)
+        jump(i3, p1, f5)
+        ''', namespace=namespace)
+        ops_offset = {loop.operations[1]: 10, loop.operations[3]: 24}
+        self.log_trace(loop, jitlog.STAGE_OPT, jitlog.KIND_LOOP, 3,
+                       ops_offset)
+        self.log.finish()
+        log = read_binlog(self.filename)
+        assert not log.truncated
+        [trace] = log.traces
+        assert (trace.stage, trace.kind, trace.number) == (
+            jitlog.STAGE_OPT, jitlog.KIND_LOOP, 3)
+        text = trace.as_text().splitlines()
+        assert text[0] == '# Loop 3 (name) : loop with 7 ops'
+        expected = self.text_of(loop, ops_offset).splitlines()
+        assert text[1:] == [line.strip() for line in expected]
+        parsed = trace.parse()
+        assert [op.name for op in parsed.operations] == [
+            'debug_merge_point', 'int_add', 'int_lt', 'guard_true',
+            'float_add', 'getfield_gc', 'jump']
+
+    def test_strings_are_interned(self):
+        loop = pure_parse('''
+        [i0]
+        i1 = int_add(i0, 1)
+        jump(i1)
+        ''')
+        self.log_trace(loop, jitlog.STAGE_OPT, jitlog.KIND_LOOP, 0)
+        self.log.flush()
+        size_one = py.path.local(self.filename).size()
+        for i in range(1, 50):
+            self.log_trace(loop, jitlog.STAGE_OPT, jitlog.KIND_LOOP, i)
+        self.log.finish()
+        log = read_binlog(self.filename)
+        assert len(log.traces) == 50
+        # '', 'loop', 'name', and the 3 arguments
+        assert len(log.strings) == 6
+        size = py.path.local(self.filename).size()
+        assert size - size_one <= 49 * 20
+
+    def test_bridges_addresses_and_counts(self):
+        loop = pure_parse('''
+        [i0]
+        label(i0, descr=targettoken)
+        i1 = int_add(i0, 1)
+        jump(i1, descr=targettoken)
+        ''', namespace={'targettoken': NamedDescr('TargetToken(42)')})
+        bridge = pure_parse('''
+        [i0]
+        i1 = int_sub(i0, 1)
+        finish(i1)
+        ''')
+        self.log_trace(loop, jitlog.STAGE_OPT, jitlog.KIND_LOOP, 0)
+        self.log_trace(bridge, jitlog.STAGE_OPT, jitlog.KIND_BRIDGE, 0x1234)
+        self.log.log_asm_addr(jitlog.KIND_LOOP, 0, 1000, 1100)
+        self.log.log_asm_addr(jitlog.KIND_BRIDGE, 0x1234, 2000, 2050)
+        self.log.log_entry_count('e', 0, 5)
+        self.log.log_entry_count('l', 42, 500)
+        self.log.log_entry_count('b', 0x1234, 77)
+        self.log.finish()
+        log, loops = import_binlog(self.filename)
+        assert log.traces[0].get_addr() == (1000, 1100)
+        assert log.traces[1].get_addr() == (2000, 2050)
+        assert log.traces[1].as_text().splitlines()[0] == (
+            '# bridge out of Guard 0x1234 with 2 ops')
+        assert [(l.descr, l.count) for l in loops] == [
+            ('entry 0', 5), ('TargetToken(42)', 500),
+            ('bridge %d' % 0x1234, 77)]
+
+    def test_truncated(self):
+        loop = pure_parse('''
+        [i0]
+        i1 = int_add(i0, 1)
+        jump(i1)
+        ''')
+        self.log_trace(loop, jitlog.STAGE_NOOPT, jitlog.KIND_LOOP, -1)
+        self.log_trace(loop, jitlog.STAGE_OPT, jitlog.KIND_LOOP, 0)
+        self.log.finish()
+        f = py.path.local(self.filename)
+        f.write(f.read('rb')[:-3], 'wb')
+        log = read_binlog(self.filename)
+        assert log.truncated
+        assert len(log.traces) == 1
+        assert log.traces[0].number == -1
+        assert log.get_traces(jitlog.STAGE_OPT) == []
+
+    def test_not_a_binlog(self):
+        self.log.finish()
+        py.path.local(self.filename).write('[1234] {jit-log-opt-loop\n')
+        py.test.raises(BinlogError, read_binlog, self.filename)
+
+
+class NamedDescr(AbstractDescr):
+    def __init__(self, name):
+        self.name = name
+
+    def repr_of_descr(self):
+        return self.name